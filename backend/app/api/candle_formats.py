@@ -0,0 +1,79 @@
+from typing import Any, Callable, Dict, List
+import numpy as np
+from app.services.websocket_manager import encode
+
+try:
+    import orjson
+except ImportError:  # pinned in requirements.txt; falls back to the stdlib encoder
+    orjson = None
+try:
+    import msgpack
+except ImportError:  # pinned in requirements.txt; format=msgpack is unavailable without it
+    msgpack = None
+try:
+    import pyarrow
+except ImportError:  # optional, not in requirements.txt: format=arrow is unavailable without it
+    pyarrow = None
+
+CANDLE_FIELDS = ("time", "open", "high", "low", "close", "volume")
+Columns = Dict[str, np.ndarray]
+
+
+def dumps(payload: Any) -> bytes:
+    """JSON bytes; orjson writes NumPy arrays directly (NaN as null, like encode())."""
+    if orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY)
+    if isinstance(payload, dict):
+        payload = {k: v.tolist() if isinstance(v, np.ndarray) else v for k, v in payload.items()}
+    return encode(payload).encode()
+
+
+def _rows(cols: Columns) -> bytes:
+    # The Lightweight Charts shape: [{time, open, high, low, close, volume}, ...]
+    rows = [dict(zip(CANDLE_FIELDS, row)) for row in zip(*(cols[name].tolist() for name in CANDLE_FIELDS))]
+    return dumps(rows)
+
+
+def _columnar(cols: Columns) -> bytes:
+    return dumps({name: cols[name] for name in CANDLE_FIELDS})
+
+
+def _msgpack(cols: Columns) -> bytes:
+    return msgpack.packb({name: cols[name].tolist() for name in CANDLE_FIELDS})
+
+
+def _arrow(cols: Columns) -> bytes:
+    batch = pyarrow.record_batch(
+        [pyarrow.array(cols["time"], type=pyarrow.int64())]
+        + [pyarrow.array(cols[name], type=pyarrow.float64()) for name in CANDLE_FIELDS[1:]],
+        names=list(CANDLE_FIELDS),
+    )
+    sink = pyarrow.BufferOutputStream()
+    with pyarrow.ipc.new_stream(sink, batch.schema) as writer:
+        writer.write_batch(batch)
+    return sink.getvalue().to_pybytes()
+
+
+# format -> (encoder, media type, whether its library is installed)
+CANDLE_FORMATS: Dict[str, tuple] = {
+    "rows": (_rows, "application/json", True),
+    "columnar": (_columnar, "application/json", True),
+    "msgpack": (_msgpack, "application/msgpack", msgpack is not None),
+    "arrow": (_arrow, "application/vnd.apache.arrow.stream", pyarrow is not None),
+}
+
+
+def available_formats() -> List[str]:
+    return [name for name, (_, _, available) in CANDLE_FORMATS.items() if available]
+
+
+def candle_encoder(fmt: str) -> Callable[[Columns], bytes]:
+    return CANDLE_FORMATS[fmt][0]
+
+
+def candle_media_type(fmt: str) -> str:
+    return CANDLE_FORMATS[fmt][1]
+
+
+def empty_columns() -> Columns:
+    return {"time": np.empty(0, dtype=np.int64), **{name: np.empty(0) for name in CANDLE_FIELDS[1:]}}
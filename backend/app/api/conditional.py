@@ -0,0 +1,109 @@
+import hashlib
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+from fastapi import Response
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.schemas.candle_series import CandleSeries
+from app.services.websocket_manager import encode
+
+_conditional = metrics.counter(
+    "http_conditional_total", "Conditional GETs by outcome (not_modified, cached body, encoded body)", ("endpoint", "result"),
+)
+
+
+def bar_version(series: CandleSeries) -> Tuple:
+    """
+    Identity of a candle window: its span plus the forming bar's values and
+    the series' revision counter, so a revised forming bar changes it too
+    (fetched series restart their counter; the values don't).
+    """
+    if not series:
+        return (0,)
+    return (
+        len(series), int(series.timestamp[0]), int(series.timestamp[-1]), series.version,
+        float(series.open[-1]), float(series.high[-1]), float(series.low[-1]),
+        float(series.close[-1]), float(series.volume[-1]),
+    )
+
+
+def make_etag(*parts: Any) -> str:
+    """
+    Weak ETag over whatever determines a response body. Weak because
+    GZipMiddleware sends the same body gzip-encoded or not under one
+    validator, which a strong ETag would have to tell apart.
+    """
+    return 'W/"' + hashlib.blake2b(repr(parts).encode(), digest_size=12).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match uses the weak comparison: W/"x" matches "x"."""
+    if not if_none_match:
+        return False
+    opaque = etag.removeprefix("W/")
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == opaque:
+            return True
+    return False
+
+
+class BodyCache:
+    """LRU of encoded response bodies by ETag, so hot payloads are serialized once per version."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._bodies: "OrderedDict[str, bytes]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, etag: str) -> Optional[bytes]:
+        body = self._bodies.get(etag)
+        if body is None:
+            self.misses += 1
+            return None
+        self._bodies.move_to_end(etag)
+        self.hits += 1
+        return body
+
+    def put(self, etag: str, body: bytes):
+        if self.max_entries <= 0:
+            return
+        self._bodies[etag] = body
+        self._bodies.move_to_end(etag)
+        while len(self._bodies) > self.max_entries:
+            self._bodies.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._bodies), "hits": self.hits, "misses": self.misses}
+
+
+body_cache = BodyCache(settings.HTTP_BODY_CACHE_SIZE)
+
+
+def conditional_response(
+    endpoint: str,
+    etag: str,
+    max_age: int,
+    if_none_match: Optional[str],
+    build: Callable[[], Any],
+    media_type: str = "application/json",
+    encoder: Callable[[Any], bytes] = lambda payload: encode(payload).encode(),
+) -> Response:
+    """
+    304 when the client already holds `etag`, else the cached body for it,
+    else build() encoded and cached. build() only runs on the last path, so
+    endpoints put their aggregation/formatting work inside it.
+    """
+    headers = {"ETag": etag, "Cache-Control": f"max-age={max_age}"}
+    if etag_matches(if_none_match, etag):
+        _conditional.inc(endpoint=endpoint, result="not_modified")
+        return Response(status_code=304, headers=headers)
+    body = body_cache.get(etag)
+    if body is None:
+        body = encoder(build())
+        body_cache.put(etag, body)
+        _conditional.inc(endpoint=endpoint, result="encoded")
+    else:
+        _conditional.inc(endpoint=endpoint, result="cached")
+    return Response(content=body, media_type=media_type, headers=headers)
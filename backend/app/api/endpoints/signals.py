@@ -1,46 +1,65 @@
-from fastapi import APIRouter, HTTPException
-from typing import Dict, Any, List
+import asyncio
+from datetime import datetime
+from fastapi import APIRouter, Header, HTTPException, Query
+from typing import Dict, Any, List, Optional
 from app.services.asset_context import asset_context
+from app.services.symbol_registry import Instrument
 from app.services.decision_engine import DecisionEngine
 from app.services.feature_engine import FeatureEngine
 from app.services.market_hours import get_market_status_ist
 from app.services.connection_manager import manager as conn_manager
-from app.services.market_levels import MarketLevels
+from app.services.market_levels import PIVOT_METHODS
+from app.services.levels_service import PIVOT_PERIODS, levels_service
 from app.services.expert_engine import ExpertEngine
 from app.services.candle_aggregator import CandleAggregator
+from app.services.candle_stream import base_timeframe_for
 from app.services.market_predictor import MarketPredictor
+from app.services.signal_scheduler import signal_scheduler, latest_payload
+from app.services.backtest import Backtester, BacktestConfig
+from app.services.signal_log_writer import signal_log_writer
+from app.services.option_chain_recorder import option_chain_recorder
+from app.api.conditional import bar_version, conditional_response, make_etag
+from app.api.candle_formats import CANDLE_FORMATS, available_formats, candle_encoder, candle_media_type, empty_columns
 
 router = APIRouter()
 
+def _resolve(asset: Optional[str]) -> Instrument:
+    """Instrument for the request's asset (the current asset if omitted); 400 if unknown."""
+    try:
+        return asset_context.resolve(asset)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+async def _admit(asset: Optional[str]) -> Instrument:
+    """Like _resolve, for endpoints that go upstream: the asset joins the watched universe (probe, cap, eviction)."""
+    try:
+        return await signal_scheduler.admit(asset or asset_context.current_asset)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def _snapshot_version(snapshot: Dict[str, Any]) -> tuple:
+    """What a snapshot's signal depends on: its candle window, price, session and option chain."""
+    options = snapshot.get("options") or {}
+    return (
+        snapshot["asset"], snapshot["interval"], bar_version(snapshot["candles"]),
+        snapshot["price"], snapshot["market_status"].get("status"), options.get("timestamp"),
+    )
+
 @router.get("/latest")
-async def get_latest_signal() -> Dict[str, Any]:
+async def get_latest_signal(asset: Optional[str] = None, if_none_match: Optional[str] = Header(None)) -> Dict[str, Any]:
     """
-    Get the latest computed signal for the CURRENT asset.
+    Get the latest computed signal for an asset (the CURRENT asset if none is given).
+    Served from the background scheduler's snapshot; computed inline only if
+    the snapshot is missing or stale. Conditional: 304 while the snapshot's
+    data is unchanged.
     """
-    # 1. Get current asset context
-    asset = asset_context.current_asset
-    connector = asset_context.get_connector()
-    symbol = asset_context.get_symbol()
-    
-    # 2. Market Status (NIFTY only)
-    market_status = {"is_open": True, "status": "OPEN"}
-    if asset == "NIFTY":
-        market_status = get_market_status_ist()
+    instrument = _resolve(asset)
+    asset = instrument.key
 
-    # 3. Fetch Data (Real-time for free edition)
     try:
-        # Binance needs 500 candles for good EMA200
-        limit = 500 if asset == "BITCOIN" else 200
-        interval = "1m" if asset == "BITCOIN" else "5m"
-        
-        candles = await connector.get_historical_candles(symbol, "15m" if asset == "BITCOIN" else "5m", 100)
-        print(f"Signals Endpoint: Fetched {len(candles)} candles for {asset}")
-        latest_price = await connector.get_latest_price(symbol)
-        
-        if latest_price == 0 and candles:
-             latest_price = candles[-1].close
-             
+        snapshot = await signal_scheduler.get_or_refresh(asset)
     except Exception as e:
+        market_status = get_market_status_ist() if instrument.market == "NSE" else {"is_open": True, "status": "OPEN"}
         return {
             "status": "ERROR", 
             "message": str(e), 
@@ -48,25 +67,108 @@ async def get_latest_signal() -> Dict[str, Any]:
             "market_status": market_status
         }
 
-    # 4. Compute Features
-    features = FeatureEngine.calculate_technical_indicators(candles, asset_type=asset)
-    
-    # 5. Compute Decision (Pass market status)
-    decision = DecisionEngine.analyze(features, asset_type=asset, is_market_open=market_status["is_open"])
+    etag = make_etag("latest", *_snapshot_version(snapshot))
+    return conditional_response("latest", etag, instrument.update_interval, if_none_match, lambda: latest_payload(snapshot))
+
+@router.get("/history")
+async def get_signal_history(
+    asset: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    limit: int = Query(500, ge=1, le=10000),
+) -> Dict[str, Any]:
+    """
+    Logged signals for an asset between start and end (ISO datetimes, UTC if
+    naive), newest first.
+    """
+    instrument = _resolve(asset)
+    try:
+        history = await signal_log_writer.history(instrument.key, start, end, limit)
+    except Exception as e:
+        print(f"Error reading signal history: {e}")
+        history = []
+    return {"asset": instrument.key, "count": len(history), "signals": history}
 
+@router.get("/options")
+async def get_option_chain_analytics(asset: Optional[str] = None, contracts: bool = False) -> Dict[str, Any]:
+    """
+    Option chain aggregates (PCR, max pain, OI walls, ATM IV, skew) from the
+    latest snapshot; contracts=true adds per-contract IV and greeks as columns.
+    """
+    instrument = _resolve(asset)
+    try:
+        snapshot = await signal_scheduler.get_or_refresh(instrument.key)
+    except Exception as e:
+        return {"status": "ERROR", "message": str(e), "asset": instrument.key}
+    metrics = snapshot.get("options") or {}
+    result = {"asset": instrument.key, "available": bool(metrics), "metrics": metrics}
+    if contracts:
+        columns = snapshot.get("_option_columns") or {}
+        result["contracts"] = {
+            name: [None if isinstance(v, float) and v != v else v for v in values.tolist()]
+            for name, values in columns.items()
+        }
+    return result
+
+@router.get("/options/history")
+async def get_option_contract_history(
+    strike: float,
+    option_type: str = Query("CE", pattern="^(CE|PE|ce|pe)$"),
+    field: str = "oi",
+    asset: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    expiry: Optional[datetime] = None,
+) -> Dict[str, Any]:
+    """
+    One contract's stored values over time, e.g. OI of 24500 CE today:
+    ?strike=24500&option_type=CE&field=oi&start=<today>. Expiry defaults to
+    the series tracked at `end`.
+    """
+    instrument = _resolve(asset)
+    try:
+        history = await option_chain_recorder.contract_history(
+            instrument.key, strike, option_type, field, start, end, expiry,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        print(f"Error reading option chain history: {e}")
+        history = []
     return {
-        "asset": asset,
-        "price": latest_price,
-        "signal": decision,
-        "market_status": market_status,
-        "timestamp": candles[-1].timestamp if candles else None,
-        "provider": "Binance Public API" if asset == "BITCOIN" else "Yahoo Finance"
+        "asset": instrument.key,
+        "strike": strike,
+        "option_type": option_type.upper(),
+        "field": field,
+        "count": len(history),
+        "values": history,
     }
 
+@router.get("/options/chain")
+async def get_option_chain_at(
+    asset: Optional[str] = None,
+    at: Optional[datetime] = None,
+    expiry: Optional[datetime] = None,
+) -> Dict[str, Any]:
+    """Stored option chain as of `at` (the latest if omitted)."""
+    instrument = _resolve(asset)
+    try:
+        chain = await option_chain_recorder.chain_at(instrument.key, at, expiry)
+    except Exception as e:
+        print(f"Error reading option chain: {e}")
+        chain = None
+    if chain is None:
+        raise HTTPException(status_code=404, detail=f"No stored option chain for {instrument.key}")
+    body = chain.model_dump(mode="json")
+    for contract in body["contracts"]:
+        if contract["iv"] != contract["iv"]:  # NaN: no solvable IV for this quote
+            contract["iv"] = None
+    return {"asset": instrument.key, "chain": body}
+
 @router.post("/toggle")
 async def toggle_asset(asset: str) -> Dict[str, str]:
     """
-    Switch the active asset (NIFTY / BITCOIN).
+    Switch the default asset, used by requests that don't name one.
     """
     try:
         asset_context.set_asset(asset.upper())
@@ -78,135 +180,132 @@ async def toggle_asset(asset: str) -> Dict[str, str]:
 async def get_context() -> Dict[str, Any]:
     return {
         "current_asset": asset_context.current_asset,
-        "supported_assets": ["NIFTY", "BITCOIN"]
+        "supported_assets": asset_context.supported_assets,
+        "watchlist": asset_context.assets
     }
 
 @router.get("/levels")
-async def get_market_levels(asset: str = "NIFTY") -> Dict[str, Any]:
+async def get_market_levels(
+    asset: str = "NIFTY",
+    method: str = "classic",
+    period: str = "daily",
+    if_none_match: Optional[str] = Header(None),
+) -> Dict[str, Any]:
     """
-    Returns Support/Resistance levels based on Daily Pivots.
+    Returns Support/Resistance levels from the previous period's pivots.
+    method: classic, camarilla, woodie or fibonacci; period: daily, weekly or monthly.
+    Levels change once per session, so the ETag is the session's and a
+    revalidation gets its 304 without touching the levels.
     """
-    # Quick connector logical lookup (in real app, use factory)
-    from app.services.connectors.binance_connector import BinanceConnector
-    from app.services.connectors.yfinance_connector import YFinanceConnector
-    
-    if asset == "NIFTY":
-        symbol = "^NSEI"
-        connector = YFinanceConnector()
-    else:
-        symbol = "BTCUSDT"
-        connector = BinanceConnector()
-        
-    return await MarketLevels.get_daily_pivots(connector, symbol)
+    instrument = await _admit(asset)
+    if method not in PIVOT_METHODS:
+        raise HTTPException(status_code=400, detail=f"Unknown method {method}; one of {', '.join(PIVOT_METHODS)}")
+    if period not in PIVOT_PERIODS:
+        raise HTTPException(status_code=400, detail=f"Unknown period {period}; one of {', '.join(PIVOT_PERIODS)}")
+    try:
+        version = levels_service.version(instrument.symbol)
+        if version is None:
+            # First request of the session: compute (and memoize) the levels
+            connector = asset_context.get_connector_for(instrument.key)
+            levels = await levels_service.get_levels(connector, instrument.symbol, instrument.market, method, period)
+            version = levels_service.version(instrument.symbol)
+            if version is None:
+                # Nothing memoized (no completed period yet): validate by content
+                etag = make_etag("levels", instrument.key, levels)
+                return conditional_response("levels", etag, instrument.update_interval, if_none_match, lambda: levels)
+        etag = make_etag("levels", instrument.key, method, period, version)
+        return conditional_response(
+            "levels", etag, instrument.update_interval, if_none_match,
+            lambda: levels_service.memoized(instrument.symbol, method, period),
+        )
+    except Exception as e:
+        print(f"Error serving levels for {asset}: {e}")
+        return {}
 
 @router.get("/expert")
-async def get_expert_commentary(asset: str = "NIFTY") -> Dict[str, Any]:
+async def get_expert_commentary(asset: str = "NIFTY", if_none_match: Optional[str] = Header(None)) -> Dict[str, Any]:
     """
     Returns deterministic expert commentary.
     """
-    from app.services.connectors.binance_connector import BinanceConnector
-    from app.services.connectors.yfinance_connector import YFinanceConnector
-    
-    # 1. Setup Context
-    if asset == "NIFTY":
-        symbol = "^NSEI"
-        connector = YFinanceConnector()
-        market_status = get_market_status_ist()
-    else:
-        symbol = "BTCUSDT"
-        connector = BinanceConnector()
-        market_status = {"is_open": True, "status": "OPEN"}
+    instrument = _resolve(asset)
 
     try:
-        # 2. Fetch Data
-        candles = await connector.get_historical_candles(symbol, "15m" if asset == "BITCOIN" else "5m", 100)
-        latest_price = await connector.get_latest_price(symbol)
+        # 1. Precomputed candles/features/decision/levels
+        snapshot = await signal_scheduler.get_or_refresh(instrument.key)
         
-        if not candles:
+        if not snapshot["candles"]:
              return {"error": "Insufficient data for expert analysis"}
 
-        # 3. Compute Features & Decision
-        features = FeatureEngine.calculate_technical_indicators(candles, asset_type=asset)
-        decision = DecisionEngine.analyze(features, asset_type=asset, is_market_open=market_status["is_open"])
-        
-        # 4. Get Levels
-        levels = await MarketLevels.get_daily_pivots(connector, symbol)
-        
-        # 5. Generate Commentary
-        commentary = ExpertEngine.generate_commentary(asset, latest_price, decision, levels)
-        
-        return commentary
+        # 2. Generate Commentary (skipped when the client's copy is current)
+        etag = make_etag("expert", *_snapshot_version(snapshot), snapshot["levels"])
+        return conditional_response(
+            "expert", etag, instrument.update_interval, if_none_match,
+            lambda: ExpertEngine.generate_commentary(instrument.asset_type, snapshot["price"], snapshot["decision"], snapshot["levels"]),
+        )
     except Exception as e:
         print(f"Error generating expert commentary: {e}")
         return {"error": str(e)}
+
 @router.get("/candles")
-async def get_market_candles(asset: str = "NIFTY", tf: str = "5m") -> List[Dict[str, Any]]:
+async def get_market_candles(
+    asset: str = "NIFTY",
+    tf: str = "5m",
+    fmt: str = Query("rows", alias="format"),
+    if_none_match: Optional[str] = Header(None),
+) -> List[Dict[str, Any]]:
     """
     Returns aggregated candlesticks for charts.
     Supported tf: 1m, 2m, 3m, 5m, 10m, 15m, 30m, 1h, 2h, 1d
+    format: rows (default, a list of bars for Lightweight Charts), columnar
+    (JSON object of parallel time/open/high/low/close/volume arrays),
+    msgpack (the columnar object) or arrow (IPC stream); arrow needs the
+    optional pyarrow package installed (406 otherwise).
+    Live charts should use /ws/candles, which sends only changed bars.
+    The ETag follows the base series' last bar, so polls that find it
+    unchanged get a 304 without aggregating.
     """
-    from app.services.connectors.binance_connector import BinanceConnector
-    from app.services.connectors.yfinance_connector import YFinanceConnector
-    
-    if asset == "NIFTY":
-        symbol = "^NSEI"
-        connector = YFinanceConnector()
-        # Yahoo supports: 1m, 2m, 5m, 15m, 30m, 60m, 90m, 1h, 1d, 5d, 1wk, 1mo, 3mo
-        # We need to map requested TF to a base TF we can fetch, then aggregate if needed.
-        # Simple strategy: Fetch 1m if target < 5m, else 5m if target < 15m, else 15m...
-        # For simplicity in this iteration: Fetch 1m or 5m base.
-        # Determine base timeframe and limit based on requested tf
-        if tf in ['1m', '2m', '3m', '5m']:
-            base_tf = "1m"
-            limit = 500 # Aggr 5m from 1m needs 5x candles
-        elif tf in ['10m', '15m', '30m']:
-            base_tf = "5m"
-            limit = 300 # Aggr 30m from 5m needs 6x candles
-        elif tf in ['1h', '2h']:
-            base_tf = "60m" # Yahoo uses 60m
-            limit = 200
-        else: # 1d
-            base_tf = "1d"
-            limit = 100
-    else:
-        symbol = "BTCUSDT"
-        connector = BinanceConnector()
-        # For Bitcoin, we can just fetch close to what we need
-        # But our aggregator works best with granular data
-        if tf in ['1d']:
-            base_tf = "1d"
-            limit = 100
-        elif tf in ['1h', '2h']:
-            base_tf = "1h"
-            limit = 200
-        else:
-            base_tf = "1m"
-            limit = 1000
+    if fmt not in CANDLE_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unknown format {fmt}; one of {', '.join(CANDLE_FORMATS)}")
+    if fmt not in available_formats():
+        raise HTTPException(status_code=406, detail=f"format={fmt} is not available on this server")
+    instrument = await _admit(asset)
+    symbol = instrument.symbol
+    connector = asset_context.get_connector_for(instrument.key)
+    base_tf, limit = base_timeframe_for(instrument.provider, tf)
 
     try:
         # Fetch base candles
         # Note: YF 1m data is limited to 7 days.
-        candles = await connector.get_historical_candles(symbol, base_tf, limit)
+        candles = await connector.get_candle_series(symbol, base_tf, limit)
         
         # Aggregate
-        aggregated = CandleAggregator.aggregate_candles(candles, tf)
-        
-        return aggregated
+        etag = make_etag("candles", symbol, tf, base_tf, fmt, bar_version(candles))
+        return conditional_response(
+            "candles", etag, instrument.update_interval, if_none_match,
+            lambda: _aggregate_columns(candles, tf),
+            media_type=candle_media_type(fmt), encoder=candle_encoder(fmt),
+        )
     except Exception as e:
         print(f"Error serving candles: {e}")
         return []
 
+def _aggregate_columns(candles, tf: str) -> Dict[str, Any]:
+    if not candles:
+        return empty_columns()
+    columns = CandleAggregator.aggregate_columns(candles, tf)
+    if columns is None:
+        print(f"Aggregation failed: unsupported timeframe {tf}")
+        return empty_columns()
+    return columns
+
 @router.get("/predict")
 async def get_market_open_prediction(asset: str = "NIFTY") -> Dict[str, Any]:
     """
-    Predicts next market open for NIFTY when market is closed.
-    Returns empty dict if market is open or asset is not NIFTY.
+    Predicts next market open for NSE indices (NIFTY, BANKNIFTY) when market is closed.
+    Returns empty dict if market is open or asset is not an NSE instrument.
     """
-    from app.services.connectors.yfinance_connector import YFinanceConnector
-    from app.services.market_predictor import MarketPredictor
-    
-    # Only for NIFTY
-    if asset != "NIFTY":
+    instrument = await _admit(asset)
+    if instrument.market != "NSE":
         return {}
     
     # Check if market is closed
@@ -215,26 +314,24 @@ async def get_market_open_prediction(asset: str = "NIFTY") -> Dict[str, Any]:
         return {}
     
     try:
-        symbol = "^NSEI"
-        connector = YFinanceConnector()
+        symbol = instrument.symbol
+        connector = asset_context.get_connector_for(instrument.key)
         
         # Fetch last session data
-        candles = await connector.get_historical_candles(symbol, "1d", 5)
+        candles = await connector.get_candle_series(symbol, "1d", 5)
         if not candles or len(candles) < 1:
             return {"error": "Insufficient historical data"}
         
-        last_candle = candles[-1]
-        
         # Get current decision and levels
-        features = FeatureEngine.calculate_technical_indicators(candles, asset_type="NIFTY")
-        decision = DecisionEngine.analyze(features, asset_type="NIFTY", is_market_open=False)
-        levels = await MarketLevels.get_daily_pivots(connector, symbol)
+        features = FeatureEngine.calculate_technical_indicators(candles, asset_type=instrument.asset_type)
+        decision = DecisionEngine.analyze(features, asset_type=instrument.asset_type, is_market_open=False)
+        levels = await levels_service.get_levels(connector, symbol, instrument.market)
         
         # Generate prediction
         prediction = MarketPredictor.predict_open(
-            last_close=last_candle.close,
-            last_high=last_candle.high,
-            last_low=last_candle.low,
+            last_close=float(candles.close[-1]),
+            last_high=float(candles.high[-1]),
+            last_low=float(candles.low[-1]),
             levels=levels,
             decision=decision
         )
@@ -243,3 +340,31 @@ async def get_market_open_prediction(asset: str = "NIFTY") -> Dict[str, Any]:
     except Exception as e:
         print(f"Error predicting market open: {e}")
         return {"error": str(e)}
+
+@router.get("/backtest")
+async def run_backtest(
+    asset: str = "NIFTY",
+    interval: Optional[str] = None,
+    bars: int = 1000,
+    cost_bps: float = 5.0,
+    allow_short: bool = True
+) -> Dict[str, Any]:
+    """
+    Replays the DecisionEngine rules over history (vectorized) and reports
+    hit-rate, PnL, drawdown and exposure. History beyond what the provider
+    serves per request comes from the candle store.
+    """
+    instrument = await _admit(asset)
+    interval = interval or instrument.signal_interval
+    bars = max(2, min(bars, 200_000))
+
+    try:
+        connector = asset_context.get_connector_for(instrument.key)
+        candles = await connector.get_candle_series(instrument.symbol, interval, bars)
+        config = BacktestConfig(cost_bps=cost_bps, allow_short=allow_short)
+        # Vectorized, but large histories still take tens of ms: keep it off the loop.
+        result = await asyncio.to_thread(Backtester.run, candles, instrument.asset_type, config)
+        return {"asset": instrument.key, "interval": interval, **result}
+    except Exception as e:
+        print(f"Error running backtest for {asset}: {e}")
+        return {"error": str(e)}
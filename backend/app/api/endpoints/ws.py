@@ -0,0 +1,139 @@
+import asyncio
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from typing import Dict, Any, List, Optional
+from app.services.asset_context import asset_context
+from app.services.candle_stream import candle_streams
+from app.services.signal_scheduler import signal_scheduler, latest_payload
+from app.services.websocket_manager import manager as ws_manager, encode
+
+router = APIRouter()
+
+# Last message pushed per asset; an unchanged signal is not re-sent every cycle.
+_last_sent: Dict[str, str] = {}
+
+
+async def publish_snapshots(snapshots: List[Dict[str, Any]]):
+    """SignalScheduler listener: serialize each fresh snapshot once and fan it out."""
+    for snapshot in snapshots:
+        asset = snapshot["asset"]
+        message = encode({"type": "signal", **latest_payload(snapshot)})
+        if _last_sent.get(asset) == message:
+            continue
+        _last_sent[asset] = message
+        await ws_manager.broadcast(message, topic=asset)
+
+
+signal_scheduler.add_listener(publish_snapshots)
+
+
+def _parse_assets(raw: Any) -> List[str]:
+    if isinstance(raw, str):
+        raw = raw.split(",")
+    return [str(a).strip() for a in raw or [] if str(a).strip()]
+
+
+async def _subscribe(websocket: WebSocket, assets: List[str]):
+    """Queue the current snapshot of each asset, then subscribe to its updates."""
+    keys = []
+    for asset in assets:
+        try:
+            keys.append(asset_context.resolve(asset).key)
+        except ValueError as e:
+            ws_manager.send(websocket, encode({"type": "error", "asset": asset, "message": str(e)}))
+
+    snapshots = await asyncio.gather(*(signal_scheduler.get_or_refresh(k) for k in keys), return_exceptions=True)
+    for key, snapshot in zip(keys, snapshots):
+        if isinstance(snapshot, BaseException):
+            ws_manager.send(websocket, encode({"type": "error", "asset": key, "message": str(snapshot)}))
+            continue
+        # A cycle may have finished while the others were loading; send the newest.
+        snapshot = signal_scheduler.get_snapshot(key, max_age=float("inf")) or snapshot
+        ws_manager.send(websocket, encode({"type": "signal", **latest_payload(snapshot)}))
+    # Subscribing only now keeps the refresh above from being delivered twice.
+    ws_manager.subscribe(websocket, keys)
+
+
+@router.websocket("/signals")
+async def signals_stream(websocket: WebSocket, assets: Optional[str] = None):
+    """
+    Push channel for signals, replacing /latest polling. ?assets=NIFTY,BITCOIN
+    picks the subscriptions (the current asset if omitted); the client gets
+    each asset's current signal on subscribe and then a message whenever it
+    changes. Clients may send {"action": "subscribe"|"unsubscribe", "assets": [...]}
+    or {"action": "ping"}.
+    """
+    await ws_manager.connect(websocket)
+    try:
+        await _subscribe(websocket, _parse_assets(assets) or [asset_context.current_asset])
+        while True:
+            try:
+                message = await websocket.receive_json()
+            except (ValueError, KeyError):
+                ws_manager.send(websocket, encode({"type": "error", "message": "Expected a JSON object"}))
+                continue
+            action = message.get("action") if isinstance(message, dict) else None
+            if action == "subscribe":
+                await _subscribe(websocket, _parse_assets(message.get("assets")))
+            elif action == "unsubscribe":
+                keys = []
+                for asset in _parse_assets(message.get("assets")):
+                    try:
+                        keys.append(asset_context.resolve(asset).key)
+                    except ValueError:
+                        pass
+                ws_manager.unsubscribe(websocket, keys)
+            elif action == "ping":
+                ws_manager.send(websocket, encode({"type": "pong"}))
+            else:
+                ws_manager.send(websocket, encode({"type": "error", "message": f"Unknown action: {action}"}))
+    except WebSocketDisconnect:
+        pass
+    finally:
+        ws_manager.disconnect(websocket)
+
+
+@router.websocket("/candles")
+async def candles_stream(websocket: WebSocket, asset: Optional[str] = None, tf: str = "5m"):
+    """
+    Live chart bars: a snapshot per (asset, tf) subscription, then deltas
+    carrying only the bars that changed (the forming bar and newly opened
+    ones). seq increases by one per delta of a subscription; on a gap, send
+    {"action": "resync", "asset": ..., "tf": ...} for a fresh snapshot.
+    Other actions: subscribe, unsubscribe (same fields) and ping.
+    """
+    await ws_manager.connect(websocket)
+    try:
+        if asset:
+            await _candles_action(websocket, {"action": "subscribe", "asset": asset, "tf": tf})
+        while True:
+            try:
+                message = await websocket.receive_json()
+            except (ValueError, KeyError):
+                ws_manager.send(websocket, encode({"type": "error", "message": "Expected a JSON object"}))
+                continue
+            await _candles_action(websocket, message if isinstance(message, dict) else {})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        ws_manager.disconnect(websocket)
+        await candle_streams.drop(websocket)
+
+
+async def _candles_action(websocket: WebSocket, message: Dict[str, Any]):
+    action = message.get("action")
+    if action == "ping":
+        ws_manager.send(websocket, encode({"type": "pong"}))
+        return
+    handler = {
+        "subscribe": candle_streams.subscribe,
+        "unsubscribe": candle_streams.unsubscribe,
+        "resync": candle_streams.resync,
+    }.get(action)
+    asset, tf = message.get("asset") or asset_context.current_asset, message.get("tf") or "5m"
+    if handler is None:
+        ws_manager.send(websocket, encode({"type": "error", "message": f"Unknown action: {action}"}))
+        return
+    try:
+        await handler(websocket, asset, tf)
+    except Exception as e:
+        ws_manager.send(websocket, encode({"type": "error", "asset": asset, "tf": tf, "message": str(e)}))
@@ -15,9 +15,106 @@ class Settings(BaseSettings):
     POSTGRES_DB: str = "nifty_options_db"
     DATABASE_URL: Optional[str] = None
 
-    # Redis
+    # Candle store (history served from the DB, upstream asked only for missing bars).
+    # Defaults to a local SQLite file; point it at DATABASE_URL for Postgres.
+    CANDLE_STORE_ENABLED: bool = True
+    CANDLE_STORE_URL: Optional[str] = "sqlite:///./candles.db"
+
+    # Audit trail of computed signals (defaults to the candle store's database)
+    SIGNAL_LOG_ENABLED: bool = True
+    SIGNAL_LOG_URL: Optional[str] = None
+    SIGNAL_LOG_QUEUE_SIZE: int = 10000  # rows beyond this are dropped, not waited for
+    SIGNAL_LOG_BATCH_SIZE: int = 500
+    SIGNAL_LOG_FLUSH_INTERVAL: float = 2.0
+
+    # Option chain history, columnar + delta-compressed (defaults to the candle store's database)
+    OPTION_CHAIN_STORE_ENABLED: bool = True
+    OPTION_CHAIN_STORE_URL: Optional[str] = None
+    OPTION_CHAIN_KEYFRAME_INTERVAL: int = 60  # snapshots per keyframe (10 min at 10s polling)
+
+    # Decision parameter optimizer
+    OPTIMIZER_WORKERS: int = 0  # 0 = one per CPU
+    OPTIMIZER_CACHE_DIR: str = ".optimizer_cache"
+
+    # Redis: shared snapshots + leader election across uvicorn workers
+    REDIS_ENABLED: bool = False  # in-memory state when off or unreachable
     REDIS_HOST: str = "localhost"
     REDIS_PORT: int = 6379
+    REDIS_DB: int = 0
+    REDIS_PREFIX: str = "signal:"
+    REDIS_TIMEOUT: float = 1.0
+
+    # Instrument universe: assets the scheduler keeps warm (clients may ask for
+    # any other registered asset or Binance pair; those join the universe).
+    WATCHLIST: List[str] = ["NIFTY", "BANKNIFTY", "BITCOIN", "ETH"]
+    MAX_SYMBOLS: int = 64
+    # Pairs clients added are dropped when nobody asked for them this long,
+    # or after this many refreshes in a row failed or came back empty
+    SYMBOL_IDLE_SECONDS: float = 3600.0
+    SYMBOL_MAX_FAILURES: int = 5
+
+    # Background signal precomputation
+    SIGNAL_SCHEDULER_ENABLED: bool = True
+    SIGNAL_SCHEDULER_JITTER: float = 0.1  # fraction of each asset's update interval
+
+    # Yahoo Finance (blocking client runs on a bounded thread pool)
+    YF_MAX_WORKERS: int = 4
+    YF_TIMEOUT: float = 10.0
+    YF_BATCH_WINDOW: float = 0.05  # seconds to collect history requests into one yf.download
+
+    # Pooled HTTP clients shared by every connector of a provider
+    HTTP_TIMEOUT: float = 10.0
+    HTTP_MAX_CONNECTIONS: int = 20
+    HTTP_MAX_KEEPALIVE: int = 10
+    HTTP_KEEPALIVE_EXPIRY: float = 30.0  # seconds an idle connection is kept open
+    HTTP2_ENABLED: bool = True  # needs the h2 package; falls back to HTTP/1.1
+
+    # Read endpoints answer If-None-Match with 304 and keep encoded bodies by ETag
+    HTTP_BODY_CACHE_SIZE: int = 256  # bodies kept (LRU); 0 disables the body cache
+    # Responses at least this large are gzipped for clients that accept it
+    GZIP_MINIMUM_SIZE: int = 1024  # bytes
+    GZIP_LEVEL: int = 5  # 1-9; higher is smaller but slower per response
+
+    # Pivot levels are computed once per session from this much daily history
+    LEVELS_HISTORY_DAYS: int = 400  # daily bars; weekly/monthly pivots need at least a month
+
+    # Binance streaming (kline/aggTrade WebSocket instead of REST polling)
+    BINANCE_STREAMING_ENABLED: bool = True
+    BINANCE_WS_URL: str = "wss://stream.binance.com:9443"
+
+    # Market data source: live | record (live, logging every upstream response) | replay (offline)
+    MARKET_DATA_MODE: str = "live"
+    MARKET_DATA_RECORDING_DIR: str = "./data/recordings"  # <dir>/<provider>.jsonl.gz
+    REPLAY_SPEED: float = 1.0  # recording clock vs real time; 0 = as fast as possible
+    REPLAY_LATENCY: str = "none"  # none | recorded | fixed:<ms> | uniform:<min>:<max> | lognormal:<median_ms>:<sigma>
+    REPLAY_ERROR_RATE: float = 0.0  # share of calls that fail
+    REPLAY_ERROR_MODE: str = "raise"  # raise | empty
+    REPLAY_SEED: int = 0
+
+    # Synthetic feed (provider "synthetic") for soak tests and sizing: KEY or KEY:NSE|CRYPTO
+    # entries become assets. NSE ones trade only in exchange hours, which lines up with
+    # the scheduler's market status at SYNTHETIC_SPEED=1.
+    SYNTHETIC_INSTRUMENTS: List[str] = []
+    SYNTHETIC_TICK_RATE: float = 100.0  # ticks per second per instrument while its market is open
+    SYNTHETIC_SPEED: float = 1.0  # simulated seconds per real second
+    SYNTHETIC_VOLATILITY: float = 0.2  # annualized
+    SYNTHETIC_JUMP_INTENSITY: float = 1.0  # expected jumps per trading day
+    SYNTHETIC_HISTORY_BARS: int = 5000  # 1m bars kept per instrument
+    SYNTHETIC_SEED: int = 0
+
+    # Prometheus-format /metrics (in-process histograms and counters)
+    METRICS_ENABLED: bool = True
+    EVENT_LOOP_MONITOR_INTERVAL: float = 0.5  # seconds between event loop lag samples
+
+    # Option chains ("file" replays OptionChain JSON from OPTION_CHAIN_DIR; unset = no chains)
+    OPTION_CHAIN_PROVIDER: Optional[str] = None
+    OPTION_CHAIN_DIR: str = "./data/option_chains"
+    RISK_FREE_RATE: float = 0.065  # annualized, for Black-Scholes IV/greeks
+
+    # Push channel to browsers (/ws/signals)
+    WS_QUEUE_SIZE: int = 32  # pending messages per client before the slow-client policy applies
+    WS_SLOW_CLIENT_POLICY: str = "drop_oldest"  # drop_oldest | disconnect
+    WS_SEND_TIMEOUT: float = 5.0
 
     # API Keys (To be filled by user)
     KITE_API_KEY: Optional[str] = None
@@ -0,0 +1,23 @@
+import re
+from typing import Optional
+
+_UNIT_SECONDS = {
+    "s": 1,
+    "m": 60, "T": 60,
+    "h": 3600, "H": 3600,
+    "d": 86400, "D": 86400,
+    "w": 604800, "wk": 604800,
+}
+
+_INTERVAL_RE = re.compile(r"^(\d+)(s|m|T|h|H|d|D|wk|w)$")
+
+
+def interval_to_seconds(interval: str) -> Optional[int]:
+    """
+    Converts an interval string ('1m', '15m', '60m', '1h', '1d', '1wk') to seconds.
+    Returns None for anything we don't understand (e.g. '1mo').
+    """
+    match = _INTERVAL_RE.match(interval.strip()) if interval else None
+    if not match:
+        return None
+    return int(match.group(1)) * _UNIT_SECONDS[match.group(2)]
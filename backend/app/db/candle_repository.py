@@ -0,0 +1,187 @@
+import csv
+import io
+import threading
+from typing import Any, Dict, List, Optional
+from datetime import tzinfo
+import numpy as np
+from sqlalchemy import delete, select
+from sqlalchemy.engine import Connection
+from app.core.config import settings
+from app.db.models import Base, MarketCandleModel
+from app.db.session import get_engine, schema_gaps
+from app.schemas.candle_series import CandleSeries
+
+_VALUE_COLUMNS = ("open", "high", "low", "close", "volume", "source")
+_KEY_COLUMNS = ("symbol", "interval", "timestamp")
+
+
+class CandleRepository:
+    """
+    Bars in market_candles, one row per (symbol, interval, timestamp).
+
+    Timestamps are stored as naive UTC. Writes are bulk upserts: a single
+    multi-row INSERT ... ON CONFLICT DO UPDATE on SQLite and Postgres, and
+    on Postgres through psycopg2 large batches go through COPY into a temp
+    table first (other drivers keep the INSERT path).
+    All methods are blocking; callers on the event loop run them on a thread.
+    """
+
+    COPY_THRESHOLD = 5000
+
+    def __init__(self, url: str):
+        self.url = url
+        self.engine = get_engine(url)
+        self._schema_ready = False
+        self._schema_lock = threading.Lock()
+
+    def ensure_schema(self):
+        # No migrations in this project yet; create the table on first use.
+        if self._schema_ready:
+            return
+        with self._schema_lock:
+            if not self._schema_ready:
+                Base.metadata.create_all(self.engine, tables=[MarketCandleModel.__table__])
+                gaps = schema_gaps(self.engine, MarketCandleModel.__table__)
+                if gaps:
+                    # Upserts need the unique key; see DEPLOY.md "Database upgrades"
+                    raise RuntimeError(f"market_candles predates the candle store (missing {', '.join(gaps)}); upgrade it by hand")
+                self._schema_ready = True
+
+    def read(
+        self,
+        symbol: str,
+        interval: str,
+        limit: int,
+        tz: Optional[tzinfo] = None,
+        source: str = "",
+    ) -> CandleSeries:
+        """Last `limit` stored bars, oldest first."""
+        self.ensure_schema()
+        m = MarketCandleModel
+        query = (
+            select(m.timestamp, m.open, m.high, m.low, m.close, m.volume)
+            .where(m.symbol == symbol, m.interval == interval)
+            .order_by(m.timestamp.desc())
+            .limit(limit)
+        )
+        with self.engine.connect() as conn:
+            rows = conn.execute(query).all()
+        if not rows:
+            return CandleSeries.empty(tz=tz, source=source)
+
+        rows.reverse()
+        ts, o, h, l, c, v = zip(*rows)
+        return CandleSeries.from_arrays(
+            # naive UTC datetimes -> epoch ms
+            np.array(ts, dtype="datetime64[ms]").astype(np.int64),
+            np.array(o, dtype=np.float64),
+            np.array(h, dtype=np.float64),
+            np.array(l, dtype=np.float64),
+            np.array(c, dtype=np.float64),
+            np.array(v, dtype=np.float64),
+            tz=tz,
+            source=source,
+            capacity=limit,
+        )
+
+    def upsert(self, symbol: str, interval: str, series: CandleSeries) -> int:
+        """Insert or overwrite every bar in series. Returns the number of rows written."""
+        if not len(series):
+            return 0
+        self.ensure_schema()
+        rows = self._rows(symbol, interval, series)
+        with self.engine.begin() as conn:
+            dialect = conn.dialect.name
+            if dialect == "postgresql" and len(rows) >= self.COPY_THRESHOLD and self._supports_copy(conn):
+                self._copy_upsert(conn, rows)
+            elif dialect in ("postgresql", "sqlite"):
+                self._insert_upsert(conn, rows, dialect)
+            else:
+                self._replace(conn, symbol, interval, rows)
+        return len(rows)
+
+    @staticmethod
+    def _rows(symbol: str, interval: str, series: CandleSeries) -> List[Dict[str, Any]]:
+        timestamps = series.timestamp.astype("datetime64[ms]").astype(object)
+        columns = [np.where(np.isnan(col), None, col).tolist()
+                   for col in (series.open, series.high, series.low, series.close, series.volume)]
+        return [
+            {
+                "symbol": symbol, "interval": interval, "timestamp": ts,
+                "open": o, "high": h, "low": l, "close": c, "volume": v,
+                "source": series.source,
+            }
+            for ts, o, h, l, c, v in zip(timestamps, *columns)
+        ]
+
+    @staticmethod
+    def _insert_upsert(conn: Connection, rows: List[Dict[str, Any]], dialect: str):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        stmt = insert(MarketCandleModel.__table__)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(_KEY_COLUMNS),
+            set_={name: stmt.excluded[name] for name in _VALUE_COLUMNS},
+        )
+        # executemany: SQLAlchemy batches this into multi-row VALUES statements
+        conn.execute(stmt, rows)
+
+    @staticmethod
+    def _supports_copy(conn: Connection) -> bool:
+        # copy_expert is psycopg2's; pg8000 and psycopg 3 spell COPY differently
+        return conn.dialect.driver == "psycopg2"
+
+    @staticmethod
+    def _copy_upsert(conn: Connection, rows: List[Dict[str, Any]]):
+        """Postgres bulk path: COPY into a temp table, then one INSERT ... SELECT."""
+        columns = _KEY_COLUMNS + _VALUE_COLUMNS
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            writer.writerow(["" if row[name] is None else row[name] for name in columns])
+        buffer.seek(0)
+
+        names = ", ".join(f'"{name}"' for name in columns)
+        updates = ", ".join(f'"{name}" = EXCLUDED."{name}"' for name in _VALUE_COLUMNS)
+        cursor = conn.connection.driver_connection.cursor()
+        try:
+            cursor.execute(
+                "CREATE TEMP TABLE _candle_load ON COMMIT DROP AS "
+                f"SELECT {names} FROM market_candles WITH NO DATA"
+            )
+            cursor.copy_expert(f"COPY _candle_load ({names}) FROM STDIN WITH (FORMAT csv)", buffer)
+            cursor.execute(
+                f"INSERT INTO market_candles ({names}) SELECT {names} FROM _candle_load "
+                f'ON CONFLICT ("symbol", "interval", "timestamp") DO UPDATE SET {updates}'
+            )
+        finally:
+            cursor.close()
+
+    @staticmethod
+    def _replace(conn: Connection, symbol: str, interval: str, rows: List[Dict[str, Any]]):
+        # Dialects without ON CONFLICT: clear the covered range and reinsert.
+        m = MarketCandleModel
+        conn.execute(
+            delete(m).where(
+                m.symbol == symbol,
+                m.interval == interval,
+                m.timestamp >= rows[0]["timestamp"],
+                m.timestamp <= rows[-1]["timestamp"],
+            )
+        )
+        conn.execute(m.__table__.insert(), rows)
+
+
+def create_candle_store() -> Optional[CandleRepository]:
+    """Repository for the configured candle database, or None when the store is disabled."""
+    if not settings.CANDLE_STORE_ENABLED:
+        return None
+    url = settings.CANDLE_STORE_URL or settings.DATABASE_URL
+    try:
+        return CandleRepository(url)
+    except Exception as e:
+        # e.g. the Postgres driver isn't installed; run without persistence
+        print(f"Candle store disabled ({url.split('@')[-1]}): {e}")
+        return None
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, JSON
+from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, JSON, LargeBinary, UniqueConstraint, Index
 from sqlalchemy.orm import declarative_base
 from datetime import datetime
 
@@ -6,6 +6,10 @@ Base = declarative_base()
 
 class MarketCandleModel(Base):
     __tablename__ = "market_candles"
+    __table_args__ = (
+        # One row per bar; also the index behind history reads and upserts
+        UniqueConstraint("symbol", "interval", "timestamp", name="uq_market_candles_symbol_interval_ts"),
+    )
     id = Column(Integer, primary_key=True, index=True)
     symbol = Column(String, index=True)
     timestamp = Column(DateTime, index=True)
@@ -14,17 +18,24 @@ class MarketCandleModel(Base):
     high = Column(Float)
     low = Column(Float)
     close = Column(Float)
-    volume = Column(Integer)
+    volume = Column(Float)  # crypto volume is fractional
     source = Column(String)
 
 class OptionChainSnapshot(Base):
     __tablename__ = "option_chain_snapshots"
+    __table_args__ = (
+        # Every read is one symbol/expiry over a time range
+        Index("ix_option_chain_snapshots_symbol_expiry_ts", "symbol", "expiry", "timestamp"),
+    )
     id = Column(Integer, primary_key=True, index=True)
+    symbol = Column(String)
     timestamp = Column(DateTime, index=True)
     expiry = Column(DateTime, index=True)
     spot_price = Column(Float)
     source = Column(String)
-    data = Column(JSON)  # Store the full chain as JSON for now to avoid massive normalization overhead
+    keyframe = Column(Boolean, default=False)  # False: data is a delta against the previous row
+    contracts = Column(Integer)
+    data = Column(LargeBinary)  # columnar chain, see app.db.option_chain_codec
 
 class NewsItemModel(Base):
     __tablename__ = "news_items"
@@ -40,8 +51,14 @@ class NewsItemModel(Base):
 
 class SignalLog(Base):
     __tablename__ = "signal_logs"
+    __table_args__ = (
+        # History reads are per symbol over a time range
+        Index("ix_signal_logs_symbol_timestamp", "symbol", "timestamp"),
+    )
     id = Column(Integer, primary_key=True, index=True)
-    timestamp = Column(DateTime, default=datetime.utcnow)
+    timestamp = Column(DateTime, default=datetime.utcnow, index=True)  # naive UTC
+    symbol = Column(String)  # asset key, e.g. NIFTY, BITCOIN
+    price = Column(Float)
     action = Column(String)  # BUY, SELL, NO_TRADE
     bias = Column(String)
     strategy_type = Column(String)
@@ -0,0 +1,100 @@
+import json
+import zlib
+from typing import Dict, Iterable, Optional
+import numpy as np
+
+# Contract layout, stored in keyframes only; deltas reuse the keyframe's.
+LAYOUT_COLUMNS = ("strike", "is_call")
+# Floats are delta-encoded as the XOR of their bit patterns, so unchanged
+# quotes become zero bytes and the encoding stays lossless (NaN included).
+FLOAT_COLUMNS = ("ltp", "iv", "bid", "ask")
+# Counts are delta-encoded as differences.
+INT_COLUMNS = ("oi", "oi_change", "volume")
+VALUE_COLUMNS = FLOAT_COLUMNS + INT_COLUMNS
+
+_DTYPES = {"strike": np.float64, "is_call": np.bool_, **{c: np.uint64 for c in FLOAT_COLUMNS}, **{c: np.int64 for c in INT_COLUMNS}}
+
+
+def chain_state(columns: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """Storage form of analyzer columns: float bits as uint64, counts as int64."""
+    n = len(columns["strike"])
+    state = {
+        "strike": np.asarray(columns["strike"], dtype=np.float64),
+        "is_call": np.asarray(columns["is_call"], dtype=bool),
+    }
+    for name in FLOAT_COLUMNS:
+        values = columns.get(name)
+        values = np.full(n, np.nan) if values is None else np.asarray(values, dtype=np.float64)
+        state[name] = np.ascontiguousarray(values).view(np.uint64)
+    for name in INT_COLUMNS:
+        values = columns.get(name)
+        state[name] = np.zeros(n, dtype=np.int64) if values is None else np.rint(values).astype(np.int64)
+    return state
+
+
+def state_columns(state: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """Inverse of chain_state."""
+    columns = {name: state[name] for name in LAYOUT_COLUMNS if name in state}
+    for name in FLOAT_COLUMNS:
+        if name in state:
+            columns[name] = state[name].view(np.float64)
+    for name in INT_COLUMNS:
+        if name in state:
+            columns[name] = state[name]
+    return columns
+
+
+def same_layout(a: Dict[str, np.ndarray], b: Dict[str, np.ndarray]) -> bool:
+    return (len(a["strike"]) == len(b["strike"])
+            and np.array_equal(a["strike"], b["strike"])
+            and np.array_equal(a["is_call"], b["is_call"]))
+
+
+def _pack(arrays: Dict[str, np.ndarray], n: int) -> bytes:
+    # Layout: one JSON header line (row count, per-column byte ranges), then
+    # each column zlib-compressed on its own so readers inflate only what they need.
+    blobs, ranges, offset = [], {}, 0
+    for name, values in arrays.items():
+        blob = zlib.compress(np.ascontiguousarray(values).tobytes(), 6)
+        ranges[name] = [offset, len(blob)]
+        offset += len(blob)
+        blobs.append(blob)
+    header = json.dumps({"n": n, "columns": ranges}, separators=(",", ":")).encode()
+    return header + b"\n" + b"".join(blobs)
+
+
+def encode_keyframe(state: Dict[str, np.ndarray]) -> bytes:
+    return _pack({name: state[name] for name in LAYOUT_COLUMNS + VALUE_COLUMNS}, len(state["strike"]))
+
+
+def encode_delta(state: Dict[str, np.ndarray], previous: Dict[str, np.ndarray]) -> bytes:
+    """Delta against the previous state; the caller guarantees the same layout."""
+    arrays = {}
+    for name in FLOAT_COLUMNS:
+        arrays[name] = state[name] ^ previous[name]
+    for name in INT_COLUMNS:
+        arrays[name] = state[name] - previous[name]
+    return _pack(arrays, len(state["strike"]))
+
+
+def decode(payload: bytes, names: Optional[Iterable[str]] = None) -> Dict[str, np.ndarray]:
+    """Raw stored arrays (keyframe values or deltas), only the requested columns."""
+    newline = payload.index(b"\n")
+    header = json.loads(payload[:newline])
+    body = memoryview(payload)[newline + 1:]
+    ranges = header["columns"]
+    arrays = {}
+    for name in (ranges if names is None else names):
+        if name not in ranges:
+            continue
+        offset, length = ranges[name]
+        arrays[name] = np.frombuffer(zlib.decompress(body[offset:offset + length]), dtype=_DTYPES[name])
+    return arrays
+
+
+def apply_delta(state: Dict[str, np.ndarray], delta: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """Next state from a previous state and a decoded delta (columns missing from delta are dropped)."""
+    result = {name: state[name] for name in LAYOUT_COLUMNS if name in state}
+    for name, values in delta.items():
+        result[name] = state[name] ^ values if name in FLOAT_COLUMNS else state[name] + values
+    return result
@@ -0,0 +1,280 @@
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from sqlalchemy import func, insert, select
+from app.core.config import settings
+from app.db import option_chain_codec as codec
+from app.db.models import Base, OptionChainSnapshot
+from app.db.session import get_engine, schema_gaps
+from app.schemas.market_data import OptionChain, OptionContract
+
+
+def _naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+class OptionChainRepository:
+    """
+    Option chain snapshots in option_chain_snapshots, stored columnar and
+    delta-compressed (see option_chain_codec).
+
+    Each (symbol, expiry) is a sequence of rows ordered by timestamp: a
+    keyframe carries the full chain, the rows after it only their change
+    against the row before. A new keyframe starts every keyframe_interval
+    rows and whenever the listed strikes change, so reading any point in
+    time decodes at most one keyframe interval, and a per-contract history
+    inflates just the one column it asks for.
+
+    Aware timestamps are stored as naive UTC, naive ones as given. All
+    methods are blocking; callers on the event loop run them on a thread.
+    """
+
+    def __init__(self, url: str, keyframe_interval: int = 60):
+        self.url = url
+        self.engine = get_engine(url)
+        self.keyframe_interval = max(keyframe_interval, 1)
+        self._schema_ready = False
+        self._schema_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        # (symbol, expiry) -> (timestamp, state, rows since keyframe) of the last row written
+        self._last: Dict[Tuple[str, datetime], Tuple[datetime, Dict[str, np.ndarray], int]] = {}
+
+    def ensure_schema(self):
+        # No migrations in this project yet; create the table on first use.
+        if self._schema_ready:
+            return
+        with self._schema_lock:
+            if not self._schema_ready:
+                Base.metadata.create_all(self.engine, tables=[OptionChainSnapshot.__table__])
+                gaps = schema_gaps(self.engine, OptionChainSnapshot.__table__)
+                if gaps:
+                    # The JSON-era table; see DEPLOY.md "Database upgrades"
+                    raise RuntimeError(f"option_chain_snapshots predates columnar storage (missing {', '.join(gaps)}); upgrade it by hand")
+                self._schema_ready = True
+
+    def append(
+        self,
+        symbol: str,
+        timestamp: datetime,
+        expiry: datetime,
+        spot_price: float,
+        columns: Dict[str, np.ndarray],
+        source: str = "",
+    ) -> bool:
+        """
+        Store one snapshot from per-contract columns (strike, is_call, ltp,
+        iv, bid, ask, oi, oi_change, volume). Returns False when a snapshot
+        at or after this timestamp is already stored.
+        """
+        self.ensure_schema()
+        timestamp, expiry = _naive_utc(timestamp), _naive_utc(expiry)
+        state = codec.chain_state(columns)
+        key = (symbol, expiry)
+        with self._write_lock:
+            last = self._last.get(key)
+            if last is None:
+                last = self._load_last(symbol, expiry)
+            if last is not None and timestamp <= last[0]:
+                return False
+            keyframe = last is None or last[2] + 1 >= self.keyframe_interval or not codec.same_layout(state, last[1])
+            data = codec.encode_keyframe(state) if keyframe else codec.encode_delta(state, last[1])
+            with self.engine.begin() as conn:
+                conn.execute(insert(OptionChainSnapshot), [{
+                    "symbol": symbol,
+                    "timestamp": timestamp,
+                    "expiry": expiry,
+                    "spot_price": spot_price,
+                    "source": source,
+                    "keyframe": keyframe,
+                    "contracts": len(state["strike"]),
+                    "data": data,
+                }])
+            self._last[key] = (timestamp, state, 0 if keyframe else last[2] + 1)
+        return True
+
+    def _load_last(self, symbol: str, expiry: datetime) -> Optional[Tuple[datetime, Dict[str, np.ndarray], int]]:
+        """Seed the delta chain from the database, e.g. after a restart."""
+        latest = self._latest_timestamp(symbol, expiry, None)
+        if latest is None:
+            return None
+        rows = self._segment(symbol, expiry, latest)
+        state = None
+        for row in rows:
+            state = self._advance(state, row, None)
+        if state is None:
+            return None
+        return latest, state, len(rows) - 1
+
+    def _latest_timestamp(self, symbol: str, expiry: Optional[datetime], at: Optional[datetime]) -> Optional[datetime]:
+        m = OptionChainSnapshot
+        query = select(func.max(m.timestamp)).where(m.symbol == symbol)
+        if expiry is not None:
+            query = query.where(m.expiry == expiry)
+        if at is not None:
+            query = query.where(m.timestamp <= at)
+        with self.engine.connect() as conn:
+            return conn.execute(query).scalar()
+
+    def _expiry_at(self, symbol: str, at: Optional[datetime]) -> Optional[datetime]:
+        """Expiry of the latest snapshot at or before `at`: the series being tracked then."""
+        m = OptionChainSnapshot
+        query = select(m.expiry).where(m.symbol == symbol)
+        if at is not None:
+            query = query.where(m.timestamp <= at)
+        query = query.order_by(m.timestamp.desc()).limit(1)
+        with self.engine.connect() as conn:
+            return conn.execute(query).scalar()
+
+    def _segment(self, symbol: str, expiry: datetime, start: datetime, end: Optional[datetime] = None) -> List[Any]:
+        """Rows from the keyframe at or before start through end (start if omitted)."""
+        m = OptionChainSnapshot
+        scope = (m.symbol == symbol, m.expiry == expiry)
+        keyframe_ts = select(func.max(m.timestamp)).where(*scope, m.keyframe.is_(True), m.timestamp <= start).scalar_subquery()
+        query = (
+            select(m.timestamp, m.spot_price, m.source, m.keyframe, m.data)
+            .where(*scope, m.timestamp >= func.coalesce(keyframe_ts, start), m.timestamp <= (end or start))
+            .order_by(m.timestamp)
+        )
+        with self.engine.connect() as conn:
+            rows = conn.execute(query).all()
+        # A segment must open on a keyframe to be decodable
+        while rows and not rows[0].keyframe:
+            rows.pop(0)
+        return rows
+
+    @staticmethod
+    def _advance(state: Optional[Dict[str, np.ndarray]], row: Any, names: Optional[Tuple[str, ...]]) -> Optional[Dict[str, np.ndarray]]:
+        if row.keyframe:
+            wanted = None if names is None else codec.LAYOUT_COLUMNS + names
+            return codec.decode(row.data, wanted)
+        if state is None:
+            return None
+        return codec.apply_delta(state, codec.decode(row.data, names))
+
+    def snapshot_at(self, symbol: str, at: Optional[datetime] = None, expiry: Optional[datetime] = None) -> Optional[Dict[str, Any]]:
+        """
+        Chain as of `at` (latest if omitted): the last stored snapshot at or
+        before it, for `expiry` or else the expiry tracked at that time.
+        {"timestamp", "expiry", "spot_price", "source", "columns"}, or None.
+        """
+        self.ensure_schema()
+        at = _naive_utc(at)
+        expiry = _naive_utc(expiry) or self._expiry_at(symbol, at)
+        if expiry is None:
+            return None
+        target = self._latest_timestamp(symbol, expiry, at)
+        if target is None:
+            return None
+        rows = self._segment(symbol, expiry, target)
+        if not rows:
+            return None
+        state = None
+        for row in rows:
+            state = self._advance(state, row, None)
+        last = rows[-1]
+        return {
+            "timestamp": last.timestamp,
+            "expiry": expiry,
+            "spot_price": last.spot_price,
+            "source": last.source,
+            "columns": codec.state_columns(state),
+        }
+
+    def chain_at(self, symbol: str, at: Optional[datetime] = None, expiry: Optional[datetime] = None) -> Optional[OptionChain]:
+        """snapshot_at() rebuilt as an OptionChain."""
+        snapshot = self.snapshot_at(symbol, at, expiry)
+        if snapshot is None:
+            return None
+        columns = {name: values.tolist() for name, values in snapshot["columns"].items()}
+        source = snapshot["source"] or ""
+        contracts = [
+            OptionContract(
+                strike=columns["strike"][i],
+                option_type="CE" if columns["is_call"][i] else "PE",
+                ltp=columns["ltp"][i],
+                iv=columns["iv"][i],
+                oi=columns["oi"][i],
+                oi_change=columns["oi_change"][i],
+                volume=columns["volume"][i],
+                bid=None if columns["bid"][i] != columns["bid"][i] else columns["bid"][i],
+                ask=None if columns["ask"][i] != columns["ask"][i] else columns["ask"][i],
+                timestamp=snapshot["timestamp"],
+                source=source,
+            )
+            for i in range(len(columns["strike"]))
+        ]
+        return OptionChain(
+            timestamp=snapshot["timestamp"],
+            expiry=snapshot["expiry"],
+            spot_price=snapshot["spot_price"],
+            contracts=contracts,
+            source=source,
+        )
+
+    def contract_history(
+        self,
+        symbol: str,
+        strike: float,
+        option_type: str,
+        field: str = "oi",
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        expiry: Optional[datetime] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        One contract's `field` (ltp, iv, bid, ask, oi, oi_change, volume) at
+        every stored snapshot in [start, end], oldest first. Only that column
+        is inflated, and deltas are applied to the single element.
+        """
+        if field not in codec.VALUE_COLUMNS:
+            raise ValueError(f"Unknown option chain field: {field}")
+        self.ensure_schema()
+        start, end = _naive_utc(start), _naive_utc(end)
+        expiry = _naive_utc(expiry) or self._expiry_at(symbol, end)
+        if expiry is None:
+            return []
+        if start is None:
+            m = OptionChainSnapshot
+            with self.engine.connect() as conn:
+                start = conn.execute(
+                    select(func.min(m.timestamp)).where(m.symbol == symbol, m.expiry == expiry)
+                ).scalar()
+            if start is None:
+                return []
+        end = end or datetime.max
+        is_call = option_type.upper() == "CE"
+        is_float = field in codec.FLOAT_COLUMNS
+
+        history = []
+        index, value = None, None
+        for row in self._segment(symbol, expiry, start, end):
+            if row.keyframe:
+                arrays = codec.decode(row.data, codec.LAYOUT_COLUMNS + (field,))
+                match = np.flatnonzero((arrays["strike"] == strike) & (arrays["is_call"] == is_call))
+                index = int(match[0]) if len(match) else None
+                value = arrays[field][index] if index is not None else None
+            elif index is not None:
+                delta = codec.decode(row.data, (field,))[field][index]
+                value = value ^ delta if is_float else value + delta
+            if index is None or row.timestamp < start:
+                continue
+            history.append({
+                "timestamp": row.timestamp,
+                "value": float(np.uint64(value).view(np.float64)) if is_float else int(value),
+            })
+        return history
+
+
+def create_option_chain_store() -> Optional[OptionChainRepository]:
+    """Repository for the configured option chain database, or None when storage is disabled."""
+    if not settings.OPTION_CHAIN_STORE_ENABLED:
+        return None
+    url = settings.OPTION_CHAIN_STORE_URL or settings.CANDLE_STORE_URL or settings.DATABASE_URL
+    try:
+        return OptionChainRepository(url, settings.OPTION_CHAIN_KEYFRAME_INTERVAL)
+    except Exception as e:
+        print(f"Option chain store disabled ({url.split('@')[-1]}): {e}")
+        return None
@@ -0,0 +1,51 @@
+from typing import Dict, List
+from sqlalchemy import Table, UniqueConstraint, create_engine, inspect
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import sessionmaker
+
+_engines: Dict[str, Engine] = {}
+
+
+def get_engine(url: str) -> Engine:
+    """
+    One pooled engine per database URL for the whole process.
+    SQLite needs check_same_thread off because we run queries on worker threads.
+    """
+    engine = _engines.get(url)
+    if engine is None:
+        connect_args = {"check_same_thread": False} if url.startswith("sqlite") else {}
+        engine = create_engine(url, pool_pre_ping=True, connect_args=connect_args)
+        _engines[url] = engine
+    return engine
+
+
+def get_sessionmaker(url: str) -> sessionmaker:
+    return sessionmaker(bind=get_engine(url), autoflush=False, expire_on_commit=False)
+
+
+def schema_gaps(engine: Engine, table: Table) -> List[str]:
+    """
+    What an existing table lacks against its model: columns and unique
+    constraints. create_all only creates missing tables and never alters
+    one, so a table from an older version needs the DDL in DEPLOY.md.
+    """
+    inspector = inspect(engine)
+    if not inspector.has_table(table.name):
+        return []
+    present = {c["name"] for c in inspector.get_columns(table.name)}
+    gaps = [f"column {c.name}" for c in table.columns if c.name not in present]
+    # A unique index serves ON CONFLICT as well as a constraint does
+    unique = {tuple(u["column_names"]) for u in inspector.get_unique_constraints(table.name)}
+    unique |= {tuple(i["column_names"]) for i in inspector.get_indexes(table.name) if i.get("unique")}
+    for constraint in table.constraints:
+        if isinstance(constraint, UniqueConstraint):
+            columns = tuple(c.name for c in constraint.columns)
+            if columns not in unique:
+                gaps.append(f"unique ({', '.join(columns)})")
+    return gaps
+
+
+def dispose_engines():
+    for engine in _engines.values():
+        engine.dispose()
+    _engines.clear()
@@ -0,0 +1,80 @@
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+from sqlalchemy import insert, select
+from app.core.config import settings
+from app.db.models import Base, SignalLog
+from app.db.session import get_engine
+
+
+def _naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+class SignalLogRepository:
+    """
+    Audit trail of computed decisions in signal_logs.
+
+    Inserts are one multi-row executemany per batch; history reads use the
+    (symbol, timestamp) index. Timestamps are naive UTC. All methods are
+    blocking; callers on the event loop run them on a thread.
+    """
+
+    def __init__(self, url: str):
+        self.url = url
+        self.engine = get_engine(url)
+        self._schema_ready = False
+        self._schema_lock = threading.Lock()
+
+    def ensure_schema(self):
+        # No migrations in this project yet; create the table on first use.
+        if self._schema_ready:
+            return
+        with self._schema_lock:
+            if not self._schema_ready:
+                Base.metadata.create_all(self.engine, tables=[SignalLog.__table__])
+                self._schema_ready = True
+
+    def insert_many(self, rows: List[Dict[str, Any]]) -> int:
+        if not rows:
+            return 0
+        self.ensure_schema()
+        with self.engine.begin() as conn:
+            conn.execute(insert(SignalLog), rows)
+        return len(rows)
+
+    def history(
+        self,
+        symbol: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        limit: int = 500,
+    ) -> List[Dict[str, Any]]:
+        """Logged signals for symbol in [start, end], newest first."""
+        self.ensure_schema()
+        m = SignalLog
+        query = select(
+            m.timestamp, m.symbol, m.price, m.action, m.bias, m.strategy_type,
+            m.confidence, m.rationale, m.rules_version, m.model_version,
+        ).where(m.symbol == symbol)
+        if start is not None:
+            query = query.where(m.timestamp >= _naive_utc(start))
+        if end is not None:
+            query = query.where(m.timestamp <= _naive_utc(end))
+        query = query.order_by(m.timestamp.desc()).limit(limit)
+        with self.engine.connect() as conn:
+            return [dict(row._mapping) for row in conn.execute(query)]
+
+
+def create_signal_log() -> Optional[SignalLogRepository]:
+    """Repository for the configured signal log database, or None when logging is disabled."""
+    if not settings.SIGNAL_LOG_ENABLED:
+        return None
+    url = settings.SIGNAL_LOG_URL or settings.CANDLE_STORE_URL or settings.DATABASE_URL
+    try:
+        return SignalLogRepository(url)
+    except Exception as e:
+        print(f"Signal log disabled ({url.split('@')[-1]}): {e}")
+        return None
@@ -1,6 +1,9 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import PlainTextResponse
 from app.core.config import settings
+from app.core.metrics import metrics, EventLoopMonitor, MetricsMiddleware
 
 app = FastAPI(
     title="NIFTY50 Options Signal Console API",
@@ -20,22 +23,59 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],  # pollers send it back as If-None-Match
 )
+app.add_middleware(GZipMiddleware, minimum_size=settings.GZIP_MINIMUM_SIZE, compresslevel=settings.GZIP_LEVEL)
+app.add_middleware(MetricsMiddleware, registry=metrics)
+loop_monitor = EventLoopMonitor(metrics, interval=settings.EVENT_LOOP_MONITOR_INTERVAL)
 
-from app.api.endpoints import setup, signals
+from app.api.endpoints import setup, signals, ws
+from app.services.signal_scheduler import signal_scheduler
+from app.services.asset_context import asset_context
+from app.services.connector_registry import connector_registry
+from app.services.websocket_manager import manager as ws_manager
+from app.services.candle_stream import candle_streams
+from app.services.shared_state import shared_state
+from app.services.signal_log_writer import signal_log_writer
+from app.services.option_chain_recorder import option_chain_recorder
 
 app.include_router(setup.router, prefix="/api/v1/setup", tags=["setup"])
 app.include_router(signals.router, prefix="/api/v1/signals", tags=["signals"])
+app.include_router(ws.router, prefix="/ws", tags=["ws"])
 
 @app.on_event("startup")
 async def startup_event():
     # In a real app, initialize DB connection pool here
-    pass
+    await shared_state.connect()
+    await asset_context.load_binance_symbols()
+    if settings.METRICS_ENABLED:
+        loop_monitor.start()
+    signal_log_writer.start()
+    signal_scheduler.add_listener(signal_log_writer.record_snapshots)
+    signal_scheduler.add_listener(option_chain_recorder.record_snapshots)
+    if settings.SIGNAL_SCHEDULER_ENABLED:
+        await signal_scheduler.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await ws_manager.close()
+    await candle_streams.close()
+    await signal_scheduler.stop()
+    await signal_log_writer.stop()
+    await asset_context.close()
+    await connector_registry.close()
+    await shared_state.close()
+    await loop_monitor.stop()
 
 @app.get("/")
 def read_root():
     return {"message": "NIFTY50 Options Signal Console API is running"}
 
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def prometheus_metrics():
+    """Prometheus text exposition of the in-process metrics."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 @app.get("/health")
 def health_check():
     return {"status": "ok"}
@@ -0,0 +1,296 @@
+import time
+from datetime import datetime, tzinfo
+from typing import Iterable, List, Optional, Sequence
+import numpy as np
+from app.schemas.market_data import MarketCandle
+
+_FLOAT_FIELDS = ("open", "high", "low", "close", "volume")
+
+
+class CandleSeries:
+    """
+    Columnar OHLCV buffer: timestamp (epoch ms, int64) plus open/high/low/
+    close/volume (float64) as contiguous NumPy arrays with a fixed capacity.
+
+    append() and the forming-bar update are O(1) amortized. Storage is twice
+    the capacity; when the write cursor reaches the end, the live window is
+    moved into a freshly allocated buffer, so slices handed out earlier keep
+    pointing at valid data. Slicing (series[a:b], tail(n)) is zero-copy: the
+    result shares memory with its parent, and sees in-place revisions of the
+    forming bar but never later appends. Use copy() for a detached snapshot.
+
+    tz is the exchange timezone used to turn timestamps back into datetimes
+    (None means naive local time, which is what the Binance connector has
+    always produced).
+    """
+
+    def __init__(self, capacity: int = 1000, tz: Optional[tzinfo] = None, source: str = ""):
+        if capacity < 1:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self.tz = tz
+        self.source = source
+        self.version = 0
+        self._view = False
+        self._allocate(2 * capacity)
+        self._start = 0
+        self._end = 0
+
+    def _allocate(self, size: int):
+        self._ts = np.empty(size, dtype=np.int64)
+        self._cols = {name: np.empty(size, dtype=np.float64) for name in _FLOAT_FIELDS}
+
+    # --- construction -----------------------------------------------------
+
+    @classmethod
+    def from_arrays(
+        cls,
+        timestamp: Sequence,
+        open: Sequence,
+        high: Sequence,
+        low: Sequence,
+        close: Sequence,
+        volume: Sequence,
+        tz: Optional[tzinfo] = None,
+        source: str = "",
+        capacity: Optional[int] = None,
+    ) -> "CandleSeries":
+        ts = np.asarray(timestamp, dtype=np.int64)
+        capacity = max(capacity or len(ts), 1)
+        n = min(len(ts), capacity)
+        series = cls(capacity=capacity, tz=tz, source=source)
+        series._ts[:n] = ts[len(ts) - n:]
+        for name, values in zip(_FLOAT_FIELDS, (open, high, low, close, volume)):
+            column = np.asarray(values, dtype=np.float64)
+            series._cols[name][:n] = column[len(column) - n:]
+        series._end = n
+        return series
+
+    @classmethod
+    def from_candles(cls, candles: Iterable[MarketCandle], capacity: Optional[int] = None) -> "CandleSeries":
+        candles = list(candles)
+        if candles and any(candles[i].timestamp > candles[i + 1].timestamp for i in range(len(candles) - 1)):
+            candles = sorted(candles, key=lambda c: c.timestamp)
+        tz = candles[0].timestamp.tzinfo if candles else None
+        return cls.from_arrays(
+            [to_epoch_ms(c.timestamp) for c in candles],
+            [c.open for c in candles],
+            [c.high for c in candles],
+            [c.low for c in candles],
+            [c.close for c in candles],
+            [c.volume for c in candles],
+            tz=tz,
+            source=candles[0].source if candles else "",
+            capacity=capacity,
+        )
+
+    @classmethod
+    def wrap(
+        cls,
+        timestamp: np.ndarray,
+        open: np.ndarray,
+        high: np.ndarray,
+        low: np.ndarray,
+        close: np.ndarray,
+        volume: np.ndarray,
+        tz: Optional[tzinfo] = None,
+        source: str = "",
+    ) -> "CandleSeries":
+        """Read-only series over existing int64/float64 arrays of equal length (no copy), e.g. shared memory."""
+        columns = dict(zip(_FLOAT_FIELDS, (open, high, low, close, volume)))
+        if timestamp.dtype != np.int64 or any(column.dtype != np.float64 for column in columns.values()):
+            raise ValueError("wrap() needs an int64 timestamp and float64 columns")
+        if any(len(column) != len(timestamp) for column in columns.values()):
+            raise ValueError("wrap() needs columns of equal length")
+        series = object.__new__(cls)
+        series.capacity = max(len(timestamp), 1)
+        series.tz = tz
+        series.source = source
+        series.version = 0
+        series._view = True
+        series._ts = timestamp.view()
+        series._cols = {name: column.view() for name, column in columns.items()}
+        for array in (series._ts, *series._cols.values()):
+            array.flags.writeable = False
+        series._start = 0
+        series._end = len(timestamp)
+        return series
+
+    @classmethod
+    def empty(cls, tz: Optional[tzinfo] = None, source: str = "") -> "CandleSeries":
+        return cls(capacity=1, tz=tz, source=source)
+
+    # --- columns (views) --------------------------------------------------
+
+    @property
+    def timestamp(self) -> np.ndarray:
+        return self._ts[self._start:self._end]
+
+    @property
+    def open(self) -> np.ndarray:
+        return self._cols["open"][self._start:self._end]
+
+    @property
+    def high(self) -> np.ndarray:
+        return self._cols["high"][self._start:self._end]
+
+    @property
+    def low(self) -> np.ndarray:
+        return self._cols["low"][self._start:self._end]
+
+    @property
+    def close(self) -> np.ndarray:
+        return self._cols["close"][self._start:self._end]
+
+    @property
+    def volume(self) -> np.ndarray:
+        return self._cols["volume"][self._start:self._end]
+
+    def __len__(self) -> int:
+        return self._end - self._start
+
+    @property
+    def last_timestamp(self) -> Optional[int]:
+        return int(self._ts[self._end - 1]) if len(self) else None
+
+    # --- mutation ---------------------------------------------------------
+
+    def _check_writable(self):
+        if self._view:
+            raise TypeError("CandleSeries slices are read-only; copy() them first")
+
+    def append(self, timestamp: int, open: float, high: float, low: float, close: float, volume: float):
+        self._check_writable()
+        if self._end == len(self._ts):
+            # Move the newest capacity-1 bars into a fresh buffer; old views stay valid.
+            keep = min(len(self), self.capacity - 1)
+            old_ts, old_cols = self._ts, self._cols
+            self._allocate(2 * self.capacity)
+            self._ts[:keep] = old_ts[self._end - keep:self._end]
+            for name in _FLOAT_FIELDS:
+                self._cols[name][:keep] = old_cols[name][self._end - keep:self._end]
+            self._start, self._end = 0, keep
+        elif len(self) == self.capacity:
+            self._start += 1
+
+        i = self._end
+        self._ts[i] = timestamp
+        self._cols["open"][i] = open
+        self._cols["high"][i] = high
+        self._cols["low"][i] = low
+        self._cols["close"][i] = close
+        self._cols["volume"][i] = volume
+        self._end += 1
+        self.version += 1
+
+    def update_last(self, open: float, high: float, low: float, close: float, volume: float):
+        self._check_writable()
+        if not len(self):
+            raise IndexError("update_last on empty CandleSeries")
+        i = self._end - 1
+        self._cols["open"][i] = open
+        self._cols["high"][i] = high
+        self._cols["low"][i] = low
+        self._cols["close"][i] = close
+        self._cols["volume"][i] = volume
+        self.version += 1
+
+    def upsert(self, timestamp: int, open: float, high: float, low: float, close: float, volume: float) -> bool:
+        """
+        Revise the forming bar (same timestamp) or append a new one.
+        Bars older than the last one are ignored; returns False for those.
+        """
+        last = self.last_timestamp
+        if last is not None and timestamp == last:
+            self.update_last(open, high, low, close, volume)
+        elif last is None or timestamp > last:
+            self.append(timestamp, open, high, low, close, volume)
+        else:
+            return False
+        return True
+
+    # --- slicing / conversion ---------------------------------------------
+
+    def __getitem__(self, key) -> "CandleSeries":
+        if not isinstance(key, slice) or key.step not in (None, 1):
+            raise TypeError("CandleSeries supports contiguous slices only; use the column arrays for indexing")
+        start, stop, _ = key.indices(len(self))
+        stop = max(start, stop)
+        view = object.__new__(CandleSeries)
+        view.capacity = max(stop - start, 1)
+        view.tz = self.tz
+        view.source = self.source
+        view.version = self.version
+        view._view = True
+        view._ts = self._ts
+        view._cols = self._cols
+        view._start = self._start + start
+        view._end = self._start + stop
+        return view
+
+    def tail(self, n: int) -> "CandleSeries":
+        return self[max(len(self) - n, 0):]
+
+    def copy(self, capacity: Optional[int] = None) -> "CandleSeries":
+        series = CandleSeries.from_arrays(
+            self.timestamp, self.open, self.high, self.low, self.close, self.volume,
+            tz=self.tz, source=self.source, capacity=capacity or self.capacity,
+        )
+        series.version = self.version
+        return series
+
+    def since(self, timestamp: int) -> "CandleSeries":
+        """Zero-copy view of the bars at or after timestamp (epoch ms)."""
+        return self[int(np.searchsorted(self.timestamp, timestamp, side="left")):]
+
+    def datetime_at(self, index: int) -> datetime:
+        return from_epoch_ms(int(self.timestamp[index]), self.tz)
+
+    def candle_at(self, index: int) -> MarketCandle:
+        return MarketCandle(
+            timestamp=self.datetime_at(index),
+            open=float(self.open[index]),
+            high=float(self.high[index]),
+            low=float(self.low[index]),
+            close=float(self.close[index]),
+            volume=float(self.volume[index]),
+            source=self.source
+        )
+
+    def to_candles(self) -> List[MarketCandle]:
+        """Pydantic conversion, for the API boundary only."""
+        return [
+            MarketCandle(
+                timestamp=from_epoch_ms(ts, self.tz),
+                open=o, high=h, low=l, close=c, volume=v,
+                source=self.source
+            )
+            for ts, o, h, l, c, v in zip(
+                self.timestamp.tolist(), self.open.tolist(), self.high.tolist(),
+                self.low.tolist(), self.close.tolist(), self.volume.tolist()
+            )
+        ]
+
+    def utc_offset_ms(self) -> int:
+        """
+        Offset (ms) between the wall clock the bars were stamped in and UTC,
+        taken at the last bar. Naive series use the server's local offset.
+        """
+        if not len(self):
+            return 0
+        last = self.datetime_at(-1)
+        if self.tz is not None:
+            return int(last.utcoffset().total_seconds() * 1000)
+        return time.localtime(int(self.timestamp[-1]) // 1000).tm_gmtoff * 1000
+
+    def __repr__(self) -> str:
+        return f"CandleSeries(len={len(self)}, capacity={self.capacity}, source={self.source!r})"
+
+
+def to_epoch_ms(ts: datetime) -> int:
+    # Naive datetimes are local time, matching datetime.fromtimestamp() in the connectors.
+    return int(round(ts.timestamp() * 1000))
+
+
+def from_epoch_ms(ms: int, tz: Optional[tzinfo] = None) -> datetime:
+    return datetime.fromtimestamp(ms / 1000.0, tz)
@@ -0,0 +1,35 @@
+from pydantic import BaseModel
+
+
+class DecisionParams(BaseModel):
+    """
+    Tunable weights and thresholds of DecisionEngine. The defaults are the
+    hand-set values the engine has always used.
+    """
+    # Trend
+    price_ema_points: float = 20        # close above/below EMA20
+    ema_alignment_points: float = 20    # EMA20 above/below EMA50
+
+    # Momentum (RSI bands)
+    rsi_mid: float = 50
+    rsi_overbought: float = 70
+    rsi_oversold: float = 30
+    rsi_momentum_points: float = 10     # RSI between mid and a band
+    rsi_extreme_points: float = 30      # RSI beyond a band (reversal)
+
+    # Asset specifics
+    vwap_points: float = 10             # NIFTY intraday, close vs VWAP
+    crypto_rsi_high: float = 60
+    crypto_rsi_low: float = 40
+    crypto_points: float = 10
+
+    # Aggregation
+    max_confidence: float = 100
+    confidence_threshold: float = 60    # BUY/SELL needs more than this
+    options_spread: float = 15          # CALL/PUT needs this lead over the other side
+    options_confidence_cap: float = 85
+
+    # Option chain (NIFTY, when a chain feed is configured)
+    pcr_bullish: float = 1.2            # put/call OI ratio above this: puts written, supportive
+    pcr_bearish: float = 0.8            # below this: calls written, capping
+    options_chain_points: float = 10    # CALL/PUT confidence shift per agreeing chain signal
@@ -1,44 +1,196 @@
-from typing import Optional
+from datetime import datetime
+from typing import Optional, Dict, Any, List
 from app.services.connector_interface import MarketDataConnector
-from app.services.connectors.yfinance_connector import YFinanceConnector
-from app.services.connectors.binance_connector import BinanceConnector
+from app.services.connectors.binance_stream_connector import BinanceStreamConnector
+from app.services.connectors.instrumented_connector import InstrumentedConnector
+from app.services.connectors.persistent_connector import PersistentCandleConnector
+from app.services.connectors.recording_connector import RecordingConnector, recording_path
+from app.services.connectors.replay_connector import ReplayConnector
+from app.db.candle_repository import create_candle_store
+from app.services.market_data_cache import CachedMarketDataConnector
+from app.services.connector_registry import connector_registry
+from app.services.symbol_registry import Instrument, SymbolRegistry, symbol_registry
+from app.core.config import settings
 
 class AssetContext:
     """
-    Manages the current asset context (NIFTY or BITCOIN).
-    Provides the appropriate connector and settings.
+    Maps assets (NIFTY, BANKNIFTY, BITCOIN, ETH, any Binance pair) to their
+    instrument spec and connector. Every request names its asset; the
+    "current asset" is only the default for clients that don't.
+
+    Provider connectors come from the connector registry, which owns their
+    HTTP pools. One wrapped connector is shared per provider, so every asset
+    and endpoint reuses the same TTL/single-flight cache (or Binance stream),
+    and (when the candle store is enabled) history comes from the DB with
+    only missing bars fetched upstream.
+
+    MARKET_DATA_MODE=record logs every upstream response to
+    MARKET_DATA_RECORDING_DIR; replay serves those logs instead of the
+    network. Both bypass the candle store (recordings must hold whole
+    responses, not the store's top-ups, and replays must not write to it)
+    and the Binance stream (its ticks never reach the REST connector).
     """
-    def __init__(self):
+    def __init__(self, registry: SymbolRegistry = symbol_registry):
+        self.registry = registry
         self._current_asset = "NIFTY" # Default
-        self._connectors = {
-            "NIFTY": YFinanceConnector(),
-            "BITCOIN": BinanceConnector()
+        self.mode = settings.MARKET_DATA_MODE
+        if self.mode not in ("live", "record", "replay"):
+            raise ValueError(f"Unknown MARKET_DATA_MODE: {self.mode}")
+        live = self.mode == "live"
+        self._candle_store = create_candle_store() if live else None
+        # Upstream calls are timed right at the provider, below the store and cache.
+        self._upstream: Dict[str, InstrumentedConnector] = {
+            provider: InstrumentedConnector(self._provider_connector(provider), provider)
+            for provider in ("yfinance", "binance")
         }
-        self._symbols = {
-            "NIFTY": "^NSEI",
-            "BITCOIN": "BTC/USDT"
-        }
-        self._update_intervals = {
-            "NIFTY": 15, # Yahoo Finance is slower
-            "BITCOIN": 3 # Binance is fast
+        binance = self._persistent(self._upstream["binance"], continuous=True)
+        # The Binance stream already serves local reads, so it skips the TTL cache.
+        if settings.BINANCE_STREAMING_ENABLED and live:
+            binance_connector = BinanceStreamConnector(rest=binance, ws_url=settings.BINANCE_WS_URL)
+        else:
+            binance_connector = CachedMarketDataConnector(binance)
+        self._connectors: Dict[str, MarketDataConnector] = {
+            "yfinance": CachedMarketDataConnector(self._persistent(self._upstream["yfinance"])),
+            "binance": binance_connector
         }
+        if registry.for_provider("synthetic"):
+            # Generated in-process: no upstream to time, cache or record
+            self._connectors["synthetic"] = connector_registry.get("synthetic")
+        # Assets the background scheduler keeps warm; grows as clients ask for
+        # new ones. The configured ones are pinned, the rest can be dropped.
+        self._watchlist: List[str] = []
+        self._pinned = {self.watch(asset).key for asset in settings.WATCHLIST}
+
+    def _provider_connector(self, provider: str) -> MarketDataConnector:
+        path = recording_path(settings.MARKET_DATA_RECORDING_DIR, provider)
+        if self.mode == "replay":
+            return ReplayConnector(
+                path,
+                speed=settings.REPLAY_SPEED,
+                latency=settings.REPLAY_LATENCY,
+                error_rate=settings.REPLAY_ERROR_RATE,
+                error_mode=settings.REPLAY_ERROR_MODE,
+                seed=settings.REPLAY_SEED,
+            )
+        if self.mode == "record":
+            return RecordingConnector(connector_registry.get(provider), path)
+        return connector_registry.get(provider)
+
+    def _persistent(self, connector: MarketDataConnector, continuous: bool = False) -> MarketDataConnector:
+        if self._candle_store is None:
+            return connector
+        return PersistentCandleConnector(connector, self._candle_store, continuous=continuous)
+
+    def resolve(self, asset: Optional[str] = None) -> Instrument:
+        """Instrument for a request's asset (the current asset if none). Raises ValueError."""
+        return self.registry.resolve(asset or self._current_asset)
+
+    def watch(self, asset: str) -> Instrument:
+        """Add an asset to the universe, registering an ad-hoc pair. Raises ValueError."""
+        instrument = self.resolve(asset)
+        self.registry.admit(instrument)
+        if instrument.key not in self._watchlist:
+            self._watchlist.append(instrument.key)
+        return instrument
+
+    async def unwatch(self, asset: str):
+        """
+        Drop a client-added asset from the universe (and the registry, for
+        ad-hoc pairs), releasing what its connector holds for it (streams,
+        cached windows).
+        """
+        if asset in self._pinned:
+            return
+        instrument = self.registry.get(asset)
+        if asset in self._watchlist:
+            self._watchlist.remove(asset)
+        self.registry.unregister(asset)
+        if instrument is not None:
+            release = getattr(self._connectors.get(instrument.provider), "release", None)
+            if release is not None:
+                await release(instrument.symbol)
+
+    def is_evictable(self, asset: str) -> bool:
+        """Client-added ad-hoc pairs; the configured watchlist and built-ins stay."""
+        return asset not in self._pinned and self.registry.is_adhoc(asset)
+
+    async def load_binance_symbols(self):
+        """Restrict ad-hoc pairs to what Binance lists as trading (live mode only)."""
+        if self.mode != "live":
+            return
+        symbols = await connector_registry.get("binance").get_exchange_symbols()
+        if symbols:
+            self.registry.set_binance_symbols(symbols)
 
     @property
     def current_asset(self) -> str:
         return self._current_asset
 
     def set_asset(self, asset: str):
-        if asset not in self._connectors:
-            raise ValueError(f"Unknown asset: {asset}")
-        self._current_asset = asset
+        self._current_asset = self.resolve(asset).key
 
     def get_connector(self) -> MarketDataConnector:
-        return self._connectors[self._current_asset]
+        return self.get_connector_for(self._current_asset)
 
     def get_symbol(self) -> str:
-        return self._symbols[self._current_asset]
-    
+        return self.get_symbol_for(self._current_asset)
+
     def get_update_interval(self) -> int:
-        return self._update_intervals[self._current_asset]
+        return self.get_update_interval_for(self._current_asset)
+
+    @property
+    def assets(self) -> List[str]:
+        """The watched universe."""
+        return list(self._watchlist)
+
+    @property
+    def supported_assets(self) -> List[str]:
+        return self.registry.keys
+
+    def get_connector_for(self, asset: str) -> MarketDataConnector:
+        return self._connectors[self.resolve(asset).provider]
+
+    def use_connector(self, provider: str, connector: MarketDataConnector):
+        """Serve a provider's assets from another connector (offline feeds, benchmarks)."""
+        if provider not in self._connectors:
+            raise ValueError(f"Unknown provider: {provider}")
+        self._connectors[provider] = connector
+
+    def get_symbol_for(self, asset: str) -> str:
+        return self.resolve(asset).symbol
+
+    def get_update_interval_for(self, asset: str) -> int:
+        return self.resolve(asset).update_interval
+
+    def get_signal_interval_for(self, asset: str) -> str:
+        """Candle interval the signal/decision pipeline runs on."""
+        return self.resolve(asset).signal_interval
+
+    def get_provider_for(self, asset: str) -> str:
+        return self.resolve(asset).provider_name
+
+    def heartbeats(self) -> Dict[str, Optional[datetime]]:
+        """Per provider, the last time upstream (REST or stream) delivered data."""
+        beats = {provider: connector.last_success for provider, connector in self._upstream.items()}
+        for provider, connector in self._connectors.items():
+            streamed = getattr(connector, "last_message_at", None)
+            if isinstance(streamed, (int, float)):
+                streamed = datetime.fromtimestamp(streamed)
+            if streamed is not None and (beats.get(provider) is None or streamed > beats[provider]):
+                beats[provider] = streamed
+        return beats
+
+    def cache_stats(self) -> Dict[str, Any]:
+        return {
+            provider: connector.stats()
+            for provider, connector in self._connectors.items()
+            if hasattr(connector, "stats")
+        }
+
+    async def close(self):
+        for connector in self._connectors.values():
+            close = getattr(connector, "close", None)
+            if close is not None:
+                await close()
 
 asset_context = AssetContext()
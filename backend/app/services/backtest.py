@@ -0,0 +1,173 @@
+from typing import Dict, Any, Optional
+import numpy as np
+from pydantic import BaseModel
+from app.schemas.candle_series import CandleSeries
+from app.schemas.decision_params import DecisionParams
+from app.services.decision_engine import DecisionEngine
+from app.services.indicator_engine import indicator_matrix
+
+_DAY_MS = 86400 * 1000
+_IST_OFFSET_MS = 330 * 60 * 1000
+_NSE_OPEN_MIN = 9 * 60 + 15
+_NSE_CLOSE_MIN = 15 * 60 + 30
+
+
+class BacktestConfig(BaseModel):
+    cost_bps: float = 5.0            # per unit of position change (fees + slippage), in basis points
+    allow_short: bool = True         # SELL opens a short; otherwise it just exits
+    hold_on_neutral: bool = False    # keep the position through NEUTRAL bars until an opposite signal
+    vwap_window: int = 100           # live signals see VWAP over a 100-bar window
+    exit_at_session_end: bool = True # NSE intraday: flat into the close, no overnight exposure
+
+
+def nse_session_mask(timestamps_ms: np.ndarray) -> np.ndarray:
+    """True for bars stamped inside NSE hours (09:15-15:30 IST, Mon-Fri); mirrors get_market_status_ist."""
+    ist = timestamps_ms + _IST_OFFSET_MS
+    minute = (ist % _DAY_MS) // 60000
+    weekday = (ist // _DAY_MS + 3) % 7  # 1970-01-01 was a Thursday
+    return (weekday < 5) & (minute >= _NSE_OPEN_MIN) & (minute <= _NSE_CLOSE_MIN)
+
+
+class Backtester:
+    """
+    Vectorized historical simulation of DecisionEngine.
+
+    The whole indicator matrix is computed in one pass over the history and
+    the rules are applied as array operations (DecisionEngine.rule_masks /
+    score), so years of intraday bars take well under a second. The signal
+    on bar t's close sets the position held over bar t+1 (no lookahead);
+    every change of position pays cost_bps per unit traded.
+    """
+
+    @staticmethod
+    def indicators(series: CandleSeries, asset_type: str = "NIFTY", vwap_window: Optional[int] = 100) -> Dict[str, np.ndarray]:
+        """Indicator columns plus the market-open mask; independent of DecisionParams."""
+        columns = {name: values[0] for name, values in indicator_matrix(
+            series.close, series.high, series.low, series.volume, vwap_window=vwap_window
+        ).items()}
+        n = len(series)
+        columns["close"] = series.close
+        columns["is_market_open"] = nse_session_mask(series.timestamp) if asset_type == "NIFTY" else np.ones(n, dtype=bool)
+        return columns
+
+    @staticmethod
+    def actions(columns: Dict[str, np.ndarray], asset_type: str = "NIFTY", params: Optional[DecisionParams] = None) -> Dict[str, np.ndarray]:
+        """Rule scores and action (1 BUY, -1 SELL, 0 NEUTRAL) per bar from precomputed indicator columns."""
+        params = params or DecisionParams()
+        close = columns["close"]
+        n = len(close)
+        masks = DecisionEngine.rule_masks(
+            close, columns["ema_20"], columns["ema_50"], columns["rsi"], columns["vwap"],
+            np.full(n, asset_type == "NIFTY"), np.full(n, asset_type == "BITCOIN"),
+            columns["is_market_open"], params,
+        )
+        scores = DecisionEngine.score(masks, params)
+        # analyze() never trades on a zero/missing price
+        scores["action"] = np.where(close == 0, 0, scores["action"])
+        return scores
+
+    @staticmethod
+    def signals(
+        series: CandleSeries,
+        asset_type: str = "NIFTY",
+        vwap_window: Optional[int] = 100,
+        params: Optional[DecisionParams] = None,
+    ) -> Dict[str, np.ndarray]:
+        """Indicator columns, buy/sell confidence and action for every bar."""
+        columns = Backtester.indicators(series, asset_type, vwap_window)
+        return {**columns, **Backtester.actions(columns, asset_type, params)}
+
+    @staticmethod
+    def positions(action: np.ndarray, config: BacktestConfig) -> np.ndarray:
+        pos = action.astype(np.float64)
+        if not config.allow_short:
+            pos = np.maximum(pos, 0)
+        if config.hold_on_neutral:
+            # Forward-fill the last non-neutral signal.
+            signal_at = np.where(action != 0, np.arange(len(action)), -1)
+            last = np.maximum.accumulate(signal_at)
+            pos = np.where(last >= 0, pos[np.maximum(last, 0)], 0.0)
+        return pos
+
+    @staticmethod
+    def run(
+        series: CandleSeries,
+        asset_type: str = "NIFTY",
+        config: Optional[BacktestConfig] = None,
+        params: Optional[DecisionParams] = None,
+    ) -> Dict[str, Any]:
+        config = config or BacktestConfig()
+        n = len(series)
+        if n < 2:
+            return {"bars": n, "error": "Insufficient data for backtest"}
+
+        signals = Backtester.signals(series, asset_type, config.vwap_window, params)
+        return Backtester.simulate(series, signals["action"], asset_type, config)
+
+    @staticmethod
+    def simulate(series: CandleSeries, action: np.ndarray, asset_type: str, config: BacktestConfig) -> Dict[str, Any]:
+        """Entries/exits, costs and metrics for a precomputed action column."""
+        close = series.close
+        ts = series.timestamp
+        n = len(series)
+        pos = Backtester.positions(action, config)
+
+        if asset_type == "NIFTY" and config.exit_at_session_end and n > 1 and np.median(np.diff(ts)) < _DAY_MS:
+            day = (ts + _IST_OFFSET_MS) // _DAY_MS
+            pos[np.append(day[1:] != day[:-1], True)] = 0.0
+
+        cost_rate = config.cost_bps / 1e4
+        bar_ret = np.zeros(n)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            bar_ret[1:] = np.nan_to_num(close[1:] / close[:-1] - 1, nan=0.0, posinf=0.0, neginf=0.0)
+        traded = np.abs(np.diff(pos, prepend=0.0))
+        # Position decided on bar t earns bar t+1's return.
+        gross = np.zeros(n)
+        gross[1:] = pos[:-1] * bar_ret[1:]
+        net = gross - traded * cost_rate
+        equity = np.cumprod(1 + net)
+        drawdown = equity / np.maximum.accumulate(equity) - 1
+
+        # A trade is a run of the same non-zero position.
+        prev = np.concatenate(([0.0], pos[:-1]))
+        starts = (pos != 0) & (pos != prev)
+        trade_id = np.cumsum(starts) - 1
+        held = pos[:-1] != 0
+        trades = int(starts.sum())
+        if trades:
+            trade_ret = np.bincount(trade_id[:-1][held], weights=gross[1:][held], minlength=trades)
+            trade_ret -= 2 * cost_rate  # entry + exit
+            hit_rate = float(np.mean(trade_ret > 0))
+            avg_trade = float(trade_ret.mean())
+        else:
+            hit_rate = avg_trade = 0.0
+
+        pnl_points = float(np.sum(pos[:-1] * np.diff(close)) - np.sum(traded * close) * cost_rate)
+        return {
+            "bars": n,
+            "start": series.datetime_at(0).isoformat(),
+            "end": series.datetime_at(-1).isoformat(),
+            "trades": trades,
+            "hit_rate": round(hit_rate, 4),
+            "total_return_pct": round(float(equity[-1] - 1) * 100, 4),
+            "pnl_points": round(pnl_points, 2),
+            "max_drawdown_pct": round(float(drawdown.min()) * 100, 4),
+            "exposure_pct": round(float(np.mean(pos != 0)) * 100, 2),
+            "long_pct": round(float(np.mean(pos > 0)) * 100, 2),
+            "short_pct": round(float(np.mean(pos < 0)) * 100, 2),
+            "avg_trade_pct": round(avg_trade * 100, 4),
+            "costs_pct": round(float(traded.sum() * cost_rate) * 100, 4),
+        }
+
+    @staticmethod
+    def run_universe(
+        universe: Dict[str, CandleSeries],
+        asset_types: Dict[str, str],
+        config: Optional[BacktestConfig] = None,
+        params: Optional[DecisionParams] = None,
+    ) -> Dict[str, Dict[str, Any]]:
+        """Backtest several assets; asset_types maps each asset to its rule family."""
+        return {
+            asset: Backtester.run(series, asset_types.get(asset, "NIFTY"), config, params)
+            for asset, series in universe.items()
+        }
@@ -1,64 +1,217 @@
-from typing import List, Dict, Any
-import pandas as pd
+from typing import List, Dict, Any, Optional, Tuple, Union
+import numpy as np
+from app.core.intervals import interval_to_seconds
 from app.schemas.market_data import MarketCandle
+from app.schemas.candle_series import CandleSeries
+
+_DAY_MS = 86400 * 1000
+
+# Bucket sizes for the timeframes the chart exposes.
+TF_SECONDS = {
+    '1m': 60, '2m': 120, '3m': 180, '5m': 300,
+    '10m': 600, '15m': 900, '30m': 1800,
+    '1h': 3600, '2h': 7200, '1d': 86400
+}
+
+
+def timeframe_seconds(target_tf: str) -> Optional[int]:
+    return TF_SECONDS.get(target_tf) or interval_to_seconds(target_tf)
+
+
+def bucket_ohlcv(
+    wall_ms: np.ndarray,
+    opens: np.ndarray,
+    highs: np.ndarray,
+    lows: np.ndarray,
+    closes: np.ndarray,
+    volumes: np.ndarray,
+    bucket_ms: int,
+) -> Dict[str, np.ndarray]:
+    """
+    Columnar OHLCV bucketing kernel. Inputs must be sorted by time.
+
+    Buckets are anchored at midnight of the first bar's (wall-clock) day, the
+    same origin pandas' resample uses, so for every bucket that divides a day
+    this equals plain epoch alignment. Empty buckets simply don't appear.
+    Returns the bucket start (wall-clock ms) plus first/max/min/last/sum
+    columns.
+    """
+    origin = (wall_ms[0] // _DAY_MS) * _DAY_MS
+    ids = (wall_ms - origin) // bucket_ms
+    boundaries = np.flatnonzero(np.diff(ids)) + 1
+    starts = np.concatenate(([0], boundaries))
+    ends = np.concatenate((boundaries - 1, [len(ids) - 1]))
+
+    return {
+        "start": origin + ids[starts] * bucket_ms,
+        "open": opens[starts],
+        "high": np.fmax.reduceat(highs, starts),
+        "low": np.fmin.reduceat(lows, starts),
+        "close": closes[ends],
+        # pandas' sum treats missing volume as 0
+        "volume": np.add.reduceat(np.nan_to_num(volumes), starts),
+    }
+
 
 class CandleAggregator:
     """
     Service to aggregate base candles into higher timeframes.
     Necessary for NIFTY free data (Yahoo) which may not provide 2m, 3m etc.
     """
-    
+
+    @staticmethod
+    def aggregate_columns(candles: Union[CandleSeries, List[MarketCandle]], target_tf: str) -> Optional[Dict[str, np.ndarray]]:
+        """
+        Columnar aggregation: time/open/high/low/close/volume arrays, one
+        entry per non-empty bucket. None if target_tf isn't understood.
+        """
+        bucket_seconds = timeframe_seconds(target_tf)
+        if bucket_seconds is None:
+            return None
+        if not isinstance(candles, CandleSeries):
+            candles = CandleSeries.from_candles(candles)
+        if not len(candles):
+            return {name: np.empty(0) for name in ("time", "open", "high", "low", "close", "volume")}
+
+        # Bin on the exchange wall clock, like pandas did on the tz-aware index.
+        # Naive (local-time) bars were binned and reported as if UTC.
+        offset = candles.utc_offset_ms()
+        report_offset = offset if candles.tz is not None else 0
+        cols = bucket_ohlcv(
+            candles.timestamp + offset,
+            candles.open, candles.high, candles.low, candles.close, candles.volume,
+            bucket_seconds * 1000,
+        )
+        # resample().dropna() drops buckets with a missing open/close
+        keep = ~(np.isnan(cols["open"]) | np.isnan(cols["close"]))
+        return {
+            "time": ((cols.pop("start") - report_offset) // 1000)[keep],
+            **{name: values[keep] for name, values in cols.items()},
+        }
+
     @staticmethod
-    def aggregate_candles(candles: List[MarketCandle], target_tf: str) -> List[Dict[str, Any]]:
+    def aggregate_candles(candles: Union[CandleSeries, List[MarketCandle]], target_tf: str) -> List[Dict[str, Any]]:
         """
         Aggregates base candles to target timeframe.
         target_tf format: '2m', '3m', '10m', '15m'
         """
         if not candles:
             return []
-            
-        # Convert to DataFrame
-        data = [c.dict() for c in candles]
-        df = pd.DataFrame(data)
-        df['timestamp'] = pd.to_datetime(df['timestamp'])
-        df.set_index('timestamp', inplace=True)
-        
-        # Parse timeframe string (e.g. '2m' -> '2T' for pandas)
-        # Simple mapping for now
-        tf_map = {
-            '1m': '1T', '2m': '2T', '3m': '3T', '5m': '5T', 
-            '10m': '10T', '15m': '15T', '30m': '30T', 
-            '1h': '1H', '2h': '2H', '1d': '1D'
-        }
-        resample_rule = tf_map.get(target_tf, target_tf.replace('m', 'T').replace('d', 'D').replace('h', 'H'))
-
-        # Resample logic
-        # OHLCV aggregation
-        agg_dict = {
-            'open': 'first',
-            'high': 'max',
-            'low': 'min',
-            'close': 'last',
-            'volume': 'sum'
-        }
-        
-        try:
-            resampled = df.resample(resample_rule).agg(agg_dict).dropna()
-        except Exception as e:
-            print(f"Aggregation failed: {e}")
+
+        cols = CandleAggregator.aggregate_columns(candles, target_tf)
+        if cols is None:
+            print(f"Aggregation failed: unsupported timeframe {target_tf}")
             return []
-        
+
         # Convert back to list of dicts suitable for Lightweight Charts
         # LWC expects: { time: timestamp/string, open, high, low, close }
-        results = []
-        for time, row in resampled.iterrows():
-            results.append({
-                "time": int(time.timestamp()), # Unix timestamp for charts
-                "open": row['open'],
-                "high": row['high'],
-                "low": row['low'],
-                "close": row['close'],
-                "volume": row['volume']
-            })
-            
-        return results
+        return [
+            {"time": t, "open": o, "high": h, "low": l, "close": c, "volume": v}
+            for t, o, h, l, c, v in zip(
+                cols["time"].tolist(),
+                cols["open"].tolist(),
+                cols["high"].tolist(),
+                cols["low"].tolist(),
+                cols["close"].tolist(),
+                cols["volume"].tolist(),
+            )
+        ]
+
+
+class IncrementalCandleAggregator:
+    """
+    Rolls base bars into one target timeframe one bar at a time.
+
+    Only the last bucket is touched per update: a revision of the forming base
+    bar replaces its contribution, a new base bar in the same bucket extends
+    it, and a base bar past the bucket boundary closes it and opens the next.
+    Produces the same bars as CandleAggregator.aggregate_candles over the
+    same base bars. utc_offset_ms/report_offset_ms follow aggregate_columns.
+    """
+
+    def __init__(self, target_tf: str, max_bars: int = 1000, utc_offset_ms: int = 0, report_offset_ms: int = 0):
+        bucket_seconds = timeframe_seconds(target_tf)
+        if bucket_seconds is None:
+            raise ValueError(f"Unsupported timeframe: {target_tf}")
+        self.target_tf = target_tf
+        self.bucket_ms = bucket_seconds * 1000
+        self.max_bars = max_bars
+        self.utc_offset_ms = utc_offset_ms
+        self.report_offset_ms = report_offset_ms
+        self.bars: List[Dict[str, Any]] = []
+        self._origin: Optional[int] = None
+        self._bucket_id: Optional[int] = None
+        self._base_timestamp: Optional[int] = None
+        # Last bucket aggregated over its closed base bars (forming base bar excluded)
+        self._closed: Optional[Dict[str, float]] = None
+        self._forming: Optional[Dict[str, float]] = None
+
+    @classmethod
+    def for_series(cls, series: CandleSeries, target_tf: str, max_bars: int = 1000) -> "IncrementalCandleAggregator":
+        offset = series.utc_offset_ms()
+        return cls(target_tf, max_bars, utc_offset_ms=offset, report_offset_ms=offset if series.tz is not None else 0)
+
+    @property
+    def last_base_timestamp(self) -> Optional[int]:
+        return self._base_timestamp
+
+    def update(self, timestamp: int, open_: float, high: float, low: float, close: float, volume: float) -> Tuple[Optional[Dict[str, Any]], bool]:
+        """
+        Feeds one base bar (timestamp in epoch ms). Returns (last_bar,
+        opened_new_bucket); last_bar is None when the base bar is older than
+        what we've already folded in.
+        """
+        if self._base_timestamp is not None and timestamp < self._base_timestamp:
+            return None, False
+
+        wall = timestamp + self.utc_offset_ms
+        if self._origin is None:
+            self._origin = (wall // _DAY_MS) * _DAY_MS
+        bucket_id = (wall - self._origin) // self.bucket_ms
+        bar = {"open": open_, "high": high, "low": low, "close": close, "volume": volume if volume == volume else 0.0}
+
+        new_bucket = bucket_id != self._bucket_id
+        if new_bucket:
+            self._bucket_id = bucket_id
+            self._closed = None
+            self.bars.append({"time": (self._origin + bucket_id * self.bucket_ms - self.report_offset_ms) // 1000})
+            if len(self.bars) > self.max_bars:
+                del self.bars[0]
+        elif timestamp != self._base_timestamp:
+            self._closed = self._combine(self._closed, self._forming)
+
+        self._forming = bar
+        self._base_timestamp = timestamp
+        self.bars[-1].update(self._combine(self._closed, bar))
+        return self.bars[-1], new_bucket
+
+    def update_from_series(self, series: CandleSeries) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Folds in every base bar at or after the last one seen. Returns the
+        touched output bars (oldest first) and how many buckets were opened.
+        """
+        if self._base_timestamp is not None:
+            series = series.since(self._base_timestamp)
+        touched: List[Dict[str, Any]] = []
+        opened = 0
+        for row in zip(series.timestamp.tolist(), series.open.tolist(), series.high.tolist(),
+                       series.low.tolist(), series.close.tolist(), series.volume.tolist()):
+            bar, new_bucket = self.update(*row)
+            if bar is None:
+                continue
+            opened += int(new_bucket)
+            if not touched or touched[-1] is not bar:
+                touched.append(bar)
+        return [dict(b) for b in touched], opened
+
+    @staticmethod
+    def _combine(head: Optional[Dict[str, float]], tail: Dict[str, float]) -> Dict[str, float]:
+        if head is None:
+            return dict(tail)
+        return {
+            "open": head["open"],
+            "high": max(head["high"], tail["high"]),
+            "low": min(head["low"], tail["low"]),
+            "close": tail["close"],
+            "volume": head["volume"] + tail["volume"],
+        }
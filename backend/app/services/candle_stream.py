@@ -0,0 +1,210 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+from fastapi import WebSocket
+from app.services.asset_context import AssetContext, asset_context
+from app.services.candle_aggregator import IncrementalCandleAggregator, timeframe_seconds
+from app.services.signal_scheduler import signal_scheduler
+from app.services.symbol_registry import Instrument
+from app.services.websocket_manager import ConnectionManager, manager as ws_manager, encode
+
+Admit = Callable[[str], Awaitable[Instrument]]
+
+
+def base_timeframe_for(provider: str, tf: str) -> Tuple[str, int]:
+    """Base interval and bar count to fetch for a chart timeframe."""
+    if provider == "yfinance":
+        # Yahoo supports: 1m, 2m, 5m, 15m, 30m, 60m, 90m, 1h, 1d, 5d, 1wk, 1mo, 3mo
+        # Fetch a granular base and aggregate; 1m data is limited to 7 days.
+        if tf in ['1m', '2m', '3m', '5m']:
+            return "1m", 500  # Aggr 5m from 1m needs 5x candles
+        if tf in ['10m', '15m', '30m']:
+            return "5m", 300  # Aggr 30m from 5m needs 6x candles
+        if tf in ['1h', '2h']:
+            return "60m", 200  # Yahoo uses 60m
+        return "1d", 100
+    # Binance serves every interval, but the aggregator works best with granular data
+    if tf in ['1d']:
+        return "1d", 100
+    if tf in ['1h', '2h']:
+        return "1h", 200
+    return "1m", 1000
+
+
+class CandleStream:
+    """
+    Live chart bars for one (asset, timeframe).
+
+    The base series is re-read from the asset's connector every update
+    interval (served from cache/stream, so cheap) and folded into an
+    IncrementalCandleAggregator; only the bars it touched, i.e. the forming
+    bar and any newly opened ones, are published as a delta. Every delta
+    bumps seq, so a client that sees a gap asks for a resync and gets the
+    full snapshot again. The snapshot message is serialized once per seq.
+    Each poll goes through admit first, which keeps a streamed asset from
+    being dropped as idle.
+    """
+
+    def __init__(
+        self, instrument: Instrument, tf: str, context: AssetContext, manager: ConnectionManager,
+        admit: Optional[Admit] = None,
+    ):
+        self.instrument = instrument
+        self.tf = tf
+        self.topic = f"candles:{instrument.key}:{tf}"
+        self.base_tf, self.limit = base_timeframe_for(instrument.provider, tf)
+        self.context = context
+        self.manager = manager
+        self.admit = admit
+        self.clients: Set[WebSocket] = set()
+        self.seq = 0
+        self.aggregator: Optional[IncrementalCandleAggregator] = None
+        self._snapshot: Optional[Tuple[int, str]] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def _fetch(self):
+        connector = self.context.get_connector_for(self.instrument.key)
+        return await connector.get_candle_series(self.instrument.symbol, self.base_tf, self.limit)
+
+    async def start(self):
+        series = await self._fetch()
+        self.aggregator = IncrementalCandleAggregator.for_series(series, self.tf, max_bars=self.limit)
+        self.aggregator.update_from_series(series)
+        self._task = asyncio.create_task(self._run(), name=f"candle-stream:{self.topic}")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def snapshot_message(self) -> str:
+        if self._snapshot is None or self._snapshot[0] != self.seq:
+            self._snapshot = (self.seq, encode({
+                "type": "snapshot",
+                "asset": self.instrument.key,
+                "tf": self.tf,
+                "seq": self.seq,
+                "bars": self.aggregator.bars if self.aggregator else [],
+            }))
+        return self._snapshot[1]
+
+    async def poll(self) -> Optional[List[Dict[str, Any]]]:
+        """Fold in new base bars and publish the touched bars; returns them (None if unchanged)."""
+        series = await self._fetch()
+        # The last base bar is always re-read (it may be forming); a poll
+        # that only re-reads it unchanged publishes nothing.
+        forming = dict(self.aggregator.bars[-1]) if self.aggregator.bars else None
+        touched, _ = self.aggregator.update_from_series(series)
+        if not touched or touched == [forming]:
+            return None
+        self.seq += 1
+        await self.manager.broadcast(encode({
+            "type": "delta",
+            "asset": self.instrument.key,
+            "tf": self.tf,
+            "seq": self.seq,
+            "bars": touched,
+        }), topic=self.topic)
+        return touched
+
+    async def _run(self):
+        interval = self.instrument.update_interval
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                if self.admit is not None:
+                    await self.admit(self.instrument.key)
+                await self.poll()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"CandleStream {self.topic}: poll failed: {e}")
+
+
+class CandleStreamHub:
+    """
+    One CandleStream per subscribed (asset, timeframe), stopped when its last
+    client leaves. Assets are taken in through admit (the scheduler's, so
+    ad-hoc pairs get the same probe, cap and eviction as on every other path).
+    """
+
+    def __init__(
+        self, context: AssetContext = asset_context, manager: ConnectionManager = ws_manager,
+        admit: Optional[Admit] = None,
+    ):
+        self.context = context
+        self.manager = manager
+        self.admit = admit
+        self._streams: Dict[Tuple[str, str], CandleStream] = {}
+        self._starting: Dict[Tuple[str, str], asyncio.Task] = {}
+
+    async def _stream(self, asset: str, tf: str) -> CandleStream:
+        if timeframe_seconds(tf) is None:
+            raise ValueError(f"Unsupported timeframe: {tf}")
+        instrument = await self.admit(asset) if self.admit is not None else self.context.resolve(asset)
+        key = (instrument.key, tf)
+        stream = self._streams.get(key)
+        if stream is not None:
+            return stream
+
+        # Concurrent first subscribers share one initial load.
+        task = self._starting.get(key)
+        if task is None:
+            stream = CandleStream(instrument, tf, self.context, self.manager, self.admit)
+            task = self._starting[key] = asyncio.create_task(stream.start())
+            try:
+                await task
+            finally:
+                self._starting.pop(key, None)
+            self._streams[key] = stream
+            return stream
+        await asyncio.shield(task)
+        return self._streams[key]
+
+    async def subscribe(self, websocket: WebSocket, asset: str, tf: str) -> CandleStream:
+        """Queue the snapshot and subscribe to the deltas. Raises ValueError for unknown assets/timeframes."""
+        stream = await self._stream(asset, tf)
+        self.manager.send(websocket, stream.snapshot_message())
+        self.manager.subscribe(websocket, [stream.topic])
+        stream.clients.add(websocket)
+        return stream
+
+    async def resync(self, websocket: WebSocket, asset: str, tf: str):
+        stream = self._streams.get((self.context.resolve(asset).key, tf))
+        if stream is None or websocket not in stream.clients:
+            await self.subscribe(websocket, asset, tf)
+        else:
+            self.manager.send(websocket, stream.snapshot_message())
+
+    async def unsubscribe(self, websocket: WebSocket, asset: str, tf: str):
+        stream = self._streams.get((self.context.resolve(asset).key, tf))
+        if stream is not None:
+            await self._leave(websocket, stream)
+
+    async def drop(self, websocket: WebSocket):
+        """Remove a disconnected client from every stream."""
+        for stream in list(self._streams.values()):
+            if websocket in stream.clients:
+                await self._leave(websocket, stream)
+
+    async def _leave(self, websocket: WebSocket, stream: CandleStream):
+        stream.clients.discard(websocket)
+        self.manager.unsubscribe(websocket, [stream.topic])
+        if not stream.clients:
+            self._streams.pop((stream.instrument.key, stream.tf), None)
+            await stream.stop()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            stream.topic: {"clients": len(stream.clients), "seq": stream.seq}
+            for stream in self._streams.values()
+        }
+
+    async def close(self):
+        streams = list(self._streams.values())
+        self._streams.clear()
+        for stream in streams:
+            await stream.stop()
+
+
+candle_streams = CandleStreamHub(admit=signal_scheduler.admit)
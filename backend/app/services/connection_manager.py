@@ -1,4 +1,13 @@
-from typing import Dict, Any
+from datetime import datetime
+from typing import Dict, Any, Iterable, Tuple
+from app.core.metrics import metrics
+from app.services.asset_context import asset_context
+from app.services.connector_registry import connector_registry
+from app.services.websocket_manager import manager as ws_manager
+from app.services.candle_stream import candle_streams
+from app.services.shared_state import shared_state
+from app.services.signal_log_writer import signal_log_writer
+from app.services.option_chain_recorder import option_chain_recorder
 
 class ConnectionManager:
     """
@@ -14,18 +23,63 @@ class ConnectionManager:
         Check health. For free edition, we assume ready.
         Real implementation would ping 8.8.8.8 or yfinance/binance status.
         """
+        heartbeats = asset_context.heartbeats()
+        beats = [beat for beat in heartbeats.values() if beat is not None]
         return {
             "market_data": {
                 "status": "connected",
                 "provider": "yfinance/binance",
-                "last_heartbeat": None
+                "last_heartbeat": max(beats).isoformat() if beats else None,
+                "heartbeats": {provider: beat.isoformat() if beat else None for provider, beat in heartbeats.items()},
+                "cache": asset_context.cache_stats(),
+                "pools": connector_registry.pool_stats()
             },
             "news_feed": {
                 "status": "connected",
                 "provider": "rss/public",
-                "last_heartbeat": None
+                "last_heartbeat": None  # no news connector is wired up yet
             },
+            "websockets": ws_manager.stats(),
+            "candle_streams": candle_streams.stats(),
+            "shared_state": shared_state.backend,
+            "signal_log": signal_log_writer.stats(),
+            "option_chain_store": option_chain_recorder.stats(),
             "system_status": "ready" # ALWAYS READY for Free Edition
         }
+    def collect_metrics(self) -> Iterable[Tuple[str, str, str, list]]:
+        """/metrics families read from the components' own counters at scrape time."""
+        now = datetime.now()
+        yield "market_data_heartbeat_age_seconds", "gauge", "Seconds since a provider last delivered data", [
+            (None, {"provider": provider}, (now - beat).total_seconds())
+            for provider, beat in asset_context.heartbeats().items() if beat is not None
+        ]
+        cache = asset_context.cache_stats()
+        lookups = []
+        for provider, stats in cache.items():
+            for result in ("hits", "misses", "coalesced"):
+                if result in stats:
+                    lookups.append((None, {"provider": provider, "result": result}, stats[result]))
+        yield "market_data_cache_lookups_total", "counter", "Market data cache lookups by outcome", lookups
+        yield "market_data_cache_hit_ratio", "gauge", "Share of lookups served without an upstream call", [
+            (None, {"provider": provider}, stats["hit_rate"]) for provider, stats in cache.items() if "hit_rate" in stats
+        ]
+        pools = connector_registry.pool_stats()
+        yield "upstream_http_requests_total", "counter", "HTTP requests sent to market data providers", [
+            (None, {"provider": provider}, stats.get("requests", 0)) for provider, stats in pools.items()
+        ]
+        yield "upstream_http_errors_total", "counter", "Provider HTTP responses with status >= 400", [
+            (None, {"provider": provider}, stats.get("errors", 0)) for provider, stats in pools.items()
+        ]
+        yield "upstream_http_connections", "gauge", "Open pooled connections per provider", [
+            (None, {"provider": provider}, stats.get("connections", 0)) for provider, stats in pools.items()
+        ]
+        ws = ws_manager.stats()
+        yield "websocket_clients", "gauge", "Connected /ws clients", [(None, {}, ws["clients"])]
+        yield "websocket_dropped_total", "counter", "Messages dropped for slow /ws clients", [(None, {}, ws["dropped"])]
+        log = signal_log_writer.stats()
+        yield "audit_log_queued", "gauge", "Signal log rows waiting to be written", [(None, {}, log["queued"])]
+        yield "audit_log_dropped_total", "counter", "Signal log rows dropped on a full queue", [(None, {}, log["dropped"])]
+
 
 manager = ConnectionManager()
+metrics.add_collector(manager.collect_metrics)
@@ -2,6 +2,7 @@ from abc import ABC, abstractmethod
 from typing import List, Optional
 from datetime import datetime
 from app.schemas.market_data import MarketCandle, OptionChain, NewsItem
+from app.schemas.candle_series import CandleSeries
 
 class MarketDataConnector(ABC):
     @abstractmethod
@@ -13,9 +14,26 @@ class MarketDataConnector(ABC):
     async def get_historical_candles(self, symbol: str, interval: str, limit: int) -> List[MarketCandle]:
         """Get historical candles."""
         pass
-    
-    # Options Chain might be N/A for Free Edition or handled differently
-    # We'll keep it as optional or raise NotImplementedError
+
+    async def get_candle_series(self, symbol: str, interval: str, limit: int) -> CandleSeries:
+        """
+        Get historical candles as a columnar CandleSeries.
+        Connectors that can build the arrays directly should override this;
+        the default converts the MarketCandle list.
+        """
+        return CandleSeries.from_candles(await self.get_historical_candles(symbol, interval, limit))
+
+
+class OptionChainConnector(ABC):
+    """
+    Option chain feed, separate from MarketDataConnector because the free
+    spot feeds don't carry chains; configured via OPTION_CHAIN_PROVIDER.
+    """
+    @abstractmethod
+    async def get_option_chain(self, symbol: str, expiry: Optional[datetime] = None) -> Optional[OptionChain]:
+        """Latest chain for the underlying (nearest expiry if none is given), or None if unavailable."""
+        pass
+
 
 class NewsConnector(ABC):
     @abstractmethod
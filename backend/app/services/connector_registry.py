@@ -0,0 +1,127 @@
+from typing import Any, Callable, Dict, Optional
+import httpx
+from app.core.config import settings
+from app.services.connector_interface import MarketDataConnector, OptionChainConnector
+from app.services.symbol_registry import symbol_registry
+from app.services.connectors.binance_connector import BinanceConnector
+from app.services.connectors.file_option_chain_connector import FileOptionChainConnector
+from app.services.connectors.synthetic_connector import SyntheticConnector
+from app.services.connectors.yfinance_connector import YFinanceConnector
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401 - httpx only needs it importable
+        return True
+    except ImportError:
+        return False
+
+
+class ConnectorRegistry:
+    """
+    Process-wide owner of market data connectors and their HTTP pools.
+
+    Every provider gets exactly one connector, created on first use, and
+    HTTP providers share one tuned httpx.AsyncClient (keep-alive, HTTP/2 when
+    h2 is installed, bounded connections). The app's shutdown hook closes
+    everything; pool_stats() is exposed through the health check.
+    """
+
+    def __init__(self):
+        self._factories: Dict[str, Callable[[], MarketDataConnector]] = {
+            "binance": lambda: BinanceConnector(client=self.http_client("binance")),
+            "yfinance": lambda: YFinanceConnector(),
+            "synthetic": lambda: SyntheticConnector.from_settings(symbol_registry.for_provider("synthetic")),
+        }
+        self._option_chain_factories: Dict[str, Callable[[], OptionChainConnector]] = {
+            "file": lambda: FileOptionChainConnector(settings.OPTION_CHAIN_DIR),
+        }
+        self._connectors: Dict[str, Any] = {}
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._client_stats: Dict[str, Dict[str, Any]] = {}
+        self.http2 = settings.HTTP2_ENABLED and _http2_available()
+        if settings.HTTP2_ENABLED and not self.http2:
+            print("ConnectorRegistry: h2 not installed, using HTTP/1.1 keep-alive")
+
+    @property
+    def providers(self):
+        return list(self._factories.keys())
+
+    def get(self, provider: str) -> MarketDataConnector:
+        connector = self._connectors.get(provider)
+        if connector is None:
+            if provider not in self._factories:
+                raise ValueError(f"Unknown provider: {provider}")
+            connector = self._connectors[provider] = self._factories[provider]()
+        return connector
+
+    def option_chain(self, provider: Optional[str] = None) -> Optional[OptionChainConnector]:
+        """Option chain feed (OPTION_CHAIN_PROVIDER by default), or None when none is configured."""
+        provider = provider or settings.OPTION_CHAIN_PROVIDER
+        if not provider:
+            return None
+        key = f"option_chain:{provider}"
+        connector = self._connectors.get(key)
+        if connector is None:
+            if provider not in self._option_chain_factories:
+                raise ValueError(f"Unknown option chain provider: {provider}")
+            connector = self._connectors[key] = self._option_chain_factories[provider]()
+        return connector
+
+    def http_client(self, provider: str) -> httpx.AsyncClient:
+        """Shared pooled client for a provider (one pool per upstream host)."""
+        client = self._clients.get(provider)
+        if client is None or client.is_closed:
+            stats = self._client_stats[provider] = {"requests": 0, "responses": 0, "errors": 0}
+
+            async def on_request(request: httpx.Request):
+                stats["requests"] += 1
+
+            async def on_response(response: httpx.Response):
+                stats["responses"] += 1
+                if response.status_code >= 400:
+                    stats["errors"] += 1
+
+            client = self._clients[provider] = httpx.AsyncClient(
+                timeout=settings.HTTP_TIMEOUT,
+                verify=False,
+                follow_redirects=True,
+                http2=self.http2,
+                limits=httpx.Limits(
+                    max_connections=settings.HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE,
+                    keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY,
+                ),
+                event_hooks={"request": [on_request], "response": [on_response]},
+            )
+        return client
+
+    def pool_stats(self) -> Dict[str, Dict[str, Any]]:
+        stats = {}
+        for provider, client in self._clients.items():
+            entry = dict(self._client_stats.get(provider, {}))
+            entry["http2"] = self.http2
+            entry["closed"] = client.is_closed
+            # httpcore's pool is the only place that knows live connections.
+            pool = getattr(getattr(client, "_transport", None), "_pool", None)
+            connections = list(getattr(pool, "connections", []) or [])
+            entry["connections"] = len(connections)
+            entry["idle"] = sum(1 for c in connections if c.is_idle())
+            stats[provider] = entry
+        return stats
+
+    async def close(self):
+        for connector in self._connectors.values():
+            close = getattr(connector, "close", None)
+            if close is not None:
+                try:
+                    await close()
+                except Exception as e:
+                    print(f"ConnectorRegistry: error closing connector: {e!r}")
+        for client in self._clients.values():
+            await client.aclose()
+        self._connectors.clear()
+        self._clients.clear()
+
+
+connector_registry = ConnectorRegistry()
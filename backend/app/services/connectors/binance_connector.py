@@ -1,17 +1,24 @@
 import httpx
-from typing import List
+import numpy as np
+from typing import List, Optional, Set
 from datetime import datetime
 from app.services.connector_interface import MarketDataConnector
 from app.schemas.market_data import MarketCandle
+from app.schemas.candle_series import CandleSeries
 
 class BinanceConnector(MarketDataConnector):
     """
     Fetches real-time data from Binance via direct HTTP requests (Public API).
     Robust against CCXT/SSL issues in some environments.
+    Pass a shared pooled client (see ConnectorRegistry); without one the
+    connector opens and owns its own.
     """
-    def __init__(self):
+    MAX_KLINES = 1000  # Binance rejects larger klines requests
+
+    def __init__(self, client: Optional[httpx.AsyncClient] = None):
         self.base_url = "https://api.binance.com/api/v3"
-        self.client = httpx.AsyncClient(timeout=10.0, verify=False, follow_redirects=True)
+        self._owns_client = client is None
+        self.client = client or httpx.AsyncClient(timeout=10.0, verify=False, follow_redirects=True)
 
     async def get_latest_price(self, symbol: str) -> float:
         # symbol needs to be simpler for raw API, e.g. "BTC/USDT" -> "BTCUSDT"
@@ -29,43 +36,51 @@ class BinanceConnector(MarketDataConnector):
             return 0.0
 
     async def get_historical_candles(self, symbol: str, interval: str, limit: int) -> List[MarketCandle]:
+        return (await self.get_candle_series(symbol, interval, limit)).to_candles()
+
+    async def get_candle_series(self, symbol: str, interval: str, limit: int) -> CandleSeries:
         clean_symbol = symbol.replace("/", "").upper()
         try:
             # klines: [Open time, Open, High, Low, Close, Volume, Close time, ...]
             response = await self.client.get(f"{self.base_url}/klines", params={
                 "symbol": clean_symbol,
                 "interval": interval,
-                "limit": limit
+                "limit": min(limit, self.MAX_KLINES)
             })
             
             if response.status_code == 200:
-                data = response.json()
-                candles = []
-                for kline in data:
-                    # kline[0] is Open Time in ms
-                    ts = kline[0]
-                    o = float(kline[1])
-                    h = float(kline[2])
-                    l = float(kline[3])
-                    c = float(kline[4])
-                    v = float(kline[5])
-                    
-                    candles.append(MarketCandle(
-                        timestamp=datetime.fromtimestamp(ts / 1000.0),
-                        open=o,
-                        high=h,
-                        low=l,
-                        close=c,
-                        volume=v,
-                        source="binance"
-                    ))
-                return candles
+                return self.klines_to_series(response.json())
             else:
                 print(f"Error fetching Binance candles: {response.status_code} {response.text}")
-                return []
+                return CandleSeries.empty(source="binance")
         except Exception as e:
             print(f"Exception fetching Binance history for {symbol}: {e}")
-            return []
+            return CandleSeries.empty(source="binance")
+
+    async def get_exchange_symbols(self) -> Set[str]:
+        """Spot pairs currently trading (e.g. SOLUSDT); empty if exchangeInfo is unavailable."""
+        try:
+            response = await self.client.get(f"{self.base_url}/exchangeInfo", params={"permissions": "SPOT"})
+            if response.status_code == 200:
+                return {s["symbol"] for s in response.json().get("symbols", []) if s.get("status") == "TRADING"}
+            print(f"Error fetching Binance exchangeInfo: {response.status_code} {response.text}")
+        except Exception as e:
+            print(f"Exception fetching Binance exchangeInfo: {e}")
+        return set()
+
+    @staticmethod
+    def klines_to_series(klines: List[list]) -> CandleSeries:
+        if not klines:
+            return CandleSeries.empty(source="binance")
+        # kline[0] is Open Time in ms; prices/volume arrive as strings
+        ohlcv = np.array([k[1:6] for k in klines], dtype=np.float64)
+        return CandleSeries.from_arrays(
+            [k[0] for k in klines],
+            ohlcv[:, 0], ohlcv[:, 1], ohlcv[:, 2], ohlcv[:, 3], ohlcv[:, 4],
+            source="binance"
+        )
     
     async def close(self):
-        await self.client.aclose()
+        # A shared client belongs to whoever handed it to us.
+        if self._owns_client:
+            await self.client.aclose()
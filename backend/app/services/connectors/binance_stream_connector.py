@@ -0,0 +1,269 @@
+import asyncio
+import json
+import random
+import time
+from typing import Dict, List, Optional, Set, Tuple
+import numpy as np
+import websockets
+from app.core.intervals import interval_to_seconds
+from app.services.connector_interface import MarketDataConnector
+from app.services.connectors.binance_connector import BinanceConnector
+from app.schemas.market_data import MarketCandle
+from app.schemas.candle_series import CandleSeries
+
+
+class BinanceStreamConnector(MarketDataConnector):
+    """
+    Streams Binance kline + aggTrade WebSocket data into in-memory rolling
+    candle windows per (symbol, interval).
+
+    The first request for a symbol/interval subscribes to its streams and
+    seeds the window from REST; after that get_historical_candles and
+    get_latest_price are local reads. Streams requested while a connection
+    is up (or still being opened) are added with SUBSCRIBE and only count
+    as live once Binance acknowledges them; a failed or rejected SUBSCRIBE
+    forces a reconnect, which subscribes everything through the URL.
+    Dropped connections are retried with exponential backoff and the
+    missed span is backfilled from REST. Reads fall back to REST whenever
+    their stream isn't live. release() unsubscribes a symbol and drops its
+    windows once nobody needs it.
+    """
+
+    def __init__(
+        self,
+        rest: Optional[MarketDataConnector] = None,
+        ws_url: str = "wss://stream.binance.com:9443",
+        window_size: int = 1000,
+        reconnect_min: float = 1.0,
+        reconnect_max: float = 30.0,
+    ):
+        self.rest = rest or BinanceConnector()
+        self.ws_url = ws_url.rstrip("/")
+        self.window_size = window_size
+        self.reconnect_min = reconnect_min
+        self.reconnect_max = reconnect_max
+
+        self._windows: Dict[Tuple[str, str], CandleSeries] = {}
+        self._prices: Dict[str, float] = {}
+        self._streams: Set[str] = set()      # wanted
+        self._subscribed: Set[str] = set()   # confirmed on the current connection
+        self._pending: Dict[int, List[str]] = {}  # SUBSCRIBE id -> streams awaiting the ack
+        self._subscribe_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._ws = None
+        self._has_streams = asyncio.Event()
+        self._request_id = 0
+
+        self.live = False
+        self.messages = 0
+        self.reconnects = 0
+        self.backfills = 0
+        self.last_message_at: Optional[float] = None
+
+    @staticmethod
+    def _clean(symbol: str) -> str:
+        return symbol.replace("/", "").upper()
+
+    async def get_latest_price(self, symbol: str) -> float:
+        clean = self._clean(symbol)
+        await self._ensure_streams([f"{clean.lower()}@aggTrade"])
+        price = self._prices.get(clean)
+        if self._is_live(f"{clean.lower()}@aggTrade") and price:
+            return price
+        return await self.rest.get_latest_price(symbol)
+
+    async def get_historical_candles(self, symbol: str, interval: str, limit: int) -> List[MarketCandle]:
+        return (await self.get_candle_series(symbol, interval, limit)).to_candles()
+
+    async def get_candle_series(self, symbol: str, interval: str, limit: int) -> CandleSeries:
+        clean = self._clean(symbol)
+        key = (clean, interval)
+        if limit > self.window_size:
+            return await self.rest.get_candle_series(clean, interval, limit)
+
+        if key not in self._windows:
+            async with self._subscribe_lock:
+                if key not in self._windows:
+                    seed = await self.rest.get_candle_series(clean, interval, self.window_size)
+                    if not len(seed):
+                        return seed
+                    self._windows[key] = seed.copy(capacity=self.window_size)
+                    await self._ensure_streams([f"{clean.lower()}@kline_{interval}"])
+                    return seed.tail(limit)
+
+        if not self._is_live(f"{clean.lower()}@kline_{interval}"):
+            # Stream is down (or not subscribed yet): serve REST and fold it in so the window stays current.
+            fetched = await self.rest.get_candle_series(clean, interval, limit)
+            self._merge(key, fetched)
+            return fetched
+        # Detached copy: the window's forming bar keeps changing under us.
+        return self._windows[key].tail(limit).copy()
+
+    def _is_live(self, stream: str) -> bool:
+        return self.live and stream in self._subscribed
+
+    async def _ensure_streams(self, streams: List[str]):
+        new = [s for s in streams if s not in self._streams]
+        if not new:
+            return
+        self._streams.update(new)
+        self._has_streams.set()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="binance-stream")
+        elif self._ws is not None:
+            await self._subscribe(self._ws, new)
+        # Otherwise the connection is still being opened: _run subscribes
+        # whatever its URL missed as soon as it is up.
+
+    async def _subscribe(self, ws, streams: List[str]):
+        self._request_id += 1
+        self._pending[self._request_id] = streams
+        try:
+            await ws.send(json.dumps({"method": "SUBSCRIBE", "params": streams, "id": self._request_id}))
+        except Exception as e:
+            print(f"BinanceStream: subscribe failed, reconnecting: {e}")
+            await self._reconnect(ws)
+
+    async def release(self, symbol: str):
+        """Stop streaming a symbol: UNSUBSCRIBE its streams and drop its windows and price."""
+        clean = self._clean(symbol)
+        prefix = f"{clean.lower()}@"
+        streams = sorted(s for s in self._streams if s.startswith(prefix))
+        self._streams.difference_update(streams)
+        self._subscribed.difference_update(streams)
+        for key in [k for k in self._windows if k[0] == clean]:
+            del self._windows[key]
+        self._prices.pop(clean, None)
+        ws = self._ws
+        if not streams or ws is None:
+            return  # the next connection's URL leaves them out
+        self._request_id += 1
+        try:
+            await ws.send(json.dumps({"method": "UNSUBSCRIBE", "params": streams, "id": self._request_id}))
+        except Exception as e:
+            print(f"BinanceStream: unsubscribe failed, reconnecting: {e}")
+            await self._reconnect(ws)
+
+    @staticmethod
+    async def _reconnect(ws):
+        # Closing ends _run's read loop; the next connection subscribes every stream through its URL.
+        try:
+            await ws.close()
+        except Exception:
+            pass
+
+    async def _run(self):
+        delay = self.reconnect_min
+        while True:
+            await self._has_streams.wait()
+            streams = sorted(self._streams)
+            url = f"{self.ws_url}/stream?streams={'/'.join(streams)}"
+            try:
+                async with websockets.connect(url, ping_interval=20, max_queue=1024) as ws:
+                    self._ws = ws
+                    self._subscribed = set(streams)
+                    self._pending.clear()
+                    late = [s for s in self._streams if s not in self._subscribed]
+                    if late:
+                        await self._subscribe(ws, late)
+                    # Covers bars closed between the REST seed (or the last
+                    # disconnect) and the stream coming up.
+                    await self._backfill_gaps()
+                    self.live = True
+                    delay = self.reconnect_min
+                    async for raw in ws:
+                        if self._handle(raw) is False:
+                            await self._reconnect(ws)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"BinanceStream: connection error: {e}")
+            finally:
+                self._ws = None
+                self.live = False
+                self._subscribed = set()
+
+            self.reconnects += 1
+            await asyncio.sleep(delay + random.uniform(0, delay / 2))
+            delay = min(delay * 2, self.reconnect_max)
+
+    def _ack(self, message: dict) -> bool:
+        """SUBSCRIBE response: mark its streams subscribed; False if Binance rejected it."""
+        streams = self._pending.pop(message.get("id"), None)
+        if streams is None:
+            return True
+        if message.get("error"):
+            print(f"BinanceStream: subscribe rejected, reconnecting: {message['error']}")
+            return False
+        self._subscribed.update(streams)
+        return True
+
+    def _handle(self, raw):
+        try:
+            message = json.loads(raw)
+        except ValueError:
+            return
+        if isinstance(message, dict) and "id" in message and "data" not in message:
+            return self._ack(message)
+        data = message.get("data", message)
+        event = data.get("e") if isinstance(data, dict) else None
+        if event == "kline":
+            k = data["k"]
+            window = self._windows.get((self._clean(k["s"]), k["i"]))
+            if window is not None:
+                window.upsert(int(k["t"]), float(k["o"]), float(k["h"]), float(k["l"]), float(k["c"]), float(k["v"]))
+        elif event == "aggTrade":
+            self._prices[self._clean(data["s"])] = float(data["p"])
+        else:
+            return
+        self.messages += 1
+        self.last_message_at = time.time()
+
+    def _merge(self, key: Tuple[str, str], fetched: CandleSeries):
+        if not len(fetched):
+            return
+        window = self._windows.get(key)
+        if window is None:
+            return
+        first = int(fetched.timestamp[0])
+        step = interval_to_seconds(key[1])
+        keep = window[:0]
+        if len(window) and not (step and first - window.last_timestamp > step * 1000):
+            # Otherwise the gap is wider than what REST returned: start the window over.
+            keep = window[:int(np.searchsorted(window.timestamp, first, side="left"))]
+        merged = CandleSeries(capacity=self.window_size, tz=window.tz, source=window.source)
+        for part in (keep, fetched):
+            for row in zip(part.timestamp.tolist(), part.open.tolist(), part.high.tolist(),
+                           part.low.tolist(), part.close.tolist(), part.volume.tolist()):
+                merged.append(*row)
+        self._windows[key] = merged
+
+    async def _backfill_gaps(self):
+        for (symbol, interval), window in list(self._windows.items()):
+            step = interval_to_seconds(interval) or 60
+            if len(window):
+                missed = int((time.time() * 1000 - window.last_timestamp) // (step * 1000)) + 2
+            else:
+                missed = self.window_size
+            fetched = await self.rest.get_candle_series(symbol, interval, min(missed, self.window_size))
+            self._merge((symbol, interval), fetched)
+            self.backfills += 1
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "live": self.live,
+            "streams": sorted(self._streams),
+            "subscribed": sorted(self._subscribed),
+            "windows": sorted(f"{symbol}:{interval}" for symbol, interval in self._windows),
+            "messages": self.messages,
+            "reconnects": self.reconnects,
+            "backfills": self.backfills,
+            "last_message_at": self.last_message_at,
+        }
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.rest.close()
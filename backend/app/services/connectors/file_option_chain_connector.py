@@ -0,0 +1,62 @@
+import asyncio
+import os
+from datetime import datetime
+from typing import Dict, List, Optional
+from app.services.connector_interface import OptionChainConnector
+from app.schemas.market_data import OptionChain
+
+
+class FileOptionChainConnector(OptionChainConnector):
+    """
+    Offline stand-in for a live option chain feed.
+
+    Reads OptionChain JSON from `root`: either `<root>/<SYMBOL>.json`, served
+    as-is on every call, or a directory `<root>/<SYMBOL>/` of snapshots that
+    are replayed in file-name order, one per call, holding on the last one.
+    dump() writes snapshots in the same layout, e.g. to record fixtures.
+    """
+    def __init__(self, root: str):
+        self.root = root
+        self._positions: Dict[str, int] = {}
+
+    def _files(self, symbol: str) -> List[str]:
+        folder = os.path.join(self.root, symbol)
+        if os.path.isdir(folder):
+            return [os.path.join(folder, name) for name in sorted(os.listdir(folder)) if name.endswith(".json")]
+        single = folder + ".json"
+        return [single] if os.path.isfile(single) else []
+
+    @staticmethod
+    def _read(path: str) -> OptionChain:
+        with open(path, "rb") as f:
+            return OptionChain.model_validate_json(f.read())
+
+    async def get_option_chain(self, symbol: str, expiry: Optional[datetime] = None) -> Optional[OptionChain]:
+        files = self._files(symbol)
+        if not files:
+            return None
+        position = self._positions.get(symbol, 0)
+        self._positions[symbol] = min(position + 1, len(files) - 1)
+        try:
+            chain = await asyncio.to_thread(self._read, files[min(position, len(files) - 1)])
+        except Exception as e:
+            print(f"Error reading option chain for {symbol}: {e}")
+            return None
+        if expiry is not None and chain.expiry.date() != expiry.date():
+            return None
+        return chain
+
+    def rewind(self, symbol: Optional[str] = None):
+        if symbol is None:
+            self._positions.clear()
+        else:
+            self._positions.pop(symbol, None)
+
+    def dump(self, symbol: str, chain: OptionChain) -> str:
+        """Append a snapshot to <root>/<SYMBOL>/, named by its timestamp."""
+        folder = os.path.join(self.root, symbol)
+        os.makedirs(folder, exist_ok=True)
+        path = os.path.join(folder, chain.timestamp.strftime("%Y%m%dT%H%M%S%f") + ".json")
+        with open(path, "w") as f:
+            f.write(chain.model_dump_json())
+        return path
@@ -0,0 +1,69 @@
+import time
+from datetime import datetime
+from typing import List, Optional
+from app.core.metrics import metrics
+from app.services.connector_interface import MarketDataConnector
+from app.schemas.market_data import MarketCandle
+from app.schemas.candle_series import CandleSeries
+
+_latency = metrics.histogram(
+    "connector_request_seconds", "Upstream market data call latency", ("provider", "method"),
+)
+_errors = metrics.counter(
+    "connector_errors_total", "Upstream calls that raised", ("provider", "method"),
+)
+_empty = metrics.counter(
+    "connector_empty_total", "Upstream calls that returned no data (the connectors swallow most errors)", ("provider", "method"),
+)
+
+
+class InstrumentedConnector(MarketDataConnector):
+    """
+    Times every call into a provider connector and tracks its heartbeat:
+    the last time it returned data. Sits directly on the provider, below
+    the store and cache layers, so only real upstream calls are measured.
+    """
+
+    def __init__(self, inner: MarketDataConnector, provider: str):
+        self.inner = inner
+        self.provider = provider
+        self.last_success: Optional[datetime] = None
+        self.last_error: Optional[datetime] = None
+
+    async def _call(self, method: str, call, is_empty):
+        started = time.perf_counter()
+        try:
+            result = await call
+        except Exception:
+            _errors.inc(provider=self.provider, method=method)
+            self.last_error = datetime.now()
+            raise
+        finally:
+            _latency.observe(time.perf_counter() - started, provider=self.provider, method=method)
+        if is_empty(result):
+            _empty.inc(provider=self.provider, method=method)
+        else:
+            self.last_success = datetime.now()
+        return result
+
+    async def get_latest_price(self, symbol: str) -> float:
+        return await self._call("get_latest_price", self.inner.get_latest_price(symbol), lambda p: not p)
+
+    async def get_historical_candles(self, symbol: str, interval: str, limit: int) -> List[MarketCandle]:
+        return await self._call(
+            "get_historical_candles", self.inner.get_historical_candles(symbol, interval, limit), lambda c: not c,
+        )
+
+    async def get_candle_series(self, symbol: str, interval: str, limit: int) -> CandleSeries:
+        return await self._call(
+            "get_candle_series", self.inner.get_candle_series(symbol, interval, limit), lambda s: not len(s),
+        )
+
+    def __getattr__(self, name):
+        # Provider-specific extras (batching, stats) pass through
+        return getattr(self.inner, name)
+
+    async def close(self):
+        close = getattr(self.inner, "close", None)
+        if close is not None:
+            await close()
@@ -0,0 +1,130 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from datetime import tzinfo
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from app.core.intervals import interval_to_seconds
+from app.db.candle_repository import CandleRepository
+from app.services.connector_interface import MarketDataConnector
+from app.schemas.market_data import MarketCandle
+from app.schemas.candle_series import CandleSeries
+
+
+class PersistentCandleConnector(MarketDataConnector):
+    """
+    Serves candle history from the candle store and only asks the wrapped
+    connector for what the store is missing.
+
+    Per request the stored window is read first, then upstream is asked for
+    the bars since the last stored one (re-fetching that bar, which may have
+    still been forming). A window shorter than requested is backfilled once
+    per process, and for continuous markets (crypto) holes inside the stored
+    window are refetched too. Exchange sessions (NSE) have overnight and
+    weekend holes by design, so those are not treated as gaps.
+
+    Everything fetched is upserted back. If the store is unreachable the
+    request goes straight to the wrapped connector.
+    """
+
+    def __init__(self, inner: MarketDataConnector, store: CandleRepository, continuous: bool = False):
+        self.inner = inner
+        self.store = store
+        self.continuous = continuous
+        # SQLite allows one writer anyway; a single thread keeps writes ordered.
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="candle-store")
+        self._backfilled: Dict[Tuple[str, str], int] = {}
+        self._tz: Dict[Tuple[str, str], Optional[tzinfo]] = {}
+        self._sources: Dict[Tuple[str, str], str] = {}
+        self.store_hits = 0
+        self.upstream_bars = 0
+        self.errors = 0
+
+    async def _run_blocking(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, partial(fn, *args))
+
+    async def get_latest_price(self, symbol: str) -> float:
+        return await self.inner.get_latest_price(symbol)
+
+    async def get_historical_candles(self, symbol: str, interval: str, limit: int) -> List[MarketCandle]:
+        return (await self.get_candle_series(symbol, interval, limit)).to_candles()
+
+    async def get_candle_series(self, symbol: str, interval: str, limit: int) -> CandleSeries:
+        key = (symbol, interval)
+        step_ms = (interval_to_seconds(interval) or 60) * 1000
+        try:
+            stored = await self._run_blocking(
+                self.store.read, symbol, interval, limit, self._tz.get(key), self._sources.get(key, "")
+            )
+        except Exception as e:
+            self.errors += 1
+            print(f"Candle store read failed for {symbol} {interval}: {e!r}")
+            return await self.inner.get_candle_series(symbol, interval, limit)
+
+        count = self._bars_to_fetch(key, stored, limit, step_ms)
+        fetched = await self.inner.get_candle_series(symbol, interval, count)
+        self.upstream_bars += len(fetched)
+        if count < limit:
+            self.store_hits += 1
+        elif len(fetched):
+            self._backfilled[key] = max(self._backfilled.get(key, 0), limit)
+
+        if not len(fetched):
+            return stored
+        self._tz[key] = fetched.tz
+        self._sources[key] = fetched.source
+        try:
+            await self._run_blocking(self.store.upsert, symbol, interval, fetched)
+        except Exception as e:
+            self.errors += 1
+            print(f"Candle store write failed for {symbol} {interval}: {e!r}")
+        return self._merge(stored, fetched, limit)
+
+    def _bars_to_fetch(self, key: Tuple[str, str], stored: CandleSeries, limit: int, step_ms: int) -> int:
+        if not len(stored):
+            return limit
+        if len(stored) < limit and self._backfilled.get(key, 0) < limit:
+            # Short window: upstream may hold older history we never stored.
+            return limit
+
+        now_ms = int(time.time() * 1000)
+        since = stored.last_timestamp
+        if self.continuous:
+            holes = np.flatnonzero(np.diff(stored.timestamp) > step_ms)
+            if len(holes):
+                since = int(stored.timestamp[holes[0]])
+        # +1 re-fetches the bar at `since`, which may still have been forming.
+        missing = max(now_ms - since, 0) // step_ms + 1
+        return int(min(max(missing, 1), limit))
+
+    @staticmethod
+    def _merge(stored: CandleSeries, fetched: CandleSeries, limit: int) -> CandleSeries:
+        """Stored bars older than the fetched ones, then the fetched ones (which win)."""
+        head = stored[:int(np.searchsorted(stored.timestamp, fetched.timestamp[0], side="left"))]
+        if not len(head):
+            return fetched.tail(limit)
+        return CandleSeries.from_arrays(
+            np.concatenate((head.timestamp, fetched.timestamp)),
+            np.concatenate((head.open, fetched.open)),
+            np.concatenate((head.high, fetched.high)),
+            np.concatenate((head.low, fetched.low)),
+            np.concatenate((head.close, fetched.close)),
+            np.concatenate((head.volume, fetched.volume)),
+            tz=fetched.tz,
+            source=fetched.source,
+            capacity=limit,
+        )
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "store_hits": self.store_hits,
+            "upstream_bars": self.upstream_bars,
+            "errors": self.errors,
+        }
+
+    async def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        close = getattr(self.inner, "close", None)
+        if close is not None:
+            await close()
@@ -0,0 +1,107 @@
+import gzip
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional
+from zoneinfo import ZoneInfo
+import numpy as np
+from app.services.connector_interface import MarketDataConnector
+from app.schemas.market_data import MarketCandle
+from app.schemas.candle_series import CandleSeries
+
+RECORDING_SUFFIX = ".jsonl.gz"
+
+
+def recording_path(directory: str, provider: str) -> str:
+    return os.path.join(directory, provider + RECORDING_SUFFIX)
+
+
+def encode_series(series: CandleSeries) -> Dict[str, Any]:
+    return {
+        "timestamp": series.timestamp.tolist(),
+        **{name: getattr(series, name).tolist() for name in ("open", "high", "low", "close", "volume")},
+        "tz": str(series.tz) if series.tz is not None else None,
+        "source": series.source,
+    }
+
+
+def decode_series(columns: Dict[str, Any]) -> CandleSeries:
+    tz = columns.get("tz")
+    try:
+        tz = ZoneInfo(tz) if tz else None
+    except Exception:
+        tz = None
+    return CandleSeries.from_arrays(
+        np.asarray(columns["timestamp"], dtype=np.int64),
+        *(np.asarray(columns[name], dtype=np.float64) for name in ("open", "high", "low", "close", "volume")),
+        tz=tz, source=columns.get("source", ""),
+    )
+
+
+class RecordingConnector(MarketDataConnector):
+    """
+    Passes every call through to `inner` and appends it to a gzip JSONL log:
+    one line per call with its offset from the start of the recording, the
+    call (method, symbol, interval, limit), its latency and its result
+    (candles as columns) or error. ReplayConnector serves the log back.
+
+    Each process run appends a new gzip member, so recordings accumulate
+    across restarts; offsets restart at 0 with every run.
+    """
+
+    def __init__(self, inner: MarketDataConnector, path: str, flush_every: int = 50):
+        self.inner = inner
+        self.path = path
+        self.flush_every = flush_every
+        self.recorded = 0
+        self._started = time.monotonic()
+        self._file: Optional[gzip.GzipFile] = None
+
+    def _write(self, record: Dict[str, Any]):
+        if self._file is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._file = gzip.open(self.path, "at", encoding="utf-8")
+        self._file.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self.recorded += 1
+        if self.recorded % self.flush_every == 0:
+            self._file.flush()
+
+    async def _record(self, method: str, args: List[Any], call, encode):
+        started = time.monotonic()
+        record = {"t": round(started - self._started, 6), "method": method, "args": args}
+        try:
+            result = await call
+        except Exception as e:
+            record["latency"] = round(time.monotonic() - started, 6)
+            record["error"] = f"{type(e).__name__}: {e}"
+            self._write(record)
+            raise
+        record["latency"] = round(time.monotonic() - started, 6)
+        record["result"] = encode(result)
+        self._write(record)
+        return result
+
+    async def get_latest_price(self, symbol: str) -> float:
+        return await self._record("get_latest_price", [symbol], self.inner.get_latest_price(symbol), float)
+
+    async def get_candle_series(self, symbol: str, interval: str, limit: int) -> CandleSeries:
+        return await self._record(
+            "get_candle_series", [symbol, interval, limit],
+            self.inner.get_candle_series(symbol, interval, limit), encode_series,
+        )
+
+    async def get_historical_candles(self, symbol: str, interval: str, limit: int) -> List[MarketCandle]:
+        # Stored in the same columnar form, so either call can replay the other
+        return await self._record(
+            "get_candle_series", [symbol, interval, limit],
+            self.inner.get_historical_candles(symbol, interval, limit),
+            lambda candles: encode_series(CandleSeries.from_candles(candles)),
+        )
+
+    async def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        close = getattr(self.inner, "close", None)
+        if close is not None:
+            await close()
@@ -0,0 +1,191 @@
+import asyncio
+import bisect
+import gzip
+import json
+import random
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from app.services.connector_interface import MarketDataConnector
+from app.services.connectors.recording_connector import decode_series
+from app.schemas.market_data import MarketCandle
+from app.schemas.candle_series import CandleSeries
+
+# (offset, recorded latency, result or None, error or None)
+Entry = Tuple[float, float, Any, Optional[str]]
+
+
+def latency_model(spec: str, seed: int = 0) -> Optional[Callable[[float], float]]:
+    """
+    Injected latency in seconds from a spec string, given the recorded
+    latency: "none", "recorded", "fixed:<ms>", "uniform:<min_ms>:<max_ms>"
+    or "lognormal:<median_ms>:<sigma>".
+    """
+    kind, _, rest = (spec or "none").partition(":")
+    params = [float(p) for p in rest.split(":") if p]
+    rng = random.Random(seed)
+    if kind == "none":
+        return None
+    if kind == "recorded":
+        return lambda recorded: recorded
+    if kind == "fixed" and len(params) == 1:
+        return lambda recorded: params[0] / 1000.0
+    if kind == "uniform" and len(params) == 2:
+        return lambda recorded: rng.uniform(params[0], params[1]) / 1000.0
+    if kind == "lognormal" and len(params) == 2:
+        return lambda recorded: rng.lognormvariate(0.0, params[1]) * params[0] / 1000.0
+    raise ValueError(f"Unknown latency spec: {spec}")
+
+
+class ReplayConnector(MarketDataConnector):
+    """
+    Serves a RecordingConnector log back without touching the network.
+
+    Calls are matched on (method, symbol, interval): the newest recorded
+    response with at least the requested bars, tailed to `limit`. With
+    speed > 0 the recording's clock runs at that multiple of real time from
+    the first call, and each call gets the latest response recorded by
+    then, so data evolves as it did live (1.0 = real time). speed = 0
+    replays as fast as possible: each call takes the next response for its
+    key, holding on the last one.
+
+    Optional latency (see latency_model) and errors (error_rate, raised
+    as ConnectionError, or returned as empty data with error_mode="empty")
+    are injected per call from a seeded RNG, so runs are reproducible.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        speed: float = 1.0,
+        latency: str = "none",
+        error_rate: float = 0.0,
+        error_mode: str = "raise",
+        seed: int = 0,
+    ):
+        self.path = path
+        self.speed = speed
+        self.error_rate = error_rate
+        self.error_mode = error_mode
+        self._latency = latency_model(latency, seed)
+        # Recorded latencies live on the recording's clock; injected ones don't.
+        self._scale_latency = (latency or "").startswith("recorded") and speed > 0
+        self._rng = random.Random(seed)
+        self._entries: Dict[Tuple[str, ...], List[Entry]] = {}
+        self._limits: Dict[Tuple[str, ...], List[int]] = {}
+        self._offsets: Dict[Tuple, List[float]] = {}
+        self._cursors: Dict[Tuple, int] = {}
+        self._clock_start: Optional[float] = None
+        self.calls = 0
+        self.misses = 0
+        self.injected_errors = 0
+        self._load()
+
+    def _load(self):
+        entries: Dict[Tuple, List[Entry]] = {}
+        # Each recording run restarts its offsets; chain runs back to back.
+        base, last = 0.0, 0.0
+        try:
+            with gzip.open(self.path, "rt", encoding="utf-8") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    record = json.loads(line)
+                    if record["t"] < last - base:
+                        base = last
+                    offset = base + record["t"]
+                    last = offset
+                    args = record["args"]
+                    result = record.get("result")
+                    if result is not None and record["method"] == "get_candle_series":
+                        result = decode_series(result)
+                    key = (
+                        record["method"], str(args[0]),
+                        str(args[1]) if len(args) > 1 else "", int(args[2]) if len(args) > 2 else 0,
+                    )
+                    entries.setdefault(key, []).append((offset, record.get("latency", 0.0), result, record.get("error")))
+        except FileNotFoundError:
+            print(f"ReplayConnector: no recording at {self.path}")
+        except (OSError, EOFError, ValueError) as e:
+            # A run that was killed leaves a truncated last member; keep what was read.
+            print(f"ReplayConnector: recording {self.path} truncated: {e}")
+        for key, values in entries.items():
+            self._entries[key] = values
+            self._offsets[key] = [offset for offset, _, _, _ in values]
+            self._limits.setdefault(key[:-1], []).append(key[-1])
+        for limits in self._limits.values():
+            limits.sort()
+        print(f"ReplayConnector: {sum(len(v) for v in entries.values())} responses from {self.path}")
+
+    def _key_for(self, method: str, symbol: str, interval: str, limit: int) -> Optional[Tuple]:
+        """Exact recording for the call, else the smallest recorded limit that covers it, else the largest."""
+        limits = self._limits.get((method, symbol, interval))
+        if not limits:
+            return None
+        i = bisect.bisect_left(limits, limit)
+        return (method, symbol, interval, limits[min(i, len(limits) - 1)])
+
+    def _pick(self, key: Tuple) -> Entry:
+        entries = self._entries[key]
+        if self.speed <= 0:
+            i = self._cursors.get(key, 0)
+            self._cursors[key] = min(i + 1, len(entries) - 1)
+            return entries[i]
+        now = time.monotonic()
+        if self._clock_start is None:
+            self._clock_start = now
+        offset = (now - self._clock_start) * self.speed
+        i = bisect.bisect_right(self._offsets[key], offset) - 1
+        return entries[max(i, 0)]
+
+    async def _serve(self, method: str, symbol: str, interval: str, limit: int):
+        self.calls += 1
+        key = self._key_for(method, symbol, interval, limit)
+        if key is None:
+            self.misses += 1
+            return None
+        _, recorded_latency, result, error = self._pick(key)
+        if self._latency is not None:
+            delay = self._latency(recorded_latency)
+            await asyncio.sleep(delay / self.speed if self._scale_latency else delay)
+        if error is not None:
+            raise ConnectionError(f"replayed: {error}")
+        if self.error_rate and self._rng.random() < self.error_rate:
+            self.injected_errors += 1
+            if self.error_mode == "raise":
+                raise ConnectionError(f"injected error for {symbol} {interval}")
+            return None
+        return result
+
+    async def get_latest_price(self, symbol: str) -> float:
+        price = await self._serve("get_latest_price", symbol, "", 0)
+        if price is None:
+            # Not recorded on its own: use the last close of a recorded series
+            series = await self._serve_any_series(symbol)
+            return float(series.close[-1]) if series is not None and len(series) else 0.0
+        return price
+
+    async def _serve_any_series(self, symbol: str) -> Optional[CandleSeries]:
+        for method, sym, interval in self._limits:
+            if method == "get_candle_series" and sym == symbol:
+                return await self._serve("get_candle_series", symbol, interval, 1)
+        return None
+
+    async def get_candle_series(self, symbol: str, interval: str, limit: int) -> CandleSeries:
+        series = await self._serve("get_candle_series", symbol, interval, limit)
+        if series is None:
+            return CandleSeries.empty()
+        # Read-only view: one decoded recording serves every caller
+        return series.tail(limit)
+
+    async def get_historical_candles(self, symbol: str, interval: str, limit: int) -> List[MarketCandle]:
+        return (await self.get_candle_series(symbol, interval, limit)).to_candles()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            "speed": self.speed,
+            "keys": len(self._entries),
+            "calls": self.calls,
+            "misses": self.misses,
+            "injected_errors": self.injected_errors,
+        }
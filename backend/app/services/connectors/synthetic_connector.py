@@ -0,0 +1,271 @@
+import time
+import zlib
+from typing import Any, Dict, List, Optional
+import numpy as np
+import pytz
+from pydantic import BaseModel
+from app.core.config import settings
+from app.schemas.candle_series import CandleSeries
+from app.schemas.market_data import MarketCandle
+from app.services.backtest import nse_session_mask
+from app.services.candle_aggregator import CandleAggregator, bucket_ohlcv, timeframe_seconds
+from app.services.connector_interface import MarketDataConnector
+from app.services.market_hours import IST, next_nse_session
+from app.services.symbol_registry import Instrument
+
+_MINUTE_MS = 60_000
+_DAY_MS = 86_400_000
+_IST_OFFSET_MS = 330 * _MINUTE_MS
+_NSE_OPEN_MINUTE = 9 * 60 + 15
+_NSE_CLOSE_MINUTE = 15 * 60 + 30
+# Open seconds per year and per trading day, to scale annualized drift/volatility and daily jump counts
+_YEAR_SECONDS = {"NSE": 252 * 375 * 60, "CRYPTO": 365 * 86400}
+_DAY_SECONDS = {"NSE": 375 * 60, "CRYPTO": 86400}
+# Bound on ticks generated in one vectorized pass (memory, not correctness)
+_CHUNK_TICKS = 1 << 18
+
+
+def _ist_minute(timestamps_ms: np.ndarray) -> np.ndarray:
+    return ((timestamps_ms + _IST_OFFSET_MS) % _DAY_MS) // _MINUTE_MS
+
+
+class SyntheticInstrument(BaseModel):
+    symbol: str
+    market: str = "CRYPTO"        # NSE trades in exchange hours only (get_market_status_ist); CRYPTO 24x7
+    start_price: float = 20000.0
+    drift: float = 0.0            # annualized
+    volatility: float = 0.2       # annualized
+    jump_intensity: float = 1.0   # expected jumps per trading day (Merton jump-diffusion)
+    jump_mean: float = 0.0        # mean log jump size
+    jump_std: float = 0.01
+    tick_rate: float = 100.0      # ticks per second while the market is open
+    tick_size: float = 5.0        # median units per tick (lognormal)
+
+
+class _Feed:
+    """Generator state of one instrument: RNG, last trade and its 1m bars."""
+
+    def __init__(self, spec: SyntheticInstrument, seed: int, history_bars: int, start_ms: int):
+        self.spec = spec
+        self.rng = np.random.default_rng([seed, zlib.crc32(spec.symbol.encode())])
+        self.interval_ms = 1000.0 / spec.tick_rate
+        tick_years = (self.interval_ms / 1000.0) / _YEAR_SECONDS[spec.market]
+        self.tick_mu = (spec.drift - 0.5 * spec.volatility ** 2) * tick_years
+        self.tick_sigma = spec.volatility * np.sqrt(tick_years)
+        self.tick_jumps = spec.jump_intensity * (self.interval_ms / 1000.0) / _DAY_SECONDS[spec.market]
+        self.bars = CandleSeries(
+            capacity=history_bars, tz=IST if spec.market == "NSE" else pytz.utc, source="synthetic",
+        )
+        self.price = spec.start_price
+        self.next_tick = float(start_ms)
+        self.session = (0, -1)  # NSE session (open, close) ms the cursor is in
+        self.ticks = 0
+        self.last_trade_ms: Optional[int] = None
+        self._backfill(history_bars, start_ms)
+
+    def _backfill(self, bars: int, start_ms: int):
+        """History as minute bars (no ticks) ending just before start_ms, with the close at start_price."""
+        spec = self.spec
+        minutes = np.empty(0, dtype=np.int64)
+        end = (start_ms // _MINUTE_MS) * _MINUTE_MS
+        while len(minutes) < bars:
+            candidates = end - _MINUTE_MS * np.arange(bars * 4, 0, -1, dtype=np.int64)
+            if spec.market == "NSE":
+                # Bars open inside the session; the close (15:30:00) is its last instant, not a bar
+                candidates = candidates[nse_session_mask(candidates) & (_ist_minute(candidates) < _NSE_CLOSE_MINUTE)]
+            minutes = np.concatenate((candidates, minutes))
+            end -= _MINUTE_MS * bars * 4
+        minutes = minutes[-bars:]
+        n = len(minutes)
+        minute_years = 60.0 / _YEAR_SECONDS[spec.market]
+        returns = (spec.drift - 0.5 * spec.volatility ** 2) * minute_years \
+            + spec.volatility * np.sqrt(minute_years) * self.rng.standard_normal(n)
+        jumps = self.rng.poisson(spec.jump_intensity * 60.0 / _DAY_SECONDS[spec.market], n)
+        hit = np.flatnonzero(jumps)
+        returns[hit] += self.rng.normal(spec.jump_mean * jumps[hit], spec.jump_std * np.sqrt(jumps[hit]))
+        path = np.cumsum(returns)
+        close = spec.start_price * np.exp(path - path[-1])
+        open_ = np.concatenate(([close[0]], close[:-1]))
+        wick = np.abs(self.rng.standard_normal((2, n))) * spec.volatility * np.sqrt(minute_years) * 0.5
+        high = np.maximum(open_, close) * np.exp(wick[0])
+        low = np.minimum(open_, close) * np.exp(-wick[1])
+        volume = spec.tick_rate * 60.0 * spec.tick_size * self.rng.lognormal(0.0, 0.5, n) * self._profile(minutes)
+        self.bars = CandleSeries.from_arrays(
+            minutes, open_, high, low, close, volume,
+            tz=self.bars.tz, source="synthetic", capacity=self.bars.capacity,
+        )
+
+    def _profile(self, timestamps_ms: np.ndarray) -> np.ndarray:
+        """Intraday volume shape: NSE trades a U (busy open and close), crypto is flat."""
+        if self.spec.market != "NSE":
+            return np.ones(len(timestamps_ms))
+        x = np.clip((_ist_minute(timestamps_ms) - _NSE_OPEN_MINUTE) / (_NSE_CLOSE_MINUTE - _NSE_OPEN_MINUTE), 0.0, 1.0)
+        return 1.0 + 2.0 * (2.0 * x - 1.0) ** 2
+
+    def advance(self, target_ms: int) -> int:
+        """Generate every tick up to target_ms, skipping closed sessions; returns the tick count."""
+        generated = 0
+        while self.next_tick <= target_ms:
+            end = float(target_ms)
+            if self.spec.market == "NSE":
+                if self.next_tick > self.session[1]:
+                    open_ms, close_ms = next_nse_session(int(np.ceil(self.next_tick)))
+                    if self.session[1] >= 0 and self.next_tick < open_ms:
+                        # Overnight/weekend gap: the price reopens away from the last close
+                        self.price *= float(np.exp(self.rng.normal(0.0, 0.5 * self.spec.volatility / np.sqrt(252))))
+                    self.session = (open_ms, close_ms)
+                    self.next_tick = max(self.next_tick, float(open_ms))
+                    if self.next_tick > target_ms:
+                        break
+                end = min(end, float(self.session[1]))
+            count = min(int((end - self.next_tick) // self.interval_ms) + 1, _CHUNK_TICKS)
+            self._ticks(self.next_tick + self.interval_ms * np.arange(count))
+            self.next_tick += self.interval_ms * count
+            generated += count
+        return generated
+
+    def _ticks(self, times: np.ndarray):
+        n = len(times)
+        spec = self.spec
+        returns = self.tick_mu + self.tick_sigma * self.rng.standard_normal(n)
+        jumps = self.rng.poisson(self.tick_jumps, n)
+        hit = np.flatnonzero(jumps)
+        if len(hit):
+            returns[hit] += self.rng.normal(spec.jump_mean * jumps[hit], spec.jump_std * np.sqrt(jumps[hit]))
+        prices = self.price * np.exp(np.cumsum(returns))
+        ts = times.astype(np.int64)
+        sizes = self.rng.lognormal(np.log(spec.tick_size), 1.0, n) * self._profile(ts)
+        sizes[hit] *= 5.0  # jumps trade heavy
+
+        cols = bucket_ohlcv(ts, prices, prices, prices, prices, sizes, _MINUTE_MS)
+        bars = self.bars
+        first = 0
+        if len(bars) and bars.last_timestamp == int(cols["start"][0]):
+            bars.update_last(
+                float(bars.open[-1]),
+                max(float(bars.high[-1]), float(cols["high"][0])),
+                min(float(bars.low[-1]), float(cols["low"][0])),
+                float(cols["close"][0]),
+                float(bars.volume[-1]) + float(cols["volume"][0]),
+            )
+            first = 1
+        for row in zip(*(cols[name][first:].tolist() for name in ("start", "open", "high", "low", "close", "volume"))):
+            bars.append(*row)
+
+        self.price = float(prices[-1])
+        self.last_trade_ms = int(ts[-1])
+        self.ticks += n
+
+
+class SyntheticConnector(MarketDataConnector):
+    """
+    In-process market simulator for soak tests and capacity sizing.
+
+    Each instrument trades a jump-diffusion (GBM plus Poisson jumps) at
+    tick_rate ticks per second of simulated time, with lognormal trade
+    sizes and, for NSE instruments, only inside the sessions
+    get_market_status_ist reports as open (prices gap over the close).
+    Ticks are generated in vectorized chunks and folded into 1m bars; other
+    intervals are aggregated from those on request.
+
+    The simulated clock starts at start_ms (now by default) and runs at
+    `speed` times real time; ticks are produced lazily by advance(), which
+    every read calls. speed = 0 freezes the clock so a driver can step it
+    with advance(seconds) as fast as the pipeline keeps up.
+    """
+
+    def __init__(
+        self,
+        instruments: List[SyntheticInstrument],
+        speed: float = 1.0,
+        start_ms: Optional[int] = None,
+        history_bars: int = 5000,
+        seed: int = 0,
+    ):
+        self.speed = speed
+        self._clock_ms = start_ms if start_ms is not None else int(time.time() * 1000)
+        self._clock_anchor = (time.monotonic(), self._clock_ms)
+        self._feeds: Dict[str, _Feed] = {
+            spec.symbol: _Feed(spec, seed, history_bars, self._clock_ms) for spec in instruments
+        }
+        self.last_message_at: Optional[float] = None  # wall clock of the last generated tick (heartbeats)
+
+    @classmethod
+    def from_settings(cls, instruments: List[Instrument]) -> "SyntheticConnector":
+        """Feeds for the registry's synthetic instruments, tuned by the SYNTHETIC_* settings."""
+        specs = [
+            SyntheticInstrument(
+                symbol=i.symbol,
+                market=i.market,
+                start_price=22000.0 if i.market == "NSE" else 60000.0,
+                volatility=settings.SYNTHETIC_VOLATILITY,
+                jump_intensity=settings.SYNTHETIC_JUMP_INTENSITY,
+                tick_rate=settings.SYNTHETIC_TICK_RATE,
+            )
+            for i in instruments
+        ]
+        return cls(specs, speed=settings.SYNTHETIC_SPEED, history_bars=settings.SYNTHETIC_HISTORY_BARS, seed=settings.SYNTHETIC_SEED)
+
+    @property
+    def clock_ms(self) -> int:
+        return self._clock_ms
+
+    @property
+    def symbols(self) -> List[str]:
+        return list(self._feeds.keys())
+
+    def advance(self, seconds: Optional[float] = None) -> int:
+        """
+        Moves the simulated clock (by `seconds`, or to where `speed` puts it
+        now) and generates the ticks in between. Returns the tick count.
+        """
+        if seconds is not None:
+            target = self._clock_ms + int(seconds * 1000)
+        elif self.speed > 0:
+            wall, clock = self._clock_anchor
+            target = clock + int((time.monotonic() - wall) * self.speed * 1000)
+        else:
+            target = self._clock_ms
+        if target <= self._clock_ms:
+            return 0
+        if seconds is not None:
+            # Keep the real-time clock from jumping back
+            self._clock_anchor = (time.monotonic(), target)
+        self._clock_ms = target
+        generated = sum(feed.advance(target) for feed in self._feeds.values())
+        if generated:
+            self.last_message_at = time.time()
+        return generated
+
+    async def get_latest_price(self, symbol: str) -> float:
+        self.advance()
+        feed = self._feeds.get(symbol)
+        return feed.price if feed is not None else 0.0
+
+    async def get_candle_series(self, symbol: str, interval: str, limit: int) -> CandleSeries:
+        self.advance()
+        feed = self._feeds.get(symbol)
+        if feed is None:
+            return CandleSeries.empty(source="synthetic")
+        if interval == "1m":
+            return feed.bars.tail(limit)
+        bucket_seconds = timeframe_seconds(interval)
+        if bucket_seconds is None or bucket_seconds < 60:
+            print(f"SyntheticConnector: unsupported interval {interval}")
+            return CandleSeries.empty(tz=feed.bars.tz, source="synthetic")
+        # Enough 1m bars for `limit` buckets (more than enough across NSE session gaps)
+        cols = CandleAggregator.aggregate_columns(feed.bars.tail(limit * (bucket_seconds // 60)), interval)
+        return CandleSeries.from_arrays(
+            cols["time"] * 1000, cols["open"], cols["high"], cols["low"], cols["close"], cols["volume"],
+            tz=feed.bars.tz, source="synthetic",
+        ).tail(limit)
+
+    async def get_historical_candles(self, symbol: str, interval: str, limit: int) -> List[MarketCandle]:
+        return (await self.get_candle_series(symbol, interval, limit)).to_candles()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "clock": self._clock_ms,
+            "speed": self.speed,
+            "ticks": {symbol: feed.ticks for symbol, feed in self._feeds.items()},
+        }
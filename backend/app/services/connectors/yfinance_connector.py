@@ -1,47 +1,203 @@
+import asyncio
 import yfinance as yf
-from typing import List
+import numpy as np
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Dict, List, Optional, Set, Tuple
 from datetime import datetime
+from app.core.config import settings
+from app.core.intervals import interval_to_seconds
 from app.services.connector_interface import MarketDataConnector
 from app.schemas.market_data import MarketCandle
+from app.schemas.candle_series import CandleSeries
+
+# yfinance history periods, as the trading days each one roughly covers
+_PERIOD_DAYS = (
+    ("1d", 1), ("5d", 5), ("1mo", 20), ("3mo", 60), ("6mo", 120),
+    ("1y", 245), ("2y", 490), ("5y", 1230), ("10y", 2460),
+)
+_SESSION_SECONDS = 375 * 60  # one NSE session, 09:15-15:30 IST
+# Trading days Yahoo serves for intraday bars up to a bar length (7d of 1m,
+# 60d up to 30m, 730d up to 90m)
+_INTRADAY_CAPS = ((60, 5), (1800, 20), (5400, 490), (86399, 490))
+
 
 class YFinanceConnector(MarketDataConnector):
     """
     Fetches free data from Yahoo Finance.
     Mainly for NIFTY 50 (^NSEI).
+
+    yfinance is blocking, so every call runs on a small bounded thread pool
+    with a per-call timeout and never on the event loop. History requests
+    that arrive within a short window for the same (period, interval) are
+    folded into a single yf.download call across all requested symbols.
     """
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        timeout: Optional[float] = None,
+        batch_window: Optional[float] = None,
+    ):
+        self.timeout = timeout if timeout is not None else settings.YF_TIMEOUT
+        self.batch_window = batch_window if batch_window is not None else settings.YF_BATCH_WINDOW
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or settings.YF_MAX_WORKERS,
+            thread_name_prefix="yfinance"
+        )
+        # (period, interval) -> symbol -> futures waiting on that symbol
+        self._pending: Dict[Tuple[str, str], Dict[str, List[asyncio.Future]]] = {}
+        # Flushes in flight; the loop only keeps weak references to tasks
+        self._flushes: Set[asyncio.Task] = set()
+        self.batches = 0
+        self.batched_requests = 0
+        self.timeouts = 0
+
+    async def _run_blocking(self, fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        try:
+            return await asyncio.wait_for(
+                loop.run_in_executor(self._executor, partial(fn, *args, **kwargs)),
+                timeout=self.timeout
+            )
+        except asyncio.TimeoutError:
+            # The worker thread keeps running until Yahoo answers; the bounded
+            # pool is what stops a slow upstream from spawning more of them.
+            self.timeouts += 1
+            raise
+
     async def get_latest_price(self, symbol: str) -> float:
         try:
-            ticker = yf.Ticker(symbol)
             # fast_info is usually faster and live-ish
-            return ticker.fast_info.last_price
+            return await self._run_blocking(lambda: yf.Ticker(symbol).fast_info.last_price)
         except Exception as e:
-            print(f"Error fetching YF price for {symbol}: {e}")
+            print(f"Error fetching YF price for {symbol}: {e!r}")
             return 0.0
 
     async def get_historical_candles(self, symbol: str, interval: str, limit: int) -> List[MarketCandle]:
+        return (await self.get_candle_series(symbol, interval, limit)).to_candles()
+
+    async def get_candle_series(self, symbol: str, interval: str, limit: int) -> CandleSeries:
         try:
-            # Map interval: 1m, 5m, 15m, 1h, 1d
-            ticker = yf.Ticker(symbol)
-            # YF requires 'period' if requesting recent data
-            period = "1d" if interval in ["1m", "5m"] else "5d"
-            
-            df = ticker.history(period=period, interval=interval)
-            
-            candles = []
-            for index, row in df.iterrows():
-                # YF timestamp is index
-                candles.append(MarketCandle(
-                    timestamp=index.to_pydatetime(),
-                    open=row['Open'],
-                    high=row['High'],
-                    low=row['Low'],
-                    close=row['Close'],
-                    volume=row.get('Volume', 0),
-                    source="yfinance"
-                ))
-            
+            df = await self._enqueue_history(symbol, self.period_for(interval, limit), interval)
+
             # Return last 'limit' candles
-            return candles[-limit:]
+            return self._frame_to_series(df).tail(limit)
         except Exception as e:
-            print(f"Error fetching YF history for {symbol}: {e}")
-            return []
+            print(f"Error fetching YF history for {symbol}: {e!r}")
+            return CandleSeries.empty(source="yfinance")
+
+    @staticmethod
+    def period_for(interval: str, limit: int) -> str:
+        """
+        Shortest yfinance period holding `limit` bars of `interval` (YF wants
+        a period for recent data), capped at what Yahoo serves intraday.
+        """
+        seconds = interval_to_seconds(interval)
+        if seconds is None:  # 1mo, 3mo
+            days = limit * (63 if interval == "3mo" else 21)
+        elif seconds >= 86400:
+            days = limit * max(seconds // 86400 * 5 // 7, 1)
+        else:
+            days = -(-limit * seconds // _SESSION_SECONDS)
+            days = min(days, next(cap for longest, cap in _INTRADAY_CAPS if seconds <= longest))
+        return next((name for name, covered in _PERIOD_DAYS if covered >= days), "max")
+
+    async def _enqueue_history(self, symbol: str, period: str, interval: str) -> pd.DataFrame:
+        key = (period, interval)
+        future = asyncio.get_running_loop().create_future()
+        batch = self._pending.get(key)
+        if batch is None:
+            batch = self._pending[key] = {}
+            asyncio.get_running_loop().call_later(self.batch_window, self._start_flush, key)
+        batch.setdefault(symbol, []).append(future)
+        return await future
+
+    def _start_flush(self, key: Tuple[str, str]):
+        task = asyncio.ensure_future(self._flush(key))
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def _flush(self, key: Tuple[str, str]):
+        batch = self._pending.pop(key, {})
+        if not batch:
+            return
+        period, interval = key
+        symbols = sorted(batch)
+        self.batches += 1
+        self.batched_requests += sum(len(waiters) for waiters in batch.values())
+
+        try:
+            frames = await self._run_blocking(self._download, symbols, period, interval)
+        except Exception as e:
+            for waiters in batch.values():
+                for waiter in waiters:
+                    if not waiter.done():
+                        waiter.set_exception(e)
+            return
+
+        for symbol, waiters in batch.items():
+            df = frames.get(symbol, pd.DataFrame())
+            for waiter in waiters:
+                if not waiter.done():
+                    waiter.set_result(df)
+
+    @staticmethod
+    def _download(symbols: List[str], period: str, interval: str) -> Dict[str, pd.DataFrame]:
+        """One yf.download for every symbol in the batch (runs on the executor)."""
+        if len(symbols) == 1:
+            # Single symbol: Ticker.history keeps the exact pre-batching behaviour.
+            return {symbols[0]: yf.Ticker(symbols[0]).history(period=period, interval=interval)}
+
+        df = yf.download(
+            tickers=symbols,
+            period=period,
+            interval=interval,
+            group_by="ticker",
+            auto_adjust=True,
+            threads=False,
+            progress=False
+        )
+        frames = {}
+        if df is None or df.empty:
+            return frames
+        for symbol in symbols:
+            if isinstance(df.columns, pd.MultiIndex):
+                if symbol not in df.columns.get_level_values(0):
+                    continue
+                sub = df[symbol]
+            else:
+                sub = df
+            # Tickers are aligned on a shared index; drop the rows that belong to others.
+            frames[symbol] = sub.dropna(how="all")
+        return frames
+
+    @staticmethod
+    def _frame_to_series(df: pd.DataFrame) -> CandleSeries:
+        if df is None or df.empty:
+            return CandleSeries.empty(source="yfinance")
+        # YF timestamp is index (tz-aware, exchange timezone)
+        index = pd.DatetimeIndex(df.index)
+        if index.tz is None:
+            index = index.tz_localize("UTC")
+        volume = df["Volume"] if "Volume" in df.columns else np.zeros(len(df))
+        return CandleSeries.from_arrays(
+            index.as_unit("ms").asi8,
+            df["Open"].to_numpy(dtype=np.float64),
+            df["High"].to_numpy(dtype=np.float64),
+            df["Low"].to_numpy(dtype=np.float64),
+            df["Close"].to_numpy(dtype=np.float64),
+            np.asarray(volume, dtype=np.float64),
+            tz=index.tz,
+            source="yfinance"
+        )
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "batches": self.batches,
+            "batched_requests": self.batched_requests,
+            "timeouts": self.timeouts
+        }
+
+    async def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -1,149 +1,236 @@
-from typing import Dict, Any, List
-from app.services.asset_context import asset_context
+from typing import Dict, Any, List, Optional, Sequence
+import numpy as np
+from app.schemas.decision_params import DecisionParams
+
+DEFAULT_PARAMS = DecisionParams()
+
+# Scoring rules, in the order their rationale is reported:
+# (rule, side, DecisionParams field with its points, rationale template).
+# Conditions live in DecisionEngine.rule_masks.
+RULES = [
+    ("above_ema20", "buy", "price_ema_points", "Price above EMA20 (Short-term Bullish)."),
+    ("ema_bull", "buy", "ema_alignment_points", "EMA20 > EMA50 (Trend Alignment)."),
+    ("below_ema20", "sell", "price_ema_points", "Price below EMA20 (Short-term Bearish)."),
+    ("ema_bear", "sell", "ema_alignment_points", "EMA20 < EMA50 (Trend Alignment)."),
+    ("rsi_bull", "buy", "rsi_momentum_points", "RSI Bullish Momentum ({rsi_mid:g}-{rsi_overbought:g})."),
+    ("rsi_overbought", "sell", "rsi_extreme_points", "RSI Overbought (>{rsi_overbought:g}) - Partial Reversal Risk."),
+    ("rsi_bear", "sell", "rsi_momentum_points", "RSI Bearish Momentum ({rsi_oversold:g}-{rsi_mid:g})."),
+    ("rsi_oversold", "buy", "rsi_extreme_points", "RSI Oversold (<{rsi_oversold:g}) - Value Territory."),
+    ("closed_warning", None, None, "[WARN] Market Closed - Signals based on EOD/Last Tick."),
+    ("above_vwap", "buy", "vwap_points", "Price > VWAP (Intraday Strength)."),
+    ("below_vwap", "sell", "vwap_points", "Price < VWAP (Intraday Weakness)."),
+    ("crypto_momentum", "buy", "crypto_points", "Strong Crypto Momentum."),
+    ("crypto_breakdown", "sell", "crypto_points", "Crypto Clean Breakdown."),
+]
+
+# Stored with every logged signal; bump when RULES or the DecisionParams defaults change.
+RULES_VERSION = "2"
+
 
 class DecisionEngine:
     """
     Multi-Asset Decision Engine.
     Produces BUY/SELL confidence separately.
+
+    The rules are evaluated as array operations (rule_masks/score), so one
+    call scores a whole universe of instruments, or every bar of a backtest;
+    analyze() is the single-instrument case of analyze_batch(). Weights and
+    thresholds come from DecisionParams (defaults: the original constants).
     """
 
     @staticmethod
-    def analyze(features: Dict[str, float], asset_type: str = "NIFTY", is_market_open: bool = True) -> Dict[str, Any]:
-        action = "NEUTRAL"
-        bias = "NEUTRAL"
-        buy_confidence = 0.0
-        sell_confidence = 0.0
-        rationale = []
-
-        close = features.get('close', 0)
-        ema_20 = features.get('ema_20', 0)
-        ema_50 = features.get('ema_50', 0)
-        rsi = features.get('rsi', 50)
-        vwap = features.get('vwap', 0)
-
-        # Basic validation
-        if close == 0:
-            return {
-                "action": "NEUTRAL",
-                "bias": "NEUTRAL",
-                "buy_confidence": 0,
-                "sell_confidence": 0,
-                "rationale": ["Price data missing or zero."]
+    def rule_masks(
+        close: np.ndarray,
+        ema_20: np.ndarray,
+        ema_50: np.ndarray,
+        rsi: np.ndarray,
+        vwap: np.ndarray,
+        is_nifty: np.ndarray,
+        is_crypto: np.ndarray,
+        is_market_open: np.ndarray,
+        params: DecisionParams = DEFAULT_PARAMS,
+    ) -> Dict[str, np.ndarray]:
+        """Boolean array per rule in RULES. NaN indicators never satisfy a rule."""
+        p = params
+        intraday = is_nifty & is_market_open & (vwap > 0)
+        return {
+            # 1. Trend Analysis
+            "above_ema20": close > ema_20,
+            "ema_bull": ema_20 > ema_50,
+            "below_ema20": close < ema_20,
+            "ema_bear": ema_20 < ema_50,
+            # 2. Momentum (RSI)
+            "rsi_bull": (p.rsi_mid < rsi) & (rsi < p.rsi_overbought),
+            "rsi_overbought": rsi >= p.rsi_overbought,
+            "rsi_bear": (p.rsi_oversold < rsi) & (rsi < p.rsi_mid),
+            "rsi_oversold": rsi <= p.rsi_oversold,
+            # 3. Asset Specifics: VWAP logic (NIFTY intraday only)
+            "closed_warning": is_nifty & ~is_market_open,
+            "above_vwap": intraday & (close > vwap),
+            "below_vwap": intraday & ~(close > vwap),
+            # Crypto volatility logic
+            "crypto_momentum": is_crypto & (rsi > p.crypto_rsi_high) & (close > ema_20),
+            "crypto_breakdown": is_crypto & (rsi < p.crypto_rsi_low) & (close < ema_20),
+        }
+
+    @staticmethod
+    def score(masks: Dict[str, np.ndarray], params: DecisionParams = DEFAULT_PARAMS) -> Dict[str, np.ndarray]:
+        """Capped buy/sell confidence and the action code (1 BUY, -1 SELL, 0 NEUTRAL)."""
+        shape = next(iter(masks.values())).shape
+        buy = np.zeros(shape)
+        sell = np.zeros(shape)
+        for rule, side, points, _ in RULES:
+            if side == "buy":
+                buy += getattr(params, points) * masks[rule]
+            elif side == "sell":
+                sell += getattr(params, points) * masks[rule]
+        buy = np.minimum(buy, params.max_confidence)
+        sell = np.minimum(sell, params.max_confidence)
+        threshold = params.confidence_threshold
+        action = np.where((buy > threshold) & (buy > sell), 1, np.where((sell > threshold) & (sell > buy), -1, 0))
+        return {"buy": buy, "sell": sell, "action": action}
+
+    @staticmethod
+    def analyze(
+        features: Dict[str, float],
+        asset_type: str = "NIFTY",
+        is_market_open: bool = True,
+        params: Optional[DecisionParams] = None,
+        options_metrics: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        return DecisionEngine.analyze_batch(
+            [features], [asset_type], [is_market_open], params, [options_metrics],
+        )[0]
+
+    @staticmethod
+    def analyze_batch(
+        features: Sequence[Dict[str, float]],
+        asset_types: Sequence[str],
+        is_market_open: Optional[Sequence[bool]] = None,
+        params: Optional[DecisionParams] = None,
+        options_metrics: Optional[Sequence[Optional[Dict[str, Any]]]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        analyze() for many instruments at once: one vectorized pass over the rules.
+        options_metrics (per instrument, from FeatureEngine.calculate_options_metrics)
+        only shapes the NIFTY options signal; BUY/SELL never depends on it.
+        """
+        params = params or DEFAULT_PARAMS
+        texts = {rule: text.format(**params.model_dump()) for rule, _, _, text in RULES}
+        n = len(features)
+        if is_market_open is None:
+            is_market_open = [True] * n
+        if options_metrics is None:
+            options_metrics = [None] * n
+
+        def column(name: str, default: float) -> np.ndarray:
+            return np.array([f.get(name, default) for f in features], dtype=np.float64)
+
+        close = column("close", 0)
+        types = np.array(asset_types, dtype=object)
+        masks = DecisionEngine.rule_masks(
+            close, column("ema_20", 0), column("ema_50", 0), column("rsi", 50), column("vwap", 0),
+            types == "NIFTY", types == "BITCOIN", np.array(is_market_open, dtype=bool), params,
+        )
+        scores = DecisionEngine.score(masks, params)
+
+        results = []
+        for i in range(n):
+            # Basic validation
+            if close[i] == 0:
+                results.append({
+                    "action": "NEUTRAL",
+                    "bias": "NEUTRAL",
+                    "buy_confidence": 0,
+                    "sell_confidence": 0,
+                    "rationale": ["Price data missing or zero."]
+                })
+                continue
+
+            buy_confidence = float(scores["buy"][i])
+            sell_confidence = float(scores["sell"][i])
+            rationale = [texts[rule] for rule, _, _, _ in RULES if masks[rule][i]]
+
+            # Determine Signal
+            if scores["action"][i] == 1:
+                action, bias = "BUY", "BULLISH"
+            elif scores["action"][i] == -1:
+                action, bias = "SELL", "BEARISH"
+            else:
+                action, bias = "NEUTRAL", "NEUTRAL"
+                rationale.append("Confidence below threshold or conflicting signals.")
+
+            result = {
+                "action": action,
+                "bias": bias,
+                "buy_confidence": buy_confidence,
+                "sell_confidence": sell_confidence,
+                "rationale": rationale,
+                "indicators_snapshot": features[i]
             }
 
-        # --- LOGIC ---
-        
-        # 1. Trend Analysis
-        if close > ema_20:
-            buy_confidence += 20
-            rationale.append("Price above EMA20 (Short-term Bullish).")
-        if ema_20 > ema_50:
-            buy_confidence += 20
-            rationale.append("EMA20 > EMA50 (Trend Alignment).")
-        
-        if close < ema_20:
-            sell_confidence += 20
-            rationale.append("Price below EMA20 (Short-term Bearish).")
-        if ema_20 < ema_50:
-            sell_confidence += 20
-            rationale.append("EMA20 < EMA50 (Trend Alignment).")
-
-        # 2. Momentum (RSI)
-        if 50 < rsi < 70:
-            buy_confidence += 10
-            rationale.append("RSI Bullish Momentum (50-70).")
-        elif rsi >= 70:
-            sell_confidence += 30
-            rationale.append("RSI Overbought (>70) - Partial Reversal Risk.")
-        
-        if 30 < rsi < 50:
-            sell_confidence += 10
-            rationale.append("RSI Bearish Momentum (30-50).")
-        elif rsi <= 30:
-            buy_confidence += 30
-            rationale.append("RSI Oversold (<30) - Value Territory.")
-
-        # 3. Asset Specifics
-        if asset_type == "NIFTY":
-            if not is_market_open:
-                rationale.append("[WARN] Market Closed - Signals based on EOD/Last Tick.")
-            
-            # VWAP Logic (Intraday only)
-            if is_market_open and vwap > 0:
-                if close > vwap:
-                    buy_confidence += 10
-                    rationale.append("Price > VWAP (Intraday Strength).")
-                else:
-                    sell_confidence += 10
-                    rationale.append("Price < VWAP (Intraday Weakness).")
-        
-        elif asset_type == "BITCOIN":
-             # Crypto Volatility logic
-             if rsi > 60 and close > ema_20:
-                 buy_confidence += 10
-                 rationale.append("Strong Crypto Momentum.")
-             if rsi < 40 and close < ema_20:
-                 sell_confidence += 10
-                 rationale.append("Crypto Clean Breakdown.")
-
-        # --- FINAL AGGREGATION ---
-        
-        # Cap confidence
-        buy_confidence = min(buy_confidence, 100)
-        sell_confidence = min(sell_confidence, 100)
-
-        # Determine Signal
-        if buy_confidence > 60 and buy_confidence > sell_confidence:
-            action = "BUY"
-            bias = "BULLISH"
-        elif sell_confidence > 60 and sell_confidence > buy_confidence:
-            action = "SELL"
-            bias = "BEARISH"
+            # OPTIONS SIGNAL (NIFTY only)
+            if asset_types[i] == "NIFTY":
+                result["options_signal"] = DecisionEngine._options_signal(
+                    buy_confidence, sell_confidence, params, options_metrics[i],
+                )
+                # Volatility score (simple: RSI deviation from 50), 0-100 scale
+                result["intraday_volatility"] = abs(features[i].get("rsi", 50) - 50) * 2
+
+            results.append(result)
+        return results
+
+    @staticmethod
+    def _options_signal(
+        buy_confidence: float,
+        sell_confidence: float,
+        params: DecisionParams,
+        metrics: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        # Options direction based on confidence spread
+        call_confidence, put_confidence = buy_confidence, sell_confidence
+        notes = []
+        if metrics:
+            # Chain positioning nudges the spread: a high put/call OI ratio and
+            # fresh put writing read as support, the reverse as a cap.
+            pcr = metrics.get("pcr_oi")
+            if pcr is not None and pcr > params.pcr_bullish:
+                call_confidence += params.options_chain_points
+                notes.append(f"PCR {pcr:.2f} > {params.pcr_bullish:g} (put writing, supportive).")
+            elif pcr is not None and pcr < params.pcr_bearish:
+                put_confidence += params.options_chain_points
+                notes.append(f"PCR {pcr:.2f} < {params.pcr_bearish:g} (call writing, capping).")
+            put_added, call_added = metrics.get("put_oi_change") or 0, metrics.get("call_oi_change") or 0
+            if put_added > 0 and put_added > call_added:
+                call_confidence += params.options_chain_points
+                notes.append("Put OI build-up exceeds call OI build-up.")
+            elif call_added > 0 and call_added > put_added:
+                put_confidence += params.options_chain_points
+                notes.append("Call OI build-up exceeds put OI build-up.")
+
+        if call_confidence > put_confidence + params.options_spread:
+            signal = {
+                "direction": "CALL",
+                "confidence": min(call_confidence, params.options_confidence_cap),
+                "reasoning": "Bullish momentum favors CALL options"
+            }
+        elif put_confidence > call_confidence + params.options_spread:
+            signal = {
+                "direction": "PUT",
+                "confidence": min(put_confidence, params.options_confidence_cap),
+                "reasoning": "Bearish momentum favors PUT options"
+            }
         else:
-            action = "NEUTRAL"
-            bias = "NEUTRAL"
-            rationale.append("Confidence below threshold or conflicting signals.")
-
-        # OPTIONS SIGNAL (NIFTY only)
-        options_signal = None
-        intraday_volatility = 0
-        
-        if asset_type == "NIFTY":
-            # Calculate volatility score (simple: RSI deviation from 50)
-            intraday_volatility = abs(rsi - 50) * 2  # 0-100 scale
-            
-            # Options direction based on confidence spread
-            if buy_confidence > sell_confidence + 15:
-                options_signal = {
-                    "direction": "CALL",
-                    "confidence": min(buy_confidence, 85),
-                    "reasoning": "Bullish momentum favors CALL options"
-                }
-            elif sell_confidence > buy_confidence + 15:
-                options_signal = {
-                    "direction": "PUT",
-                    "confidence": min(sell_confidence, 85),
-                    "reasoning": "Bearish momentum favors PUT options"
-                }
-            else:
-                options_signal = {
-                    "direction": "NEUTRAL",
-                    "confidence": max(buy_confidence, sell_confidence),
-                    "reasoning": "Mixed signals - consider straddles or avoid options"
-                }
-
-        result = {
-            "action": action,
-            "bias": bias,
-            "buy_confidence": buy_confidence,
-            "sell_confidence": sell_confidence,
-            "rationale": rationale,
-            "indicators_snapshot": features
-        }
-        
-        # Add NIFTY-specific fields
-        if options_signal:
-            result["options_signal"] = options_signal
-            result["intraday_volatility"] = intraday_volatility
-            
-        return result
+            signal = {
+                "direction": "NEUTRAL",
+                "confidence": min(max(call_confidence, put_confidence), params.max_confidence),
+                "reasoning": "Mixed signals - consider straddles or avoid options"
+            }
+        if metrics:
+            signal["chain"] = notes
+            signal["strike"] = metrics.get("atm_strike")
+            signal["iv"] = metrics.get("atm_iv")
+            signal["max_pain"] = metrics.get("max_pain")
+            signal["support"] = metrics.get("support")
+            signal["resistance"] = metrics.get("resistance")
+        return signal
@@ -1,7 +1,10 @@
 import pandas as pd
 # import pandas_ta as ta # Still avoiding due to install issues, using manual calc
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Union
 from app.schemas.market_data import MarketCandle, OptionChain
+from app.schemas.candle_series import CandleSeries
+from app.services.indicator_engine import indicator_engine
+from app.services.options_analytics import option_chain_analyzer
 
 class FeatureEngine:
     """
@@ -10,32 +13,22 @@ class FeatureEngine:
     """
 
     @staticmethod
-    def calculate_technical_indicators(candles: List[MarketCandle], asset_type: str = "NIFTY") -> Dict[str, float]:
+    def calculate_technical_indicators(candles: Union[CandleSeries, List[MarketCandle]], asset_type: str = "NIFTY") -> Dict[str, float]:
         if not candles:
             print("FeatureEngine: No candles provided.")
             return {}
 
-        data_dicts = []
-        for c in candles:
-            # Pydantic v2 support
-            if hasattr(c, 'model_dump'):
-                data_dicts.append(c.model_dump())
-            else:
-                data_dicts.append(c.dict())
+        if not isinstance(candles, CandleSeries):
+            candles = CandleSeries.from_candles(candles)
 
-        df = pd.DataFrame(data_dicts)
-        print(f"FeatureEngine: DF Shape: {df.shape}")
-        
-        if 'timestamp' in df.columns:
-            df['datetime'] = pd.to_datetime(df['timestamp'])
-        else:
-             print("FeatureEngine: timestamp column missing!")
-             return {}
-             
-        df.set_index('datetime', inplace=True)
-        
-        # Sort just in case
-        df.sort_index(inplace=True)
+        # Columns straight from the series arrays (already time-ordered)
+        df = pd.DataFrame({
+            'open': candles.open,
+            'high': candles.high,
+            'low': candles.low,
+            'close': candles.close,
+            'volume': candles.volume
+        }, index=pd.to_datetime(candles.timestamp, unit='ms'))
 
         close = df['close']
         high = df['high']
@@ -98,8 +91,26 @@ class FeatureEngine:
         }
 
     @staticmethod
-    def calculate_options_metrics(chain: OptionChain) -> Dict[str, Any]:
+    def update_technical_indicators(symbol: str, interval: str, candles: Union[CandleSeries, List[MarketCandle]], asset_type: str = "NIFTY") -> Dict[str, float]:
+        """
+        Incremental counterpart of calculate_technical_indicators.
+        Keeps running EMA/RSI/ATR/VWAP state per (symbol, interval), slid along
+        with the candle window, and only folds in bars newer than the last one
+        seen, so repeated polls cost O(new bars) and return the same values.
+        """
+        return indicator_engine.update(symbol, interval, candles)
+
+    @staticmethod
+    def calculate_option_chain(chain: Optional[OptionChain], symbol: Optional[str] = None) -> Dict[str, Any]:
         """
-        No-op/Placeholder for Free Edition if Options Chain data is missing.
+        Vectorized IV/greeks pass over a chain snapshot: {"metrics", "columns"},
+        both empty when no chain is available (the free feeds don't carry one).
         """
-        return {}
+        if chain is None:
+            return {"metrics": {}, "columns": {}}
+        return option_chain_analyzer.analyze(chain, symbol)
+
+    @staticmethod
+    def calculate_options_metrics(chain: Optional[OptionChain], symbol: Optional[str] = None) -> Dict[str, Any]:
+        """Chain aggregates: PCR, max pain, OI walls/changes, ATM IV, skew."""
+        return FeatureEngine.calculate_option_chain(chain, symbol)["metrics"]
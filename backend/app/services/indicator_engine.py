@@ -0,0 +1,294 @@
+from collections import deque
+from typing import Dict, List, Optional, Tuple, Any, Union
+import numpy as np
+from scipy.signal import lfilter
+from app.core.intervals import interval_to_seconds
+from app.schemas.market_data import MarketCandle
+from app.schemas.candle_series import CandleSeries
+
+EMA_SPANS = (20, 50, 200)
+RSI_PERIOD = 14
+ATR_PERIOD = 14
+# Below this the first bar of a window still feeds RSI/ATR, so it can't be slid
+_MIN_SLIDING_WINDOW = max(RSI_PERIOD, ATR_PERIOD)
+
+
+class IncrementalIndicators:
+    """
+    Streaming EMA/RSI/ATR/VWAP state for a single symbol/interval.
+
+    Mirrors FeatureEngine.calculate_technical_indicators over the last
+    `window` bars: EMAs use adjust=False seeded with the window's first
+    close, RSI/ATR are simple rolling means over the last 14 values and
+    VWAP is cumulative over the window. When a bar leaves the window its
+    volume is subtracted from VWAP and each EMA is re-seeded in O(1)
+    (moving the seed from c[k] to c[k+1] shifts an adjust=False EMA at
+    bar t by (1 - alpha)^(t-k) * (c[k+1] - c[k])). State is split into the
+    committed (closed) bars and the provisional forming bar, so revising
+    the forming bar is O(1) and never double-counts. window=None keeps
+    everything since the first bar seen.
+    """
+
+    def __init__(self, window: Optional[int] = None):
+        self.window = window
+        self.reset()
+
+    def reset(self):
+        self.bars = 0
+        self.last_timestamp = None      # epoch ms of the provisional bar
+        self._committed: Optional[Dict[str, Any]] = None
+        self._provisional: Optional[Dict[str, Any]] = None
+        self._gains = deque(maxlen=RSI_PERIOD - 1)
+        self._losses = deque(maxlen=RSI_PERIOD - 1)
+        self._ranges = deque(maxlen=ATR_PERIOD - 1)
+        # (timestamp, close, volume) of the committed bars still in the window
+        self._history: deque = deque()
+
+    @property
+    def first_bar(self) -> Optional[Tuple[int, float]]:
+        """(epoch ms, close) of the oldest bar in the window."""
+        if self._history:
+            return self._history[0][0], self._history[0][1]
+        if self._provisional is None:
+            return None
+        return self.last_timestamp, self._provisional["close"]
+
+    def update(self, timestamp, open_: float, high: float, low: float, close: float, volume: float):
+        """
+        Feed one bar. A timestamp equal to the current forming bar revises it,
+        a newer one closes the forming bar and opens a new one. Older bars are
+        ignored (already folded into the committed state).
+        """
+        if self.last_timestamp is not None:
+            if timestamp < self.last_timestamp:
+                return
+            if timestamp > self.last_timestamp:
+                self._commit()
+        self._provisional = self._step(high, low, close, volume)
+        self.last_timestamp = timestamp
+
+    def _commit(self):
+        p = self._provisional
+        if p is None:
+            return
+        self._gains.append(p["gain"])
+        self._losses.append(p["loss"])
+        self._ranges.append(p["tr"])
+        self._committed = p
+        self.bars += 1
+        if self.window is None:
+            return
+        self._history.append((self.last_timestamp, p["close"], p["volume"]))
+        # The forming bar takes the last slot of the window
+        while len(self._history) > self.window - 1:
+            self._evict()
+
+    def _evict(self):
+        _, close, volume = self._history.popleft()
+        c = self._committed
+        if self._history:
+            shift = self._history[0][1] - close
+            age = len(self._history)  # bars from the evicted one to the last committed
+            c["ema"] = {span: ema + (1 - 2.0 / (span + 1)) ** age * shift for span, ema in c["ema"].items()}
+        c["cum_vol"] -= volume
+        c["cum_pv"] -= close * volume
+        c["traded"] -= volume > 0
+
+    def _step(self, high: float, low: float, close: float, volume: float) -> Dict[str, Any]:
+        prev = self._committed
+        if prev is None or (self.window is not None and not self._history):
+            emas = {span: close for span in EMA_SPANS}
+            gain = loss = 0.0
+            tr = high - low
+            cum_vol = volume
+            cum_pv = close * volume
+            traded = int(volume > 0)
+        else:
+            emas = {}
+            for span in EMA_SPANS:
+                alpha = 2.0 / (span + 1)
+                emas[span] = (1 - alpha) * prev["ema"][span] + alpha * close
+            delta = close - prev["close"]
+            gain = delta if delta > 0 else 0.0
+            loss = -delta if delta < 0 else 0.0
+            tr = max(high - low, abs(high - prev["close"]), abs(low - prev["close"]))
+            cum_vol = prev["cum_vol"] + volume
+            cum_pv = prev["cum_pv"] + close * volume
+            traded = prev["traded"] + (volume > 0)
+
+        return {
+            "ema": emas,
+            "close": close,
+            "volume": volume,
+            "gain": gain,
+            "loss": loss,
+            "tr": tr,
+            "cum_vol": cum_vol,
+            "cum_pv": cum_pv,
+            "traded": traded,
+        }
+
+    @staticmethod
+    def _window_mean(history: deque, current: float, period: int) -> float:
+        if len(history) < period - 1:
+            return float("nan")
+        return (sum(history) + current) / period
+
+    def snapshot(self) -> Dict[str, float]:
+        """Indicator dict for the latest (possibly forming) bar."""
+        p = self._provisional
+        if p is None:
+            return {}
+
+        avg_gain = self._window_mean(self._gains, p["gain"], RSI_PERIOD)
+        avg_loss = self._window_mean(self._losses, p["loss"], RSI_PERIOD)
+        if avg_loss != avg_loss or avg_gain != avg_gain:
+            rsi = float("nan")
+        elif avg_loss == 0:
+            rsi = 100.0 if avg_gain > 0 else float("nan")
+        else:
+            rsi = 100 - (100 / (1 + avg_gain / avg_loss))
+
+        vwap = 0.0
+        # Counting traded bars keeps rounding left by evicted volume from reading as volume
+        if p["traded"] and p["cum_vol"] > 0:
+            vwap = p["cum_pv"] / p["cum_vol"]
+
+        return {
+            "ema_20": float(p["ema"][20]),
+            "ema_50": float(p["ema"][50]),
+            "ema_200": float(p["ema"][200]),
+            "rsi": float(rsi),
+            "atr": float(self._window_mean(self._ranges, p["tr"], ATR_PERIOD)),
+            "vwap": float(vwap),
+            "close": float(p["close"]),
+            "volume": float(p["volume"])
+        }
+
+
+class IndicatorEngine:
+    """
+    Keeps one IncrementalIndicators state per (symbol, interval) key and
+    syncs it against whatever candle window the connector returned, so the
+    result equals calculate_technical_indicators over that same window.
+    """
+
+    def __init__(self):
+        self._states: Dict[Tuple[str, str], IncrementalIndicators] = {}
+
+    def update(self, symbol: str, interval: str, candles: Union[CandleSeries, List[MarketCandle]]) -> Dict[str, float]:
+        if not candles:
+            return {}
+        if not isinstance(candles, CandleSeries):
+            candles = CandleSeries.from_candles(candles)
+
+        key = (symbol, interval)
+        window = len(candles)
+        state = self._states.get(key)
+
+        if state is None or state.window != window:
+            state = IncrementalIndicators(window)
+            self._states[key] = state
+        elif window <= _MIN_SLIDING_WINDOW or self._has_gap(state, int(candles.timestamp[0]), interval):
+            # Too short to slide (the window's first bar is inside the RSI/ATR
+            # periods), or the window no longer connects to our state: reseed.
+            state.reset()
+
+        self._fold(state, candles)
+        if state.first_bar != (int(candles.timestamp[0]), float(candles.close[0])):
+            # The window starts somewhere the state didn't slide to (bars missing
+            # or revised upstream): rebuild from this window.
+            state.reset()
+            self._fold(state, candles)
+        return state.snapshot()
+
+    @staticmethod
+    def _fold(state: IncrementalIndicators, candles: CandleSeries):
+        # Only the forming bar and anything newer need folding in.
+        if state.last_timestamp is not None:
+            candles = candles.since(state.last_timestamp)
+        for row in zip(candles.timestamp.tolist(), candles.open.tolist(), candles.high.tolist(),
+                       candles.low.tolist(), candles.close.tolist(), candles.volume.tolist()):
+            state.update(*row)
+
+    @staticmethod
+    def _has_gap(state: IncrementalIndicators, first_timestamp: int, interval: str) -> bool:
+        if state.last_timestamp is None:
+            return True
+        if first_timestamp <= state.last_timestamp:
+            return False
+        step = interval_to_seconds(interval)
+        if step is None:
+            return True
+        return first_timestamp - state.last_timestamp > step * 1000
+
+    def reset(self, symbol: Optional[str] = None, interval: Optional[str] = None):
+        if symbol is None:
+            self._states.clear()
+            return
+        self._states.pop((symbol, interval), None)
+
+
+indicator_engine = IndicatorEngine()
+
+
+def ema_matrix(values: np.ndarray, span: int) -> np.ndarray:
+    """
+    adjust=False EMA along the last axis, seeded with the first value
+    (pandas ewm(span, adjust=False)). Runs as one IIR filter over every row.
+    """
+    alpha = 2.0 / (span + 1)
+    x = np.atleast_2d(values)
+    y, _ = lfilter([alpha], [1.0, alpha - 1.0], x, axis=-1, zi=(1 - alpha) * x[:, :1])
+    return y.reshape(np.shape(values))
+
+
+def rolling_mean(values: np.ndarray, period: int) -> np.ndarray:
+    """Trailing mean over `period` values along the last axis; NaN until the window fills."""
+    x = np.atleast_2d(values)
+    out = np.full(x.shape, np.nan)
+    if x.shape[-1] >= period:
+        out[:, period - 1:] = np.lib.stride_tricks.sliding_window_view(x, period, axis=-1).mean(axis=-1)
+    return out.reshape(np.shape(values))
+
+
+def indicator_matrix(
+    close: np.ndarray,
+    high: np.ndarray,
+    low: np.ndarray,
+    volume: np.ndarray,
+    vwap_window: Optional[int] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Full indicator columns for a matrix of bars (one row per instrument, bars
+    left-aligned along the last axis; shorter rows NaN-padded at the end).
+    Same definitions as FeatureEngine.calculate_technical_indicators. VWAP is
+    cumulative from the first bar, or trailing over vwap_window bars; it is 0
+    where no volume has traded.
+    """
+    close, high, low, volume = (np.atleast_2d(np.asarray(a, dtype=np.float64)) for a in (close, high, low, volume))
+    prev_close = np.concatenate((np.full((close.shape[0], 1), np.nan), close[:, :-1]), axis=1)
+    delta = close - prev_close
+    # The first bar has no previous close: zero gain/loss, true range = high - low.
+    gain = np.where(delta > 0, delta, 0.0)
+    loss = np.where(delta < 0, -delta, 0.0)
+    true_range = np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rsi = 100 - 100 / (1 + rolling_mean(gain, RSI_PERIOD) / rolling_mean(loss, RSI_PERIOD))
+        if vwap_window:
+            cum_pv = rolling_mean(close * volume, vwap_window) * vwap_window
+            cum_vol = rolling_mean(volume, vwap_window) * vwap_window
+        else:
+            cum_pv = np.cumsum(close * volume, axis=-1)
+            cum_vol = np.cumsum(volume, axis=-1)
+        vwap = np.where(cum_vol > 0, cum_pv / cum_vol, 0.0)
+
+    columns = {f"ema_{span}": ema_matrix(close, span) for span in EMA_SPANS}
+    columns.update({
+        "rsi": rsi,
+        "atr": rolling_mean(true_range, ATR_PERIOD),
+        "vwap": vwap,
+    })
+    return columns
+
@@ -0,0 +1,171 @@
+import asyncio
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Optional, Tuple
+import numpy as np
+from app.core.config import settings
+from app.schemas.candle_series import CandleSeries
+from app.services.connector_interface import MarketDataConnector
+from app.services.market_hours import IST, next_nse_session
+from app.services.market_levels import MarketLevels, PIVOT_METHODS
+
+PIVOT_PERIODS = {
+    "daily": "Daily (Previous Day)",
+    "weekly": "Weekly (Previous Week)",
+    "monthly": "Monthly (Previous Month)",
+}
+_DAY_MS = 86_400_000
+_EPOCH = date(1970, 1, 1)
+# Daily bars are stamped at the start of the exchange day
+_DAY_OFFSET_MS = {"NSE": 330 * 60 * 1000, "CRYPTO": 0}
+
+Levels = Dict[str, Any]
+
+
+def session_key(market: str, now: Optional[datetime] = None) -> Tuple[date, int]:
+    """
+    The trading day levels are for and when they roll over (epoch ms): for
+    NSE the session in progress, or the next one once the close has passed,
+    rolling over at its close; for crypto the UTC day. now must be
+    timezone-aware (defaults to the current time).
+    """
+    now_ms = int((now or datetime.now(timezone.utc)).timestamp() * 1000)
+    if market == "NSE":
+        open_ms, close_ms = next_nse_session(now_ms)
+        return datetime.fromtimestamp(open_ms / 1000.0, IST).date(), close_ms
+    return datetime.fromtimestamp(now_ms / 1000.0, timezone.utc).date(), (now_ms // _DAY_MS + 1) * _DAY_MS
+
+
+def _period_bars(day_ids: np.ndarray, period_ids: np.ndarray, series: CandleSeries, keep: np.ndarray) -> Tuple[np.ndarray, ...]:
+    """High/low/close and first day of each period, over the completed daily bars in `keep`."""
+    period_ids = period_ids[keep]
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(period_ids)) + 1))
+    ends = np.concatenate((starts[1:] - 1, [len(period_ids) - 1]))
+    return (
+        np.fmax.reduceat(series.high[keep], starts),
+        np.fmin.reduceat(series.low[keep], starts),
+        series.close[keep][ends],
+        day_ids[keep][starts],
+    )
+
+
+class LevelsService:
+    """
+    Pivot levels per symbol, computed once per session and served from memory.
+
+    On the first request of a session (see session_key) the symbol's daily
+    history is fetched through its connector (served from the candle store
+    when that is enabled) and the daily, weekly and monthly bars of every
+    completed period are run through each pivot method in one vectorized
+    pass. The levels for the last completed period of each (method,
+    period) are kept until the session rolls over; concurrent first
+    requests share one computation.
+    """
+
+    def __init__(self, history_days: int = 400):
+        self.history_days = history_days
+        self._tables: Dict[str, Tuple[int, Dict[Tuple[str, str], Levels]]] = {}
+        self._pending: Dict[str, asyncio.Task] = {}
+        self.hits = 0
+        self.computes = 0
+
+    async def get_levels(
+        self,
+        connector: MarketDataConnector,
+        symbol: str,
+        market: str,
+        method: str = "classic",
+        period: str = "daily",
+        now: Optional[datetime] = None,
+    ) -> Levels:
+        """Levels for the session in effect, or {} when there is no completed period to base them on."""
+        if method not in PIVOT_METHODS:
+            raise ValueError(f"Unknown pivot method: {method}")
+        if period not in PIVOT_PERIODS:
+            raise ValueError(f"Unknown pivot period: {period}")
+        now_ms = int((now or datetime.now(timezone.utc)).timestamp() * 1000)
+        memo = self._tables.get(symbol)
+        if memo is not None and now_ms < memo[0]:
+            self.hits += 1
+            return memo[1].get((method, period), {})
+
+        task = self._pending.get(symbol)
+        if task is None or task.done():
+            session, expires_ms = session_key(market, now)
+            task = self._pending[symbol] = asyncio.create_task(self._compute(connector, symbol, market, session, expires_ms))
+        table = await asyncio.shield(task)
+        return table.get((method, period), {})
+
+    def version(self, symbol: str, now: Optional[datetime] = None) -> Optional[int]:
+        """
+        When the symbol's memoized levels roll over (epoch ms), or None if
+        they have to be computed first. Identifies the levels get_levels()
+        serves, so callers can validate a cached copy without fetching them.
+        """
+        memo = self._tables.get(symbol)
+        now_ms = int((now or datetime.now(timezone.utc)).timestamp() * 1000)
+        if memo is None or now_ms >= memo[0]:
+            return None
+        return memo[0]
+
+    def memoized(self, symbol: str, method: str = "classic", period: str = "daily") -> Levels:
+        """The memoized levels, without a fetch ({} if there are none)."""
+        memo = self._tables.get(symbol)
+        return memo[1].get((method, period), {}) if memo is not None else {}
+
+    async def _compute(
+        self, connector: MarketDataConnector, symbol: str, market: str, session: date, expires_ms: int,
+    ) -> Dict[Tuple[str, str], Levels]:
+        try:
+            series = await connector.get_candle_series(symbol, "1d", self.history_days)
+            table = self.compute_table(series, market, session)
+        except Exception as e:
+            print(f"Error calculating levels for {symbol}: {e}")
+            return {}
+        self.computes += 1
+        if table:
+            # Nothing to memoize without a completed period: retry on the next request
+            self._tables[symbol] = (expires_ms, table)
+        return table
+
+    @staticmethod
+    def compute_table(series: CandleSeries, market: str, session: date) -> Dict[Tuple[str, str], Levels]:
+        """Latest levels of every (method, period) from daily bars, using only periods completed before `session`."""
+        if not series:
+            return {}
+        day_ids = (series.timestamp + _DAY_OFFSET_MS.get(market, 0)) // _DAY_MS
+        session_day = (session - _EPOCH).days
+        period_ids = {
+            "daily": day_ids,
+            "weekly": (day_ids + 3) // 7,  # Monday-based weeks; 1970-01-01 was a Thursday
+            "monthly": day_ids.astype("datetime64[D]").astype("datetime64[M]").astype(np.int64),
+        }
+        session_ids = {
+            "daily": session_day,
+            "weekly": (session_day + 3) // 7,
+            "monthly": int(np.datetime64(session, "M").astype(np.int64)),
+        }
+
+        table: Dict[Tuple[str, str], Levels] = {}
+        for period, ids in period_ids.items():
+            keep = ids < session_ids[period]
+            if not keep.any():
+                continue
+            high, low, close, first_day = _period_bars(day_ids, ids, series, keep)
+            start = (_EPOCH + timedelta(days=int(first_day[-1]))).isoformat()
+            for method in PIVOT_METHODS:
+                levels = MarketLevels.pivot_arrays(method, high, low, close)
+                table[(method, period)] = {
+                    "basis": PIVOT_PERIODS[period],
+                    "method": method,
+                    "period": period,
+                    "date": start,
+                    "session": session.isoformat(),
+                    "levels": {key: round(float(values[-1]), 2) for key, values in levels.items()},
+                }
+        return table
+
+    def stats(self) -> Dict[str, Any]:
+        return {"symbols": len(self._tables), "hits": self.hits, "computes": self.computes}
+
+
+levels_service = LevelsService(history_days=settings.LEVELS_HISTORY_DAYS)
@@ -0,0 +1,152 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from app.services.connector_interface import MarketDataConnector
+from app.schemas.market_data import MarketCandle
+from app.schemas.candle_series import CandleSeries
+
+# Seconds a candle window stays fresh, per interval. Roughly "how long until
+# the forming bar is worth refetching", not the bar length itself.
+DEFAULT_INTERVAL_TTLS = {
+    "1m": 3,
+    "2m": 5,
+    "5m": 10,
+    "15m": 15,
+    "30m": 30,
+    "60m": 60,
+    "1h": 60,
+    "1d": 300,
+}
+DEFAULT_CANDLE_TTL = 15
+DEFAULT_PRICE_TTL = 2
+
+
+def _retrieve(task: asyncio.Task):
+    # Mark the outcome retrieved, so a fetch whose callers all went away doesn't log a warning.
+    if not task.cancelled():
+        task.exception()
+
+
+class CachedMarketDataConnector(MarketDataConnector):
+    """
+    TTL + LRU cache in front of any MarketDataConnector.
+
+    Entries are keyed by (symbol, interval, limit). Concurrent misses for the
+    same key share one in-flight upstream call (single-flight), so a dashboard
+    load that hits /latest, /expert, /levels and /candles at once only goes
+    upstream once per distinct request.
+    Empty/zero results are returned to waiters but never stored.
+    """
+
+    def __init__(
+        self,
+        inner: MarketDataConnector,
+        interval_ttls: Optional[Dict[str, float]] = None,
+        default_ttl: float = DEFAULT_CANDLE_TTL,
+        price_ttl: float = DEFAULT_PRICE_TTL,
+        max_entries: int = 256,
+    ):
+        self.inner = inner
+        self.interval_ttls = dict(DEFAULT_INTERVAL_TTLS if interval_ttls is None else interval_ttls)
+        self.default_ttl = default_ttl
+        self.price_ttl = price_ttl
+        self.max_entries = max_entries
+
+        self._entries: "OrderedDict[Tuple, Tuple[float, Any]]" = OrderedDict()
+        self._inflight: Dict[Tuple, asyncio.Task] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    def ttl_for(self, interval: str) -> float:
+        return self.interval_ttls.get(interval, self.default_ttl)
+
+    async def get_latest_price(self, symbol: str) -> float:
+        return await self._get(
+            ("price", symbol),
+            self.price_ttl,
+            lambda: self.inner.get_latest_price(symbol),
+        )
+
+    async def get_historical_candles(self, symbol: str, interval: str, limit: int) -> List[MarketCandle]:
+        return (await self.get_candle_series(symbol, interval, limit)).to_candles()
+
+    async def get_candle_series(self, symbol: str, interval: str, limit: int) -> CandleSeries:
+        series = await self._get(
+            ("candles", symbol, interval, limit),
+            self.ttl_for(interval),
+            lambda: self.inner.get_candle_series(symbol, interval, limit),
+        )
+        # Hand out a read-only zero-copy view, never the cached buffer itself.
+        return series[:]
+
+    async def _get(self, key: Tuple, ttl: float, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._entries[key]
+
+        pending = self._inflight.get(key)
+        if pending is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            # The fetch runs as its own task, so a caller that goes away
+            # (client disconnect) doesn't cancel it for everyone else waiting.
+            pending = asyncio.create_task(self._fill(key, ttl, fetch))
+            pending.add_done_callback(_retrieve)
+            self._inflight[key] = pending
+        return await asyncio.shield(pending)
+
+    async def _fill(self, key: Tuple, ttl: float, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            value = await fetch()
+            if value:
+                self._store(key, value, ttl)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    def _store(self, key: Tuple, value: Any, ttl: float):
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, symbol: Optional[str] = None):
+        if symbol is None:
+            self._entries.clear()
+            return
+        for key in [k for k in self._entries if k[1] == symbol]:
+            del self._entries[key]
+
+    async def release(self, symbol: str):
+        """A symbol that is no longer watched: free its entries."""
+        self.invalidate(symbol)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "inflight": len(self._inflight),
+            # Every hit or coalesced waiter is an upstream call we didn't make.
+            "upstream_saved": self.hits + self.coalesced,
+            "hit_rate": round((self.hits + self.coalesced) / lookups, 4) if lookups else 0.0,
+        }
+
+    async def close(self):
+        close = getattr(self.inner, "close", None)
+        if close is not None:
+            await close()
@@ -1,14 +1,26 @@
-from datetime import datetime, time
+from datetime import datetime, time, timedelta
+from typing import Optional, Tuple
 import pytz
 
-def get_market_status_ist():
+IST = pytz.timezone('Asia/Kolkata')
+NSE_OPEN = time(9, 15)
+NSE_CLOSE = time(15, 30)
+
+
+def get_market_status_ist(now: Optional[datetime] = None):
     """
     Returns the market status for NIFTY (NSE).
     Timezone: Asia/Kolkata
     Open: 09:15 - 15:30 (Mon-Fri)
+
+    now defaults to the current time; naive values are taken as IST.
     """
-    tz_ist = pytz.timezone('Asia/Kolkata')
-    now_ist = datetime.now(tz_ist)
+    if now is None:
+        now_ist = datetime.now(IST)
+    elif now.tzinfo is None:
+        now_ist = IST.localize(now)
+    else:
+        now_ist = now.astimezone(IST)
     
     # Check Weekend
     if now_ist.weekday() >= 5: # 5=Sat, 6=Sun
@@ -21,10 +33,8 @@ def get_market_status_ist():
 
     # Check Time
     current_time = now_ist.time()
-    market_open = time(9, 15)
-    market_close = time(15, 30)
 
-    if market_open <= current_time <= market_close:
+    if NSE_OPEN <= current_time <= NSE_CLOSE:
         return {
             "is_open": True,
             "status": "OPEN",
@@ -38,3 +48,18 @@ def get_market_status_ist():
             "message": "Market Closed (Outside Hours)",
             "timestamp": now_ist.strftime("%Y-%m-%d %H:%M:%S IST")
         }
+
+
+def next_nse_session(epoch_ms: int) -> Tuple[int, int]:
+    """
+    (open, close) in epoch ms of the NSE session that is open at epoch_ms,
+    or else the next one to open. Same hours as get_market_status_ist.
+    """
+    day = datetime.fromtimestamp(epoch_ms / 1000.0, IST).date()
+    while True:
+        if day.weekday() < 5:
+            open_ms = int(IST.localize(datetime.combine(day, NSE_OPEN)).timestamp() * 1000)
+            close_ms = int(IST.localize(datetime.combine(day, NSE_CLOSE)).timestamp() * 1000)
+            if epoch_ms <= close_ms:
+                return open_ms, close_ms
+        day += timedelta(days=1)
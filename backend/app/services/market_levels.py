@@ -1,12 +1,16 @@
 from typing import Dict, Any, Optional
 from datetime import datetime
+import numpy as np
 import pandas as pd
 from app.services.connector_interface import MarketDataConnector
 from app.schemas.market_data import MarketCandle
 
+PIVOT_METHODS = ("classic", "camarilla", "woodie", "fibonacci")
+
+
 class MarketLevels:
     """
-    Calculates Pivot Points (Classic) and Support/Resistance levels.
+    Calculates Pivot Points (Classic, Camarilla, Woodie, Fibonacci) and Support/Resistance levels.
     """
     
     @staticmethod
@@ -21,22 +25,46 @@ class MarketLevels:
         R3 = H + 2(P - L)
         S3 = L - 2(H - P)
         """
-        p = (high + low + close) / 3
-        r1 = (2 * p) - low
-        s1 = (2 * p) - high
-        r2 = p + (high - low)
-        s2 = p - (high - low)
-        r3 = high + 2 * (p - low)
-        s3 = low - 2 * (high - p)
-        
+        pivots = MarketLevels.pivot_arrays("classic", np.array([high]), np.array([low]), np.array([close]))
+        return {key: round(float(values[0]), 2) for key, values in pivots.items()}
+
+    @staticmethod
+    def pivot_arrays(method: str, high: np.ndarray, low: np.ndarray, close: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Pivot levels for every bar at once (each bar's levels apply to the next period).
+        classic:   P = (H + L + C) / 3, levels as in calculate_pivots
+        woodie:    P = (H + L + 2C) / 4, same R/S construction as classic
+        fibonacci: P = (H + L + C) / 3, R/S = P +/- 0.382, 0.618, 1.0 x (H - L)
+        camarilla: R/S1..4 = C +/- (H - L) x 1.1 / 12, 6, 4, 2
+        """
+        rng = high - low
+        if method == "camarilla":
+            levels = {"p": (high + low + close) / 3}
+            for i, divisor in enumerate((12, 6, 4, 2), start=1):
+                levels[f"r{i}"] = close + rng * 1.1 / divisor
+                levels[f"s{i}"] = close - rng * 1.1 / divisor
+            return levels
+        if method == "fibonacci":
+            p = (high + low + close) / 3
+            levels = {"p": p}
+            for i, ratio in enumerate((0.382, 0.618, 1.0), start=1):
+                levels[f"r{i}"] = p + ratio * rng
+                levels[f"s{i}"] = p - ratio * rng
+            return levels
+        if method == "woodie":
+            p = (high + low + 2 * close) / 4
+        elif method == "classic":
+            p = (high + low + close) / 3
+        else:
+            raise ValueError(f"Unknown pivot method: {method}")
         return {
-            "p": round(p, 2),
-            "r1": round(r1, 2),
-            "s1": round(s1, 2),
-            "r2": round(r2, 2),
-            "s2": round(s2, 2),
-            "r3": round(r3, 2),
-            "s3": round(s3, 2)
+            "p": p,
+            "r1": (2 * p) - low,
+            "s1": (2 * p) - high,
+            "r2": p + rng,
+            "s2": p - rng,
+            "r3": high + 2 * (p - low),
+            "s3": low - 2 * (high - p),
         }
 
     @staticmethod
@@ -46,28 +74,28 @@ class MarketLevels:
         """
         try:
             # Fetch last 2 daily candles to ensure we have the completed previous day
-            candles = await connector.get_historical_candles(symbol, "1d", 2)
+            candles = await connector.get_candle_series(symbol, "1d", 2)
             
             if not candles or len(candles) < 2:
                 # Fallback if only 1 candle (e.g. new listing or data issue) or empty
                 if len(candles) == 1:
-                     target_candle = candles[0]
+                     target = 0
                 else:
                     return {}
             else:
                  # Use the second to last candle (completed previous day)
                  # The last candle is usually the "current/forming" day
-                 target_candle = candles[-2]
+                 target = len(candles) - 2
 
             pivots = MarketLevels.calculate_pivots(
-                target_candle.high, 
-                target_candle.low, 
-                target_candle.close
+                float(candles.high[target]), 
+                float(candles.low[target]), 
+                float(candles.close[target])
             )
             
             return {
                 "basis": "Daily (Previous Day)",
-                "date": target_candle.timestamp.strftime("%Y-%m-%d"),
+                "date": candles.datetime_at(target).strftime("%Y-%m-%d"),
                 "levels": pivots
             }
             
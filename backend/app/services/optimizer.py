@@ -0,0 +1,290 @@
+"""
+Parameter sweep + walk-forward evaluation of DecisionEngine over an
+asset's history, fetched the same way the /backtest endpoint fetches it.
+
+    cd backend
+    python -m app.services.optimizer --asset NIFTY --bars 5000 \
+        --grid confidence_threshold=50,60,70 --grid rsi_overbought=65,70,75
+"""
+import argparse
+import asyncio
+import hashlib
+import itertools
+import json
+import os
+import sys
+from datetime import tzinfo
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from app.core.config import settings
+from app.schemas.candle_series import CandleSeries
+from app.schemas.decision_params import DecisionParams
+from app.services.backtest import Backtester, BacktestConfig
+
+_FIELDS = ("timestamp", "open", "high", "low", "close", "volume")
+
+# Per-worker state, filled by _init_worker from the shared-memory block.
+_worker: Dict[str, Any] = {}
+
+
+def parameter_grid(grid: Dict[str, Sequence[Any]], base: Optional[DecisionParams] = None) -> List[DecisionParams]:
+    """Every combination of the given DecisionParams fields (others from base/defaults)."""
+    base = base or DecisionParams()
+    unknown = set(grid) - set(DecisionParams.model_fields)
+    if unknown:
+        raise ValueError(f"Unknown DecisionParams fields: {', '.join(sorted(unknown))}")
+    names = list(grid)
+    return [
+        base.model_copy(update=dict(zip(names, values)))
+        for values in itertools.product(*(grid[name] for name in names))
+    ]
+
+
+def walk_forward_splits(bars: int, folds: int = 4, train_fraction: float = 0.5) -> List[Tuple[int, int, int]]:
+    """
+    Anchored walk-forward windows as (train_start, train_end, test_end):
+    the first train_fraction of the history seeds the first fold, the rest
+    is cut into `folds` consecutive test windows, and each fold trains on
+    everything before its test window.
+    """
+    first = int(bars * train_fraction)
+    edges = np.linspace(first, bars, folds + 1).astype(int)
+    return [(0, int(edges[k]), int(edges[k + 1])) for k in range(folds) if edges[k + 1] > edges[k]]
+
+
+def data_hash(series: CandleSeries) -> str:
+    digest = hashlib.sha256()
+    for name in _FIELDS:
+        digest.update(np.ascontiguousarray(getattr(series, name)).tobytes())
+    return digest.hexdigest()
+
+
+def _init_worker(shm_name: str, bars: int, asset_type: str, config_json: str, tz: Optional[tzinfo]):
+    """Attach the candle arrays in shared memory (no copy) and precompute indicators once per worker."""
+    # Pool workers share the parent's resource tracker, so the parent's unlink() covers this too.
+    shm = shared_memory.SharedMemory(name=shm_name)
+    block = np.ndarray((len(_FIELDS), bars), dtype=np.float64, buffer=shm.buf)
+    config = BacktestConfig.model_validate_json(config_json)
+    series = CandleSeries.wrap(block[0].view(np.int64), *block[1:], tz=tz, source="optimizer")
+    _worker.update({
+        "shm": shm,
+        "series": series,
+        "asset_type": asset_type,
+        "config": config,
+        "columns": Backtester.indicators(series, asset_type, config.vwap_window),
+    })
+
+
+def _evaluate(params_json: List[str], splits: List[Tuple[int, int, int]]) -> List[List[Dict[str, Any]]]:
+    """Train/test metrics per split for each parameter set (runs in a worker)."""
+    series, columns = _worker["series"], _worker["columns"]
+    asset_type, config = _worker["asset_type"], _worker["config"]
+    out = []
+    for raw in params_json:
+        action = Backtester.actions(columns, asset_type, DecisionParams.model_validate_json(raw))["action"]
+        folds = []
+        for train_start, train_end, test_end in splits:
+            folds.append({
+                "train": Backtester.simulate(series[train_start:train_end], action[train_start:train_end], asset_type, config),
+                "test": Backtester.simulate(series[train_end:test_end], action[train_end:test_end], asset_type, config),
+            })
+        out.append(folds)
+    return out
+
+
+class Optimizer:
+    """
+    Parameter sweep + walk-forward evaluation of DecisionEngine.
+
+    Candle arrays are placed once in a shared-memory block that every worker
+    of the process pool maps read-only, so only parameter sets travel to the
+    workers. Each worker computes the indicator matrix once; a parameter set
+    then costs one vectorized rule pass plus the fold simulations.
+
+    Results are cached on disk per (data hash, params, splits, config) cell,
+    so re-running a grown grid only evaluates the new cells.
+    """
+
+    def __init__(
+        self,
+        series: CandleSeries,
+        asset_type: str = "NIFTY",
+        config: Optional[BacktestConfig] = None,
+        folds: int = 4,
+        train_fraction: float = 0.5,
+        objective: str = "total_return_pct",
+        workers: Optional[int] = None,
+        cache_dir: Optional[str] = None,
+        chunk_size: int = 32,
+    ):
+        self.series = series
+        self.asset_type = asset_type
+        self.config = config or BacktestConfig()
+        self.splits = walk_forward_splits(len(series), folds, train_fraction)
+        self.objective = objective
+        self.workers = workers or settings.OPTIMIZER_WORKERS or os.cpu_count() or 1
+        self.cache_dir = cache_dir or settings.OPTIMIZER_CACHE_DIR
+        self.chunk_size = chunk_size
+        self.data_hash = data_hash(series)
+
+    def _cell_key(self, params_json: str) -> str:
+        spec = json.dumps({
+            "params": json.loads(params_json),
+            "asset_type": self.asset_type,
+            "splits": self.splits,
+            "config": self.config.model_dump(),
+        }, sort_keys=True)
+        return hashlib.sha256(spec.encode()).hexdigest()
+
+    def _cache_path(self) -> str:
+        return os.path.join(self.cache_dir, f"{self.data_hash}.json")
+
+    def _load_cache(self) -> Dict[str, Any]:
+        try:
+            with open(self._cache_path()) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_cache(self, cache: Dict[str, Any]):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp = self._cache_path() + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(cache, f)
+        os.replace(tmp, self._cache_path())
+
+    def run(self, candidates: Sequence[DecisionParams]) -> Dict[str, Any]:
+        if len(self.series) < 2 or not self.splits:
+            return {"error": "Insufficient data for optimization"}
+
+        params_json = [p.model_dump_json() for p in candidates]
+        keys = [self._cell_key(raw) for raw in params_json]
+        cache = self._load_cache()
+        missing = sorted({(key, raw) for key, raw in zip(keys, params_json) if key not in cache})
+        if missing:
+            for key, folds in zip((k for k, _ in missing), self._compute([raw for _, raw in missing])):
+                cache[key] = folds
+            self._save_cache(cache)
+
+        results = [{"params": p.model_dump(), "folds": cache[key]} for p, key in zip(candidates, keys)]
+        return {
+            "data_hash": self.data_hash,
+            "candidates": len(candidates),
+            "computed": len(missing),
+            "cached": len(set(keys)) - len(missing),
+            "splits": self.splits,
+            "walk_forward": self._walk_forward(results),
+            "results": results,
+        }
+
+    def _compute(self, params_json: List[str]) -> List[List[Dict[str, Any]]]:
+        bars = len(self.series)
+        shm = shared_memory.SharedMemory(create=True, size=len(_FIELDS) * bars * 8)
+        try:
+            block = np.ndarray((len(_FIELDS), bars), dtype=np.float64, buffer=shm.buf)
+            block[0] = self.series.timestamp.view(np.float64)
+            for row, name in enumerate(_FIELDS[1:], start=1):
+                block[row] = getattr(self.series, name)
+            del block  # the mapping can't be closed while a view is alive
+
+            chunks = [params_json[i:i + self.chunk_size] for i in range(0, len(params_json), self.chunk_size)]
+            init_args = (shm.name, bars, self.asset_type, self.config.model_dump_json(), self.series.tz)
+            with ProcessPoolExecutor(max_workers=min(self.workers, len(chunks)),
+                                     initializer=_init_worker, initargs=init_args) as pool:
+                results = pool.map(_evaluate, chunks, itertools.repeat(self.splits))
+                return [folds for chunk in results for folds in chunk]
+        finally:
+            shm.close()
+            shm.unlink()
+
+    def _walk_forward(self, results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Per fold: the best parameters on the train window and how they did out of sample."""
+        report = []
+        for k, (train_start, train_end, test_end) in enumerate(self.splits):
+            best = max(results, key=lambda r: r["folds"][k]["train"].get(self.objective, float("-inf")))
+            report.append({
+                "train": [train_start, train_end],
+                "test": [train_end, test_end],
+                "params": best["params"],
+                "train_metrics": best["folds"][k]["train"],
+                "test_metrics": best["folds"][k]["test"],
+            })
+        return report
+
+
+def parse_grid(specs: Sequence[str]) -> Dict[str, List[Any]]:
+    """--grid name=v1,v2,... options as a parameter_grid() grid (values parsed as JSON where they can be)."""
+    grid: Dict[str, List[Any]] = {}
+    for spec in specs:
+        name, sep, values = spec.partition("=")
+        if not sep or not values:
+            raise ValueError(f"Expected name=v1,v2,... in --grid {spec}")
+        parsed = []
+        for value in values.split(","):
+            try:
+                parsed.append(json.loads(value))
+            except ValueError:
+                parsed.append(value)
+        grid[name.strip()] = parsed
+    return grid
+
+
+async def load_history(asset: str, interval: Optional[str], bars: int) -> Tuple[str, CandleSeries]:
+    """An asset's rule family and candles, from its connector (and the candle store, when enabled)."""
+    # Imported here: pool workers import this module and must not build the app's connectors.
+    from app.services.asset_context import asset_context
+
+    instrument = asset_context.resolve(asset)
+    connector = asset_context.get_connector_for(instrument.key)
+    series = await connector.get_candle_series(instrument.symbol, interval or instrument.signal_interval, bars)
+    return instrument.asset_type, series
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="DecisionEngine parameter sweep with walk-forward evaluation")
+    parser.add_argument("--asset", default="NIFTY")
+    parser.add_argument("--interval", help="candle interval (defaults to the asset's signal interval)")
+    parser.add_argument("--bars", type=int, default=5000)
+    parser.add_argument("--grid", action="append", default=[], metavar="NAME=V1,V2",
+                        help="DecisionParams field and the values to try; repeat for more fields")
+    parser.add_argument("--folds", type=int, default=4)
+    parser.add_argument("--train-fraction", type=float, default=0.5)
+    parser.add_argument("--objective", default="total_return_pct", help="train metric each fold maximizes")
+    parser.add_argument("--cost-bps", type=float, default=5.0)
+    parser.add_argument("--workers", type=int, help="process pool size (defaults to OPTIMIZER_WORKERS)")
+    parser.add_argument("--cache-dir", help="defaults to OPTIMIZER_CACHE_DIR")
+    parser.add_argument("--json", help="also write the full report, every candidate's folds included, to this file")
+    args = parser.parse_args(argv)
+
+    try:
+        candidates = parameter_grid(parse_grid(args.grid))
+    except ValueError as e:
+        parser.error(str(e))
+    asset_type, series = asyncio.run(load_history(args.asset, args.interval, args.bars))
+    optimizer = Optimizer(
+        series, asset_type, BacktestConfig(cost_bps=args.cost_bps), folds=args.folds,
+        train_fraction=args.train_fraction, objective=args.objective,
+        workers=args.workers, cache_dir=args.cache_dir,
+    )
+    report = optimizer.run(candidates)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    if "error" in report:
+        print(f"{args.asset}: {report['error']} ({len(series)} bars)")
+        return 1
+
+    print(f"{args.asset}: {len(series)} bars, {report['candidates']} candidates "
+          f"({report['computed']} computed, {report['cached']} cached)")
+    tuned = sorted(parse_grid(args.grid))
+    for k, fold in enumerate(report["walk_forward"]):
+        params = ", ".join(f"{name}={fold['params'][name]}" for name in tuned)
+        print(f"  fold {k}: train {args.objective}={fold['train_metrics'].get(args.objective)} "
+              f"test {args.objective}={fold['test_metrics'].get(args.objective)}  [{params}]")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
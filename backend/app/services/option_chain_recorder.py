@@ -0,0 +1,91 @@
+import asyncio
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from app.db.option_chain_repository import OptionChainRepository, create_option_chain_store
+from app.schemas.market_data import OptionChain
+
+
+class OptionChainRecorder:
+    """
+    Keeps the history of every option chain the scheduler analyzes.
+
+    SignalScheduler listener: each fresh snapshot that carries a chain is
+    appended to the option chain store on a thread (the analyzer's columns,
+    IV included). A chain that hasn't moved on since the last poll is
+    skipped by the store itself.
+    """
+
+    def __init__(self, repository: Optional[OptionChainRepository]):
+        self.repository = repository
+        self.written = 0
+        self.skipped = 0
+        self.failed = 0
+        self.last_write_ms: Optional[float] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.repository is not None
+
+    async def record_snapshots(self, snapshots: List[Dict[str, Any]]):
+        """Snapshots adopted from another worker were recorded there."""
+        if not self.enabled:
+            return
+        for snapshot in snapshots:
+            metrics = snapshot.get("options")
+            columns = snapshot.get("_option_columns")
+            if snapshot.get("_shared") or not metrics or not columns:
+                continue
+            started = time.perf_counter()
+            try:
+                written = await asyncio.to_thread(
+                    self.repository.append,
+                    snapshot["asset"],
+                    datetime.fromisoformat(metrics["timestamp"]),
+                    datetime.fromisoformat(metrics["expiry"]),
+                    metrics["spot"],
+                    columns,
+                    metrics.get("source") or "",
+                )
+                if written:
+                    self.written += 1
+                else:
+                    self.skipped += 1
+            except Exception as e:
+                self.failed += 1
+                print(f"OptionChainRecorder: failed to store chain for {snapshot['asset']}: {e}")
+            finally:
+                self.last_write_ms = round((time.perf_counter() - started) * 1000, 2)
+
+    async def chain_at(self, symbol: str, at: Optional[datetime] = None, expiry: Optional[datetime] = None) -> Optional[OptionChain]:
+        if not self.enabled:
+            return None
+        return await asyncio.to_thread(self.repository.chain_at, symbol, at, expiry)
+
+    async def contract_history(
+        self,
+        symbol: str,
+        strike: float,
+        option_type: str,
+        field: str = "oi",
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        expiry: Optional[datetime] = None,
+    ) -> List[Dict[str, Any]]:
+        if not self.enabled:
+            return []
+        return await asyncio.to_thread(
+            self.repository.contract_history, symbol, strike, option_type, field, start, end, expiry,
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "written": self.written,
+            "skipped": self.skipped,
+            "failed": self.failed,
+            "last_write_ms": self.last_write_ms,
+        }
+
+
+option_chain_recorder = OptionChainRecorder(create_option_chain_store())
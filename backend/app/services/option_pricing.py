@@ -0,0 +1,162 @@
+from typing import Dict, Optional
+import numpy as np
+from scipy.special import ndtr
+
+_SQRT_2PI = np.sqrt(2.0 * np.pi)
+_DAYS_PER_YEAR = 365.0
+
+IV_LOW = 1e-3   # bracket for the implied-volatility solve (0.1% .. 500%)
+IV_HIGH = 5.0
+
+
+def _pdf(x: np.ndarray) -> np.ndarray:
+    return np.exp(-0.5 * x * x) / _SQRT_2PI
+
+
+def _d1_d2(spot, strike, t, rate, sigma, dividend):
+    vol_t = sigma * np.sqrt(t)
+    d1 = (np.log(spot / strike) + (rate - dividend + 0.5 * sigma * sigma) * t) / vol_t
+    return d1, d1 - vol_t
+
+
+def bs_price(
+    spot: np.ndarray,
+    strike: np.ndarray,
+    t: np.ndarray,
+    rate: float,
+    sigma: np.ndarray,
+    is_call: np.ndarray,
+    dividend: float = 0.0,
+) -> np.ndarray:
+    """Black-Scholes(-Merton) prices; every argument broadcasts, t in years."""
+    d1, d2 = _d1_d2(spot, strike, t, rate, sigma, dividend)
+    spot_df = spot * np.exp(-dividend * t)
+    strike_df = strike * np.exp(-rate * t)
+    call = spot_df * ndtr(d1) - strike_df * ndtr(d2)
+    put = strike_df * ndtr(-d2) - spot_df * ndtr(-d1)
+    return np.where(is_call, call, put)
+
+
+def bs_greeks(
+    spot: np.ndarray,
+    strike: np.ndarray,
+    t: np.ndarray,
+    rate: float,
+    sigma: np.ndarray,
+    is_call: np.ndarray,
+    dividend: float = 0.0,
+) -> Dict[str, np.ndarray]:
+    """
+    Delta, gamma, theta (per calendar day) and vega (per 1 vol point) for
+    every contract at once. NaN sigma gives NaN greeks.
+    """
+    d1, d2 = _d1_d2(spot, strike, t, rate, sigma, dividend)
+    sqrt_t = np.sqrt(t)
+    div_df = np.exp(-dividend * t)
+    strike_df = strike * np.exp(-rate * t)
+    pdf_d1 = _pdf(d1)
+
+    delta = np.where(is_call, div_df * ndtr(d1), div_df * (ndtr(d1) - 1.0))
+    gamma = div_df * pdf_d1 / (spot * sigma * sqrt_t)
+    vega = spot * div_df * pdf_d1 * sqrt_t
+    decay = -spot * div_df * pdf_d1 * sigma / (2.0 * sqrt_t)
+    theta_call = decay - rate * strike_df * ndtr(d2) + dividend * spot * div_df * ndtr(d1)
+    theta_put = decay + rate * strike_df * ndtr(-d2) - dividend * spot * div_df * ndtr(-d1)
+    theta = np.where(is_call, theta_call, theta_put)
+    return {
+        "delta": delta,
+        "gamma": gamma,
+        "theta": theta / _DAYS_PER_YEAR,
+        "vega": vega / 100.0,
+    }
+
+
+def implied_volatility(
+    price: np.ndarray,
+    spot: np.ndarray,
+    strike: np.ndarray,
+    t: np.ndarray,
+    rate: float,
+    is_call: np.ndarray,
+    dividend: float = 0.0,
+    tol: float = 1e-6,
+    max_iter: int = 40,
+    initial: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    Implied volatility of every contract in one batched solve.
+
+    Puts are mapped to calls by put-call parity, so one pricing formula
+    covers the chain. Safeguarded Newton from `initial` (e.g. the previous
+    snapshot's IVs) where given, else a Corrado-Miller estimate: each
+    contract keeps a [lo, hi] bracket tightened from the sign of the pricing
+    error, and a Newton step that leaves it (or has no vega to work with)
+    bisects instead. A contract is done when its Newton step is below tol
+    or its price error is negligible. Prices outside the no-arbitrage
+    bounds, contracts whose price barely depends on volatility and
+    contracts that didn't converge give NaN.
+    """
+    price, spot, strike, t, is_call = np.broadcast_arrays(
+        np.asarray(price, dtype=np.float64), np.asarray(spot, dtype=np.float64),
+        np.asarray(strike, dtype=np.float64), np.asarray(t, dtype=np.float64),
+        np.asarray(is_call, dtype=bool),
+    )
+    sigma = np.full(price.shape, np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        spot_df = spot * np.exp(-dividend * t)
+        strike_df = strike * np.exp(-rate * t)
+        call = np.where(is_call, price, price + spot_df - strike_df)
+        valid = (np.isfinite(call) & (t > 0) & (strike > 0) & (spot > 0)
+                 & (call > np.maximum(spot_df - strike_df, 0.0)) & (call < spot_df))
+    idx = np.flatnonzero(valid)
+    if not len(idx):
+        return sigma
+
+    target, sdf, kdf = call[idx], spot_df[idx], strike_df[idx]
+    sqrt_t = np.sqrt(t[idx])
+    log_moneyness = np.log(sdf / kdf)
+    vega_scale = sdf * sqrt_t / _SQRT_2PI
+    price_tol = 1e-9 * spot[idx]
+    # Deep in/out of the money a vol change of 1e-4 doesn't move the price
+    # measurably: IV is not identifiable there.
+    flat_vega = price_tol * 1e4
+
+    # Corrado-Miller approximation
+    half_gap = 0.5 * (sdf - kdf)
+    excess = target - half_gap
+    root = np.sqrt(np.maximum(excess * excess - (sdf - kdf) ** 2 / np.pi, 0.0))
+    x = np.clip(np.sqrt(2.0 * np.pi) / sqrt_t * (excess + root) / (sdf + kdf), 0.05, 2.0)
+    if initial is not None:
+        warm = np.broadcast_to(np.asarray(initial, dtype=np.float64), price.shape)[idx]
+        x = np.where(np.isfinite(warm) & (warm > IV_LOW) & (warm < IV_HIGH), warm, x)
+
+    lo = np.full(len(idx), IV_LOW)
+    hi = np.full(len(idx), IV_HIGH)
+    done = np.zeros(len(idx), dtype=bool)
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        for _ in range(max_iter):
+            vol_t = x * sqrt_t
+            d1 = log_moneyness / vol_t + 0.5 * vol_t
+            diff = sdf * ndtr(d1) - kdf * ndtr(d1 - vol_t) - target
+            # x always lies inside its bracket, so it replaces one end
+            too_high = diff > 0
+            hi = np.where(too_high, x, hi)
+            lo = np.where(too_high, lo, x)
+
+            vega = vega_scale * np.exp(-0.5 * d1 * d1)
+            step = diff / vega
+            newton = x - step
+            next_x = np.where((newton > lo) & (newton < hi), newton, 0.5 * (lo + hi))
+
+            done |= (np.abs(step) < tol) | (np.abs(diff) < price_tol) | (vega < flat_vega)
+            x = np.where(done, x, next_x)
+            if done.all():
+                break
+
+    vol_t = x * sqrt_t
+    d1 = log_moneyness / vol_t + 0.5 * vol_t
+    diff = sdf * ndtr(d1) - kdf * ndtr(d1 - vol_t) - target
+    vega = vega_scale * np.exp(-0.5 * d1 * d1)
+    x[(np.abs(diff) >= price_tol) & (np.abs(diff) >= 10 * tol * vega)] = np.nan
+    sigma[idx] = x
+    return sigma
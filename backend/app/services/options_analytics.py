@@ -0,0 +1,169 @@
+from datetime import datetime, time
+from operator import attrgetter
+from typing import Any, Dict, Optional, Tuple
+import numpy as np
+import pytz
+from app.core.config import settings
+from app.schemas.market_data import OptionChain
+from app.services.option_pricing import bs_greeks, implied_volatility
+
+_IST = pytz.timezone("Asia/Kolkata")
+_SECONDS_PER_YEAR = 365.0 * 86400
+_NSE_EXPIRY_TIME = time(15, 30)
+_CHAIN_FIELDS = ("strike", "is_call", "ltp", "bid", "ask", "oi", "oi_change", "volume")
+_NUMERIC_FIELDS = ("strike", "ltp", "oi", "oi_change", "volume")
+
+
+def chain_columns(chain: OptionChain) -> Dict[str, np.ndarray]:
+    """Contracts as columns, sorted by (strike, type) with CE before PE."""
+    contracts = chain.contracts
+    n = len(contracts)
+    # Field by field through map/attrgetter, so the loop over contracts runs in C;
+    # None bid/ask become NaN in the float conversion
+    columns = {name: np.fromiter(map(attrgetter(name), contracts), np.float64, n) for name in _NUMERIC_FIELDS}
+    for name in ("bid", "ask"):
+        columns[name] = np.array(list(map(attrgetter(name), contracts)), dtype=np.float64).reshape(n)
+    kinds = map(attrgetter("option_type"), contracts)
+    columns["is_call"] = np.fromiter((kind == "CE" or kind.upper() == "CE" for kind in kinds), bool, n)
+    order = np.lexsort((~columns["is_call"], columns["strike"]))
+    return {name: columns[name][order] for name in _CHAIN_FIELDS}
+
+
+def years_to_expiry(chain: OptionChain) -> float:
+    """Time from the snapshot to expiry; a date-only expiry settles at 15:30 IST."""
+    expiry = chain.expiry
+    if expiry.time() == time(0, 0):
+        close = datetime.combine(expiry.date(), _NSE_EXPIRY_TIME)
+        tz = expiry.tzinfo
+        if tz is None:
+            expiry = close
+        else:
+            expiry = tz.localize(close) if hasattr(tz, "localize") else close.replace(tzinfo=tz)
+    now = chain.timestamp
+    if (expiry.tzinfo is None) != (now.tzinfo is None):
+        # Naive side is taken as IST, the exchange clock
+        expiry = _IST.localize(expiry) if expiry.tzinfo is None else expiry
+        now = _IST.localize(now) if now.tzinfo is None else now
+    # Floor at a minute so expiry-day snapshots stay solvable
+    return max((expiry - now).total_seconds(), 60.0) / _SECONDS_PER_YEAR
+
+
+def max_pain(
+    strike: np.ndarray, is_call: np.ndarray, oi: np.ndarray, strikes: Optional[np.ndarray] = None,
+) -> Optional[float]:
+    """Settlement strike that minimizes the total payout to option holders (strikes: np.unique(strike), if known)."""
+    strikes = np.unique(strike) if strikes is None else strikes
+    if not len(strikes):
+        return None
+    # payout[i] = sum over calls of oi * max(S_i - K, 0) + puts of oi * max(K - S_i, 0)
+    gap = strikes[:, None] - strike[None, :]
+    payout = np.where(is_call, np.maximum(gap, 0.0), np.maximum(-gap, 0.0)) @ oi
+    return float(strikes[int(np.argmin(payout))])
+
+
+def chain_metrics(columns: Dict[str, np.ndarray], spot: float) -> Dict[str, Any]:
+    """Chain-wide aggregates: PCR, max pain, OI walls and changes, ATM IV, skew, OI-weighted greeks."""
+    strike, is_call, oi, oi_change = columns["strike"], columns["is_call"], columns["oi"], columns["oi_change"]
+    is_put = ~is_call
+    call_oi, put_oi = float(oi[is_call].sum()), float(oi[is_put].sum())
+    call_volume, put_volume = float(columns["volume"][is_call].sum()), float(columns["volume"][is_put].sum())
+
+    def strike_of_max(values: np.ndarray, mask: np.ndarray) -> Optional[float]:
+        return float(strike[mask][int(np.argmax(values[mask]))]) if mask.any() else None
+
+    strikes = np.unique(strike)
+    atm_strike = float(strikes[int(np.argmin(np.abs(strikes - spot)))]) if len(strikes) else None
+    iv = columns.get("iv")
+    delta = columns.get("delta")
+    metrics = {
+        "spot": spot,
+        "contracts": int(len(strike)),
+        "pcr_oi": round(put_oi / call_oi, 4) if call_oi else None,
+        "pcr_volume": round(put_volume / call_volume, 4) if call_volume else None,
+        "max_pain": max_pain(strike, is_call, oi, strikes),
+        "atm_strike": atm_strike,
+        "call_oi": call_oi,
+        "put_oi": put_oi,
+        "call_oi_change": float(oi_change[is_call].sum()),
+        "put_oi_change": float(oi_change[is_put].sum()),
+        "resistance": strike_of_max(oi, is_call),       # largest call OI wall
+        "support": strike_of_max(oi, is_put),           # largest put OI wall
+        "max_call_oi_addition": strike_of_max(oi_change, is_call),
+        "max_put_oi_addition": strike_of_max(oi_change, is_put),
+        "atm_iv": None,
+        "iv_skew": None,
+    }
+    if iv is not None and atm_strike is not None:
+        atm_iv = iv[strike == atm_strike]
+        if np.isfinite(atm_iv).any():
+            metrics["atm_iv"] = round(float(np.nanmean(atm_iv)), 6)
+    if iv is not None and delta is not None:
+        # 25-delta risk reversal: put IV minus call IV
+        put_ok, call_ok = is_put & np.isfinite(iv), is_call & np.isfinite(iv)
+        if put_ok.any() and call_ok.any():
+            put_iv = iv[put_ok][int(np.argmin(np.abs(delta[put_ok] + 0.25)))]
+            call_iv = iv[call_ok][int(np.argmin(np.abs(delta[call_ok] - 0.25)))]
+            metrics["iv_skew"] = round(float(put_iv - call_iv), 6)
+        finite = np.isfinite(delta)
+        metrics["net_delta_oi"] = round(float(np.sum(delta[finite] * oi[finite])), 2)
+        metrics["net_gamma_oi"] = round(float(np.sum(columns["gamma"][finite] * oi[finite])), 6)
+    return metrics
+
+
+class OptionChainAnalyzer:
+    """
+    IV, greeks and aggregates for a chain snapshot, all vectorized across
+    contracts. Each symbol's last IVs seed the next solve, which then
+    converges in a couple of Newton steps since chains move little between polls.
+    """
+
+    def __init__(self, rate: float = 0.065):
+        self.rate = rate
+        self._previous: Dict[str, Tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
+
+    def _initial(self, key: str, columns: Dict[str, np.ndarray]) -> Optional[np.ndarray]:
+        previous = self._previous.get(key)
+        if previous is None:
+            return None
+        strike, is_call, iv = previous
+        if len(strike) != len(columns["strike"]) or not (
+            np.array_equal(strike, columns["strike"]) and np.array_equal(is_call, columns["is_call"])
+        ):
+            return None
+        return iv
+
+    def analyze_columns(
+        self,
+        columns: Dict[str, np.ndarray],
+        spot: float,
+        t: float,
+        key: Optional[str] = None,
+    ) -> Dict[str, np.ndarray]:
+        """Adds iv/delta/gamma/theta/vega columns. Prices are the bid/ask mid where quoted, else LTP."""
+        bid, ask = columns["bid"], columns["ask"]
+        quoted = np.isfinite(bid) & np.isfinite(ask) & (bid > 0) & (ask >= bid)
+        price = np.where(quoted, 0.5 * (bid + ask), columns["ltp"])
+        initial = self._initial(key, columns) if key else None
+        iv = implied_volatility(price, spot, columns["strike"], t, self.rate, columns["is_call"], initial=initial)
+        greeks = bs_greeks(spot, columns["strike"], t, self.rate, iv, columns["is_call"])
+        if key:
+            self._previous[key] = (columns["strike"], columns["is_call"], iv)
+        return {**columns, "iv": iv, **greeks}
+
+    def analyze(self, chain: OptionChain, symbol: Optional[str] = None) -> Dict[str, Any]:
+        """{"metrics": aggregates, "columns": per-contract arrays}; empty metrics for an empty chain."""
+        if not chain.contracts or chain.spot_price <= 0:
+            return {"metrics": {}, "columns": {}}
+        columns = chain_columns(chain)
+        t = years_to_expiry(chain)
+        key = f"{symbol or chain.source}:{chain.expiry.date()}"
+        columns = self.analyze_columns(columns, chain.spot_price, t, key)
+        metrics = chain_metrics(columns, chain.spot_price)
+        metrics["expiry"] = chain.expiry.isoformat()
+        metrics["days_to_expiry"] = round(t * 365.0, 4)
+        metrics["timestamp"] = chain.timestamp.isoformat()
+        metrics["source"] = chain.source
+        return {"metrics": metrics, "columns": columns}
+
+
+option_chain_analyzer = OptionChainAnalyzer(rate=settings.RISK_FREE_RATE)
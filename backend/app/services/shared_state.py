@@ -0,0 +1,263 @@
+import asyncio
+import json
+import os
+import socket
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+from zoneinfo import ZoneInfo
+import numpy as np
+from app.core.config import settings
+from app.schemas.candle_series import CandleSeries
+from app.services.websocket_manager import encode
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # optional: without it every worker keeps its own state
+    aioredis = None
+
+MessageHandler = Callable[[str], Awaitable[None]]
+
+
+def encode_snapshot(snapshot: Dict[str, Any]) -> str:
+    """JSON form of a SignalScheduler snapshot; candles travel as columns."""
+    candles: CandleSeries = snapshot["candles"]
+    body = {k: v for k, v in snapshot.items() if k not in ("candles", "timestamp") and not k.startswith("_")}
+    body["candles"] = {
+        "timestamp": candles.timestamp.tolist(),
+        **{name: getattr(candles, name).tolist() for name in ("open", "high", "low", "close", "volume")},
+        "tz": str(candles.tz) if candles.tz is not None else None,
+        "source": candles.source,
+    }
+    # Monotonic clocks aren't comparable across processes; ship the age instead.
+    body["computed_epoch"] = time.time() - (time.monotonic() - snapshot["_computed_monotonic"])
+    return encode(body)
+
+
+def decode_snapshot(raw: str) -> Dict[str, Any]:
+    body = json.loads(raw)
+    columns = body.pop("candles")
+    tz = columns.pop("tz")
+    try:
+        tz = ZoneInfo(tz) if tz else None
+    except Exception:
+        tz = None
+    candles = CandleSeries.from_arrays(
+        np.asarray(columns["timestamp"], dtype=np.int64),
+        *(np.asarray(columns[name], dtype=np.float64) for name in ("open", "high", "low", "close", "volume")),
+        tz=tz, source=columns["source"],
+    )
+    body["candles"] = candles
+    body["timestamp"] = candles.datetime_at(-1) if len(candles) else None
+    body["_computed_monotonic"] = time.monotonic() - max(time.time() - body.pop("computed_epoch"), 0.0)
+    return body
+
+
+class MemoryStateStore:
+    """In-process stand-in for Redis: a single worker is always the leader."""
+
+    name = "memory"
+
+    def __init__(self):
+        self._values: Dict[str, Any] = {}
+        self._sets: Dict[str, Set[str]] = {}
+        self._handlers: Dict[str, List[MessageHandler]] = {}
+
+    async def get(self, key: str) -> Optional[str]:
+        value = self._values.get(key)
+        if value is None:
+            return None
+        data, expires = value
+        if expires is not None and time.monotonic() > expires:
+            del self._values[key]
+            return None
+        return data
+
+    async def set(self, key: str, value: str, ttl: Optional[float] = None):
+        self._values[key] = (value, time.monotonic() + ttl if ttl else None)
+
+    async def add_member(self, key: str, member: str):
+        self._sets.setdefault(key, set()).add(member)
+
+    async def members(self, key: str) -> Set[str]:
+        return set(self._sets.get(key, ()))
+
+    async def remove_member(self, key: str, member: str):
+        self._sets.get(key, set()).discard(member)
+
+    async def acquire_leader(self, name: str, owner: str, ttl: float) -> bool:
+        return True
+
+    async def publish(self, channel: str, message: str):
+        for handler in self._handlers.get(channel, []):
+            await handler(message)
+
+    async def subscribe(self, channel: str, handler: MessageHandler):
+        self._handlers.setdefault(channel, []).append(handler)
+
+    async def close(self):
+        self._handlers.clear()
+
+
+class RedisStateStore:
+    """
+    Redis-backed store shared by every uvicorn worker.
+
+    Leadership is a key set with NX + PX: the worker that holds it refreshes
+    and writes, the others read and follow pub/sub. The holder renews it each
+    tick; if it dies the key expires and another worker takes over. Redis
+    errors degrade to per-worker behaviour (everyone refreshes, reads miss)
+    rather than stalling signals.
+    """
+
+    name = "redis"
+
+    def __init__(self, client, prefix: str = "signal:"):
+        self.client = client
+        self.prefix = prefix
+        self._handlers: Dict[str, List[MessageHandler]] = {}
+        self._pubsub = None
+        self._listener: Optional[asyncio.Task] = None
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}{key}"
+
+    async def get(self, key: str) -> Optional[str]:
+        try:
+            value = await self.client.get(self._key(key))
+        except Exception as e:
+            print(f"RedisStateStore: get {key} failed: {e}")
+            return None
+        return value.decode() if isinstance(value, bytes) else value
+
+    async def set(self, key: str, value: str, ttl: Optional[float] = None):
+        try:
+            await self.client.set(self._key(key), value, px=int(ttl * 1000) if ttl else None)
+        except Exception as e:
+            print(f"RedisStateStore: set {key} failed: {e}")
+
+    async def add_member(self, key: str, member: str):
+        try:
+            await self.client.sadd(self._key(key), member)
+        except Exception as e:
+            print(f"RedisStateStore: sadd {key} failed: {e}")
+
+    async def members(self, key: str) -> Set[str]:
+        try:
+            values = await self.client.smembers(self._key(key))
+        except Exception as e:
+            print(f"RedisStateStore: smembers {key} failed: {e}")
+            return set()
+        return {v.decode() if isinstance(v, bytes) else v for v in values}
+
+    async def remove_member(self, key: str, member: str):
+        try:
+            await self.client.srem(self._key(key), member)
+        except Exception as e:
+            print(f"RedisStateStore: srem {key} failed: {e}")
+
+    async def acquire_leader(self, name: str, owner: str, ttl: float) -> bool:
+        key = self._key(f"leader:{name}")
+        ttl_ms = int(ttl * 1000)
+        try:
+            if await self.client.set(key, owner, nx=True, px=ttl_ms):
+                return True
+            holder = await self.client.get(key)
+            if isinstance(holder, bytes):
+                holder = holder.decode()
+            if holder == owner:
+                await self.client.pexpire(key, ttl_ms)
+                return True
+            return False
+        except Exception as e:
+            print(f"RedisStateStore: leader election failed, refreshing locally: {e}")
+            return True
+
+    async def publish(self, channel: str, message: str):
+        try:
+            await self.client.publish(self._key(channel), message)
+        except Exception as e:
+            print(f"RedisStateStore: publish {channel} failed: {e}")
+
+    async def subscribe(self, channel: str, handler: MessageHandler):
+        self._handlers.setdefault(self._key(channel), []).append(handler)
+        if self._pubsub is None:
+            self._pubsub = self.client.pubsub()
+        await self._pubsub.subscribe(self._key(channel))
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.create_task(self._listen(), name="redis-state-pubsub")
+
+    async def _listen(self):
+        while True:
+            try:
+                message = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"RedisStateStore: pub/sub read failed: {e}")
+                await asyncio.sleep(1.0)
+                continue
+            if message is None:
+                continue
+            channel, data = message["channel"], message["data"]
+            if isinstance(channel, bytes):
+                channel = channel.decode()
+            if isinstance(data, bytes):
+                data = data.decode()
+            for handler in self._handlers.get(channel, []):
+                try:
+                    await handler(data)
+                except Exception as e:
+                    print(f"RedisStateStore: handler for {channel} failed: {e}")
+
+    async def close(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+        if self._pubsub is not None:
+            await self._pubsub.aclose()
+        await self.client.aclose()
+
+
+class SharedState:
+    """
+    Process-wide handle on the shared store. Starts in memory; connect()
+    switches to Redis when it is enabled, installed and reachable.
+    """
+
+    def __init__(self, store=None):
+        self.store = store or MemoryStateStore()
+        # Identifies this worker in leader keys and pub/sub envelopes.
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+    @property
+    def backend(self) -> str:
+        return self.store.name
+
+    async def acquire_leader(self, name: str, ttl: float) -> bool:
+        return await self.store.acquire_leader(name, self.owner, ttl)
+
+    async def connect(self):
+        if not settings.REDIS_ENABLED or self.store.name == "redis":
+            return
+        if aioredis is None:
+            print("SharedState: redis package not installed, keeping state in memory")
+            return
+        client = aioredis.Redis(
+            host=settings.REDIS_HOST, port=settings.REDIS_PORT, db=settings.REDIS_DB,
+            socket_timeout=settings.REDIS_TIMEOUT, socket_connect_timeout=settings.REDIS_TIMEOUT,
+        )
+        try:
+            await client.ping()
+        except Exception as e:
+            print(f"SharedState: Redis at {settings.REDIS_HOST}:{settings.REDIS_PORT} unavailable ({e}), keeping state in memory")
+            await client.aclose()
+            return
+        self.store = RedisStateStore(client, prefix=settings.REDIS_PREFIX)
+        print(f"SharedState: using Redis at {settings.REDIS_HOST}:{settings.REDIS_PORT}")
+
+    async def close(self):
+        await self.store.close()
+
+
+shared_state = SharedState()
@@ -0,0 +1,162 @@
+import asyncio
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from app.core.config import settings
+from app.db.signal_log_repository import SignalLogRepository, create_signal_log
+from app.services.decision_engine import RULES_VERSION
+
+_STOP = object()  # queued by stop(): _run writes what it holds and exits
+
+
+def signal_log_row(snapshot: Dict[str, Any]) -> Dict[str, Any]:
+    """signal_logs row for a SignalScheduler snapshot."""
+    decision = snapshot["decision"]
+    action = decision.get("action")
+    if action == "BUY":
+        confidence = decision.get("buy_confidence")
+    elif action == "SELL":
+        confidence = decision.get("sell_confidence")
+    else:
+        confidence = max(decision.get("buy_confidence") or 0, decision.get("sell_confidence") or 0)
+    return {
+        "timestamp": datetime.utcnow(),
+        "symbol": snapshot["asset"],
+        "price": snapshot["price"],
+        "action": action,
+        "bias": decision.get("bias"),
+        "strategy_type": (decision.get("options_signal") or {}).get("direction"),
+        "confidence": confidence,
+        "rationale": decision.get("rationale"),
+        "rules_version": RULES_VERSION,
+        "model_version": None,
+    }
+
+
+class SignalLogWriter:
+    """
+    Records every computed decision without putting the database on the
+    request or refresh path.
+
+    record() only appends to a bounded asyncio queue; a background task
+    drains it in batches (up to batch_size rows, or whatever arrived within
+    flush_interval of the first one) and writes each batch with one bulk
+    insert on a thread. If the database falls behind and the queue fills,
+    new rows are dropped and counted instead of blocking. stop() queues a
+    marker behind the pending rows, so everything recorded before it is
+    written before the task exits.
+    """
+
+    def __init__(
+        self,
+        repository: Optional[SignalLogRepository],
+        queue_size: int = 10000,
+        batch_size: int = 500,
+        flush_interval: float = 2.0,
+    ):
+        self.repository = repository
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self._task: Optional[asyncio.Task] = None
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.batches = 0
+        self.last_flush_ms: Optional[float] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.repository is not None
+
+    def start(self):
+        if self.enabled and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._run(), name="signal-log-writer")
+
+    async def stop(self):
+        """Stop the writer, flushing whatever is still queued."""
+        if self._task is not None:
+            if not self._task.done():
+                await self._queue.put(_STOP)
+                await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        # Rows recorded while the last batch was being written
+        batch = []
+        while not self._queue.empty():
+            row = self._queue.get_nowait()
+            if row is not _STOP:
+                batch.append(row)
+        await self._flush(batch)
+
+    def record(self, row: Dict[str, Any]):
+        if not self.enabled:
+            return
+        try:
+            self._queue.put_nowait(row)
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    async def record_snapshots(self, snapshots: List[Dict[str, Any]]):
+        """SignalScheduler listener. Snapshots adopted from another worker were logged there."""
+        for snapshot in snapshots:
+            if not snapshot.get("_shared"):
+                self.record(signal_log_row(snapshot))
+
+    async def _run(self):
+        while True:
+            row = await self._queue.get()
+            if row is _STOP:
+                return
+            batch = [row]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    row = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if row is _STOP:
+                    await self._flush(batch)
+                    return
+                batch.append(row)
+            await self._flush(batch)
+
+    async def _flush(self, batch: List[Dict[str, Any]]):
+        if not batch or not self.enabled:
+            return
+        started = time.perf_counter()
+        try:
+            await asyncio.to_thread(self.repository.insert_many, batch)
+            self.written += len(batch)
+            self.batches += 1
+        except Exception as e:
+            self.failed += len(batch)
+            print(f"SignalLogWriter: failed to write {len(batch)} signals: {e}")
+        finally:
+            self.last_flush_ms = round((time.perf_counter() - started) * 1000, 2)
+
+    async def history(self, symbol: str, start: Optional[datetime] = None, end: Optional[datetime] = None, limit: int = 500) -> List[Dict[str, Any]]:
+        if not self.enabled:
+            return []
+        return await asyncio.to_thread(self.repository.history, symbol, start, end, limit)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "queued": self._queue.qsize(),
+            "written": self.written,
+            "batches": self.batches,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "last_flush_ms": self.last_flush_ms,
+        }
+
+
+signal_log_writer = SignalLogWriter(
+    create_signal_log(),
+    queue_size=settings.SIGNAL_LOG_QUEUE_SIZE,
+    batch_size=settings.SIGNAL_LOG_BATCH_SIZE,
+    flush_interval=settings.SIGNAL_LOG_FLUSH_INTERVAL,
+)
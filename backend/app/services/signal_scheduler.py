@@ -0,0 +1,459 @@
+import asyncio
+import random
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.services.asset_context import AssetContext, asset_context
+from app.services.connector_registry import connector_registry
+from app.services.decision_engine import DecisionEngine
+from app.services.feature_engine import FeatureEngine
+from app.services.indicator_engine import indicator_engine
+from app.services.market_hours import get_market_status_ist
+from app.services.levels_service import levels_service
+from app.services.shared_state import SharedState, shared_state, encode_snapshot, decode_snapshot
+from app.services.symbol_registry import Instrument
+from app.schemas.market_data import OptionChain
+
+SnapshotListener = Callable[[List[Dict[str, Any]]], Awaitable[None]]
+
+_stage_seconds = metrics.histogram(
+    "pipeline_stage_seconds", "Signal refresh latency per pipeline stage", ("stage",),
+)
+_refresh_errors = metrics.counter("pipeline_refresh_errors_total", "Assets whose refresh failed", ("asset",))
+
+
+async def _timed(stage: str, awaitable):
+    started = time.perf_counter()
+    try:
+        return await awaitable
+    finally:
+        _stage_seconds.observe(time.perf_counter() - started, stage=stage)
+
+
+def latest_payload(snapshot: Dict[str, Any]) -> Dict[str, Any]:
+    """Public view of a snapshot, as served by /latest and pushed on /ws/signals."""
+    return {
+        "asset": snapshot["asset"],
+        "price": snapshot["price"],
+        "signal": snapshot["decision"],
+        "market_status": snapshot["market_status"],
+        "timestamp": snapshot["timestamp"],
+        "provider": snapshot["provider"],
+    }
+
+
+class SignalScheduler:
+    """
+    Precomputes candles -> features -> decision -> levels for every watched
+    asset, so endpoints can serve the latest snapshot instead of doing
+    upstream I/O and indicator work per request.
+
+    Assets sharing an update interval form one group with one loop. Each
+    cycle fetches the whole group concurrently (Yahoo requests in a cycle
+    fold into one download, Binance pairs share one stream), folds only the
+    new bars of each window into that asset's incremental indicator state,
+    and scores the group in one DecisionEngine batch, however many
+    instruments are watched.
+
+    A refresh that is still running when the next tick comes due is not
+    stacked: the tick is skipped and counted as an overrun. Ticks are spread
+    with a small random jitter so groups don't hit upstream in lockstep.
+
+    Listeners registered with add_listener() receive each cycle's fresh
+    snapshots, which is how the WebSocket channel pushes updates.
+
+    With several workers the shared state (Redis) elects one leader per
+    group; only the leader refreshes. Snapshots are written to the store and
+    published, and the other workers adopt them, so upstream sees one
+    fetcher whatever the worker count. Assets requested on any worker join
+    a shared watchlist that the leader follows.
+
+    A Binance pair a client asks for only joins once a fetch for it returns
+    candles. The leader drops such pairs again once nobody has requested
+    them for SYMBOL_IDLE_SECONDS, or after SYMBOL_MAX_FAILURES failed or
+    empty refreshes in a row; the configured WATCHLIST always stays.
+    """
+
+    SNAPSHOT_CHANNEL = "snapshots"
+    WATCHLIST_KEY = "watchlist"
+    EVICT_EVERY = 60.0  # seconds between the leader's idle/failing sweeps
+
+    def __init__(self, context: AssetContext = asset_context, jitter: float = 0.1, state: SharedState = shared_state):
+        self.context = context
+        self.state = state
+        self.jitter = jitter
+        self._loops: Dict[int, asyncio.Task] = {}
+        self._refreshes: Dict[int, asyncio.Task] = {}
+        self._inline: Dict[str, asyncio.Task] = {}
+        self._snapshots: Dict[str, Dict[str, Any]] = {}
+        self._listeners: List[SnapshotListener] = []
+        self._subscribed = False
+        self._failures: Dict[str, int] = {}      # consecutive failed/empty refreshes
+        self._touched: Dict[str, float] = {}     # last time this worker marked an asset requested
+        self._last_sweep = time.monotonic()
+        self.evicted = 0
+        self.stats: Dict[str, Dict[str, Any]] = {}
+
+    @property
+    def running(self) -> bool:
+        return any(not task.done() for task in self._loops.values())
+
+    def _groups(self) -> Dict[int, List[str]]:
+        groups: Dict[int, List[str]] = {}
+        for asset in self.context.assets:
+            groups.setdefault(self.context.get_update_interval_for(asset), []).append(asset)
+        return groups
+
+    async def start(self):
+        if self.running:
+            return
+        if not self._subscribed:
+            await self.state.store.subscribe(self.SNAPSHOT_CHANNEL, self._on_shared_snapshot)
+            self._subscribed = True
+        for interval in self._groups():
+            self._start_loop(interval)
+        print(f"SignalScheduler: started for {', '.join(self.context.assets)}")
+
+    def _start_loop(self, interval: int):
+        if interval in self._loops and not self._loops[interval].done():
+            return
+        self.stats[f"{interval}s"] = {
+            "assets": 0, "refreshes": 0, "overruns": 0, "errors": 0, "last_duration_ms": None, "role": None,
+        }
+        self._loops[interval] = asyncio.create_task(self._run(interval), name=f"signal-scheduler:{interval}s")
+
+    async def stop(self):
+        tasks = list(self._loops.values()) + list(self._refreshes.values()) + list(self._inline.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._loops.clear()
+        self._refreshes.clear()
+        self._inline.clear()
+        print("SignalScheduler: stopped")
+
+    def add_listener(self, listener: SnapshotListener):
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener: SnapshotListener):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    async def _notify(self, snapshots: List[Dict[str, Any]]):
+        for listener in self._listeners:
+            try:
+                await listener(snapshots)
+            except Exception as e:
+                print(f"SignalScheduler: listener failed: {e}")
+
+    def get_snapshot(self, asset: str, max_age: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        Latest precomputed snapshot, or None if there is none or it is older
+        than max_age seconds (defaults to two update intervals).
+        """
+        snapshot = self._snapshots.get(asset)
+        if snapshot is None:
+            return None
+        if max_age is None:
+            max_age = 2 * self.context.get_update_interval_for(asset)
+        if time.monotonic() - snapshot["_computed_monotonic"] > max_age:
+            return None
+        return snapshot
+
+    async def admit(self, asset: str) -> Instrument:
+        """
+        Resolve an asset and make sure it is in the watched universe, marking
+        it as requested. Every client-facing path goes through here, so the
+        symbol policy (data probe, MAX_SYMBOLS, idle eviction) applies to all
+        of them. Raises ValueError.
+        """
+        instrument = self.context.resolve(asset)
+        if instrument.key not in self.context.assets:
+            if not self.context.registry.is_registered(instrument.key):
+                await self._probe(instrument)
+            # Shared first, so a leader syncing the watchlist meanwhile doesn't drop it again.
+            await self.state.store.add_member(self.WATCHLIST_KEY, instrument.key)
+            try:
+                self.context.watch(instrument.key)
+            except ValueError:
+                await self.state.store.remove_member(self.WATCHLIST_KEY, instrument.key)
+                raise
+            if self.running:
+                self._start_loop(instrument.update_interval)
+
+        await self._touch(instrument.key)
+        return instrument
+
+    async def get_or_refresh(self, asset: str) -> Dict[str, Any]:
+        """
+        Serve the precomputed snapshot, computing one inline if it is missing
+        or stale. Assets not watched yet join the universe, so later requests
+        are served from the background cycle. Raises ValueError for unknown
+        assets, including pairs upstream has no candles for.
+        """
+        # Joins before any snapshot is served, so an asset that was dropped
+        # comes back even while a shared snapshot of it is still around.
+        instrument = await self.admit(asset)
+        snapshot = self.get_snapshot(instrument.key)
+        if snapshot is not None:
+            return snapshot
+
+        # Another worker may have computed it already.
+        raw = await self.state.store.get(f"snapshot:{instrument.key}")
+        if raw is not None:
+            self._adopt({**decode_snapshot(raw), "_shared": True})
+            snapshot = self.get_snapshot(instrument.key)
+            if snapshot is not None:
+                return snapshot
+
+        # Concurrent requests for the same cold asset share one refresh.
+        task = self._inline.get(instrument.key)
+        if task is None or task.done():
+            task = self._inline[instrument.key] = asyncio.create_task(self.refresh_asset(instrument.key))
+        return await asyncio.shield(task)
+
+    async def _probe(self, instrument: Instrument):
+        """Check an ad-hoc pair exists before it joins the universe: upstream must have candles for it."""
+        connector = self.context.get_connector_for(instrument.key)
+        candles = await connector.get_candle_series(instrument.symbol, instrument.signal_interval, 100)
+        if not candles:
+            raise ValueError(f"No market data for {instrument.key}")
+
+    async def _touch(self, asset: str):
+        """Mark a client-added asset as still wanted (shared, so any worker's requests count)."""
+        if not self.context.is_evictable(asset):
+            return
+        now = time.monotonic()
+        # One write per tenth of the idle window is plenty to keep it alive.
+        if now - self._touched.get(asset, float("-inf")) < settings.SYMBOL_IDLE_SECONDS / 10:
+            return
+        self._touched[asset] = now
+        await self.state.store.set(f"requested:{asset}", "1", ttl=settings.SYMBOL_IDLE_SECONDS)
+
+    async def _evict_stale(self):
+        """Drop client-added assets nobody asked for lately, or whose refreshes keep failing."""
+        for asset in self.context.assets:
+            if not self.context.is_evictable(asset):
+                continue
+            failing = self._failures.get(asset, 0) >= settings.SYMBOL_MAX_FAILURES
+            if failing or await self.state.store.get(f"requested:{asset}") is None:
+                print(f"SignalScheduler: dropping {asset} ({'failing' if failing else 'idle'})")
+                await self.state.store.remove_member(self.WATCHLIST_KEY, asset)
+                await self._forget(asset)
+
+    async def _forget(self, asset: str):
+        instrument = self.context.registry.get(asset)
+        await self.context.unwatch(asset)
+        self._snapshots.pop(asset, None)
+        self._failures.pop(asset, None)
+        self._touched.pop(asset, None)
+        if instrument is not None:
+            indicator_engine.reset(instrument.symbol, instrument.signal_interval)
+        self.evicted += 1
+
+    async def refresh_asset(self, asset: str) -> Dict[str, Any]:
+        key = self.context.resolve(asset).key
+        result = (await self.refresh_assets([key]))[key]
+        if isinstance(result, BaseException):
+            raise result
+        return result
+
+    async def refresh_assets(self, assets: List[str]) -> Dict[str, Union[Dict[str, Any], BaseException]]:
+        """
+        One batched cycle: fetch every asset concurrently, update each one's
+        incremental indicators, then score all of them in one decision batch.
+        Returns a snapshot (or the fetch error) per asset key.
+        """
+        instruments = [self.context.resolve(asset) for asset in assets]
+        nse_status = None
+        if any(i.market == "NSE" for i in instruments):
+            nse_status = get_market_status_ist()
+
+        fetched = await _timed("fetch", asyncio.gather(*(self._fetch(i) for i in instruments), return_exceptions=True))
+        results: Dict[str, Union[Dict[str, Any], BaseException]] = {}
+        ready = []
+        for instrument, data in zip(instruments, fetched):
+            if isinstance(data, asyncio.CancelledError):
+                raise data
+            if isinstance(data, BaseException):
+                results[instrument.key] = data
+                _refresh_errors.inc(asset=instrument.key)
+                self._failures[instrument.key] = self._failures.get(instrument.key, 0) + 1
+            else:
+                ready.append((instrument, data))
+                if data["candles"]:
+                    self._failures.pop(instrument.key, None)
+                else:
+                    self._failures[instrument.key] = self._failures.get(instrument.key, 0) + 1
+        if not ready:
+            return results
+
+        market_statuses = [
+            nse_status if i.market == "NSE" else {"is_open": True, "status": "OPEN"}
+            for i, _ in ready
+        ]
+        with _stage_seconds.time(stage="features"):
+            features = [
+                FeatureEngine.update_technical_indicators(
+                    instrument.symbol, instrument.signal_interval, data["candles"], instrument.asset_type,
+                )
+                for instrument, data in ready
+            ]
+        with _stage_seconds.time(stage="options"):
+            options = [
+                FeatureEngine.calculate_option_chain(data["option_chain"], instrument.key)
+                for instrument, data in ready
+            ]
+        with _stage_seconds.time(stage="decision"):
+            decisions = DecisionEngine.analyze_batch(
+                features,
+                [i.asset_type for i, _ in ready],
+                [status["is_open"] for status in market_statuses],
+                options_metrics=[analysis["metrics"] for analysis in options],
+            )
+
+        computed_at = datetime.now().isoformat()
+        computed_monotonic = time.monotonic()
+        for (instrument, data), feature, decision, status, option in zip(ready, features, decisions, market_statuses, options):
+            candles = data["candles"]
+            snapshot = {
+                "asset": instrument.key,
+                "symbol": instrument.symbol,
+                "interval": instrument.signal_interval,
+                "price": data["price"],
+                "candles": candles,
+                "features": feature,
+                "decision": decision,
+                "levels": data["levels"],
+                "options": option["metrics"],
+                "_option_columns": option["columns"],
+                "market_status": status,
+                "timestamp": candles.datetime_at(-1) if candles else None,
+                "provider": instrument.provider_name,
+                "computed_at": computed_at,
+                "_computed_monotonic": computed_monotonic,
+            }
+            self._snapshots[instrument.key] = snapshot
+            results[instrument.key] = snapshot
+
+        fresh = [results[i.key] for i, _ in ready]
+        await _timed("notify", self._notify(fresh))
+        await _timed("share", self._share(fresh))
+        return results
+
+    async def _share(self, snapshots: List[Dict[str, Any]]):
+        """Write snapshots to the shared store and announce them to the other workers."""
+        store = self.state.store
+        for snapshot in snapshots:
+            raw = encode_snapshot(snapshot)
+            ttl = 10 * self.context.get_update_interval_for(snapshot["asset"])
+            await store.set(f"snapshot:{snapshot['asset']}", raw, ttl=ttl)
+            await store.publish(self.SNAPSHOT_CHANNEL, f"{self.state.owner}\n{raw}")
+
+    def _adopt(self, snapshot: Dict[str, Any]) -> bool:
+        current = self._snapshots.get(snapshot["asset"])
+        if current is not None and current["_computed_monotonic"] >= snapshot["_computed_monotonic"]:
+            return False
+        self._snapshots[snapshot["asset"]] = snapshot
+        return True
+
+    async def _on_shared_snapshot(self, message: str):
+        origin, _, raw = message.partition("\n")
+        if origin == self.state.owner:
+            return
+        snapshot = decode_snapshot(raw)
+        snapshot["_shared"] = True
+        if self._adopt(snapshot):
+            await self._notify([snapshot])
+
+    async def _sync_watchlist(self):
+        """Watch the assets other workers were asked for, and let go of the ones another leader dropped."""
+        members = await self.state.store.members(self.WATCHLIST_KEY)
+        for asset in set(self.context.assets) - members:
+            if self.context.is_evictable(asset):
+                await self._forget(asset)
+        for asset in members - set(self.context.assets):
+            try:
+                self.context.watch(asset)
+                self._start_loop(self.context.get_update_interval_for(asset))
+            except ValueError as e:
+                print(f"SignalScheduler: ignoring shared watchlist entry {asset}: {e}")
+
+    async def _fetch(self, instrument: Instrument) -> Dict[str, Any]:
+        connector = self.context.get_connector_for(instrument.key)
+        candles, latest_price, levels, option_chain = await asyncio.gather(
+            connector.get_candle_series(instrument.symbol, instrument.signal_interval, 100),
+            connector.get_latest_price(instrument.symbol),
+            _timed("levels", levels_service.get_levels(connector, instrument.symbol, instrument.market)),
+            _timed("option_chain", self._fetch_option_chain(instrument)),
+        )
+        if latest_price == 0 and candles:
+            latest_price = float(candles.close[-1])
+        return {"candles": candles, "price": latest_price, "levels": levels, "option_chain": option_chain}
+
+    @staticmethod
+    async def _fetch_option_chain(instrument: Instrument) -> Optional[OptionChain]:
+        """Chain for NSE instruments when a chain feed is configured; a failed fetch only loses the chain."""
+        if instrument.market != "NSE":
+            return None
+        try:
+            feed = connector_registry.option_chain()
+            return await feed.get_option_chain(instrument.key) if feed is not None else None
+        except Exception as e:
+            print(f"SignalScheduler: option chain unavailable for {instrument.key}: {e}")
+            return None
+
+    async def _refresh_group(self, interval: int, assets: List[str]):
+        stats = self.stats[f"{interval}s"]
+        stats["assets"] = len(assets)
+        started = time.perf_counter()
+        try:
+            results = await self.refresh_assets(assets)
+            stats["refreshes"] += 1
+            for asset, result in results.items():
+                if isinstance(result, BaseException):
+                    stats["errors"] += 1
+                    print(f"SignalScheduler: refresh failed for {asset}: {result}")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            stats["errors"] += 1
+            print(f"SignalScheduler: refresh failed for {', '.join(assets)}: {e}")
+        finally:
+            stats["last_duration_ms"] = round((time.perf_counter() - started) * 1000, 2)
+
+    async def _run(self, interval: int):
+        next_tick = time.monotonic()
+        while True:
+            stats = self.stats[f"{interval}s"]
+            # Only one worker refreshes a group; the others get its snapshots over pub/sub.
+            leader = await self.state.acquire_leader(f"scheduler:{interval}s", 3 * interval)
+            stats["role"] = "leader" if leader else "follower"
+            if leader:
+                await self._sync_watchlist()
+                if time.monotonic() - self._last_sweep >= self.EVICT_EVERY:
+                    self._last_sweep = time.monotonic()
+                    await self._evict_stale()
+                # Membership is re-read every tick: assets requested on demand join here.
+                assets = self._groups().get(interval, [])
+                running = self._refreshes.get(interval)
+                if running is not None and not running.done():
+                    # Previous refresh overran its slot: skip rather than pile up.
+                    stats["overruns"] += 1
+                    print(f"SignalScheduler: {interval}s group refresh overran, skipping tick")
+                elif assets:
+                    self._refreshes[interval] = asyncio.create_task(self._refresh_group(interval, assets))
+
+            next_tick += interval
+            now = time.monotonic()
+            if next_tick < now:
+                # Drop missed ticks instead of firing them back to back.
+                next_tick = now
+            delay = next_tick - now + random.uniform(0, self.jitter * interval)
+            await asyncio.sleep(delay)
+
+
+signal_scheduler = SignalScheduler(jitter=settings.SIGNAL_SCHEDULER_JITTER)
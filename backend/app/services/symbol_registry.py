@@ -0,0 +1,136 @@
+import re
+from typing import Dict, Iterable, List, Optional, Set
+from pydantic import BaseModel
+from app.core.config import settings
+
+# Quote assets we accept for ad-hoc Binance pairs like "SOLUSDT" or "SOL/USDT".
+_BINANCE_PAIR = re.compile(r"^([A-Z0-9]{2,12})/?(USDT|USDC|FDUSD|BUSD|BTC|ETH|BNB)$")
+
+
+class Instrument(BaseModel):
+    key: str                 # what clients send as ?asset=
+    symbol: str              # what the connector understands
+    provider: str            # connector registry provider
+    provider_name: str       # shown in the UI
+    asset_type: str          # DecisionEngine rule family: NIFTY (NSE session) or BITCOIN (24x7 crypto)
+    market: str              # NSE or CRYPTO; NSE instruments follow exchange hours
+    signal_interval: str     # candle interval the signal pipeline runs on
+    update_interval: int     # seconds between background refreshes
+
+
+def _nse(key: str, symbol: str) -> Instrument:
+    return Instrument(
+        key=key, symbol=symbol, provider="yfinance", provider_name="Yahoo Finance",
+        asset_type="NIFTY", market="NSE", signal_interval="5m",
+        update_interval=15,  # Yahoo Finance is slower
+    )
+
+
+def _crypto(key: str, symbol: str) -> Instrument:
+    return Instrument(
+        key=key, symbol=symbol, provider="binance", provider_name="Binance Public API",
+        asset_type="BITCOIN", market="CRYPTO", signal_interval="15m",
+        update_interval=3,  # Binance is fast
+    )
+
+
+def _synthetic(key: str, market: str) -> Instrument:
+    nse = market == "NSE"
+    return Instrument(
+        key=key, symbol=key, provider="synthetic", provider_name="Synthetic feed",
+        asset_type="NIFTY" if nse else "BITCOIN", market=market, signal_interval="5m" if nse else "15m",
+        update_interval=1,  # generated in-process
+    )
+
+
+class SymbolRegistry:
+    """
+    The instrument universe: built-in NSE indices and crypto pairs, the
+    configured synthetic instruments, plus Binance spot pairs clients ask for.
+
+    resolve() only describes an ad-hoc pair; it is registered (admit(),
+    up to MAX_SYMBOLS) once it is known to exist, i.e. once a fetch for it
+    returned data, and can be dropped again with unregister(). When the
+    list of trading pairs from Binance exchangeInfo is loaded, pairs not
+    on it are rejected outright.
+    Keys are case-insensitive; BTC is an alias of BITCOIN.
+    """
+
+    def __init__(self):
+        self._instruments: Dict[str, Instrument] = {}
+        self._aliases: Dict[str, str] = {"BTC": "BITCOIN", "BTCUSDT": "BITCOIN", "ETHUSDT": "ETH"}
+        self._adhoc: Set[str] = set()
+        self._binance_symbols: Optional[Set[str]] = None
+        for instrument in (
+            _nse("NIFTY", "^NSEI"),
+            _nse("BANKNIFTY", "^NSEBANK"),
+            _crypto("BITCOIN", "BTC/USDT"),
+            _crypto("ETH", "ETH/USDT"),
+        ):
+            self.register(instrument)
+        for entry in settings.SYNTHETIC_INSTRUMENTS:
+            key, _, market = entry.strip().upper().partition(":")
+            if market not in ("", "NSE", "CRYPTO"):
+                raise ValueError(f"Unknown market for synthetic instrument {entry}")
+            self.register(_synthetic(key, market or "CRYPTO"))
+
+    def register(self, instrument: Instrument):
+        self._instruments[instrument.key] = instrument
+
+    def resolve(self, asset: str) -> Instrument:
+        """Instrument for a client-supplied key; raises ValueError if it isn't one we can serve."""
+        key = (asset or "").strip().upper()
+        key = self._aliases.get(key, key)
+        instrument = self._instruments.get(key)
+        if instrument is not None:
+            return instrument
+
+        match = _BINANCE_PAIR.match(key)
+        if match is None:
+            raise ValueError(f"Unknown asset: {asset}")
+        clean = match.group(1) + match.group(2)
+        key = self._aliases.get(clean, clean)
+        if key in self._instruments:
+            return self._instruments[key]
+        if self._binance_symbols is not None and clean not in self._binance_symbols:
+            raise ValueError(f"Unknown asset: {asset} is not a trading Binance pair")
+        # Not registered: callers admit() it once it has proven to have data
+        return _crypto(key, f"{match.group(1)}/{match.group(2)}")
+
+    def admit(self, instrument: Instrument):
+        """Register an ad-hoc pair resolve() described; ValueError past MAX_SYMBOLS."""
+        if instrument.key in self._instruments:
+            return
+        if len(self._instruments) >= settings.MAX_SYMBOLS:
+            raise ValueError(f"Symbol limit reached ({settings.MAX_SYMBOLS}); cannot add {instrument.key}")
+        self.register(instrument)
+        self._adhoc.add(instrument.key)
+
+    def unregister(self, key: str):
+        """Drop an admitted ad-hoc pair (built-in instruments stay)."""
+        if key in self._adhoc:
+            self._adhoc.discard(key)
+            self._instruments.pop(key, None)
+
+    def is_registered(self, key: str) -> bool:
+        return key in self._instruments
+
+    def is_adhoc(self, key: str) -> bool:
+        return key in self._adhoc
+
+    def set_binance_symbols(self, symbols: Iterable[str]):
+        """Trading pairs from Binance exchangeInfo (e.g. SOLUSDT); ad-hoc pairs must be one of them."""
+        self._binance_symbols = {s.upper() for s in symbols}
+
+    def get(self, key: str) -> Optional[Instrument]:
+        return self._instruments.get(key)
+
+    def for_provider(self, provider: str) -> List[Instrument]:
+        return [i for i in self._instruments.values() if i.provider == provider]
+
+    @property
+    def keys(self) -> List[str]:
+        return list(self._instruments.keys())
+
+
+symbol_registry = SymbolRegistry()
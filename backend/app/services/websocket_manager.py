@@ -1,19 +1,183 @@
+import asyncio
+import json
+import math
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Optional, Set
 from fastapi import WebSocket
-from typing import List
+from app.core.config import settings
+
+DROP_OLDEST = "drop_oldest"
+DISCONNECT = "disconnect"
+
+
+def _json_default(value: Any):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if hasattr(value, "item"):  # numpy scalars
+        return value.item()
+    return str(value)
+
+
+def _finite(value: Any) -> Any:
+    # Browsers' JSON.parse rejects NaN/Infinity; indicators are NaN until their window fills.
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if isinstance(value, dict):
+        return {k: _finite(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_finite(v) for v in value]
+    return value
+
+
+def encode(payload: Dict[str, Any]) -> str:
+    """Serialize a message once; the same string goes to every client."""
+    return json.dumps(_finite(payload), default=_json_default, allow_nan=False)
+
+
+class Client:
+    """One connected socket with its own bounded send queue and sender task."""
+
+    def __init__(self, websocket: WebSocket, queue_size: int, topics: Optional[Iterable[str]] = None):
+        self.websocket = websocket
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.topics: Set[str] = set(topics or [])
+        self.sender: Optional[asyncio.Task] = None
+        self.sent = 0
+        self.dropped = 0
+
 
 class ConnectionManager:
-    def __init__(self):
-        self.active_connections: List[WebSocket] = []
+    """
+    WebSocket fan-out with backpressure.
+
+    broadcast() never awaits a socket: it drops the serialized message into
+    each subscribed client's bounded queue and returns, and a per-client
+    sender task drains the queue. A client whose queue is full is slow; with
+    the drop_oldest policy its oldest pending message is discarded (for live
+    signals only the newest state matters), with disconnect it is closed.
+    A send that fails or exceeds the send timeout disconnects the client
+    without affecting anyone else.
+    """
+
+    def __init__(
+        self,
+        queue_size: int = 32,
+        policy: str = DROP_OLDEST,
+        send_timeout: float = 5.0,
+    ):
+        if policy not in (DROP_OLDEST, DISCONNECT):
+            raise ValueError(f"Unknown slow-client policy: {policy}")
+        self.queue_size = queue_size
+        self.policy = policy
+        self.send_timeout = send_timeout
+        self._clients: Dict[WebSocket, Client] = {}
+        # Closes of slow clients in flight; the loop only keeps weak references to tasks
+        self._closing: Set[asyncio.Task] = set()
+        self.broadcasts = 0
+        self.dropped = 0
+        self.slow_disconnects = 0
 
-    async def connect(self, websocket: WebSocket):
+    @property
+    def active_connections(self) -> List[WebSocket]:
+        return list(self._clients.keys())
+
+    async def connect(self, websocket: WebSocket, topics: Optional[Iterable[str]] = None) -> Client:
         await websocket.accept()
-        self.active_connections.append(websocket)
+        client = Client(websocket, self.queue_size, topics)
+        client.sender = asyncio.create_task(self._sender(client))
+        self._clients[websocket] = client
+        return client
 
     def disconnect(self, websocket: WebSocket):
-        self.active_connections.remove(websocket)
+        client = self._clients.pop(websocket, None)
+        if client is not None and client.sender is not None and client.sender is not asyncio.current_task():
+            client.sender.cancel()
+
+    def subscribe(self, websocket: WebSocket, topics: Iterable[str]):
+        client = self._clients.get(websocket)
+        if client is not None:
+            client.topics.update(topics)
+
+    def unsubscribe(self, websocket: WebSocket, topics: Iterable[str]):
+        client = self._clients.get(websocket)
+        if client is not None:
+            client.topics.difference_update(topics)
+
+    def send(self, websocket: WebSocket, message: str):
+        """Queue a message for one client (same backpressure rules as broadcast)."""
+        client = self._clients.get(websocket)
+        if client is not None:
+            self._enqueue(client, message)
+
+    async def broadcast(self, message: str, topic: Optional[str] = None):
+        """Queue one pre-serialized message for every client (subscribed to topic, if given)."""
+        self.broadcasts += 1
+        for client in list(self._clients.values()):
+            if topic is None or topic in client.topics:
+                self._enqueue(client, message)
+
+    async def publish(self, topic: str, payload: Dict[str, Any]):
+        await self.broadcast(encode(payload), topic)
+
+    def _enqueue(self, client: Client, message: str):
+        try:
+            client.queue.put_nowait(message)
+            return
+        except asyncio.QueueFull:
+            pass
+
+        if self.policy == DISCONNECT:
+            self.slow_disconnects += 1
+            self.disconnect(client.websocket)
+            task = asyncio.ensure_future(self._close(client.websocket, 1013, "Client too slow"))
+            self._closing.add(task)
+            task.add_done_callback(self._closing.discard)
+            return
+
+        client.queue.get_nowait()
+        client.queue.put_nowait(message)
+        client.dropped += 1
+        self.dropped += 1
+
+    async def _sender(self, client: Client):
+        try:
+            while True:
+                message = await client.queue.get()
+                await asyncio.wait_for(client.websocket.send_text(message), timeout=self.send_timeout)
+                client.sent += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"WebSocket send failed, dropping client: {e!r}")
+            self.disconnect(client.websocket)
+            await self._close(client.websocket, 1011, "Send failed")
+
+    @staticmethod
+    async def _close(websocket: WebSocket, code: int, reason: str):
+        try:
+            await websocket.close(code=code, reason=reason)
+        except Exception:
+            pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "clients": len(self._clients),
+            "policy": self.policy,
+            "broadcasts": self.broadcasts,
+            "dropped": self.dropped,
+            "slow_disconnects": self.slow_disconnects,
+            "queued": sum(c.queue.qsize() for c in self._clients.values()),
+        }
+
+    async def close(self):
+        for websocket in list(self._clients):
+            self.disconnect(websocket)
+            await self._close(websocket, 1001, "Server shutting down")
+        await asyncio.gather(*self._closing, return_exceptions=True)
 
-    async def broadcast(self, message: str):
-        for connection in self.active_connections:
-            await connection.send_text(message)
 
-manager = ConnectionManager()
+manager = ConnectionManager(
+    queue_size=settings.WS_QUEUE_SIZE,
+    policy=settings.WS_SLOW_CLIENT_POLICY,
+    send_timeout=settings.WS_SEND_TIMEOUT,
+)
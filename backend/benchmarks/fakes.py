@@ -0,0 +1,143 @@
+import asyncio
+import json
+from typing import Any, Dict, List, Optional, Tuple, Union
+import numpy as np
+import pytz
+import websockets
+from app.schemas.candle_series import CandleSeries
+from app.schemas.market_data import MarketCandle
+from app.services.candle_aggregator import timeframe_seconds
+from app.services.connector_interface import MarketDataConnector
+
+# Fixed end of every generated history (a Friday, mid-session in IST), so
+# runs don't depend on the wall clock.
+END_MS = 1_760_000_400_000
+_INTERVAL_SECONDS = {"60m": 3600, "1d": 86400, "5d": 5 * 86400, "1wk": 7 * 86400, "1mo": 30 * 86400}
+
+
+def fake_series(symbol: str, interval: str, bars: int, seed: int = 7, start_price: float = 22000.0) -> CandleSeries:
+    """Deterministic random-walk OHLCV: same arguments, same bars."""
+    step_s = _INTERVAL_SECONDS.get(interval) or timeframe_seconds(interval) or 60
+    rng = np.random.default_rng([seed, sum(map(ord, symbol)), step_s])
+    returns = rng.normal(0.0, 0.001, bars)
+    close = start_price * np.exp(np.cumsum(returns))
+    open_ = np.concatenate(([start_price], close[:-1]))
+    spread = np.abs(rng.normal(0.0, 0.0008, bars)) * close
+    high = np.maximum(open_, close) + spread
+    low = np.minimum(open_, close) - spread
+    volume = rng.integers(1_000, 50_000, bars).astype(np.float64)
+    timestamp = END_MS - step_s * 1000 * np.arange(bars - 1, -1, -1, dtype=np.int64)
+    return CandleSeries.from_arrays(timestamp, open_, high, low, close, volume, tz=pytz.timezone("Asia/Kolkata"), source="fake")
+
+
+class FakeConnector(MarketDataConnector):
+    """
+    In-process stand-in for a provider: serves fake_series() bars, at most
+    max_bars per request, with no I/O. Series are generated once per
+    (symbol, interval, size) so timings measure the pipeline, not the fake.
+    """
+
+    def __init__(self, max_bars: int = 1000, seed: int = 7):
+        self.max_bars = max_bars
+        self.seed = seed
+        self.calls = 0
+        self._series: Dict[Tuple[str, str, int], CandleSeries] = {}
+
+    async def get_candle_series(self, symbol: str, interval: str, limit: int) -> CandleSeries:
+        self.calls += 1
+        bars = max(1, min(limit, self.max_bars))
+        key = (symbol, interval, bars)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = fake_series(symbol, interval, bars, self.seed)
+        return series
+
+    async def get_historical_candles(self, symbol: str, interval: str, limit: int) -> List[MarketCandle]:
+        series = await self.get_candle_series(symbol, interval, limit)
+        return [
+            MarketCandle(
+                timestamp=series.datetime_at(i), open=float(series.open[i]), high=float(series.high[i]),
+                low=float(series.low[i]), close=float(series.close[i]), volume=float(series.volume[i]),
+                source="fake",
+            )
+            for i in range(len(series))
+        ]
+
+    async def get_latest_price(self, symbol: str) -> float:
+        series = await self.get_candle_series(symbol, "1m", self.max_bars)
+        return float(series.close[-1])
+
+
+class BinanceReplayServer:
+    """
+    Local stand-in for the Binance combined-stream WebSocket endpoint.
+    Replays a list of recorded frames to every client that connects, so
+    BinanceStreamConnector can be exercised offline.
+
+    With drop_after_replay=True the server closes each connection once the
+    frames are sent, which exercises the reconnect + backfill path.
+    handshake_delay holds each opening handshake, to exercise streams
+    requested while the connection is still being opened.
+    """
+
+    def __init__(
+        self,
+        frames: List[Union[str, dict]],
+        host: str = "127.0.0.1",
+        port: int = 0,
+        frame_delay: float = 0.0,
+        drop_after_replay: bool = False,
+        handshake_delay: float = 0.0,
+    ):
+        self.frames = [f if isinstance(f, str) else json.dumps(f) for f in frames]
+        self.host = host
+        self.port = port
+        self.frame_delay = frame_delay
+        self.drop_after_replay = drop_after_replay
+        self.handshake_delay = handshake_delay
+        self.connections = 0
+        self.paths: List[str] = []
+        self.control_messages: List[Any] = []
+        self._server = None
+
+    @property
+    def url(self) -> str:
+        return f"ws://{self.host}:{self.port}"
+
+    async def start(self) -> str:
+        self._server = await websockets.serve(self._handler, self.host, self.port, process_request=self._process_request)
+        self.port = list(self._server.sockets)[0].getsockname()[1]
+        return self.url
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _process_request(self, *args):
+        if self.handshake_delay:
+            await asyncio.sleep(self.handshake_delay)
+        return None
+
+    async def _handler(self, connection, path: Optional[str] = None):
+        self.connections += 1
+        request = getattr(connection, "request", None)
+        self.paths.append(path or (request.path if request is not None else ""))
+        reader = asyncio.create_task(self._read_control(connection))
+        try:
+            for frame in self.frames:
+                await connection.send(frame)
+                if self.frame_delay:
+                    await asyncio.sleep(self.frame_delay)
+            if not self.drop_after_replay:
+                await connection.wait_closed()
+        finally:
+            reader.cancel()
+
+    async def _read_control(self, connection):
+        # SUBSCRIBE/UNSUBSCRIBE requests sent by the client.
+        async for raw in connection:
+            message = json.loads(raw)
+            self.control_messages.append(message)
+            await connection.send(json.dumps({"result": None, "id": message.get("id")}))
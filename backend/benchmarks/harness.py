@@ -0,0 +1,77 @@
+import gc
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+
+
+def percentile(sorted_ms: List[float], q: float) -> float:
+    if not sorted_ms:
+        return float("nan")
+    # Nearest-rank on the sorted samples
+    index = min(len(sorted_ms) - 1, max(0, int(round(q / 100.0 * len(sorted_ms) + 0.5)) - 1))
+    return sorted_ms[index]
+
+
+def measure(
+    fn: Callable[[], Any],
+    repeat: int = 200,
+    budget_s: float = 2.0,
+    warmup: int = 3,
+    setup: Optional[Callable[[], Any]] = None,
+) -> Dict[str, Any]:
+    """
+    Latency percentiles (ms) and allocations of fn().
+
+    After `warmup` calls, fn runs up to `repeat` times or until `budget_s`
+    is spent (at least 5 runs), with GC paused around each call. setup()
+    runs before every call, outside the timing. Allocations come from one
+    extra traced call: the peak of traced memory during it and what it
+    left allocated afterwards (caches, results still referenced).
+    """
+    for _ in range(warmup):
+        if setup is not None:
+            setup()
+        fn()
+
+    samples: List[float] = []
+    deadline = time.perf_counter() + budget_s
+    gc_was_enabled = gc.isenabled()
+    try:
+        while len(samples) < repeat and (len(samples) < 5 or time.perf_counter() < deadline):
+            if setup is not None:
+                setup()
+            gc.disable()
+            started = time.perf_counter()
+            fn()
+            samples.append((time.perf_counter() - started) * 1000.0)
+            if gc_was_enabled:
+                gc.enable()
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    if setup is not None:
+        setup()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        result = fn()
+        after, peak = tracemalloc.get_traced_memory()
+        del result
+    finally:
+        tracemalloc.stop()
+
+    samples.sort()
+    return {
+        "runs": len(samples),
+        "mean_ms": round(sum(samples) / len(samples), 4),
+        "min_ms": round(samples[0], 4),
+        "p50_ms": round(percentile(samples, 50), 4),
+        "p95_ms": round(percentile(samples, 95), 4),
+        "p99_ms": round(percentile(samples, 99), 4),
+        "max_ms": round(samples[-1], 4),
+        "peak_kib": round((peak - before) / 1024.0, 1),
+        "retained_kib": round((after - before) / 1024.0, 1),
+    }
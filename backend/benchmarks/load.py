@@ -0,0 +1,162 @@
+"""
+Offline load test of /api/v1/signals/* driven from recorded market data.
+
+    cd backend
+    # 1. A recording: from a live run with MARKET_DATA_MODE=record, or synthetic:
+    python -m benchmarks.load --make-recording --bars 2000
+    # 2. Drive the app in-process (no sockets) from that recording:
+    python -m benchmarks.load --duration 20 --concurrency 64
+    # ...or a server started with MARKET_DATA_MODE=replay:
+    python -m benchmarks.load --url http://127.0.0.1:8000 --duration 20
+
+In-process runs measure the app itself (ASGI, routing, handlers); runs
+against --url add uvicorn and the network.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+DEFAULT_PATHS = [
+    "/api/v1/signals/latest?asset=NIFTY",
+    "/api/v1/signals/latest?asset=BITCOIN",
+    "/api/v1/signals/levels?asset=NIFTY",
+    "/api/v1/signals/expert?asset=BITCOIN",
+    "/api/v1/signals/candles?asset=NIFTY&tf=5m",
+    "/api/v1/signals/candles?asset=BITCOIN&tf=15m",
+    "/api/v1/signals/context",
+]
+
+
+def configure(mode: str, recording_dir: str, speed: float, latency: str, error_rate: float):
+    """Market data mode, with everything else that needs a service switched off."""
+    os.environ.update({
+        "MARKET_DATA_MODE": mode,
+        "MARKET_DATA_RECORDING_DIR": recording_dir,
+        "REPLAY_SPEED": str(speed),
+        "REPLAY_LATENCY": latency,
+        "REPLAY_ERROR_RATE": str(error_rate),
+        "SIGNAL_LOG_ENABLED": "false",
+        "OPTION_CHAIN_STORE_ENABLED": "false",
+        "REDIS_ENABLED": "false",
+    })
+
+
+async def make_recording(recording_dir: str, bars: int, snapshots: int):
+    """Record FakeConnector responses for the default watchlist through RecordingConnector."""
+    from benchmarks.fakes import FakeConnector
+    from app.services.candle_stream import base_timeframe_for
+    from app.services.connectors.recording_connector import RecordingConnector, recording_path
+    from app.services.symbol_registry import symbol_registry
+    from app.core.config import settings
+
+    connectors: Dict[str, RecordingConnector] = {}
+    for snapshot in range(snapshots):
+        # A different seed per snapshot, so replays at speed > 0 see data move
+        fake = FakeConnector(max_bars=bars, seed=snapshot)
+        for asset in settings.WATCHLIST:
+            instrument = symbol_registry.resolve(asset)
+            recorder = connectors.get(instrument.provider)
+            if recorder is None:
+                recorder = connectors[instrument.provider] = RecordingConnector(
+                    fake, recording_path(recording_dir, instrument.provider),
+                )
+            recorder.inner = fake
+            await recorder.get_candle_series(instrument.symbol, instrument.signal_interval, 100)
+            await recorder.get_latest_price(instrument.symbol)
+            await recorder.get_candle_series(instrument.symbol, "1d", settings.LEVELS_HISTORY_DAYS)
+            chart_bases = {base_timeframe_for(instrument.provider, tf) for tf in ("1m", "5m", "15m", "1h", "1d")}
+            for base_tf, limit in sorted(chart_bases):
+                await recorder.get_candle_series(instrument.symbol, base_tf, limit)
+    for recorder in connectors.values():
+        await recorder.close()
+        print(f"Recorded {recorder.recorded} responses to {recorder.path}")
+
+
+async def drive(client, paths: List[str], duration: float, concurrency: int) -> Dict[str, object]:
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+    deadline = time.perf_counter() + duration
+
+    async def worker(offset: int):
+        i = offset
+        while time.perf_counter() < deadline:
+            path = paths[i % len(paths)]
+            i += 1
+            started = time.perf_counter()
+            try:
+                response = await client.get(path)
+                statuses[response.status_code] += 1
+            except Exception as e:
+                statuses[type(e).__name__] += 1
+            latencies.append((time.perf_counter() - started) * 1000.0)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    from benchmarks.harness import percentile
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+        "statuses": dict(statuses),
+    }
+
+
+async def run(args) -> Dict[str, object]:
+    import httpx
+
+    paths = args.path or DEFAULT_PATHS
+    if args.url:
+        async with httpx.AsyncClient(base_url=args.url, timeout=30.0) as client:
+            return await drive(client, paths, args.duration, args.concurrency)
+
+    from app.main import app
+    # Run the app's own startup/shutdown around the load
+    await app.router.startup()
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://replay", timeout=30.0) as client:
+            for path in paths:
+                await client.get(path)  # warm snapshots and caches
+            return await drive(client, paths, args.duration, args.concurrency)
+    finally:
+        await app.router.shutdown()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Offline load test from recorded market data")
+    parser.add_argument("--recording-dir", default="./data/recordings")
+    parser.add_argument("--make-recording", action="store_true", help="write a synthetic recording and exit")
+    parser.add_argument("--bars", type=int, default=1000, help="bars per recorded response (--make-recording)")
+    parser.add_argument("--snapshots", type=int, default=5, help="recorded polls per request (--make-recording)")
+    parser.add_argument("--url", help="load a running server instead of the in-process app")
+    parser.add_argument("--path", action="append", help="request path (repeatable); defaults to a dashboard mix")
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--speed", type=float, default=0.0, help="replay clock multiple; 0 = as fast as possible")
+    parser.add_argument("--latency", default="none", help="injected upstream latency, see latency_model")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args(argv)
+
+    # The recording is written by hand below, so the app itself stays live
+    mode = "live" if args.make_recording else "replay"
+    configure(mode, args.recording_dir, args.speed, args.latency, args.error_rate)
+    if args.make_recording:
+        asyncio.run(make_recording(args.recording_dir, args.bars, args.snapshots))
+        return 0
+    result = asyncio.run(run(args))
+    print(f"{result['requests']} requests, {result['rps']} req/s, "
+          f"p50 {result['p50_ms']} ms, p95 {result['p95_ms']} ms, p99 {result['p99_ms']} ms, "
+          f"statuses {result['statuses']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
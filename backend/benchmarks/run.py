@@ -0,0 +1,224 @@
+"""
+Signal pipeline benchmarks, fully offline.
+
+Engines and every HTTP endpoint are timed against FakeConnector
+(deterministic random-walk bars, no network, no database, no Redis) at
+several history sizes, reporting latency percentiles and allocations.
+
+    cd backend
+    python -m benchmarks.run                       # run and print
+    python -m benchmarks.run --check               # fail (exit 1) on regressions vs baseline.json
+    python -m benchmarks.run --save-baseline       # record a new baseline
+    python -m benchmarks.run --sizes 1000 --only feature_engine
+
+Baselines are machine-specific, so baseline.json is not committed: record
+one with --save-baseline on the machine that runs --check (before the change
+under test), then compare against it.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sys
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Offline configuration, before any app module reads settings
+os.environ.update({
+    "SIGNAL_SCHEDULER_ENABLED": "false",
+    "CANDLE_STORE_ENABLED": "false",
+    "SIGNAL_LOG_ENABLED": "false",
+    "OPTION_CHAIN_STORE_ENABLED": "false",
+    "OPTION_CHAIN_PROVIDER": "",
+    "REDIS_ENABLED": "false",
+    "BINANCE_STREAMING_ENABLED": "false",
+})
+# Not live, so startup skips Binance exchangeInfo; the fakes replace the replay connectors.
+os.environ.setdefault("MARKET_DATA_MODE", "replay")
+
+import numpy as np  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from benchmarks.fakes import FakeConnector, fake_series  # noqa: E402
+from benchmarks.harness import measure  # noqa: E402
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+DEFAULT_SIZES = (100, 1_000, 100_000)
+
+ENDPOINTS = [
+    ("latest", "/api/v1/signals/latest?asset={asset}"),
+    ("levels", "/api/v1/signals/levels?asset={asset}"),
+    ("expert", "/api/v1/signals/expert?asset={asset}"),
+    ("candles_5m", "/api/v1/signals/candles?asset={asset}&tf=5m"),
+    ("candles_1h", "/api/v1/signals/candles?asset={asset}&tf=1h"),
+    ("candles_5m_columnar", "/api/v1/signals/candles?asset={asset}&tf=5m&format=columnar"),
+    ("predict", "/api/v1/signals/predict?asset={asset}"),
+    ("context", "/api/v1/signals/context"),
+    ("backtest", "/api/v1/signals/backtest?asset={asset}&bars={size}"),
+]
+
+Case = Tuple[str, Callable[[], Any]]
+
+
+def engine_cases(size: int) -> List[Case]:
+    from app.api.candle_formats import candle_encoder
+    from app.services.candle_aggregator import CandleAggregator
+    from app.services.decision_engine import DecisionEngine
+    from app.services.expert_engine import ExpertEngine
+    from app.services.feature_engine import FeatureEngine
+    from app.services.market_levels import MarketLevels
+
+    series = fake_series("^NSEI", "1m", size)
+    features = FeatureEngine.calculate_technical_indicators(series)
+    decision = DecisionEngine.analyze(features, "NIFTY", True)
+    levels = asyncio.run(MarketLevels.get_daily_pivots(FakeConnector(size), "^NSEI"))
+    price = float(series.close[-1])
+    columns = CandleAggregator.aggregate_columns(series, "5m")
+    return [
+        ("feature_engine.calculate_technical_indicators",
+         lambda: FeatureEngine.calculate_technical_indicators(series)),
+        ("candle_aggregator.aggregate_candles_5m", lambda: CandleAggregator.aggregate_candles(series, "5m")),
+        ("candle_aggregator.aggregate_candles_1h", lambda: CandleAggregator.aggregate_candles(series, "1h")),
+        ("candle_formats.rows_5m", lambda: candle_encoder("rows")(columns)),
+        ("candle_formats.columnar_5m", lambda: candle_encoder("columnar")(columns)),
+        ("decision_engine.analyze", lambda: DecisionEngine.analyze(features, "NIFTY", True)),
+        ("expert_engine.generate_commentary",
+         lambda: ExpertEngine.generate_commentary("NIFTY", price, decision, levels)),
+    ]
+
+
+def run_endpoints(client: TestClient, size: int, runner: Callable[[str, Callable[[], Any]], None]):
+    from app.services.asset_context import asset_context
+    from app.services.signal_scheduler import signal_scheduler
+
+    connector = FakeConnector(max_bars=size)
+    for provider in ("yfinance", "binance"):
+        asset_context.use_connector(provider, connector)
+    for asset in ("NIFTY", "BITCOIN"):
+        # Full fetch + features + decision cycle; also replaces any snapshot from the previous size
+        runner(f"scheduler.refresh_asset[{asset}]",
+               lambda asset=asset: client.portal.call(signal_scheduler.refresh_asset, asset))
+        for name, path in ENDPOINTS:
+            url = path.format(asset=asset, size=size)
+
+            def call(url=url):
+                response = client.get(url)
+                if response.status_code != 200:
+                    raise RuntimeError(f"GET {url}: {response.status_code} {response.text[:200]}")
+                return response
+
+            runner(f"endpoint.{name}[{asset}]", call)
+
+
+def run(sizes: List[int], only: Optional[str], repeat: int, budget: float) -> Dict[str, Dict[str, Any]]:
+    from app.main import app
+
+    results: Dict[str, Dict[str, Any]] = {}
+
+    def runner_for(size: int):
+        def runner(name: str, fn: Callable[[], Any]):
+            case = f"{name}[{size}]" if "[" not in name else name.replace("[", f"[{size},", 1)
+            if only and only not in case:
+                return
+            result = measure(fn, repeat=repeat, budget_s=budget)
+            results[case] = result
+            print(f"{case:<62} p50 {result['p50_ms']:>10.3f}  p95 {result['p95_ms']:>10.3f}  "
+                  f"p99 {result['p99_ms']:>10.3f} ms  peak {result['peak_kib']:>10.1f} KiB  (n={result['runs']})",
+                  flush=True)
+        return runner
+
+    for size in sizes:
+        runner = runner_for(size)
+        for name, fn in engine_cases(size):
+            runner(name, fn)
+    with TestClient(app) as client:
+        for size in sizes:
+            run_endpoints(client, size, runner_for(size))
+    return results
+
+
+def compare(
+    results: Dict[str, Dict[str, Any]],
+    baseline: Dict[str, Dict[str, Any]],
+    tolerance: float,
+    alloc_tolerance: float,
+    min_delta_ms: float = 0.05,
+    min_delta_kib: float = 16.0,
+) -> List[str]:
+    """Regression messages: p50 or peak allocation beyond the baseline plus tolerance."""
+    regressions = []
+    for case, result in sorted(results.items()):
+        base = baseline.get(case)
+        if base is None:
+            print(f"{case}: no baseline")
+            continue
+        limit_ms = base["p50_ms"] * (1 + tolerance)
+        if result["p50_ms"] > limit_ms and result["p50_ms"] - base["p50_ms"] > min_delta_ms:
+            regressions.append(f"{case}: p50 {result['p50_ms']:.3f} ms > {limit_ms:.3f} ms (baseline {base['p50_ms']:.3f})")
+        limit_kib = base["peak_kib"] * (1 + alloc_tolerance)
+        if result["peak_kib"] > limit_kib and result["peak_kib"] - base["peak_kib"] > min_delta_kib:
+            regressions.append(f"{case}: peak {result['peak_kib']:.1f} KiB > {limit_kib:.1f} KiB (baseline {base['peak_kib']:.1f})")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Offline signal pipeline benchmarks")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)), help="comma-separated bar counts")
+    parser.add_argument("--only", help="run cases whose name contains this")
+    parser.add_argument("--repeat", type=int, default=200, help="max timed runs per case")
+    parser.add_argument("--budget", type=float, default=1.0, help="seconds per case (at least 5 runs)")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--check", action="store_true", help="exit 1 if any case regressed against the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="allowed p50 slowdown (0.5 = +50%%)")
+    parser.add_argument("--alloc-tolerance", type=float, default=0.25, help="allowed peak allocation growth")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args(argv)
+
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    results = run(sizes, args.only, args.repeat, args.budget)
+    report = {
+        "meta": {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": f"{platform.system()} {platform.machine()}",
+            "cpus": os.cpu_count(),
+        },
+        "results": results,
+    }
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+
+    if args.save_baseline:
+        baseline = {"meta": report["meta"], "results": {}}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+        # Partial runs (--only/--sizes) update just their cases
+        baseline["meta"] = report["meta"]
+        baseline["results"].update({case: {k: r[k] for k in ("p50_ms", "p95_ms", "p99_ms", "peak_kib")} for case, r in results.items()})
+        with open(args.baseline, "w") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Baseline written to {args.baseline} ({len(results)} cases)")
+
+    if args.check:
+        if not os.path.exists(args.baseline):
+            print(f"No baseline at {args.baseline}; run with --save-baseline first")
+            return 1
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.tolerance, args.alloc_tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s):")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print(f"\nNo regressions against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
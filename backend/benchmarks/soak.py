@@ -0,0 +1,246 @@
+"""
+Soak test: a synthetic high-rate feed through the candle, feature,
+decision and broadcast path, reporting throughput and memory over time.
+
+    cd backend
+    python -m benchmarks.soak --instruments 20 --tick-rate 5000 --duration 3600
+    python -m benchmarks.soak --nse 10 --crypto 10 --speed 60 --duration 14400 --report 60
+
+By default the simulated clock is stepped (--step simulated seconds per
+cycle) as fast as the pipeline keeps up, so ticks/s is the throughput
+ceiling. With --speed the clock runs at that multiple of real time and the
+pipeline cycles every --interval seconds instead, which is the shape of a
+live deployment. RSS growth is fitted over the samples after --warmup.
+"""
+import argparse
+import asyncio
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+os.environ.setdefault("SIGNAL_LOG_ENABLED", "false")
+os.environ.setdefault("OPTION_CHAIN_STORE_ENABLED", "false")
+os.environ.setdefault("CANDLE_STORE_ENABLED", "false")
+
+import numpy as np
+
+from app.services.candle_aggregator import IncrementalCandleAggregator
+from app.services.connectors.synthetic_connector import SyntheticConnector, SyntheticInstrument
+from app.services.decision_engine import DecisionEngine
+from app.services.feature_engine import FeatureEngine
+from app.services.market_hours import IST, get_market_status_ist
+from app.services.websocket_manager import ConnectionManager
+
+
+class NullSocket:
+    """Stands in for a browser: accepts every message and counts bytes."""
+
+    def __init__(self):
+        self.messages = 0
+        self.bytes = 0
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, message: str):
+        self.messages += 1
+        self.bytes += len(message)
+
+    async def close(self, code: int = 1000, reason: str = ""):
+        pass
+
+
+def rss_mib() -> float:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0  # peak, where /proc is missing
+
+
+class Soak:
+    def __init__(self, args):
+        specs = [
+            SyntheticInstrument(symbol=f"NSE{i}", market="NSE", start_price=22000.0, tick_rate=args.tick_rate)
+            for i in range(args.nse)
+        ] + [
+            SyntheticInstrument(symbol=f"CRYPTO{i}", market="CRYPTO", start_price=60000.0, tick_rate=args.tick_rate)
+            for i in range(args.crypto)
+        ]
+        start_ms = None
+        if args.start:
+            start_ms = int(IST.localize(datetime.fromisoformat(args.start)).timestamp() * 1000)
+        self.args = args
+        self.connector = SyntheticConnector(specs, speed=args.speed, start_ms=start_ms, history_bars=args.history, seed=args.seed)
+        self.specs = specs
+        self.asset_types = ["NIFTY" if s.market == "NSE" else "BITCOIN" for s in specs]
+        self.manager = ConnectionManager(queue_size=args.queue_size)
+        self.sockets: List[NullSocket] = []
+        self.aggregators: Dict[str, Dict[str, IncrementalCandleAggregator]] = {}
+        self.stage_s: Dict[str, float] = defaultdict(float)
+        self.cycles = 0
+        self.ticks = 0
+
+    async def start(self):
+        signals = [f"signals:{s.symbol}" for s in self.specs]
+        for i in range(self.args.clients):
+            # Like a dashboard: one chart (instruments and timeframes rotate over clients) plus every signal
+            chart = f"candles:{self.specs[i % len(self.specs)].symbol}:{self.args.tf[i % len(self.args.tf)]}"
+            socket = NullSocket()
+            self.sockets.append(socket)
+            await self.manager.connect(socket, [chart] + signals)
+        for spec in self.specs:
+            series = await self.connector.get_candle_series(spec.symbol, "1m", self.args.history)
+            self.aggregators[spec.symbol] = {
+                tf: IncrementalCandleAggregator.for_series(series, tf, max_bars=1000) for tf in self.args.tf
+            }
+
+    def _stage(self, name: str, started: float) -> float:
+        now = time.perf_counter()
+        self.stage_s[name] += now - started
+        return now
+
+    async def cycle(self):
+        t = time.perf_counter()
+        self.ticks += self.connector.advance(self.args.step if self.args.speed <= 0 else None)
+        t = self._stage("generate", t)
+
+        features: List[Dict[str, float]] = []
+        for spec, asset_type in zip(self.specs, self.asset_types):
+            series = await self.connector.get_candle_series(spec.symbol, "1m", self.args.bars)
+            t = self._stage("candles", t)
+            features.append(FeatureEngine.update_technical_indicators(spec.symbol, "1m", series, asset_type))
+            t = self._stage("features", t)
+            for tf, aggregator in self.aggregators[spec.symbol].items():
+                touched, opened = aggregator.update_from_series(series)
+                t = self._stage("aggregate", t)
+                if touched:
+                    await self.manager.publish(f"candles:{spec.symbol}:{tf}", {
+                        "type": "candles", "asset": spec.symbol, "tf": tf, "bars": touched, "opened": opened,
+                    })
+                    t = self._stage("broadcast", t)
+
+        clock = datetime.fromtimestamp(self.connector.clock_ms / 1000.0, IST)
+        nse_open = get_market_status_ist(clock)["is_open"]
+        decisions = DecisionEngine.analyze_batch(
+            features, self.asset_types, [nse_open if a == "NIFTY" else True for a in self.asset_types],
+        )
+        t = self._stage("decision", t)
+        for spec, decision in zip(self.specs, decisions):
+            await self.manager.publish(f"signals:{spec.symbol}", {"type": "signal", "asset": spec.symbol, "signal": decision})
+        t = self._stage("broadcast", t)
+        # Let the per-client senders deliver the cycle's messages before the next one
+        while self.manager.stats()["queued"]:
+            await asyncio.sleep(0)
+        self._stage("deliver", t)
+        self.cycles += 1
+
+    def sample(self, elapsed: float) -> Dict[str, Any]:
+        sample = {
+            "elapsed_s": round(elapsed, 1),
+            "clock": datetime.fromtimestamp(self.connector.clock_ms / 1000.0, IST).strftime("%Y-%m-%d %H:%M"),
+            "ticks_per_s": round(self.ticks / elapsed),
+            "cycles_per_s": round(self.cycles / elapsed, 1),
+            "stage_ms": {name: round(1000.0 * s / max(self.cycles, 1), 3) for name, s in self.stage_s.items()},
+            "rss_mib": round(rss_mib(), 1),
+            "gc_objects": len(gc.get_objects()),
+            "aggregated_bars": sum(len(a.bars) for aggs in self.aggregators.values() for a in aggs.values()),
+            "ws": self.manager.stats(),
+            "ws_sent": sum(s.messages for s in self.sockets),
+        }
+        if tracemalloc.is_tracing():
+            sample["traced_mib"] = round(tracemalloc.get_traced_memory()[0] / 1048576.0, 1)
+        return sample
+
+    async def close(self):
+        await self.manager.close()
+
+
+def growth_mib_per_hour(samples: List[Dict[str, Any]], warmup: float) -> Optional[float]:
+    points = [(s["elapsed_s"], s["rss_mib"]) for s in samples if s["elapsed_s"] >= warmup]
+    if len(points) < 2:
+        return None
+    x, y = np.array(points).T
+    return round(float(np.polyfit(x, y, 1)[0]) * 3600.0, 2)
+
+
+async def run(args) -> Dict[str, Any]:
+    soak = Soak(args)
+    await soak.start()
+    if args.tracemalloc:
+        tracemalloc.start()
+    samples: List[Dict[str, Any]] = []
+    started = time.perf_counter()
+    next_report = started + args.report
+    deadline = started + args.duration
+    try:
+        while True:
+            cycle_started = time.perf_counter()
+            if cycle_started >= deadline:
+                break
+            await soak.cycle()
+            now = time.perf_counter()
+            if args.speed > 0 and args.interval > 0:
+                await asyncio.sleep(max(0.0, args.interval - (now - cycle_started)))
+            if now >= next_report:
+                samples.append(soak.sample(now - started))
+                print(json.dumps(samples[-1]) if args.json else
+                      f"[{samples[-1]['elapsed_s']:>8}s] clock {samples[-1]['clock']} "
+                      f"{samples[-1]['ticks_per_s']:>10} ticks/s {samples[-1]['cycles_per_s']:>7} cycles/s "
+                      f"rss {samples[-1]['rss_mib']} MiB objects {samples[-1]['gc_objects']} "
+                      f"ws queued {samples[-1]['ws']['queued']} dropped {samples[-1]['ws']['dropped']}")
+                next_report += args.report
+        final = soak.sample(time.perf_counter() - started)
+    finally:
+        await soak.close()
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+    samples.append(final)
+    final["rss_growth_mib_per_hour"] = growth_mib_per_hour(samples, args.warmup)
+    return final
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Synthetic-feed soak test of the candle/feature/decision/broadcast path")
+    parser.add_argument("--nse", type=int, default=None, help="NSE-session instruments")
+    parser.add_argument("--crypto", type=int, default=None, help="24x7 instruments")
+    parser.add_argument("--instruments", type=int, default=10, help="split evenly when --nse/--crypto are not given")
+    parser.add_argument("--tick-rate", type=float, default=1000.0, help="ticks per second per instrument (simulated time)")
+    parser.add_argument("--speed", type=float, default=0.0, help="clock multiple of real time; 0 = step as fast as possible")
+    parser.add_argument("--step", type=float, default=1.0, help="simulated seconds per cycle when --speed is 0")
+    parser.add_argument("--interval", type=float, default=1.0, help="seconds between cycles when --speed > 0")
+    parser.add_argument("--start", help="simulated start, IST (e.g. 2025-10-06T09:15); defaults to now")
+    parser.add_argument("--duration", type=float, default=60.0, help="real seconds to run")
+    parser.add_argument("--report", type=float, default=10.0, help="seconds between samples")
+    parser.add_argument("--warmup", type=float, default=30.0, help="seconds excluded from the RSS growth fit")
+    parser.add_argument("--tf", nargs="+", default=["1m", "5m", "15m", "1h"], help="chart timeframes aggregated and broadcast")
+    parser.add_argument("--clients", type=int, default=50, help="websocket clients (null sockets), each on one chart plus all signals")
+    parser.add_argument("--queue-size", type=int, default=32)
+    parser.add_argument("--bars", type=int, default=500, help="1m bars read per instrument per cycle")
+    parser.add_argument("--history", type=int, default=5000, help="1m bars kept per instrument")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--tracemalloc", action="store_true", help="also report traced Python heap (slower)")
+    parser.add_argument("--json", action="store_true", help="one JSON object per sample")
+    args = parser.parse_args(argv)
+    if args.nse is None and args.crypto is None:
+        args.nse = args.instruments // 2
+        args.crypto = args.instruments - args.nse
+    args.nse, args.crypto = args.nse or 0, args.crypto or 0
+
+    final = asyncio.run(run(args))
+    print(json.dumps(final, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
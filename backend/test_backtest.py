@@ -0,0 +1,78 @@
+from datetime import datetime
+import numpy as np
+import pytest
+import pytz
+from app.schemas.candle_series import CandleSeries
+from app.services.backtest import BacktestConfig, Backtester, nse_session_mask
+
+IST = pytz.timezone("Asia/Kolkata")
+
+
+def ist_ms(*args) -> int:
+    return int(IST.localize(datetime(*args)).timestamp() * 1000)
+
+
+def bars(close, start_ms: int, step_ms: int = 900_000) -> CandleSeries:
+    close = np.asarray(close, dtype=float)
+    return CandleSeries.from_arrays(start_ms + step_ms * np.arange(len(close)), close, close, close, close, np.ones(len(close)))
+
+
+def test_simulate_a_small_case_by_hand():
+    series = bars([100.0, 110.0, 99.0, 99.0, 108.9, 100.0], ist_ms(2024, 1, 1, 0, 0))
+    action = np.array([1, 1, 0, -1, 0, 0])
+    result = Backtester.simulate(series, action, "BITCOIN", BacktestConfig(cost_bps=100))
+
+    # Positions 1, 1, 0, -1, 0, 0: long over bars 1-2 (+10%, -10%), short over bar 4 (+10%)
+    # Four units traded at 1% each: buy, sell, sell short, buy back
+    net = np.array([-0.01, 0.10, -0.10 - 0.01, -0.01, -0.10 - 0.01, 0.0])
+    equity = np.cumprod(1 + net)
+    assert result["trades"] == 2
+    assert result["costs_pct"] == 4.0
+    assert result["total_return_pct"] == round((equity[-1] - 1) * 100, 4)
+    assert result["max_drawdown_pct"] == round((equity.min() / equity.max() - 1) * 100, 4)
+    # Points: +10 - 11 on the long, -9.9 on the short, less 1% of 100 + 99 + 99 + 108.9 traded
+    assert result["pnl_points"] == round(10 - 11 - 9.9 - 4.069, 2)
+    # Per trade: 0% and -10% gross, each less entry and exit costs
+    assert result["hit_rate"] == 0.0 and result["avg_trade_pct"] == pytest.approx(-7.0)
+    assert (result["exposure_pct"], result["long_pct"], result["short_pct"]) == (50.0, 33.33, 16.67)
+
+
+def test_position_rules():
+    action = np.array([1, 0, -1, 0, 1])
+    assert Backtester.positions(action, BacktestConfig()).tolist() == [1, 0, -1, 0, 1]
+    assert Backtester.positions(action, BacktestConfig(allow_short=False)).tolist() == [1, 0, 0, 0, 1]
+    assert Backtester.positions(action, BacktestConfig(hold_on_neutral=True)).tolist() == [1, 1, -1, -1, 1]
+
+
+def test_nse_session_mask_keeps_only_exchange_hours():
+    stamps = {
+        (2024, 1, 1, 9, 14): False,   # Monday, before the open
+        (2024, 1, 1, 9, 15): True,
+        (2024, 1, 1, 12, 0): True,
+        (2024, 1, 1, 15, 30): True,
+        (2024, 1, 1, 15, 31): False,
+        (2024, 1, 1, 3, 0): False,    # Monday in IST, still Sunday in UTC
+        (2024, 1, 5, 15, 29): True,   # Friday
+        (2024, 1, 6, 10, 0): False,   # Saturday
+        (2024, 1, 7, 10, 0): False,   # Sunday
+    }
+    mask = nse_session_mask(np.array([ist_ms(*stamp) for stamp in stamps], dtype=np.int64))
+    assert mask.tolist() == list(stamps.values())
+
+
+def test_nifty_positions_are_flat_into_each_close():
+    day_one = bars([100.0, 101.0, 102.0], ist_ms(2024, 1, 1, 15, 0))
+    day_two = bars([103.0, 104.0, 105.0], ist_ms(2024, 1, 2, 9, 15))
+    series = CandleSeries.from_arrays(
+        np.concatenate([day_one.timestamp, day_two.timestamp]), *(
+            np.concatenate([getattr(day_one, name), getattr(day_two, name)])
+            for name in ("open", "high", "low", "close", "volume")
+        ),
+    )
+    action = np.ones(len(series), dtype=int)
+
+    intraday = Backtester.simulate(series, action, "NIFTY", BacktestConfig(cost_bps=0))
+    overnight = Backtester.simulate(series, action, "NIFTY", BacktestConfig(cost_bps=0, exit_at_session_end=False))
+    # The 102 -> 103 overnight gap is only earned when positions are carried
+    assert intraday["trades"] == 2 and overnight["trades"] == 1
+    assert intraday["pnl_points"] == 4.0 and overnight["pnl_points"] == 5.0
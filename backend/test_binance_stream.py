@@ -0,0 +1,136 @@
+import asyncio
+from datetime import datetime
+from app.schemas.market_data import MarketCandle
+from app.services.connector_interface import MarketDataConnector
+from app.services.connectors.binance_stream_connector import BinanceStreamConnector
+from benchmarks.fakes import BinanceReplayServer
+
+BASE_MS = 1_700_000_000_000 // 60_000 * 60_000
+
+
+class FakeRest(MarketDataConnector):
+    """REST stand-in: returns a fixed 1m history ending at the replayed bars."""
+
+    def __init__(self, bars: int = 5, delay: float = 0.0):
+        self.bars = bars
+        self.delay = delay
+        self.calls = []
+
+    async def get_historical_candles(self, symbol, interval, limit):
+        self.calls.append((symbol, interval, limit))
+        await asyncio.sleep(self.delay)
+        return [
+            MarketCandle(
+                timestamp=datetime.fromtimestamp((BASE_MS + i * 60_000) / 1000.0),
+                open=100.0, high=101.0, low=99.0, close=100.0, volume=1.0, source="binance"
+            )
+            for i in range(-self.bars, 0)
+        ][-limit:]
+
+    async def get_latest_price(self, symbol):
+        return 0.0
+
+    async def close(self):
+        pass
+
+
+def kline_frame(minute: int, close: float, closed: bool) -> dict:
+    start = BASE_MS + minute * 60_000
+    return {
+        "stream": "btcusdt@kline_1m",
+        "data": {
+            "e": "kline", "s": "BTCUSDT",
+            "k": {"t": start, "T": start + 59_999, "s": "BTCUSDT", "i": "1m",
+                  "o": "100", "h": str(max(close, 100)), "l": str(min(close, 100)),
+                  "c": str(close), "v": "2.5", "x": closed},
+        },
+    }
+
+
+def trade_frame(price: float) -> dict:
+    return {"stream": "btcusdt@aggTrade", "data": {"e": "aggTrade", "s": "BTCUSDT", "p": str(price), "q": "0.1"}}
+
+
+async def _wait_for(condition, attempts: int = 100):
+    for _ in range(attempts):
+        if condition():
+            return
+        await asyncio.sleep(0.02)
+
+
+async def _replay(drop_after_replay: bool):
+    frames = [kline_frame(0, 101.0, False), kline_frame(0, 102.0, True), kline_frame(1, 103.0, False), trade_frame(103.5)]
+    server = BinanceReplayServer(frames, drop_after_replay=drop_after_replay)
+    url = await server.start()
+    rest = FakeRest()
+    connector = BinanceStreamConnector(rest=rest, ws_url=url, reconnect_min=0.05, reconnect_max=0.1)
+    try:
+        await connector.get_historical_candles("BTC/USDT", "1m", 100)
+        await connector.get_latest_price("BTC/USDT")
+        if drop_after_replay:
+            await _wait_for(lambda: server.connections >= 2 and connector.backfills >= 2)
+            return connector, server, rest, None, None
+        await _wait_for(lambda: connector.messages >= len(frames) and
+                        "btcusdt@aggtrade" in [s.lower() for s in connector.stats()["subscribed"]])
+        candles = await connector.get_historical_candles("BTC/USDT", "1m", 100)
+        price = await connector.get_latest_price("BTC/USDT")
+        return connector, server, rest, candles, price
+    finally:
+        await connector.close()
+        await server.stop()
+
+
+def test_stream_replay_updates_window():
+    connector, server, rest, candles, price = asyncio.run(_replay(drop_after_replay=False))
+    assert rest.calls[0] == ("BTCUSDT", "1m", 1000)
+    assert len(candles) == 7  # 5 backfilled + bar 0 (revised) + forming bar 1
+    assert candles[-2].close == 102.0
+    assert candles[-1].close == 103.0
+    assert price == 103.5
+    assert any("btcusdt@kline_1m" in p for p in server.paths + [str(m) for m in server.control_messages])
+
+
+def test_stream_reconnects_and_backfills():
+    connector, server, rest, _, _ = asyncio.run(_replay(drop_after_replay=True))
+    assert server.connections >= 2
+    assert connector.backfills >= 2
+    assert len(rest.calls) >= 3
+
+
+async def _late_subscription():
+    # Kline frames arrive only after the client had time to subscribe
+    frames = [trade_frame(103.5), kline_frame(0, 101.0, False), kline_frame(0, 102.0, True), kline_frame(1, 103.0, False)]
+    server = BinanceReplayServer(frames, frame_delay=0.05, handshake_delay=0.2)
+    url = await server.start()
+    rest = FakeRest(delay=0.05)
+    connector = BinanceStreamConnector(rest=rest, ws_url=url, reconnect_min=0.05, reconnect_max=0.1)
+    try:
+        # Like the scheduler's gather: the price read opens the connection and
+        # the kline stream is requested while the handshake is still running.
+        await asyncio.gather(connector.get_latest_price("BTC/USDT"), connector.get_candle_series("BTC/USDT", "1m", 100))
+        await _wait_for(lambda: connector.messages >= len(frames) and "btcusdt@kline_1m" in connector.stats()["subscribed"])
+        stats = connector.stats()
+        rest_calls = len(rest.calls)
+        candles = await connector.get_candle_series("BTC/USDT", "1m", 100)
+        return server, stats, candles, rest_calls, len(rest.calls)
+    finally:
+        await connector.close()
+        await server.stop()
+
+
+def test_stream_subscribes_streams_added_during_handshake():
+    server, stats, candles, rest_calls_before, rest_calls_after = asyncio.run(_late_subscription())
+    assert server.connections == 1
+    assert "btcusdt@kline_1m" not in server.paths[0]
+    assert any(m.get("method") == "SUBSCRIBE" and "btcusdt@kline_1m" in m.get("params", []) for m in server.control_messages)
+    assert "btcusdt@kline_1m" in stats["subscribed"]
+    # Served from the streamed window, not REST
+    assert rest_calls_after == rest_calls_before
+    assert float(candles.close[-1]) == 103.0
+
+
+if __name__ == "__main__":
+    test_stream_replay_updates_window()
+    test_stream_reconnects_and_backfills()
+    test_stream_subscribes_streams_added_during_handshake()
+    print("ok")
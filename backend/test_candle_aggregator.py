@@ -0,0 +1,68 @@
+from datetime import timezone
+import numpy as np
+import pandas as pd
+import pytz
+from app.schemas.candle_series import CandleSeries
+from app.services.candle_aggregator import TF_SECONDS, CandleAggregator, IncrementalCandleAggregator
+
+IST = pytz.timezone("Asia/Kolkata")
+# Monday 2024-01-01 09:15 IST
+SESSION_OPEN_MS = 1_704_080_700_000
+
+
+def pandas_reference(series: CandleSeries, target_tf: str):
+    """The pandas resample aggregation CandleAggregator replaced, over the same bars."""
+    df = pd.DataFrame([c.model_dump() for c in series.to_candles()])
+    df["timestamp"] = pd.to_datetime(df["timestamp"])
+    df.set_index("timestamp", inplace=True)
+    rule = {"m": "min", "h": "h", "d": "D"}
+    resample_rule = target_tf[:-1] + rule[target_tf[-1]]
+    agg = {"open": "first", "high": "max", "low": "min", "close": "last", "volume": "sum"}
+    resampled = df.resample(resample_rule).agg(agg).dropna()
+    return [
+        {"time": int(time.timestamp()), "open": row["open"], "high": row["high"], "low": row["low"],
+         "close": row["close"], "volume": row["volume"]}
+        for time, row in resampled.iterrows()
+    ]
+
+
+def nse_minutes(days: int = 3, tz=IST, seed: int = 0) -> CandleSeries:
+    """1m NSE session bars (09:15-15:29 IST) over several days, with the overnight gaps."""
+    rng = np.random.default_rng(seed)
+    ts = np.concatenate([SESSION_OPEN_MS + day * 86_400_000 + 60_000 * np.arange(375) for day in range(days)])
+    close = 22000 + np.cumsum(rng.normal(0, 5, len(ts)))
+    open_ = close + rng.normal(0, 2, len(ts))
+    high = np.maximum(open_, close) + rng.uniform(0, 3, len(ts))
+    low = np.minimum(open_, close) - rng.uniform(0, 3, len(ts))
+    volume = rng.integers(0, 1000, len(ts)).astype(float)
+    return CandleSeries.from_arrays(ts, open_, high, low, close, volume, tz=tz, source="test")
+
+
+def assert_bars_equal(actual, expected):
+    assert len(actual) == len(expected)
+    for a, e in zip(actual, expected):
+        assert a["time"] == e["time"]
+        for key in ("open", "high", "low", "close", "volume"):
+            assert np.isclose(a[key], e[key]), (a, e)
+
+
+def test_aggregate_candles_matches_pandas_resample():
+    for tz in (None, IST, timezone.utc):
+        series = nse_minutes(tz=tz)
+        for target_tf in TF_SECONDS:
+            assert_bars_equal(CandleAggregator.aggregate_candles(series, target_tf), pandas_reference(series, target_tf))
+
+
+def test_incremental_aggregator_matches_pandas_resample():
+    for tz in (None, IST, timezone.utc):
+        series = nse_minutes(tz=tz, seed=1)
+        for target_tf in TF_SECONDS:
+            aggregator = IncrementalCandleAggregator.for_series(series, target_tf, max_bars=10_000)
+            # Polled in uneven chunks, with the forming bar first seen part-way through
+            for end in (1, 7, 100, 374, 376, 800, len(series)):
+                partial = series[:end].copy()
+                partial.update_last(float(partial.open[-1]), float(partial.open[-1]), float(partial.open[-1]),
+                                    float(partial.open[-1]), 0.0)
+                aggregator.update_from_series(partial)
+                aggregator.update_from_series(series[:end])
+            assert_bars_equal(aggregator.bars, pandas_reference(series, target_tf))
@@ -0,0 +1,95 @@
+import asyncio
+from types import SimpleNamespace
+import numpy as np
+from sqlalchemy import func, select
+from app.db.candle_repository import CandleRepository
+from app.db.models import MarketCandleModel
+from app.schemas.candle_series import CandleSeries
+from app.services.connector_interface import MarketDataConnector
+from app.services.connectors import persistent_connector
+from app.services.connectors.persistent_connector import PersistentCandleConnector
+
+STEP_MS = 60_000
+END_MS = 1_700_000_000_000 // STEP_MS * STEP_MS  # the forming 1m bar
+
+
+def upstream_bars(n: int = 300) -> CandleSeries:
+    """n 1m bars ending with the one forming at END_MS."""
+    close = 100.0 + np.cumsum(np.random.default_rng(0).normal(0, 0.5, n))
+    return CandleSeries.from_arrays(
+        END_MS - STEP_MS * np.arange(n - 1, -1, -1), close, close + 1, close - 1, close, np.ones(n), source="test",
+    )
+
+
+def pick(series: CandleSeries, index) -> CandleSeries:
+    index = np.asarray(index)
+    return CandleSeries.from_arrays(
+        series.timestamp[index], series.open[index], series.high[index], series.low[index],
+        series.close[index], series.volume[index], source=series.source,
+    )
+
+
+class Upstream(MarketDataConnector):
+    def __init__(self, bars: CandleSeries):
+        self.bars = bars
+        self.requests = []
+
+    async def get_historical_candles(self, symbol, interval, limit):
+        return (await self.get_candle_series(symbol, interval, limit)).to_candles()
+
+    async def get_candle_series(self, symbol, interval, limit):
+        self.requests.append(limit)
+        return self.bars.tail(limit)
+
+    async def get_latest_price(self, symbol):
+        return float(self.bars.close[-1])
+
+
+def stored_rows(repository: CandleRepository) -> int:
+    with repository.engine.connect() as conn:
+        return conn.execute(select(func.count()).select_from(MarketCandleModel)).scalar()
+
+
+def test_upsert_is_idempotent_on_the_unique_key(tmp_path):
+    repository = CandleRepository(f"sqlite:///{tmp_path / 'candles.db'}")
+    bars = upstream_bars(50)
+    assert repository.upsert("BTCUSDT", "1m", bars) == 50
+    revised = bars.copy()
+    revised.update_last(1.0, 2.0, 0.5, 1.5, 7.0)
+    repository.upsert("BTCUSDT", "1m", revised.tail(10))
+
+    assert stored_rows(repository) == 50
+    read = repository.read("BTCUSDT", "1m", 100)
+    np.testing.assert_array_equal(read.timestamp, bars.timestamp)
+    assert float(read.close[-1]) == 1.5 and float(read.volume[-1]) == 7.0
+    assert float(read.close[-2]) == float(bars.close[-2])
+
+
+def test_only_missing_bars_are_fetched(tmp_path, monkeypatch):
+    monkeypatch.setattr(persistent_connector, "time", SimpleNamespace(time=lambda: (END_MS + 30_000) / 1000))
+    repository = CandleRepository(f"sqlite:///{tmp_path / 'candles.db'}")
+    bars = upstream_bars(300)
+    # Stored: an internal gap (bars 280-284) and a tail gap (295-299)
+    repository.upsert("BTCUSDT", "1m", pick(bars, np.r_[0:280, 285:295]))
+    # Stored: a tail gap only
+    repository.upsert("ETHUSDT", "1m", pick(bars, np.r_[0:295]))
+    upstream = Upstream(bars)
+    connector = PersistentCandleConnector(upstream, repository, continuous=True)
+
+    async def run():
+        try:
+            first = await connector.get_candle_series("BTCUSDT", "1m", 100)
+            second = await connector.get_candle_series("BTCUSDT", "1m", 100)
+            tail = await connector.get_candle_series("ETHUSDT", "1m", 100)
+            return first, second, tail
+        finally:
+            await connector.close()
+
+    first, second, tail = asyncio.run(run())
+    # From the last bar before the hole through the forming one; then just the
+    # forming bar; then from the last stored bar on
+    assert upstream.requests == [21, 1, 6]
+    assert stored_rows(repository) == 600
+    for served in (first, second, tail):
+        np.testing.assert_array_equal(served.timestamp, bars.timestamp[-100:])
+        np.testing.assert_array_equal(served.close, bars.close[-100:])
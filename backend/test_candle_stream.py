@@ -0,0 +1,91 @@
+import asyncio
+import json
+import numpy as np
+from app.schemas.candle_series import CandleSeries
+from app.services.asset_context import AssetContext
+from app.services.candle_stream import CandleStreamHub
+from app.services.connector_interface import MarketDataConnector
+from app.services.symbol_registry import SymbolRegistry
+from app.services.websocket_manager import ConnectionManager
+
+MINUTE_MS = 60_000
+BASE_MS = 1_700_000_000_000 // 300_000 * 300_000  # on a 5m boundary
+
+
+class LiveBars(MarketDataConnector):
+    """1m bars the test appends to and revises, like the stream connector's window."""
+
+    def __init__(self, n: int):
+        close = 100.0 + np.arange(n, dtype=float)
+        self.series = CandleSeries.from_arrays(
+            BASE_MS + MINUTE_MS * np.arange(n), close, close + 1, close - 1, close, np.ones(n), capacity=100,
+        )
+
+    async def get_historical_candles(self, symbol, interval, limit):
+        return (await self.get_candle_series(symbol, interval, limit)).to_candles()
+
+    async def get_candle_series(self, symbol, interval, limit):
+        return self.series.tail(limit)
+
+    async def get_latest_price(self, symbol):
+        return float(self.series.close[-1])
+
+
+class RecordingSocket:
+    def __init__(self):
+        self.messages = []
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, message: str):
+        self.messages.append(json.loads(message))
+
+    async def close(self, code: int = 1000, reason: str = ""):
+        pass
+
+
+def test_snapshot_then_numbered_deltas_then_resync():
+    async def run():
+        bars = LiveBars(12)  # 5m buckets: 0-4, 5-9 and the forming 10-11
+        context = AssetContext(registry=SymbolRegistry())
+        context.use_connector("binance", bars)
+        manager = ConnectionManager()
+        hub = CandleStreamHub(context, manager)
+        socket = RecordingSocket()
+        await manager.connect(socket)
+        try:
+            stream = await hub.subscribe(socket, "BITCOIN", "5m")
+            results = []
+            bars.series.update_last(111.0, 130.0, 90.0, 125.0, 3.0)  # the forming 1m bar moves
+            results.append(await stream.poll())
+            results.append(await stream.poll())  # nothing new
+            bars.series.append(BASE_MS + 12 * MINUTE_MS, 125.0, 126.0, 124.0, 126.0, 1.0)
+            results.append(await stream.poll())
+            bars.series.append(BASE_MS + 15 * MINUTE_MS, 126.0, 127.0, 125.0, 127.0, 1.0)  # opens a bucket
+            results.append(await stream.poll())
+            await hub.resync(socket, "BITCOIN", "5m")
+            await asyncio.sleep(0.01)
+            return socket.messages, results
+        finally:
+            await hub.close()
+            await manager.close()
+
+    messages, results = asyncio.run(run())
+    snapshot, deltas, resync = messages[0], messages[1:-1], messages[-1]
+    bucket = lambda minute: (BASE_MS + minute * MINUTE_MS) // 1000
+
+    assert snapshot["type"] == "snapshot" and snapshot["seq"] == 0
+    assert [bar["time"] for bar in snapshot["bars"]] == [bucket(0), bucket(5), bucket(10)]
+    assert results[1] is None
+    # One delta per change, seq up by one each time
+    assert [d["type"] for d in deltas] == ["delta"] * 3 and [d["seq"] for d in deltas] == [1, 2, 3]
+    # Updates to the forming bar reuse its time
+    assert [bar["time"] for bar in deltas[0]["bars"]] == [bucket(10)]
+    assert deltas[0]["bars"][0]["high"] == 130.0 and deltas[0]["bars"][0]["close"] == 125.0
+    assert [bar["time"] for bar in deltas[1]["bars"]] == [bucket(10)]
+    assert deltas[1]["bars"][0]["close"] == 126.0 and deltas[1]["bars"][0]["volume"] == 5.0
+    assert [bar["time"] for bar in deltas[2]["bars"]] == [bucket(10), bucket(15)]
+    # Resync: a fresh snapshot at the current seq, with every change folded in
+    assert resync["type"] == "snapshot" and resync["seq"] == 3
+    assert resync["bars"][-2:] == [deltas[2]["bars"][0], deltas[2]["bars"][1]]
@@ -0,0 +1,84 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+import numpy as np
+from app.api import conditional
+from app.api.conditional import conditional_response, etag_matches, make_etag
+from app.api.endpoints import signals
+from app.schemas.candle_series import CandleSeries
+from app.services.asset_context import asset_context
+from app.services.connector_interface import MarketDataConnector
+from app.services.levels_service import LevelsService
+
+
+class DailyHistory(MarketDataConnector):
+    def __init__(self):
+        self.requests = 0
+
+    async def get_historical_candles(self, symbol, interval, limit):
+        return (await self.get_candle_series(symbol, interval, limit)).to_candles()
+
+    async def get_candle_series(self, symbol, interval, limit):
+        self.requests += 1
+        today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+        days = np.array([int((today - timedelta(days=d)).timestamp() * 1000) for d in range(60, -1, -1)])
+        close = 60000 + np.arange(len(days)) * 10.0
+        return CandleSeries.from_arrays(days, close, close + 500, close - 500, close, np.ones(len(days)))
+
+    async def get_latest_price(self, symbol):
+        return 0.0
+
+
+def test_etag_is_weak_and_matches_either_form():
+    etag = make_etag("latest", 1, 2.5)
+    assert etag.startswith('W/"') and etag.endswith('"')
+    assert etag_matches(etag, etag)
+    assert etag_matches(etag.removeprefix("W/"), etag)
+    assert etag_matches(f'"other", {etag}', etag)
+    assert not etag_matches(make_etag("latest", 1, 2.6), etag)
+
+
+def test_not_modified_skips_build(monkeypatch):
+    monkeypatch.setattr(conditional, "body_cache", conditional.BodyCache(8))
+    builds = []
+
+    def build():
+        builds.append(1)
+        return {"price": 1.0}
+
+    etag = make_etag("test", 1)
+    assert conditional_response("test", etag, 5, None, build).status_code == 200
+    response = conditional_response("test", etag, 5, etag, build)
+    assert response.status_code == 304 and response.headers["ETag"] == etag
+    assert len(builds) == 1
+
+
+def test_levels_revalidation_does_not_touch_the_levels(monkeypatch):
+    history = DailyHistory()
+    service = LevelsService(history_days=60)
+    monkeypatch.setattr(signals, "levels_service", service)
+    monkeypatch.setattr(asset_context, "get_connector_for", lambda asset: history)
+    monkeypatch.setattr(conditional, "body_cache", conditional.BodyCache(8))
+    lookups = []
+    get_levels = service.get_levels
+
+    async def counting_get_levels(*args, **kwargs):
+        lookups.append(args)
+        return await get_levels(*args, **kwargs)
+
+    monkeypatch.setattr(service, "get_levels", counting_get_levels)
+
+    async def run():
+        first = await signals.get_market_levels(asset="BITCOIN", method="classic", period="daily", if_none_match=None)
+        again = await signals.get_market_levels(
+            asset="BITCOIN", method="classic", period="daily", if_none_match=first.headers["ETag"],
+        )
+        weekly = await signals.get_market_levels(
+            asset="BITCOIN", method="classic", period="weekly", if_none_match=first.headers["ETag"],
+        )
+        return first, again, weekly
+
+    first, again, weekly = asyncio.run(run())
+    assert first.status_code == 200 and b'"levels"' in first.body
+    assert again.status_code == 304
+    assert weekly.status_code == 200 and b'"weekly"' in weekly.body
+    assert len(lookups) == 1 and history.requests == 1
@@ -0,0 +1,62 @@
+import math
+import numpy as np
+from app.schemas.candle_series import CandleSeries
+from app.services.feature_engine import FeatureEngine
+from app.services.indicator_engine import IndicatorEngine
+
+BASE_MS = 1_700_000_000_000 // 60_000 * 60_000
+
+
+def make_bars(n: int, seed: int = 0, volume: bool = True) -> CandleSeries:
+    rng = np.random.default_rng(seed)
+    close = 100.0 * np.exp(np.cumsum(rng.normal(0, 0.002, n)))
+    open_ = np.concatenate(([close[0]], close[:-1]))
+    high = np.maximum(open_, close) * (1 + rng.uniform(0, 0.001, n))
+    low = np.minimum(open_, close) * (1 - rng.uniform(0, 0.001, n))
+    vol = rng.lognormal(3, 1, n) if volume else np.zeros(n)
+    return CandleSeries.from_arrays(BASE_MS + 60_000 * np.arange(n), open_, high, low, close, vol)
+
+
+def assert_same(incremental, batch):
+    assert incremental.keys() == batch.keys()
+    for key, expected in batch.items():
+        actual = incremental[key]
+        if math.isnan(expected):
+            assert math.isnan(actual), key
+        else:
+            assert math.isclose(actual, expected, rel_tol=1e-9, abs_tol=1e-9), (key, actual, expected)
+
+
+def _slide(bars: CandleSeries, window: int, revise: bool = True):
+    engine = IndicatorEngine()
+    for end in range(window, len(bars) + 1):
+        current = bars[end - window:end].copy()
+        if revise:
+            # The forming bar is polled part-way through first
+            partial = current.copy()
+            partial.update_last(float(partial.open[-1]), float(partial.open[-1]), float(partial.open[-1]),
+                                float(partial.open[-1]), 0.0)
+            engine.update("SYM", "1m", partial)
+        assert_same(engine.update("SYM", "1m", current), FeatureEngine.calculate_technical_indicators(current))
+
+
+def test_sliding_window_matches_batch():
+    # 300 bars past the 100-bar window: VWAP and the EMAs must follow the window, not the whole stream
+    _slide(make_bars(400), 100)
+
+
+def test_sliding_window_without_volume():
+    _slide(make_bars(250, seed=1, volume=False), 100, revise=False)
+
+
+def test_short_window_matches_batch():
+    _slide(make_bars(60, seed=2), 10)
+
+
+def test_revised_history_reseeds():
+    bars = make_bars(150, seed=3)
+    engine = IndicatorEngine()
+    engine.update("SYM", "1m", bars[0:100].copy())
+    revised = bars[1:101].copy()
+    revised.close[0] += 5.0  # a bar the state already slid over changed upstream
+    assert_same(engine.update("SYM", "1m", revised), FeatureEngine.calculate_technical_indicators(revised))
@@ -0,0 +1,69 @@
+import asyncio
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from app.services.connectors.yfinance_connector import YFinanceConnector
+from app.services.levels_service import LevelsService
+from app.services.market_hours import IST
+
+NOW = datetime(2024, 10, 15, 10, 0, tzinfo=IST)
+# Calendar days each yfinance period reaches back
+PERIOD_SPAN = {"1d": 1, "5d": 7, "1mo": 30, "3mo": 91, "6mo": 182, "1y": 365, "2y": 730, "5y": 1826}
+
+
+def yahoo_daily(period: str) -> pd.DataFrame:
+    """^NSEI-like daily bars (stamped 00:00 IST) for the weekdays in `period` up to NOW, as Ticker.history returns them."""
+    days = pd.bdate_range(end=NOW.date(), periods=PERIOD_SPAN[period] * 5 // 7 or 1, tz=IST)
+    rng = np.random.default_rng(0)
+    close = 24000 + np.cumsum(rng.normal(0, 100, len(days)))
+    return pd.DataFrame({
+        "Open": close + rng.normal(0, 20, len(days)),
+        "High": close + rng.uniform(50, 150, len(days)),
+        "Low": close - rng.uniform(50, 150, len(days)),
+        "Close": close,
+        "Volume": rng.integers(1e5, 1e6, len(days)).astype(float),
+    }, index=days)
+
+
+def test_monthly_and_weekly_levels_come_from_the_previous_period(monkeypatch):
+    periods = []
+
+    def download(symbols, period, interval):
+        periods.append((period, interval))
+        return {symbol: yahoo_daily(period) for symbol in symbols}
+
+    monkeypatch.setattr(YFinanceConnector, "_download", staticmethod(download))
+
+    async def run():
+        connector = YFinanceConnector(batch_window=0)
+        service = LevelsService(history_days=400)
+        try:
+            return [
+                await service.get_levels(connector, "^NSEI", "NSE", period=period, now=NOW)
+                for period in ("monthly", "weekly")
+            ]
+        finally:
+            await connector.close()
+
+    monthly, weekly = asyncio.run(run())
+    assert periods == [("2y", "1d")]
+
+    bars = yahoo_daily("2y")
+    september = bars[(bars.index >= "2024-09-01") & (bars.index < "2024-10-01")]
+    high, low, close = september["High"].max(), september["Low"].min(), september["Close"].iloc[-1]
+    assert monthly["date"] == "2024-09-02"  # first trading day of September
+    assert monthly["levels"]["p"] == round((high + low + close) / 3, 2)
+    assert monthly["levels"]["r1"] == round(2 * (high + low + close) / 3 - low, 2)
+
+    week = bars[(bars.index >= "2024-10-07") & (bars.index < "2024-10-14")]
+    assert weekly["date"] == "2024-10-07"
+    assert weekly["levels"]["p"] == round((week["High"].max() + week["Low"].min() + week["Close"].iloc[-1]) / 3, 2)
+
+
+def test_period_covers_the_requested_bars():
+    assert YFinanceConnector.period_for("1m", 100) == "1d"
+    assert YFinanceConnector.period_for("5m", 100) == "5d"
+    assert YFinanceConnector.period_for("1d", 400) == "2y"
+    assert YFinanceConnector.period_for("1d", 5) == "5d"
+    # Yahoo only serves 7 days of 1m bars
+    assert YFinanceConnector.period_for("1m", 5000) == "5d"
@@ -0,0 +1,41 @@
+import asyncio
+from app.services.connector_interface import MarketDataConnector
+from app.services.market_data_cache import CachedMarketDataConnector
+
+
+class SlowPrice(MarketDataConnector):
+    def __init__(self):
+        self.calls = 0
+        self.release = asyncio.Event()
+
+    async def get_historical_candles(self, symbol, interval, limit):
+        return []
+
+    async def get_latest_price(self, symbol):
+        self.calls += 1
+        await self.release.wait()
+        return 101.5
+
+
+async def _leader_cancelled():
+    inner = SlowPrice()
+    cache = CachedMarketDataConnector(inner)
+    leader = asyncio.create_task(cache.get_latest_price("BTCUSDT"))
+    await asyncio.sleep(0)
+    waiter = asyncio.create_task(cache.get_latest_price("BTCUSDT"))
+    await asyncio.sleep(0)
+    leader.cancel()  # the first client disconnects mid-fetch
+    await asyncio.sleep(0)
+    inner.release.set()
+    price = await waiter
+    return leader, price, inner, cache
+
+
+def test_leader_cancel_does_not_cancel_waiters():
+    leader, price, inner, cache = asyncio.run(_leader_cancelled())
+    assert leader.cancelled()
+    assert price == 101.5
+    assert inner.calls == 1
+    assert cache.stats()["coalesced"] == 1
+    assert cache.stats()["inflight"] == 0
+    assert cache.stats()["entries"] == 1
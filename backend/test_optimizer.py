@@ -0,0 +1,64 @@
+import json
+import numpy as np
+from app.schemas.candle_series import CandleSeries
+from app.services import optimizer
+from app.services.asset_context import asset_context
+from app.services.connector_interface import MarketDataConnector
+
+BASE_MS = 1_700_000_000_000 // 900_000 * 900_000
+
+
+class FakeHistory(MarketDataConnector):
+    def __init__(self):
+        self.requests = []
+
+    async def get_historical_candles(self, symbol, interval, limit):
+        return (await self.get_candle_series(symbol, interval, limit)).to_candles()
+
+    async def get_candle_series(self, symbol, interval, limit):
+        self.requests.append((symbol, interval, limit))
+        rng = np.random.default_rng(0)
+        close = 60000 * np.exp(np.cumsum(rng.normal(0, 0.003, limit)))
+        open_ = np.concatenate(([close[0]], close[:-1]))
+        return CandleSeries.from_arrays(
+            BASE_MS + 900_000 * np.arange(limit), open_, np.maximum(open_, close) * 1.001,
+            np.minimum(open_, close) * 0.999, close, rng.lognormal(3, 1, limit),
+        )
+
+    async def get_latest_price(self, symbol):
+        return 0.0
+
+
+def test_optimizer_cli_sweeps_and_reuses_its_cache(monkeypatch, tmp_path, capsys):
+    history = FakeHistory()
+    monkeypatch.setattr(asset_context, "get_connector_for", lambda asset: history)
+    argv = [
+        "--asset", "BITCOIN", "--bars", "600", "--folds", "2", "--workers", "1",
+        "--grid", "confidence_threshold=50,70", "--grid", "crypto_rsi_high=55,60",
+        "--cache-dir", str(tmp_path / "cache"), "--json", str(tmp_path / "report.json"),
+    ]
+
+    assert optimizer.main(argv) == 0
+    report = json.loads((tmp_path / "report.json").read_text())
+    assert history.requests == [("BTC/USDT", "15m", 600)]
+    assert report["candidates"] == 4 and report["computed"] == 4
+    assert len(report["walk_forward"]) == 2
+    assert "fold 1:" in capsys.readouterr().out
+
+    assert optimizer.main(argv) == 0
+    report = json.loads((tmp_path / "report.json").read_text())
+    assert report["computed"] == 0 and report["cached"] == 4
+
+
+def test_wrapped_series_shares_the_block():
+    bars = 50
+    block = np.zeros((6, bars))
+    block[0] = (BASE_MS + 900_000 * np.arange(bars)).view(np.float64)
+    block[4] = np.arange(bars, dtype=np.float64)
+    series = CandleSeries.wrap(block[0].view(np.int64), *block[1:])
+
+    assert np.shares_memory(series.close, block) and np.shares_memory(series.timestamp, block)
+    assert int(series.timestamp[0]) == BASE_MS and float(series.tail(1).close[0]) == bars - 1
+    block[4, -1] = 7.0  # a view, not a copy
+    assert float(series.close[-1]) == 7.0
+    assert not series.close.flags.writeable and block.flags.writeable
@@ -0,0 +1,131 @@
+from datetime import datetime, timedelta
+import numpy as np
+from sqlalchemy import select
+from app.db import option_chain_codec as codec
+from app.db.models import OptionChainSnapshot
+from app.db.option_chain_repository import OptionChainRepository
+
+START = datetime(2024, 10, 15, 9, 15)
+EXPIRY = datetime(2024, 10, 31)
+
+
+def at(i: int) -> datetime:
+    return START + timedelta(minutes=i)
+
+
+def chain_columns(i: int, strikes=(23800.0, 23900.0, 24000.0, 24100.0, 24200.0)) -> dict:
+    """Snapshot i of a small chain: quotes drift every step, and bid/ask drop in and out as NaN."""
+    strike = np.repeat(np.asarray(strikes), 2)
+    n = len(strike)
+    rng = np.random.default_rng(i)
+    ltp = np.round(100.0 + np.abs(24000.0 - strike) / 10 + rng.normal(0, 2, n), 2)
+    unquoted = (np.arange(n) + i) % 3 == 0
+    return {
+        "strike": strike,
+        "is_call": np.tile([True, False], n // 2),
+        "ltp": ltp,
+        "iv": rng.uniform(0.1, 0.2, n),
+        "bid": np.where(unquoted, np.nan, ltp - 0.5),
+        "ask": np.where(unquoted, np.nan, ltp + 0.5),
+        "oi": (1000 + 10 * i + np.arange(n)).astype(float),
+        "oi_change": np.full(n, 10.0 * i),
+        "volume": np.full(n, 5.0 + i),
+    }
+
+
+def assert_same_chain(stored: dict, expected: dict):
+    for name, values in expected.items():
+        np.testing.assert_array_equal(stored[name], values, err_msg=name)  # NaN == NaN here
+
+
+def keyframes(repository: OptionChainRepository) -> list:
+    m = OptionChainSnapshot
+    with repository.engine.connect() as conn:
+        return list(conn.execute(select(m.keyframe).order_by(m.timestamp)).scalars())
+
+
+def test_codec_round_trips_deltas_bit_for_bit():
+    previous, state = codec.chain_state(chain_columns(0)), codec.chain_state(chain_columns(1))
+    keyframe = codec.decode(codec.encode_keyframe(previous))
+    delta = codec.decode(codec.encode_delta(state, previous), ("bid", "oi"))
+
+    assert set(delta) == {"bid", "oi"}
+    restored = codec.apply_delta(keyframe, delta)
+    np.testing.assert_array_equal(restored["bid"], state["bid"])  # uint64 bits, NaN payloads included
+    np.testing.assert_array_equal(restored["oi"], state["oi"])
+    # An unchanged quote is an all-zero delta
+    unchanged = codec.decode(codec.encode_delta(state, state))
+    assert not any(values.any() for values in unchanged.values())
+
+
+def test_snapshot_at_inside_a_delta_run(tmp_path):
+    repository = OptionChainRepository(f"sqlite:///{tmp_path / 'chains.db'}", keyframe_interval=4)
+    for i in range(10):
+        assert repository.append("NIFTY", at(i), EXPIRY, 24000.0 + i, chain_columns(i), source="test")
+
+    assert keyframes(repository) == [True, False, False, False] * 2 + [True, False]
+    snapshot = repository.snapshot_at("NIFTY", at(6) + timedelta(seconds=30))
+    assert snapshot["timestamp"] == at(6) and snapshot["spot_price"] == 24006.0 and snapshot["expiry"] == EXPIRY
+    assert_same_chain(snapshot["columns"], chain_columns(6))
+    assert_same_chain(repository.snapshot_at("NIFTY")["columns"], chain_columns(9))
+    assert repository.snapshot_at("NIFTY", at(-1)) is None
+
+
+def test_nan_bid_ask_survive_the_deltas(tmp_path):
+    repository = OptionChainRepository(f"sqlite:///{tmp_path / 'chains.db'}", keyframe_interval=10)
+    for i in range(4):
+        repository.append("NIFTY", at(i), EXPIRY, 24000.0, chain_columns(i))
+
+    for i in range(4):
+        columns = repository.snapshot_at("NIFTY", at(i))["columns"]
+        expected = chain_columns(i)
+        # A contract goes quoted -> unquoted -> quoted across these deltas
+        np.testing.assert_array_equal(np.isnan(columns["bid"]), np.isnan(expected["bid"]))
+        assert_same_chain(columns, expected)
+    chain = repository.chain_at("NIFTY", at(3))
+    unquoted = np.isnan(chain_columns(3)["bid"])
+    assert [c.bid is None for c in chain.contracts] == unquoted.tolist()
+    assert [c.ask is None for c in chain.contracts] == unquoted.tolist()
+
+
+def test_contract_history_across_keyframes_and_a_strike_change(tmp_path):
+    repository = OptionChainRepository(f"sqlite:///{tmp_path / 'chains.db'}", keyframe_interval=3)
+    wider = (23700.0, 23800.0, 23900.0, 24000.0, 24100.0, 24200.0)
+    snapshots = [chain_columns(i) if i < 5 else chain_columns(i, strikes=wider) for i in range(8)]
+    for i, columns in enumerate(snapshots):
+        repository.append("NIFTY", at(i), EXPIRY, 24000.0, columns)
+
+    # Keyframes every 3 rows, plus one where the listed strikes change (row 5)
+    assert keyframes(repository) == [True, False, False, True, False, True, False, False]
+
+    def expected(field, i):
+        columns = snapshots[i]
+        index = np.flatnonzero((columns["strike"] == 24000.0) & ~columns["is_call"])[0]
+        return columns[field][index]
+
+    history = repository.contract_history("NIFTY", 24000.0, "PE", "ltp", start=at(1), end=at(7))
+    assert [point["timestamp"] for point in history] == [at(i) for i in range(1, 8)]
+    assert [point["value"] for point in history] == [expected("ltp", i) for i in range(1, 8)]
+
+    oi = repository.contract_history("NIFTY", 24000.0, "pe", "oi")
+    assert [point["value"] for point in oi] == [int(expected("oi", i)) for i in range(8)]
+    # A strike that only the wider layout lists starts with it
+    added = repository.contract_history("NIFTY", 23700.0, "CE", "ltp")
+    assert [point["timestamp"] for point in added] == [at(i) for i in range(5, 8)]
+
+
+def test_a_new_repository_continues_the_delta_run(tmp_path):
+    url = f"sqlite:///{tmp_path / 'chains.db'}"
+    first = OptionChainRepository(url, keyframe_interval=4)
+    for i in range(6):
+        first.append("NIFTY", at(i), EXPIRY, 24000.0, chain_columns(i))
+
+    # After a restart: _load_last rebuilds the last state, so rows 6 and 7 stay deltas
+    second = OptionChainRepository(url, keyframe_interval=4)
+    assert not second.append("NIFTY", at(5), EXPIRY, 24000.0, chain_columns(5))
+    for i in range(6, 9):
+        assert second.append("NIFTY", at(i), EXPIRY, 24000.0, chain_columns(i))
+
+    assert keyframes(second) == [True, False, False, False, True, False, False, False, True]
+    for i in (6, 7, 8):
+        assert_same_chain(first.snapshot_at("NIFTY", at(i))["columns"], chain_columns(i))
@@ -0,0 +1,139 @@
+import asyncio
+import time
+from datetime import datetime, timedelta
+import numpy as np
+import pytz
+from app.schemas.market_data import OptionChain, OptionContract
+from app.services.connectors.file_option_chain_connector import FileOptionChainConnector
+from app.services.option_pricing import bs_greeks, bs_price, implied_volatility
+from app.services.options_analytics import OptionChainAnalyzer, chain_columns, max_pain, years_to_expiry
+
+IST = pytz.timezone("Asia/Kolkata")
+NOW = IST.localize(datetime(2024, 10, 15, 10, 0))
+EXPIRY = IST.localize(datetime(2024, 10, 31))
+SPOT = 24000.0
+RATE = 0.065
+
+
+def make_chain(strikes=100, now=NOW, expiry=EXPIRY, sigma=0.15) -> OptionChain:
+    """CE/PE pairs every 50 points around SPOT, priced by Black-Scholes; PEs listed first to exercise the sort."""
+    t = years_to_expiry(OptionChain(timestamp=now, expiry=expiry, spot_price=SPOT, contracts=[], source="test"))
+    contracts = []
+    for i, strike in enumerate(SPOT - 50 * (strikes // 2) + 50 * np.arange(strikes)):
+        for option_type in ("PE", "CE"):
+            price = float(bs_price(SPOT, strike, t, RATE, sigma, option_type == "CE"))
+            quoted = price > 1.0
+            contracts.append(OptionContract(
+                strike=float(strike), option_type=option_type, ltp=round(price, 2), iv=0.0,
+                oi=1000 + 10 * i, oi_change=i, volume=5,
+                bid=price - 0.05 if quoted else None, ask=price + 0.05 if quoted else None,
+                timestamp=now, source="test",
+            ))
+    return OptionChain(timestamp=now, expiry=expiry, spot_price=SPOT, contracts=contracts, source="test")
+
+
+def test_implied_volatility_round_trips_prices():
+    strike = np.array([21000.0, 23000.0, 24000.0, 25000.0, 27000.0] * 2)
+    is_call = np.repeat([True, False], 5)
+    sigma = np.array([0.35, 0.2, 0.15, 0.18, 0.3] * 2)
+    t = 30 / 365
+    price = bs_price(SPOT, strike, t, RATE, sigma, is_call)
+
+    iv = implied_volatility(price, SPOT, strike, t, RATE, is_call)
+    np.testing.assert_allclose(iv, sigma, rtol=1e-5)
+    np.testing.assert_allclose(bs_price(SPOT, strike, t, RATE, iv, is_call), price, atol=1e-6 * SPOT)
+
+
+def test_greeks_satisfy_put_call_parity():
+    strike, t, sigma = np.array([22000.0, 24000.0, 26000.0]), 45 / 365, 0.2
+    call, put = bs_greeks(SPOT, strike, t, RATE, sigma, True), bs_greeks(SPOT, strike, t, RATE, sigma, False)
+    # C - P = S - K e^{-rT}: the deltas differ by one, gamma and vega match, theta differs by the carry
+    np.testing.assert_allclose(call["delta"] - put["delta"], 1.0)
+    np.testing.assert_allclose(call["gamma"], put["gamma"])
+    np.testing.assert_allclose(call["vega"], put["vega"])
+    np.testing.assert_allclose(call["theta"] - put["theta"], -RATE * strike * np.exp(-RATE * t) / 365.0)
+    np.testing.assert_allclose(
+        bs_price(SPOT, strike, t, RATE, sigma, True) - bs_price(SPOT, strike, t, RATE, sigma, False),
+        SPOT - strike * np.exp(-RATE * t),
+    )
+
+
+def test_prices_outside_no_arbitrage_bounds_have_no_iv():
+    t = 30 / 365
+    strike = np.array([23000.0, 23000.0, 25000.0, 25000.0, 24000.0])
+    is_call = np.array([True, True, False, False, True])
+    intrinsic_call = SPOT - 23000.0 * np.exp(-RATE * t)
+    intrinsic_put = 25000.0 * np.exp(-RATE * t) - SPOT
+    price = np.array([intrinsic_call - 1.0, SPOT + 1.0, intrinsic_put - 1.0, 25000.0, np.nan])
+    assert np.isnan(implied_volatility(price, SPOT, strike, t, RATE, is_call)).all()
+
+
+def test_max_pain_of_a_small_chain():
+    strike = np.array([100.0, 100.0, 110.0, 110.0, 120.0, 120.0])
+    is_call = np.array([True, False, True, False, True, False])
+    oi = np.array([10.0, 50.0, 20.0, 20.0, 60.0, 10.0])
+    # Payout at 100: puts 20*10 + 10*20 = 400; at 110: calls 10*10 + puts 10*10 = 200;
+    # at 120: calls 10*20 + 20*10 = 400
+    assert max_pain(strike, is_call, oi) == 110.0
+    assert max_pain(np.array([]), np.array([], dtype=bool), np.array([])) is None
+
+
+def test_years_to_expiry():
+    def years(now, expiry):
+        return years_to_expiry(OptionChain(timestamp=now, expiry=expiry, spot_price=SPOT, contracts=[], source="test"))
+
+    year = 365.0 * 86400
+    # A date-only expiry settles at 15:30 IST
+    assert years(NOW, EXPIRY) == (16 * 86400 + 5.5 * 3600) / year
+    # A naive side is read as IST
+    assert years(NOW.replace(tzinfo=None), EXPIRY) == years(NOW, EXPIRY)
+    assert years(NOW, IST.localize(datetime(2024, 10, 15, 12, 0))) == 2 * 3600 / year
+    # Expired or expiring: floored at a minute
+    assert years(NOW, IST.localize(datetime(2024, 10, 15, 9, 0))) == 60.0 / year
+
+
+def test_analyzer_recovers_the_chain_volatility():
+    chain = make_chain(strikes=100)
+    result = OptionChainAnalyzer(rate=RATE).analyze(chain, "NIFTY")
+    columns, metrics = result["columns"], result["metrics"]
+
+    assert metrics["contracts"] == 200 and metrics["atm_strike"] == SPOT
+    assert abs(metrics["atm_iv"] - 0.15) < 1e-3
+    # Sorted by strike, CE before PE; unquoted (None) bid/ask are NaN
+    assert np.all(np.diff(columns["strike"]) >= 0) and columns["is_call"][0] and not columns["is_call"][1]
+    assert np.isnan(chain_columns(chain)["bid"]).any()
+
+
+def test_file_option_chain_connector_replays_snapshots(tmp_path):
+    connector = FileOptionChainConnector(str(tmp_path))
+    first, second = make_chain(strikes=4), make_chain(strikes=4, now=NOW + timedelta(minutes=1))
+    connector.dump("NIFTY", second)
+    connector.dump("NIFTY", first)  # file names sort by snapshot time, not write order
+    (tmp_path / "BANKNIFTY.json").write_text(first.model_dump_json())
+
+    async def run():
+        replayed = [await connector.get_option_chain("NIFTY") for _ in range(3)]
+        connector.rewind("NIFTY")
+        rewound = await connector.get_option_chain("NIFTY")
+        single = [await connector.get_option_chain("BANKNIFTY") for _ in range(2)]
+        other_expiry = await connector.get_option_chain("BANKNIFTY", EXPIRY + timedelta(days=7))
+        return replayed, rewound, single, other_expiry, await connector.get_option_chain("FINNIFTY")
+
+    replayed, rewound, single, other_expiry, missing = asyncio.run(run())
+    assert [chain.timestamp for chain in replayed] == [first.timestamp, second.timestamp, second.timestamp]
+    assert rewound.timestamp == first.timestamp
+    assert all(chain == first for chain in single)
+    assert other_expiry is None and missing is None
+
+
+def test_analyze_stays_fast_for_a_full_chain():
+    chain = make_chain(strikes=100)
+    analyzer = OptionChainAnalyzer(rate=RATE)
+    analyzer.analyze(chain, "NIFTY")
+    runs = []
+    for _ in range(50):
+        started = time.perf_counter()
+        analyzer.analyze(chain, "NIFTY")
+        runs.append(time.perf_counter() - started)
+    # Under a millisecond on a laptop; the loose bound only catches a return to per-contract work
+    assert np.median(runs) < 0.005
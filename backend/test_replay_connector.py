@@ -0,0 +1,120 @@
+import asyncio
+import time
+import numpy as np
+import pytest
+from app.schemas.candle_series import CandleSeries
+from app.services.connector_interface import MarketDataConnector
+from app.services.connectors.recording_connector import RecordingConnector, recording_path
+from app.services.connectors.replay_connector import ReplayConnector
+
+BASE_MS = 1_700_000_000_000 // 60_000 * 60_000
+
+
+class EvolvingFeed(MarketDataConnector):
+    """Every call sees a newer market: one more bar, a higher price. Unknown pairs fail."""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def get_historical_candles(self, symbol, interval, limit):
+        return (await self.get_candle_series(symbol, interval, limit)).to_candles()
+
+    async def get_candle_series(self, symbol, interval, limit):
+        if symbol != "BTC/USDT":
+            raise RuntimeError(f"unknown pair {symbol}")
+        self.calls += 1
+        ts = BASE_MS + 60_000 * (np.arange(limit) + self.calls)
+        close = 60000.0 + 10.0 * (np.arange(limit) + self.calls)
+        return CandleSeries.from_arrays(ts, close, close + 5, close - 5, close + 1, np.full(limit, 2.0), source="feed")
+
+    async def get_latest_price(self, symbol):
+        self.calls += 1
+        return 60000.0 + self.calls
+
+
+async def session(connector: MarketDataConnector) -> list:
+    """The same calls in the same order, recorded or replayed."""
+    results = []
+    for _ in range(3):
+        results.append(await connector.get_candle_series("BTC/USDT", "1m", 50))
+        results.append(await connector.get_latest_price("BTC/USDT"))
+    try:
+        await connector.get_candle_series("XYZ/USDT", "1m", 50)
+    except Exception as e:
+        results.append(type(e))
+    return results
+
+
+def assert_same_result(replayed, recorded):
+    if isinstance(recorded, CandleSeries):
+        for name in ("timestamp", "open", "high", "low", "close", "volume"):
+            np.testing.assert_array_equal(getattr(replayed, name), getattr(recorded, name))
+        assert replayed.source == recorded.source
+    else:
+        assert replayed == recorded
+
+
+def record(tmp_path) -> tuple:
+    path = recording_path(str(tmp_path), "binance")
+    recorder = RecordingConnector(EvolvingFeed(), path)
+
+    async def run():
+        try:
+            return await session(recorder)
+        finally:
+            await recorder.close()
+
+    return path, asyncio.run(run())
+
+
+def test_replay_at_max_speed_reproduces_the_recording(tmp_path):
+    path, recorded = record(tmp_path)
+    replay = ReplayConnector(path, speed=0)
+
+    async def run():
+        replayed = await session(replay)
+        # Fewer bars than recorded: the covering response, tailed
+        tail = await replay.get_candle_series("BTC/USDT", "1m", 20)
+        return replayed, tail
+
+    replayed, tail = asyncio.run(run())
+    assert recorded[-1] is RuntimeError and replayed[-1] is ConnectionError  # a recorded failure replays as one
+    for got, expected in zip(replayed[:-1], recorded[:-1]):
+        assert_same_result(got, expected)
+    # Past the end of its responses a key holds on the last one
+    np.testing.assert_array_equal(tail.close, recorded[4].close[-20:])
+    assert replay.stats()["misses"] == 0
+
+
+def test_replay_injects_latency_and_errors(tmp_path):
+    path, _ = record(tmp_path)
+
+    async def timed_call(connector):
+        started = time.perf_counter()
+        await connector.get_candle_series("BTC/USDT", "1m", 50)
+        return time.perf_counter() - started
+
+    slow = ReplayConnector(path, speed=0, latency="fixed:30")
+    assert asyncio.run(timed_call(slow)) >= 0.03
+
+    async def failures(connector, calls=200):
+        pattern = []
+        for _ in range(calls):
+            try:
+                series = await connector.get_candle_series("BTC/USDT", "1m", 50)
+                pattern.append(len(series) == 0)
+            except ConnectionError:
+                pattern.append(True)
+        return pattern
+
+    raised = ReplayConnector(path, speed=0, error_rate=0.25, seed=7)
+    pattern = asyncio.run(failures(raised))
+    assert raised.injected_errors == sum(pattern) and 30 <= sum(pattern) <= 70
+    # Seeded: the same calls fail again; error_mode="empty" returns no bars instead of raising
+    empty = ReplayConnector(path, speed=0, error_rate=0.25, error_mode="empty", seed=7)
+    assert asyncio.run(failures(empty)) == pattern
+
+
+def test_unknown_latency_spec_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        ReplayConnector(recording_path(str(tmp_path), "binance"), latency="gaussian:10")
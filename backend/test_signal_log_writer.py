@@ -0,0 +1,91 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from app.db.signal_log_repository import SignalLogRepository
+from app.services.signal_log_writer import SignalLogWriter
+
+
+class ListRepository:
+    def __init__(self):
+        self.rows = []
+        self.batches = []
+
+    def insert_many(self, rows):
+        self.rows.extend(rows)
+        self.batches.append(len(rows))
+        return len(rows)
+
+
+def test_stop_writes_rows_the_writer_was_still_batching():
+    async def run():
+        repository = ListRepository()
+        writer = SignalLogWriter(repository, flush_interval=10.0)
+        writer.start()
+        for i in range(5):
+            writer.record({"symbol": "NIFTY", "price": 100.0 + i})
+        await asyncio.sleep(0.05)  # the task has them in its batch, waiting out flush_interval
+        await writer.stop()
+        return repository, writer.stats()
+
+    repository, stats = asyncio.run(run())
+    assert [row["price"] for row in repository.rows] == [100.0, 101.0, 102.0, 103.0, 104.0]
+    assert stats["written"] == 5 and stats["dropped"] == 0 and stats["failed"] == 0
+
+
+def test_rows_beyond_a_full_queue_are_dropped_and_counted():
+    async def run():
+        repository = ListRepository()
+        writer = SignalLogWriter(repository, queue_size=3)
+        for i in range(5):  # nothing drains the queue yet
+            writer.record({"symbol": "NIFTY", "price": float(i)})
+        dropped = writer.stats()["dropped"]
+        writer.start()
+        await writer.stop()
+        return repository, dropped, writer.stats()
+
+    repository, dropped, stats = asyncio.run(run())
+    assert dropped == 2 and stats["dropped"] == 2
+    assert [row["price"] for row in repository.rows] == [0.0, 1.0, 2.0] and stats["written"] == 3
+
+
+def test_batches_flush_when_full_or_when_the_interval_ends():
+    async def run():
+        by_size, by_time = ListRepository(), ListRepository()
+        full = SignalLogWriter(by_size, batch_size=4, flush_interval=10.0)
+        timed = SignalLogWriter(by_time, batch_size=100, flush_interval=0.05)
+        full.start()
+        timed.start()
+        for i in range(10):
+            full.record({"symbol": "NIFTY", "price": float(i)})
+        for i in range(3):
+            timed.record({"symbol": "BITCOIN", "price": float(i)})
+        await asyncio.sleep(0.2)
+        seen = list(by_size.batches), list(by_time.batches)
+        for writer in (full, timed):
+            await writer.stop()
+        return seen, by_size.batches
+
+    (size_batches, time_batches), final = asyncio.run(run())
+    # Two full batches right away; the last two rows wait out flush_interval (here: until stop)
+    assert size_batches == [4, 4] and final == [4, 4, 2]
+    # Too few rows to fill a batch: written once flush_interval passes
+    assert time_batches == [3]
+
+
+def test_history_filters_by_symbol_and_time_range(tmp_path):
+    repository = SignalLogRepository(f"sqlite:///{tmp_path / 'signals.db'}")
+    start = datetime(2024, 10, 15, 4, 0)
+    repository.insert_many([
+        {"timestamp": start + timedelta(minutes=i), "symbol": symbol, "price": 100.0 + i, "action": "HOLD"}
+        for i in range(10) for symbol in ("NIFTY", "BITCOIN")
+    ])
+
+    history = repository.history("NIFTY", start + timedelta(minutes=3), start + timedelta(minutes=6))
+    assert [row["price"] for row in history] == [106.0, 105.0, 104.0, 103.0]  # newest first, bounds included
+    assert {row["symbol"] for row in history} == {"NIFTY"}
+    assert len(repository.history("BITCOIN")) == 10
+    assert [row["price"] for row in repository.history("BITCOIN", limit=2)] == [109.0, 108.0]
+    # Aware bounds are compared as UTC, like the stored timestamps
+    ist = timezone(timedelta(hours=5, minutes=30))
+    aware = repository.history("NIFTY", start=(start + timedelta(minutes=8)).replace(tzinfo=timezone.utc).astimezone(ist))
+    assert [row["price"] for row in aware] == [109.0, 108.0]
+    assert repository.history("FINNIFTY") == []
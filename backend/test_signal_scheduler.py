@@ -0,0 +1,202 @@
+import asyncio
+import numpy as np
+import pytest
+from app.core.config import settings
+from app.schemas.candle_series import CandleSeries
+from app.services.asset_context import AssetContext
+from app.services.candle_stream import CandleStreamHub
+from app.services.connectors.binance_stream_connector import BinanceStreamConnector
+from app.services.connector_interface import MarketDataConnector
+from app.services.shared_state import RedisStateStore, SharedState
+from app.services.signal_scheduler import SignalScheduler
+from app.services.symbol_registry import SymbolRegistry
+from app.services.websocket_manager import ConnectionManager
+from benchmarks.fakes import BinanceReplayServer
+
+BASE_MS = 1_700_000_000_000 // 900_000 * 900_000
+
+
+def make_bars(n: int) -> CandleSeries:
+    close = 100.0 + np.cumsum(np.random.default_rng(0).normal(0, 0.5, n))
+    return CandleSeries.from_arrays(BASE_MS + 900_000 * np.arange(n), close, close + 1, close - 1, close, np.ones(n))
+
+
+class FakeBinance(MarketDataConnector):
+    """Serves candles for the pairs it lists; anything else comes back empty, like Binance's 400."""
+
+    def __init__(self, listed):
+        self.listed = set(listed)
+
+    async def get_historical_candles(self, symbol, interval, limit):
+        return (await self.get_candle_series(symbol, interval, limit)).to_candles()
+
+    async def get_candle_series(self, symbol, interval, limit):
+        if symbol.replace("/", "") not in self.listed:
+            return CandleSeries()
+        return make_bars(limit)
+
+    async def get_latest_price(self, symbol):
+        return 100.0 if symbol.replace("/", "") in self.listed else 0.0
+
+    async def close(self):
+        pass
+
+
+def make_scheduler(listed=("BTCUSDT", "ETHUSDT", "SOLUSDT"), state=None):
+    context = AssetContext(registry=SymbolRegistry())
+    context.use_connector("binance", FakeBinance(listed))
+    return SignalScheduler(context=context, jitter=0, state=state or SharedState())
+
+
+def test_resolve_does_not_register_and_checks_exchange_info():
+    registry = SymbolRegistry()
+    instrument = registry.resolve("sol/usdt")
+    assert instrument.key == "SOLUSDT" and instrument.symbol == "SOL/USDT"
+    assert not registry.is_registered("SOLUSDT")
+
+    registry.set_binance_symbols(["BTCUSDT", "SOLUSDT"])
+    assert registry.resolve("SOLUSDT").key == "SOLUSDT"
+    with pytest.raises(ValueError):
+        registry.resolve("XYZUSDT")
+
+
+def test_pair_without_data_is_not_watched():
+    async def run():
+        scheduler = make_scheduler()
+        with pytest.raises(ValueError):
+            await scheduler.get_or_refresh("XYZUSDT")
+        snapshot = await scheduler.get_or_refresh("SOLUSDT")
+        return scheduler, snapshot, await scheduler.state.store.members(scheduler.WATCHLIST_KEY)
+
+    scheduler, snapshot, shared = asyncio.run(run())
+    assert snapshot["asset"] == "SOLUSDT"
+    assert "XYZUSDT" not in scheduler.context.assets
+    assert not scheduler.context.registry.is_registered("XYZUSDT")
+    assert "SOLUSDT" in scheduler.context.assets and shared == {"SOLUSDT"}
+
+
+def test_idle_and_failing_pairs_are_evicted(monkeypatch):
+    monkeypatch.setattr(settings, "SYMBOL_IDLE_SECONDS", 0.2)
+
+    async def run():
+        scheduler = make_scheduler()
+        await scheduler.get_or_refresh("SOLUSDT")
+        await scheduler._evict_stale()
+        kept = list(scheduler.context.assets)
+
+        await asyncio.sleep(0.3)  # nobody asks for it within the idle window
+        await scheduler._evict_stale()
+        idle = list(scheduler.context.assets)
+
+        await scheduler.get_or_refresh("SOLUSDT")
+        scheduler.context.use_connector("binance", FakeBinance(["BTCUSDT", "ETHUSDT"]))  # delisted
+        for _ in range(settings.SYMBOL_MAX_FAILURES):
+            await scheduler.refresh_assets(["SOLUSDT"])
+        await scheduler._evict_stale()
+        shared = await scheduler.state.store.members(scheduler.WATCHLIST_KEY)
+        return scheduler, kept, idle, shared
+
+    scheduler, kept, idle, shared = asyncio.run(run())
+    assert "SOLUSDT" in kept
+    assert "SOLUSDT" not in idle and not scheduler.context.registry.is_registered("SOLUSDT")
+    assert "SOLUSDT" not in scheduler.context.assets and shared == set()
+    # The configured watchlist is never dropped
+    assert set(settings.WATCHLIST) <= set(scheduler.context.assets)
+    assert scheduler.evicted == 2
+
+
+def test_evicted_pair_releases_its_streams(monkeypatch):
+    monkeypatch.setattr(settings, "SYMBOL_IDLE_SECONDS", 0.2)
+
+    async def wait_for(condition, attempts=100):
+        for _ in range(attempts):
+            if condition():
+                return
+            await asyncio.sleep(0.02)
+
+    async def run():
+        server = BinanceReplayServer([])
+        stream = BinanceStreamConnector(rest=FakeBinance(["BTCUSDT", "SOLUSDT"]), ws_url=await server.start())
+        scheduler = make_scheduler()
+        scheduler.context.use_connector("binance", stream)
+        try:
+            await scheduler.get_or_refresh("SOLUSDT")
+            await wait_for(lambda: any(s.startswith("solusdt@") for s in stream.stats()["subscribed"]))
+            before = stream.stats()
+            await asyncio.sleep(0.3)
+            await scheduler._evict_stale()
+            await wait_for(lambda: any(m.get("method") == "UNSUBSCRIBE" for m in server.control_messages))
+            return before, stream.stats(), server.control_messages
+        finally:
+            await stream.close()
+            await server.stop()
+
+    before, after, control = asyncio.run(run())
+    assert "solusdt@kline_15m" in before["streams"] and "SOLUSDT:15m" in before["windows"]
+    assert not [s for s in after["streams"] + after["subscribed"] if s.startswith("solusdt@")]
+    assert not [w for w in after["windows"] if w.startswith("SOLUSDT:")]
+    unsubscribed = [m for m in control if m.get("method") == "UNSUBSCRIBE"]
+    assert len(unsubscribed) == 1 and "solusdt@kline_15m" in unsubscribed[0]["params"]
+
+
+def test_candle_streams_go_through_admission():
+    async def run():
+        scheduler = make_scheduler()
+        hub = CandleStreamHub(scheduler.context, ConnectionManager(), admit=scheduler.admit)
+        client = object()
+        try:
+            with pytest.raises(ValueError):
+                await hub.subscribe(client, "XYZUSDT", "15m")
+            await hub.subscribe(client, "SOLUSDT", "15m")
+            return scheduler, await scheduler.state.store.members(scheduler.WATCHLIST_KEY)
+        finally:
+            await hub.close()
+
+    scheduler, shared = asyncio.run(run())
+    assert "XYZUSDT" not in scheduler.context.assets
+    assert "SOLUSDT" in scheduler.context.assets and shared == {"SOLUSDT"}
+
+
+def test_two_workers_share_one_refresh_through_redis(monkeypatch):
+    fakeredis = pytest.importorskip("fakeredis")
+    monkeypatch.setattr(settings, "WATCHLIST", ["BITCOIN", "ETH"])  # crypto only: no Yahoo calls
+
+    async def wait_for(condition, timeout=5.0):
+        deadline = asyncio.get_running_loop().time() + timeout
+        while not condition():
+            assert asyncio.get_running_loop().time() < deadline
+            await asyncio.sleep(0.02)
+
+    async def run():
+        server = fakeredis.FakeServer()
+        leader, follower = [
+            make_scheduler(state=SharedState(RedisStateStore(fakeredis.aioredis.FakeRedis(server=server))))
+            for _ in range(2)
+        ]
+        pushed = []
+
+        async def listener(snapshots):
+            pushed.extend(snapshots)
+
+        follower.add_listener(listener)
+        try:
+            await leader.start()
+            await wait_for(lambda: leader.get_snapshot("BITCOIN") is not None)
+            await follower.start()
+            await wait_for(lambda: follower.stats["3s"]["role"] is not None)
+            # Asked for on the follower: the leader picks it up from the shared watchlist
+            await follower.state.store.add_member(follower.WATCHLIST_KEY, "SOLUSDT")
+            await wait_for(lambda: follower.get_snapshot("SOLUSDT") is not None)
+            return leader, follower, pushed
+        finally:
+            for scheduler in (leader, follower):
+                await scheduler.stop()
+                await scheduler.state.close()
+
+    leader, follower, pushed = asyncio.run(run())
+    assert leader.stats["3s"]["role"] == "leader" and follower.stats["3s"]["role"] == "follower"
+    assert leader.stats["3s"]["refreshes"] >= 1 and follower.stats["3s"]["refreshes"] == 0
+    assert "SOLUSDT" in leader.context.assets
+    snapshot = follower.get_snapshot("SOLUSDT")
+    assert snapshot["_shared"] and snapshot["decision"] == leader.get_snapshot("SOLUSDT")["decision"]
+    assert {"BITCOIN", "ETH", "SOLUSDT"} <= {s["asset"] for s in pushed}
@@ -0,0 +1,89 @@
+import asyncio
+from app.services.websocket_manager import DISCONNECT, DROP_OLDEST, ConnectionManager
+
+
+class FakeSocket:
+    """Records what it is sent; a stalled one blocks in send_text until released."""
+
+    def __init__(self, stalled: bool = False):
+        self.received = []
+        self.closed = None
+        self.gate = asyncio.Event()
+        if not stalled:
+            self.gate.set()
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, message: str):
+        await self.gate.wait()
+        self.received.append(message)
+
+    async def close(self, code: int = 1000, reason: str = ""):
+        self.closed = (code, reason)
+
+
+async def broadcast_all(manager: ConnectionManager, count: int):
+    for i in range(count):
+        await manager.broadcast(str(i))
+        await asyncio.sleep(0.001)  # let the sender tasks run between messages
+
+
+def test_drop_oldest_keeps_the_newest_messages_for_a_stalled_client():
+    async def run():
+        manager = ConnectionManager(queue_size=4, policy=DROP_OLDEST)
+        fast, stalled = FakeSocket(), FakeSocket(stalled=True)
+        await manager.connect(fast)
+        slow = await manager.connect(stalled)
+        await broadcast_all(manager, 10)
+        during = list(fast.received), manager.stats()
+        stalled.gate.set()
+        await asyncio.sleep(0.01)
+        await manager.close()
+        return fast, stalled, slow, during
+
+    fast, stalled, slow, (fast_during, stats) = asyncio.run(run())
+    # The fast client got everything while the other was stuck
+    assert fast_during == [str(i) for i in range(10)]
+    # "0" was already in flight; of the rest only the newest queue_size survived
+    assert stalled.received == ["0", "6", "7", "8", "9"]
+    assert slow.dropped == 5 and stats["dropped"] == 5
+    assert stats["clients"] == 2 and stats["slow_disconnects"] == 0
+
+
+def test_disconnect_policy_closes_only_the_slow_client():
+    async def run():
+        manager = ConnectionManager(queue_size=2, policy=DISCONNECT)
+        fast, stalled = FakeSocket(), FakeSocket(stalled=True)
+        await manager.connect(fast)
+        await manager.connect(stalled)
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        await broadcast_all(manager, 6)
+        elapsed = loop.time() - started
+        await asyncio.sleep(0.01)
+        stats = manager.stats()
+        await manager.close()
+        return fast, stalled, stats, elapsed
+
+    fast, stalled, stats, elapsed = asyncio.run(run())
+    assert fast.received == [str(i) for i in range(6)] and elapsed < 0.5
+    assert stalled.received == [] and stalled.closed == (1013, "Client too slow")
+    assert stats["slow_disconnects"] == 1 and stats["clients"] == 1
+
+
+def test_a_send_that_times_out_drops_the_client():
+    async def run():
+        manager = ConnectionManager(queue_size=8, send_timeout=0.05)
+        fast, stalled = FakeSocket(), FakeSocket(stalled=True)
+        await manager.connect(fast)
+        await manager.connect(stalled)
+        await manager.broadcast("hello")
+        await asyncio.sleep(0.2)
+        active = manager.active_connections
+        await manager.close()
+        return fast, stalled, active
+
+    fast, stalled, active = asyncio.run(run())
+    assert active == [fast] and fast.received == ["hello"]
+    assert stalled.closed == (1011, "Send failed")